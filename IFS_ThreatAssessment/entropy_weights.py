@@ -0,0 +1,187 @@
+"""
+熵权法客观权重模块
+
+六个指标的主观权重（IFSThreatEvaluator.default_weights）是人工给定的。熵权法按
+当前一帧所有候选目标的指标取值确定客观权重：某指标在各目标上的IFS越模糊
+（熵越大），区分目标的作用越小，权重越低；越明确（熵越小）权重越高。
+
+单个IFS的熵采用 Szmidt & Kacprzyk 的定义：
+    E(A) = (min(μ, ν) + π) / (max(μ, ν) + π)
+第j个指标的熵 E_j 为该列在所有目标上的平均值，客观权重
+    w_j = (1 - E_j) / Σ_k (1 - E_k)
+最后与主观权重按比例混合。
+
+EntropyWeighting 按目标ID保存每个目标的熵，维护各列熵的累计和：目标出现、
+离开或指标变化时只调整对应目标的贡献，每帧额外开销为O(N)。
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .ifs_core import IFSArray
+from .threat_evaluator import INDICATOR_NAMES
+
+# 客观（熵）权重在混合权重中的默认占比
+DEFAULT_ENTROPY_BLEND = 0.5
+
+# 累计和每隔多少次更新按各目标的熵重新求和一次，消除增减带来的浮点累积误差
+ENTROPY_RESYNC_INTERVAL = 1000
+
+
+def ifs_entropy(mu, nu) -> np.ndarray:
+    """
+    IFS熵（逐元素，向量化）
+    
+    Args:
+        mu: 隶属度数组
+        nu: 非隶属度数组
+    
+    Returns:
+        熵数组，取值[0, 1]：μ、ν之一为1时为0，μ = ν 时为1
+    """
+    mu = np.asarray(mu, dtype=float)
+    nu = np.asarray(nu, dtype=float)
+    pi = 1.0 - mu - nu
+    return (np.minimum(mu, nu) + pi) / (np.maximum(mu, nu) + pi)
+
+
+def blend_weights(subjective: Dict[str, float], column_entropy: np.ndarray,
+                  blend: float = DEFAULT_ENTROPY_BLEND) -> Dict[str, float]:
+    """
+    由各指标的平均熵计算客观权重，并与主观权重混合
+    
+    Args:
+        subjective: 主观权重字典（只有其中的指标参与计算）
+        column_entropy: 按 INDICATOR_NAMES 顺序的各指标平均熵
+        blend: 客观权重的占比（0为纯主观，1为纯客观）
+    
+    Returns:
+        归一化的混合权重字典；各指标的熵都为1（没有区分信息）时返回归一化的主观权重
+    """
+    names = [name for name in INDICATOR_NAMES if name in subjective]
+    total = sum(subjective[name] for name in names)
+    if total == 0:
+        raise ValueError("权重和不能为0")
+    weights = {name: subjective[name] / total for name in names}
+    
+    information = {name: 1.0 - float(column_entropy[INDICATOR_NAMES.index(name)]) for name in names}
+    information_sum = sum(information.values())
+    if information_sum <= 0 or blend == 0:
+        return weights
+    return {name: (1.0 - blend) * weights[name] + blend * information[name] / information_sum
+            for name in names}
+
+
+def entropy_weights(indicators: IFSArray, subjective: Dict[str, float],
+                    blend: float = DEFAULT_ENTROPY_BLEND) -> Dict[str, float]:
+    """
+    一次性计算一帧的混合权重（不保存状态）
+    
+    Args:
+        indicators: N×6 指标IFSArray（见 IFSThreatEvaluator.indicator_matrix）
+        subjective: 主观权重字典
+        blend: 客观权重的占比
+    
+    Returns:
+        混合权重字典，可传给 IFSThreatEvaluator.aggregate_batch
+    """
+    if len(indicators) == 0:
+        return blend_weights(subjective, np.ones(len(INDICATOR_NAMES)), blend)
+    return blend_weights(subjective, ifs_entropy(indicators.mu, indicators.nu).mean(axis=0), blend)
+
+
+class EntropyWeighting:
+    """
+    随目标集合增量更新的熵权
+    
+    每个目标保存一行（6个指标的）熵，column_sum 为当前所有目标的逐列和。
+    update 只处理指标有变化的目标，retain 移除离开的目标，两者都按目标数线性。
+    """
+    
+    def __init__(self, subjective: Dict[str, float], blend: float = DEFAULT_ENTROPY_BLEND):
+        """
+        初始化熵权状态
+        
+        Args:
+            subjective: 主观权重字典
+            blend: 客观权重的占比（0为纯主观，1为纯客观）
+        """
+        if not 0.0 <= blend <= 1.0:
+            raise ValueError(f"客观权重占比应在[0, 1]内: {blend}")
+        self.subjective = subjective
+        self.blend = blend
+        self.rows = {}
+        self.column_sum = np.zeros(len(INDICATOR_NAMES))
+        self._updates = 0
+    
+    def update(self, enemy_ids: List, mu: np.ndarray, nu: np.ndarray):
+        """
+        更新一批目标（新出现或指标有变化）的熵
+        
+        Args:
+            enemy_ids: 目标ID列表
+            mu, nu: len(enemy_ids)×6 的指标隶属度/非隶属度矩阵
+        """
+        if not enemy_ids:
+            return
+        entropy = ifs_entropy(mu, nu)
+        zeros = np.zeros(len(INDICATOR_NAMES))
+        previous = np.array([self.rows.get(enemy_id, zeros) for enemy_id in enemy_ids])
+        self.column_sum += entropy.sum(axis=0) - previous.sum(axis=0)
+        self.rows.update(zip(enemy_ids, entropy))
+        self._count_update()
+    
+    def retain(self, enemy_ids: Iterable):
+        """
+        只保留给定的目标，其余（已离开的）目标移出
+        
+        Args:
+            enemy_ids: 当前帧的目标ID
+        """
+        keep = set(enemy_ids)
+        departed = [enemy_id for enemy_id in self.rows if enemy_id not in keep]
+        if not departed:
+            return
+        self.column_sum -= np.sum([self.rows.pop(enemy_id) for enemy_id in departed], axis=0)
+        self._count_update()
+    
+    def remove(self, enemy_id=None):
+        """
+        移出单个目标（None表示清空）
+        
+        Args:
+            enemy_id: 目标ID
+        """
+        if enemy_id is None:
+            self.rows = {}
+            self.column_sum = np.zeros(len(INDICATOR_NAMES))
+        elif enemy_id in self.rows:
+            self.column_sum -= self.rows.pop(enemy_id)
+            self._count_update()
+    
+    def _count_update(self):
+        """定期按各目标的熵重新求和"""
+        self._updates += 1
+        if not self.rows:
+            self.column_sum = np.zeros(len(INDICATOR_NAMES))
+        elif self._updates % ENTROPY_RESYNC_INTERVAL == 0:
+            self.column_sum = np.sum(list(self.rows.values()), axis=0)
+    
+    def column_entropy(self) -> Optional[np.ndarray]:
+        """各指标在当前目标上的平均熵（没有目标时为None）"""
+        if not self.rows:
+            return None
+        return self.column_sum / len(self.rows)
+    
+    def weights(self) -> Dict[str, float]:
+        """
+        当前目标集合下的混合权重
+        
+        Returns:
+            归一化的混合权重字典（没有目标时为归一化的主观权重）
+        """
+        column_entropy = self.column_entropy()
+        if column_entropy is None:
+            column_entropy = np.ones(len(INDICATOR_NAMES))
+        return blend_weights(self.subjective, column_entropy, self.blend)
@@ -7,7 +7,7 @@
 自动化学报, 2021, 47(1): 161-172
 
 实现内容：
-1. IFS基本定义和数据结构
+1. IFS基本定义和数据结构（含批量运算用的IFSArray）
 2. 多种数据类型到IFS的转换方法
 3. IFS运算（距离度量、得分函数、比较法则）
 """
@@ -18,7 +18,7 @@ from dataclasses import dataclass
 import math
 
 
-@dataclass
+@dataclass(slots=True)
 class IFS:
     """
     直觉模糊数（Intuitionistic Fuzzy Number）
@@ -79,6 +79,326 @@ class IFS:
         return self.__str__()
 
 
+class FrozenIFS(IFS):
+    """
+    不可变IFS常量
+    
+    用于类型映射、语言术语等查表结果：在模块加载时构造一次，之后直接复用，
+    因此禁止修改属性。与数值相同的IFS比较相等。
+    """
+    __slots__ = ()
+    
+    def __init__(self, mu: float, nu: float):
+        ifs = IFS(mu, nu)
+        object.__setattr__(self, 'mu', ifs.mu)
+        object.__setattr__(self, 'nu', ifs.nu)
+        object.__setattr__(self, 'pi', ifs.pi)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"FrozenIFS为不可变常量，不能修改属性: {name}")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"FrozenIFS为不可变常量，不能删除属性: {name}")
+    
+    def __eq__(self, other):
+        if isinstance(other, IFS):
+            return (self.mu, self.nu, self.pi) == (other.mu, other.nu, other.pi)
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash((self.mu, self.nu, self.pi))
+    
+    def __reduce__(self):
+        return (FrozenIFS, (self.mu, self.nu))
+
+
+# 论文表3：模糊评价语言的IFS表示
+LINGUISTIC_TERMS = {
+    # 中文术语
+    '极高': FrozenIFS(0.95, 0.02),
+    '很高': FrozenIFS(0.85, 0.10),
+    '高': FrozenIFS(0.75, 0.15),
+    '较高': FrozenIFS(0.65, 0.25),
+    '中': FrozenIFS(0.50, 0.40),
+    '较低': FrozenIFS(0.35, 0.55),
+    '低': FrozenIFS(0.25, 0.65),
+    '很低': FrozenIFS(0.15, 0.75),
+    '极低': FrozenIFS(0.05, 0.90),
+    
+    # 英文术语
+    'very_high': FrozenIFS(0.90, 0.05),
+    'high': FrozenIFS(0.75, 0.15),
+    'medium_high': FrozenIFS(0.65, 0.25),
+    'medium': FrozenIFS(0.50, 0.40),
+    'medium_low': FrozenIFS(0.35, 0.55),
+    'low': FrozenIFS(0.25, 0.65),
+    'very_low': FrozenIFS(0.10, 0.80),
+    
+    # 威胁等级
+    'critical': FrozenIFS(0.95, 0.02),
+    'high_threat': FrozenIFS(0.80, 0.12),
+    'moderate': FrozenIFS(0.55, 0.35),
+    'low_threat': FrozenIFS(0.30, 0.60),
+    'minimal': FrozenIFS(0.10, 0.85),
+}
+
+# 未知语言术语的默认值（中等威胁）
+DEFAULT_LINGUISTIC_IFS = FrozenIFS(0.50, 0.40)
+
+# 聚合算子：加权算术平均（论文公式7-9）、加权几何平均、有序加权平均、混合平均
+AGGREGATION_IFWA = 'ifwa'
+AGGREGATION_IFWG = 'ifwg'
+AGGREGATION_IFOWA = 'ifowa'
+AGGREGATION_IFHA = 'ifha'
+AGGREGATION_OPERATORS = (AGGREGATION_IFWA, AGGREGATION_IFWG, AGGREGATION_IFOWA, AGGREGATION_IFHA)
+
+
+def normalize_ifs_arrays(mu: np.ndarray, nu: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对隶属度/非隶属度数组施加与 IFS.__post_init__ 相同的约束（向量化）
+    
+    先截断到[0, 1]，μ + ν > 1 的元素再按和归一化。
+    
+    Args:
+        mu: 隶属度数组
+        nu: 非隶属度数组
+    
+    Returns:
+        (mu, nu) 满足约束的新数组，犹豫度为 1 - mu - nu
+    """
+    mu = np.clip(mu, 0.0, 1.0)
+    nu = np.clip(nu, 0.0, 1.0)
+    total = mu + nu
+    over = total > 1.0
+    if np.any(over):
+        scale = np.where(over, total, 1.0)
+        mu = mu / scale
+        nu = nu / scale
+    return mu, nu
+
+
+class IFSArray:
+    """
+    直觉模糊数数组（结构数组形式）
+    
+    用三个等形状的NumPy数组保存一组IFS的 (μ, ν, π)，约束条件与 IFS 相同，
+    提供 IFSOperations 中各运算的向量化版本，批量评估时不必逐个构造IFS对象。
+    """
+    
+    def __init__(self, mu, nu):
+        """
+        Args:
+            mu: 隶属度数组（或标量）
+            nu: 非隶属度数组（或标量），与mu可广播
+        """
+        mu, nu = np.broadcast_arrays(np.asarray(mu, dtype=float), np.asarray(nu, dtype=float))
+        self.mu, self.nu = normalize_ifs_arrays(mu, nu)
+        self.pi = 1.0 - self.mu - self.nu
+    
+    @classmethod
+    def from_list(cls, ifs_list: List[IFS]) -> 'IFSArray':
+        """IFS对象列表 → IFSArray"""
+        return cls([ifs.mu for ifs in ifs_list], [ifs.nu for ifs in ifs_list])
+    
+    def to_list(self) -> List[IFS]:
+        """IFSArray → IFS对象列表（按展平顺序）"""
+        return [IFS(mu, nu) for mu, nu in zip(self.mu.ravel().tolist(), self.nu.ravel().tolist())]
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.mu.shape
+    
+    def __len__(self) -> int:
+        return len(self.mu)
+    
+    def __getitem__(self, index) -> Union[IFS, 'IFSArray']:
+        """整数下标返回IFS对象，切片/掩码/下标数组返回IFSArray"""
+        mu = self.mu[index]
+        if np.ndim(mu) == 0:
+            return IFS(float(mu), float(self.nu[index]))
+        return IFSArray(mu, self.nu[index])
+    
+    def __repr__(self) -> str:
+        return f"IFSArray(shape={self.shape})"
+    
+    def score(self) -> np.ndarray:
+        """得分函数 S(A) = μ - ν"""
+        return self.mu - self.nu
+    
+    def accuracy(self) -> np.ndarray:
+        """精确函数 H(A) = μ + ν"""
+        return self.mu + self.nu
+    
+    def hamming_distance(self, other: 'IFSArray') -> np.ndarray:
+        """逐元素Hamming距离（可广播），见 IFSOperations.hamming_distance"""
+        return (np.abs(self.mu - other.mu) +
+                np.abs(self.nu - other.nu) +
+                np.abs(self.pi - other.pi)) / 2.0
+    
+    def euclidean_distance(self, other: 'IFSArray') -> np.ndarray:
+        """逐元素Euclidean距离（可广播），见 IFSOperations.euclidean_distance"""
+        squared_diff = ((self.mu - other.mu) ** 2 +
+                        (self.nu - other.nu) ** 2 +
+                        (self.pi - other.pi) ** 2)
+        return np.sqrt(squared_diff / 2.0)
+    
+    def pairwise_distances(self, other: 'IFSArray' = None, metric: str = 'hamming') -> np.ndarray:
+        """
+        两两距离矩阵
+        
+        Args:
+            other: 另一组一维IFSArray（默认与自身计算）
+            metric: 'hamming' 或 'euclidean'
+        
+        Returns:
+            len(self) × len(other) 距离矩阵
+        """
+        other = self if other is None else other
+        d_mu = self.mu[:, None] - other.mu[None, :]
+        d_nu = self.nu[:, None] - other.nu[None, :]
+        d_pi = self.pi[:, None] - other.pi[None, :]
+        
+        if metric == 'hamming':
+            return (np.abs(d_mu) + np.abs(d_nu) + np.abs(d_pi)) / 2.0
+        if metric == 'euclidean':
+            return np.sqrt((d_mu ** 2 + d_nu ** 2 + d_pi ** 2) / 2.0)
+        raise ValueError(f"不支持的距离度量: {metric}")
+    
+    def compare(self, other: 'IFSArray', epsilon: float = 1e-6) -> np.ndarray:
+        """
+        逐元素比较（论文比较法则，见 IFSOperations.compare）
+        
+        Returns:
+            int8数组：1 表示self更大，0 表示相等，-1 表示other更大
+        """
+        score_diff = self.score() - other.score()
+        accuracy_diff = self.accuracy() - other.accuracy()
+        by_accuracy = np.where(np.abs(accuracy_diff) > epsilon, np.sign(accuracy_diff), 0)
+        return np.where(np.abs(score_diff) > epsilon, np.sign(score_diff), by_accuracy).astype(np.int8)
+    
+    def argsort(self, descending: bool = True) -> np.ndarray:
+        """
+        按得分函数、再按精确函数的字典序排序（稳定排序，相同元素保持原顺序）
+        
+        Args:
+            descending: 是否降序（默认降序，即威胁度从高到低）
+        
+        Returns:
+            一维下标数组
+        """
+        score = self.score().ravel()
+        accuracy = self.accuracy().ravel()
+        if descending:
+            return np.lexsort((-accuracy, -score))
+        return np.lexsort((accuracy, score))
+    
+    def weighted_average(self, weights, axis: int = -1) -> 'IFSArray':
+        """
+        沿指定轴的IFS加权算术平均（IFWA），见 IFSOperations.weighted_average
+        
+        例如 N×6 的指标矩阵沿最后一轴聚合得到N个综合IFS。
+        
+        Args:
+            weights: 权重数组，长度等于该轴长度（自动归一化）
+            axis: 聚合轴
+        
+        Returns:
+            聚合后的IFSArray
+        """
+        weights = self._axis_weights(weights, axis)
+        mu = np.moveaxis(self.mu, axis, -1) @ weights
+        nu = np.moveaxis(self.nu, axis, -1) @ weights
+        return IFSArray(mu, nu)
+    
+    def weighted_average_profiles(self, weight_matrix, axis: int = -1) -> 'IFSArray':
+        """
+        用K组权重同时做IFWA（一次矩阵乘法）
+        
+        例如 N×6 的指标矩阵与 K×6 的权重矩阵得到 N×K 的综合IFS，
+        第k列与 weighted_average(weight_matrix[k]) 相同。
+        
+        Args:
+            weight_matrix: K×M 权重矩阵，M等于该轴长度（每行自动归一化）
+            axis: 聚合轴
+        
+        Returns:
+            聚合轴替换为K个权重组（放在最后一轴）的IFSArray
+        """
+        weight_matrix = np.asarray(weight_matrix, dtype=float)
+        if weight_matrix.ndim != 2 or weight_matrix.shape[1] != self.mu.shape[axis]:
+            raise ValueError("IFS列表和权重列表长度必须相等")
+        weight_sum = weight_matrix.sum(axis=1)
+        if np.any(weight_sum == 0):
+            raise ValueError("权重和不能为0")
+        weight_matrix = weight_matrix / weight_sum[:, None]
+        
+        mu = np.moveaxis(self.mu, axis, -1) @ weight_matrix.T
+        nu = np.moveaxis(self.nu, axis, -1) @ weight_matrix.T
+        return IFSArray(mu, nu)
+    
+    def _axis_weights(self, weights, axis: int) -> np.ndarray:
+        """检查长度并归一化沿axis聚合的权重"""
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != (self.mu.shape[axis],):
+            raise ValueError("IFS列表和权重列表长度必须相等")
+        weight_sum = weights.sum()
+        if weight_sum == 0:
+            raise ValueError("权重和不能为0")
+        return weights / weight_sum
+    
+    def weighted_geometric(self, weights, axis: int = -1) -> 'IFSArray':
+        """沿指定轴的IFS加权几何平均（IFWG），见 IFSOperations.weighted_geometric"""
+        weights = self._axis_weights(weights, axis)
+        mu = np.prod(np.moveaxis(self.mu, axis, -1) ** weights, axis=-1)
+        nu = 1.0 - np.prod((1.0 - np.moveaxis(self.nu, axis, -1)) ** weights, axis=-1)
+        return IFSArray(mu, nu)
+    
+    def ordered_weighted_average(self, position_weights, axis: int = -1) -> 'IFSArray':
+        """
+        沿指定轴的IFS有序加权平均（IFOWA），见 IFSOperations.ordered_weighted_average
+        
+        每行按得分、再按精确函数从大到小稳定排序（np.lexsort），不逐行循环。
+        """
+        weights = self._axis_weights(position_weights, axis)
+        mu = np.moveaxis(self.mu, axis, -1)
+        nu = np.moveaxis(self.nu, axis, -1)
+        order = np.lexsort((-(mu + nu), -(mu - nu)), axis=-1)
+        mu = np.take_along_axis(mu, order, axis=-1)
+        nu = np.take_along_axis(nu, order, axis=-1)
+        return IFSArray(1.0 - np.prod((1.0 - mu) ** weights, axis=-1), np.prod(nu ** weights, axis=-1))
+    
+    def hybrid_average(self, weights, position_weights, axis: int = -1) -> 'IFSArray':
+        """沿指定轴的IFS混合平均（IFHA），见 IFSOperations.hybrid_average"""
+        scale = self._axis_weights(weights, axis) * self.mu.shape[axis]
+        mu = np.moveaxis(self.mu, axis, -1)
+        nu = np.moveaxis(self.nu, axis, -1)
+        return IFSArray(1.0 - (1.0 - mu) ** scale, nu ** scale).ordered_weighted_average(position_weights)
+    
+    def aggregate(self, operator: str, weights=None, position_weights=None, axis: int = -1) -> 'IFSArray':
+        """按名称选择聚合算子（见 IFSOperations.aggregate），沿指定轴一次聚合整批数据"""
+        if operator == AGGREGATION_IFWA:
+            return self.weighted_average(weights, axis)
+        if operator == AGGREGATION_IFWG:
+            return self.weighted_geometric(weights, axis)
+        if operator == AGGREGATION_IFOWA:
+            return self.ordered_weighted_average(position_weights, axis)
+        if operator == AGGREGATION_IFHA:
+            return self.hybrid_average(weights, position_weights, axis)
+        raise ValueError(f"不支持的聚合算子: {operator}")
+    
+    def complement(self) -> 'IFSArray':
+        """逐元素补集 A^c = (ν, μ, π)"""
+        return IFSArray(self.nu, self.mu)
+    
+    def union(self, other: 'IFSArray') -> 'IFSArray':
+        """逐元素并集 (max(μ_A, μ_B), min(ν_A, ν_B))"""
+        return IFSArray(np.maximum(self.mu, other.mu), np.minimum(self.nu, other.nu))
+    
+    def intersection(self, other: 'IFSArray') -> 'IFSArray':
+        """逐元素交集 (min(μ_A, μ_B), max(ν_A, ν_B))"""
+        return IFSArray(np.minimum(self.mu, other.mu), np.maximum(self.nu, other.nu))
+
+
 class IFSConverter:
     """IFS转换器：将不同类型的数据转换为直觉模糊数"""
     
@@ -119,6 +439,26 @@ class IFSConverter:
         
         return IFS(mu=mu, nu=nu)
     
+    @staticmethod
+    def from_real_numbers(values: np.ndarray, ideal, tolerance, min_val, max_val) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        实数数组 → IFS（from_real_number 的向量化版本，min_val/max_val 必须给出）
+        
+        Args:
+            values: 实际值数组
+            ideal, tolerance, min_val, max_val: 标量或与values等长的数组
+        
+        Returns:
+            (mu, nu) 数组，与逐个调用 from_real_number 的结果一致
+        """
+        mu = np.exp(-((values - ideal) ** 2) / (2 * tolerance ** 2))
+        range_span = np.asarray(max_val - min_val, dtype=float)
+        deviation = np.abs(values - ideal)
+        safe_span = np.where(range_span > 0, range_span, 1.0)
+        nu = np.where(range_span > 0, np.minimum(0.9, deviation / safe_span), 0.1)
+        nu = np.where(mu + nu > 1.0, 1.0 - mu - 0.05, nu)
+        return normalize_ifs_arrays(mu, nu)
+    
     @staticmethod
     def from_interval(lower: float, upper: float, ideal: float, 
                      reference_range: Tuple[float, float]) -> IFS:
@@ -219,44 +559,9 @@ class IFSConverter:
             term: 语言术语（如"极高"、"高"、"中"等）
         
         Returns:
-            IFS对象
+            IFS对象（LINGUISTIC_TERMS中共享的不可变常量）
         """
-        # 论文表3：模糊评价语言的IFS表示
-        linguistic_mapping = {
-            # 中文术语
-            '极高': IFS(0.95, 0.02),
-            '很高': IFS(0.85, 0.10),
-            '高': IFS(0.75, 0.15),
-            '较高': IFS(0.65, 0.25),
-            '中': IFS(0.50, 0.40),
-            '较低': IFS(0.35, 0.55),
-            '低': IFS(0.25, 0.65),
-            '很低': IFS(0.15, 0.75),
-            '极低': IFS(0.05, 0.90),
-            
-            # 英文术语
-            'very_high': IFS(0.90, 0.05),
-            'high': IFS(0.75, 0.15),
-            'medium_high': IFS(0.65, 0.25),
-            'medium': IFS(0.50, 0.40),
-            'medium_low': IFS(0.35, 0.55),
-            'low': IFS(0.25, 0.65),
-            'very_low': IFS(0.10, 0.80),
-            
-            # 威胁等级
-            'critical': IFS(0.95, 0.02),
-            'high_threat': IFS(0.80, 0.12),
-            'moderate': IFS(0.55, 0.35),
-            'low_threat': IFS(0.30, 0.60),
-            'minimal': IFS(0.10, 0.85),
-        }
-        
-        term_lower = term.lower().strip()
-        if term_lower in linguistic_mapping:
-            return linguistic_mapping[term_lower]
-        
-        # 默认返回中等威胁
-        return IFS(0.50, 0.40)
+        return LINGUISTIC_TERMS.get(term.lower().strip(), DEFAULT_LINGUISTIC_IFS)
 
 
 class IFSOperations:
@@ -353,6 +658,112 @@ class IFSOperations:
         
         return IFS(mu=mu_weighted, nu=nu_weighted)
     
+    @staticmethod
+    def _normalized_weights(weights: List[float], count: int) -> List[float]:
+        """检查长度并归一化权重（与 weighted_average 相同的规则）"""
+        if len(weights) != count:
+            raise ValueError("IFS列表和权重列表长度必须相等")
+        weight_sum = sum(weights)
+        if weight_sum == 0:
+            raise ValueError("权重和不能为0")
+        return [w / weight_sum for w in weights]
+    
+    @staticmethod
+    def weighted_geometric(ifs_list: List[IFS], weights: List[float]) -> IFS:
+        """
+        IFS加权几何平均算子（IFWG，Xu & Yager 2006）
+        
+        IFWG(A₁, ..., Aₙ) = (Π μ_i^w_i, 1 - Π (1 - ν_i)^w_i)
+        
+        任一指标隶属度很低时综合隶属度随之很低，比IFWA更强调短板。
+        
+        Args:
+            ifs_list: IFS列表
+            weights: 权重列表（自动归一化）
+        
+        Returns:
+            聚合后的IFS
+        """
+        weights = IFSOperations._normalized_weights(weights, len(ifs_list))
+        mu = 1.0
+        nu_complement = 1.0
+        for w, ifs in zip(weights, ifs_list):
+            mu *= ifs.mu ** w
+            nu_complement *= (1.0 - ifs.nu) ** w
+        return IFS(mu=mu, nu=1.0 - nu_complement)
+    
+    @staticmethod
+    def ordered_weighted_average(ifs_list: List[IFS], position_weights: List[float]) -> IFS:
+        """
+        IFS有序加权平均算子（IFOWA，Xu 2007）
+        
+        先按比较法则从大到小排序（得分函数，同分按精确函数，再相同保持原顺序），
+        第j大的IFS使用第j个位置权重ω_j：
+        IFOWA(A₁, ..., Aₙ) = (1 - Π (1 - μ_σ(j))^ω_j, Π ν_σ(j)^ω_j)
+        
+        Args:
+            ifs_list: IFS列表
+            position_weights: 位置权重列表（自动归一化），与具体指标无关
+        
+        Returns:
+            聚合后的IFS
+        """
+        weights = IFSOperations._normalized_weights(position_weights, len(ifs_list))
+        ordered = sorted(ifs_list, key=lambda ifs: (-ifs.score(), -ifs.accuracy()))
+        mu_complement = 1.0
+        nu = 1.0
+        for w, ifs in zip(weights, ordered):
+            mu_complement *= (1.0 - ifs.mu) ** w
+            nu *= ifs.nu ** w
+        return IFS(mu=1.0 - mu_complement, nu=nu)
+    
+    @staticmethod
+    def hybrid_average(ifs_list: List[IFS], weights: List[float], position_weights: List[float]) -> IFS:
+        """
+        IFS混合平均算子（IFHA，Xu 2007）
+        
+        先用指标权重放大各IFS：Ȧ_i = n·w_i·A_i，其中 λA = (1 - (1 - μ)^λ, ν^λ)；
+        再对Ȧ按位置权重做IFOWA。同时体现指标自身的重要性和其取值所在的位置。
+        
+        Args:
+            ifs_list: IFS列表
+            weights: 指标权重列表（自动归一化）
+            position_weights: 位置权重列表（自动归一化）
+        
+        Returns:
+            聚合后的IFS
+        """
+        count = len(ifs_list)
+        weights = IFSOperations._normalized_weights(weights, count)
+        scaled = [IFS(mu=1.0 - (1.0 - ifs.mu) ** (count * w), nu=ifs.nu ** (count * w))
+                  for w, ifs in zip(weights, ifs_list)]
+        return IFSOperations.ordered_weighted_average(scaled, position_weights)
+    
+    @staticmethod
+    def aggregate(operator: str, ifs_list: List[IFS], weights: List[float] = None,
+                  position_weights: List[float] = None) -> IFS:
+        """
+        按名称选择聚合算子（见 AGGREGATION_OPERATORS）
+        
+        Args:
+            operator: 'ifwa'、'ifwg'、'ifowa' 或 'ifha'
+            ifs_list: IFS列表
+            weights: 指标权重（IFWA、IFWG、IFHA使用）
+            position_weights: 位置权重（IFOWA、IFHA使用）
+        
+        Returns:
+            聚合后的IFS
+        """
+        if operator == AGGREGATION_IFWA:
+            return IFSOperations.weighted_average(ifs_list, weights)
+        if operator == AGGREGATION_IFWG:
+            return IFSOperations.weighted_geometric(ifs_list, weights)
+        if operator == AGGREGATION_IFOWA:
+            return IFSOperations.ordered_weighted_average(ifs_list, position_weights)
+        if operator == AGGREGATION_IFHA:
+            return IFSOperations.hybrid_average(ifs_list, weights, position_weights)
+        raise ValueError(f"不支持的聚合算子: {operator}")
+    
     @staticmethod
     def complement(ifs: IFS) -> IFS:
         """
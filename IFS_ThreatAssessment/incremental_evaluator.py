@@ -0,0 +1,286 @@
+"""
+增量威胁评估模块
+
+相邻两轮Unity数据之间，大多数敌人类型不变、很多敌人静止、玩家也几乎不动，
+逐轮重新计算全部六个指标（尤其是通视射线检测和环境密度统计）是重复劳动。
+
+IncrementalThreatEvaluator 按目标ID保存上一次计算每个指标时的输入和结果，
+每个指标声明自己依赖的输入（INDICATOR_DEPENDENCIES），只有依赖的输入变化
+超过容差（epsilon）时才重新计算该指标，其余指标直接复用缓存。
+
+可选的熵权法（entropy_blend）按本轮所有目标的指标计算客观权重并与主观权重混合，
+只有指标重新计算过的目标才更新其熵，离开的目标移出，额外开销为O(N)。
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .entropy_weights import EntropyWeighting
+from .threat_evaluator import INDICATOR_NAMES, IFSThreatEvaluator, ThreatResult
+
+# 各指标依赖的输入
+INDICATOR_DEPENDENCIES = {
+    'distance': ('position', 'player_position'),
+    'type': ('type',),
+    'speed': ('speed', 'type'),
+    'angle': ('position', 'direction', 'player_position'),
+    'visibility': ('position', 'player_position'),
+    'environment': ('position',)
+}
+
+# 各输入的默认变化容差：位置（米）、速度（m/s）、方向（度）；类型按是否相同判断
+DEFAULT_EPSILONS = {
+    'position': 0.05,
+    'player_position': 0.05,
+    'speed': 0.05,
+    'direction': 0.5
+}
+
+
+class IncrementalThreatEvaluator:
+    """
+    按目标ID缓存指标的增量威胁评估器
+    
+    与输入的比较基准是该指标上一次重新计算时的输入（而非上一轮的输入），
+    缓慢漂移累计超过容差后同样会触发重新计算，误差不会逐轮累积。
+    本轮未出现的目标在本轮结束时移出缓存。
+    
+    缓存只按目标ID区分，一个实例只应服务一个数据来源（会话）；
+    多个会话共用评估器时为每个会话创建一个实例。
+    """
+    
+    def __init__(self, evaluator: IFSThreatEvaluator = None, terrain_analyzer=None,
+                 epsilons: Dict[str, float] = None, entropy_blend: float = None):
+        """
+        初始化增量评估器
+        
+        Args:
+            evaluator: 用于指标计算和加权聚合的评估器（默认新建）
+            terrain_analyzer: 地形分析器（可选，没有时通视和环境使用默认值）
+            epsilons: 覆盖 DEFAULT_EPSILONS 中的部分容差，0表示任何变化都重新计算
+            entropy_blend: 熵权法客观权重的占比（0~1），None表示只用评估器的主观权重
+        """
+        self.evaluator = evaluator or IFSThreatEvaluator()
+        self.terrain_analyzer = terrain_analyzer
+        self.epsilons = dict(DEFAULT_EPSILONS)
+        if epsilons:
+            self.epsilons.update(epsilons)
+        
+        # {目标ID: {指标名: (计算时的输入, 结果)}}
+        self.states = {}
+        self.rounds = 0
+        self.duplicate_ids = 0
+        self.cache_stats = {name: {'hits': 0, 'misses': 0} for name in INDICATOR_NAMES}
+        self.entropy = None
+        if entropy_blend is not None:
+            self.entropy = EntropyWeighting(self.evaluator.weights, entropy_blend)
+        self.last_weights = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _inputs(enemy: Dict, player_pos: Tuple[float, float]) -> Dict:
+        """提取指标依赖的输入"""
+        return {
+            'position': (enemy['x'], enemy['z']),
+            'player_position': (player_pos[0], player_pos[1]),
+            'type': enemy['type'],
+            'speed': enemy['speed'],
+            'direction': enemy['direction']
+        }
+    
+    def _changed(self, indicator: str, cached: Dict, current: Dict) -> bool:
+        """该指标依赖的输入是否有超过容差的变化"""
+        for key in INDICATOR_DEPENDENCIES[indicator]:
+            old, new = cached[key], current[key]
+            if key == 'type':
+                changed = old != new
+            elif key == 'direction':
+                changed = abs((new - old + 180) % 360 - 180) > self.epsilons[key]
+            elif key == 'speed':
+                changed = abs(new - old) > self.epsilons[key]
+            else:
+                changed = math.hypot(new[0] - old[0], new[1] - old[1]) > self.epsilons[key]
+            if changed:
+                return True
+        return False
+    
+    def _compute(self, indicator: str, inputs: Dict):
+        """
+        重新计算单个指标
+        
+        Returns:
+            (IFS, 附加数据)：距离指标附带距离值，通视和环境指标附带地形分析结果
+        """
+        indicators = self.evaluator.indicators
+        position = inputs['position']
+        player_pos = inputs['player_position']
+        
+        if indicator == 'distance':
+            distance = math.hypot(position[0] - player_pos[0], position[1] - player_pos[1])
+            return indicators.distance_ifs(distance)[0], distance
+        if indicator == 'type':
+            return indicators.target_type_ifs(inputs['type']), None
+        if indicator == 'speed':
+            return indicators.speed_ifs(inputs['speed'], inputs['type'])[0], None
+        if indicator == 'angle':
+            return indicators.attack_angle_ifs(inputs['direction'], position, player_pos)[0], None
+        
+        terrain = None
+        if self.terrain_analyzer is not None:
+            if indicator == 'visibility':
+                terrain = {'visibility': self.terrain_analyzer.check_line_of_sight(player_pos, position)}
+            else:
+                terrain = {'environment': self.terrain_analyzer.calculate_environment_complexity(position,
+                                                                                                 radius=10.0)}
+        if indicator == 'visibility':
+            return self.evaluator.visibility_ifs(terrain), terrain
+        return self.evaluator.environment_ifs(terrain), terrain
+    
+    def evaluate(self, enemies: List[Dict], player_pos: Tuple[float, float] = (0, 0)) -> List[ThreatResult]:
+        """
+        评估一轮数据中的所有敌人（只重新计算输入有变化的指标）
+        
+        Args:
+            enemies: 敌人列表（字段同 IFSThreatEvaluator.evaluate_single_target）
+            player_pos: 玩家位置
+        
+        Returns:
+            按输入顺序的评估结果列表（ThreatResult）；同一ID出现多次时只评估最后一次
+            出现的数据，结果位于该ID首次出现的位置
+        """
+        unique = {}
+        for enemy in enemies:
+            unique[enemy['id']] = enemy
+        
+        with self._lock:
+            self.duplicate_ids += len(enemies) - len(unique)
+            enemies = list(unique.values())
+            states = {}
+            recomputed = []
+            for enemy in enemies:
+                inputs = self._inputs(enemy, player_pos)
+                state = self.states.get(enemy['id'], {})
+                changed = False
+                for name in INDICATOR_NAMES:
+                    cached = state.get(name)
+                    if cached is not None and not self._changed(name, cached[0], inputs):
+                        self.cache_stats[name]['hits'] += 1
+                    else:
+                        state[name] = (inputs, self._compute(name, inputs))
+                        self.cache_stats[name]['misses'] += 1
+                        changed = True
+                if changed:
+                    recomputed.append(enemy['id'])
+                states[enemy['id']] = state
+            
+            weights = None
+            if self.entropy is not None:
+                weights = self._update_entropy(states, recomputed)
+            results = [self._result(enemy, states[enemy['id']], player_pos, weights) for enemy in enemies]
+            
+            self.states = states
+            self.last_weights = weights
+            self.rounds += 1
+        
+        return results
+    
+    def _update_entropy(self, states: Dict, recomputed: List) -> Dict[str, float]:
+        """更新指标有变化的目标的熵、移出离开的目标，返回本轮的混合权重"""
+        if recomputed:
+            ifs = [[states[enemy_id][name][1][0] for name in INDICATOR_NAMES] for enemy_id in recomputed]
+            mu = np.array([[value.mu for value in row] for row in ifs])
+            nu = np.array([[value.nu for value in row] for row in ifs])
+            self.entropy.update(recomputed, mu, nu)
+        self.entropy.retain(states)
+        return self.entropy.weights()
+    
+    def _result(self, enemy: Dict, state: Dict, player_pos: Tuple[float, float],
+                weights: Dict[str, float] = None) -> ThreatResult:
+        """由缓存的指标值聚合出该敌人的评估结果（weights为None时使用评估器的权重）"""
+        terrain_data = None
+        if self.terrain_analyzer is not None:
+            terrain_data = {**state['visibility'][1][1], **state['environment'][1][1]}
+        
+        indicator_ifs = tuple(state[name][1][0] for name in INDICATOR_NAMES)
+        return self.evaluator.aggregate(enemy, state['distance'][1][1], indicator_ifs, player_pos, terrain_data,
+                                        weights)
+    
+    def rank_targets(self, enemies: List[Dict], player_pos: Tuple[float, float] = (0, 0)) -> List[ThreatResult]:
+        """评估并按威胁度降序排序（同分保持输入顺序，与 IFSThreatEvaluator.rank_targets 一致）"""
+        results = self.evaluate(enemies, player_pos)
+        results.sort(key=lambda x: x.score, reverse=True)
+        for rank, result in enumerate(results, 1):
+            result.rank = rank
+        return results
+    
+    def find_most_threatening(self, enemies: List[Dict],
+                              player_pos: Tuple[float, float] = (0, 0)) -> Optional[ThreatResult]:
+        """评估并返回最高威胁目标（同分取输入顺序靠前的目标），没有敌人时返回None"""
+        most_threatening = None
+        for result in self.evaluate(enemies, player_pos):
+            if most_threatening is None or result.score > most_threatening.score:
+                most_threatening = result
+        if most_threatening is not None:
+            most_threatening.rank = 1
+        return most_threatening
+    
+    def invalidate(self, enemy_id=None):
+        """
+        清除缓存（例如修改了指标阈值或地形数据之后）
+        
+        Args:
+            enemy_id: 只清除该目标的缓存；None表示清除全部
+        """
+        with self._lock:
+            if enemy_id is None:
+                self.states = {}
+            else:
+                self.states.pop(enemy_id, None)
+            if self.entropy is not None:
+                self.entropy.remove(enemy_id)
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        获取缓存命中统计
+        
+        Returns:
+            {
+                'rounds': int,
+                'tracked_targets': int,
+                'duplicate_ids': int（同一轮中重复出现而被合并的目标数）,
+                'hits': int, 'misses': int, 'hit_rate': float,
+                'indicators': {指标名: {'hits', 'misses', 'hit_rate'}},
+                'entropy_weights': 上一轮的混合权重（只在启用熵权法时提供）
+            }
+        """
+        with self._lock:
+            indicators = {}
+            for name, stats in self.cache_stats.items():
+                lookups = stats['hits'] + stats['misses']
+                indicators[name] = {
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'hit_rate': stats['hits'] / lookups if lookups else 0.0
+                }
+            rounds = self.rounds
+            tracked_targets = len(self.states)
+            duplicate_ids = self.duplicate_ids
+            last_weights = self.last_weights
+        
+        hits = sum(stats['hits'] for stats in indicators.values())
+        misses = sum(stats['misses'] for stats in indicators.values())
+        stats = {
+            'rounds': rounds,
+            'tracked_targets': tracked_targets,
+            'duplicate_ids': duplicate_ids,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'indicators': indicators
+        }
+        if self.entropy is not None:
+            stats['entropy_weights'] = last_weights
+        return stats
@@ -6,10 +6,147 @@
 """
 
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+import heapq
+import math
+import threading
 import time
-from .ifs_core import IFS, IFSOperations
-from .threat_indicators import ThreatIndicators
+from .ifs_core import AGGREGATION_IFWA, AGGREGATION_OPERATORS, IFS, IFSArray, IFSOperations
+from .threat_indicators import (
+    COMPLEXITY_AUTO, TYPE_CODE_DRONE, ThreatIndicators, complexity_code, type_codes
+)
+
+# 参与聚合的指标顺序（evaluate_batch返回的indicator_mu/indicator_nu列顺序）
+INDICATOR_NAMES = ('distance', 'type', 'speed', 'angle', 'visibility', 'environment')
+
+# 评估引擎：逐个评估（scalar）、批量向量化评估（batch）与按得分上界剪枝的逐个评估（pruned）
+ENGINE_SCALAR = 'scalar'
+ENGINE_BATCH = 'batch'
+ENGINE_PRUNED = 'pruned'
+
+# 只需敌人自身字段即可计算的指标（剪枝搜索先算这些，其余指标取最有利情况作为上界）
+CHEAP_INDICATOR_NAMES = INDICATOR_NAMES[:3]
+
+# 剪枝比较的浮点容差：上界与实际得分的求和顺序不同，留出余量保证不会误剪
+PRUNE_TOLERANCE = 1e-9
+
+# 未校准时的批量阈值：目标数达到该值时 rank_targets / find_most_threatening
+# 才使用批量评估，更少的目标逐个评估更快（批量路径有约1ms的固定开销）
+BATCH_MIN_TARGETS = 24
+
+# 引擎校准使用的目标数量
+CALIBRATION_SIZES = (2, 4, 8, 16, 32, 64, 128, 256)
+
+# 校准 top_k 时取的目标数
+CALIBRATION_TOP_K = 3
+
+# 只在完整评估结果（解释信息）中才有的字段
+EXPLANATION_KEYS = ('indicator_details', 'weighted_aggregation', 'evaluation_time')
+
+
+def threat_level_for_score(score: float) -> str:
+    """综合威胁得分 → 威胁等级"""
+    if score >= 0.6:
+        return 'critical'
+    if score >= 0.3:
+        return 'high'
+    if score >= 0.0:
+        return 'medium'
+    return 'low'
+
+
+class ThreatResult:
+    """
+    紧凑的威胁评估结果
+    
+    只保存排序和选择目标所需的字段（id、得分、μ、ν、威胁等级）。各指标详情、
+    贡献度等解释信息在首次访问 explanation 时才通过 evaluate_single_target 生成，
+    评估热路径不构建详情字典和描述字符串。
+    
+    兼容原结果字典的读取方式：result['comprehensive_threat_score']、
+    result.get('threat_level')、result['indicator_details'] 等。
+    """
+    __slots__ = ('enemy_id', 'score', 'mu', 'nu', 'threat_level', 'distance', 'rank',
+                 '_evaluator', '_enemy', '_player_pos', '_terrain_data', '_weights', '_explanation')
+    
+    def __init__(self, enemy_id, score: float, mu: float, nu: float, threat_level: str, distance: float,
+                 evaluator: 'IFSThreatEvaluator', enemy: Dict, player_pos: Tuple[float, float],
+                 terrain_data: Dict = None, rank: int = None, weights: Dict[str, float] = None):
+        self.enemy_id = enemy_id
+        self.score = score
+        self.mu = mu
+        self.nu = nu
+        self.threat_level = threat_level
+        self.distance = distance
+        self.rank = rank
+        self._evaluator = evaluator
+        self._enemy = enemy
+        self._player_pos = player_pos
+        self._terrain_data = terrain_data
+        self._weights = weights
+        self._explanation = None
+    
+    @property
+    def pi(self) -> float:
+        return 1.0 - self.mu - self.nu
+    
+    @property
+    def explanation(self) -> Dict:
+        """完整评估结果（evaluate_single_target的返回值），首次访问时生成"""
+        if self._explanation is None:
+            explanation = self._evaluator.evaluate_single_target(self._enemy, self._player_pos, self._terrain_data,
+                                                                 self._weights)
+            if self.rank is not None:
+                explanation['rank'] = self.rank
+            self._explanation = explanation
+        return self._explanation
+    
+    def __getitem__(self, key: str):
+        if key == 'enemy_id':
+            return self.enemy_id
+        if key == 'comprehensive_threat_score':
+            return self.score
+        if key == 'threat_level':
+            return self.threat_level
+        if key == 'distance':
+            return self.distance
+        if key == 'ifs_values':
+            return {'membership': self.mu, 'non_membership': self.nu, 'hesitancy': self.pi}
+        if key == 'rank' and self.rank is not None:
+            return self.rank
+        return self.explanation[key]
+    
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key: str) -> bool:
+        if key == 'rank':
+            return self.rank is not None
+        return key in ('enemy_id', 'comprehensive_threat_score', 'threat_level', 'distance', 'ifs_values') \
+            or key in EXPLANATION_KEYS
+    
+    def __getstate__(self) -> Dict:
+        """pickle时先生成解释信息，不保存评估器（评估器持有线程锁，不能pickle）"""
+        state = {name: getattr(self, name) for name in ('enemy_id', 'score', 'mu', 'nu', 'threat_level',
+                                                         'distance', 'rank')}
+        state['_explanation'] = self.explanation
+        return state
+    
+    def __setstate__(self, state: Dict):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._evaluator = None
+        self._enemy = None
+        self._player_pos = None
+        self._terrain_data = None
+        self._weights = None
+    
+    def __repr__(self) -> str:
+        return (f"ThreatResult(enemy_id={self.enemy_id!r}, score={self.score:.3f}, "
+                f"level={self.threat_level}, rank={self.rank})")
 
 
 class IFSThreatEvaluator:
@@ -22,7 +159,10 @@ class IFSThreatEvaluator:
     3. 找出最具威胁的目标
     """
     
-    def __init__(self, custom_weights: Dict[str, float] = None):
+    def __init__(self, custom_weights: Dict[str, float] = None,
+                 batch_min_targets: int = BATCH_MIN_TARGETS,
+                 pruned_search: bool = False, lut_resolution: Dict[str, float] = None,
+                 aggregation_operator: str = AGGREGATION_IFWA, position_weights: List[float] = None):
         """
         初始化威胁评估器
         
@@ -37,10 +177,39 @@ class IFSThreatEvaluator:
                     'visibility': 0.06,  # 通视条件
                     'environment': 0.04  # 作战环境
                 }
+            batch_min_targets: 使用批量评估的最少目标数（None表示只用逐个评估）
+            pruned_search: find_most_threatening 在逐个评估时使用剪枝搜索（结果不变）
+            lut_resolution: 使用查找表计算的隶属度曲线及采样间隔（见 ThreatIndicators）
+            aggregation_operator: 指标聚合算子（见 ifs_core.AGGREGATION_OPERATORS，默认论文的IFWA）
+            position_weights: IFOWA/IFHA的位置权重，长度等于参与聚合的指标数；
+                None表示把指标权重从大到小排列作为位置权重
         """
-        self.indicators = ThreatIndicators()
+        if aggregation_operator not in AGGREGATION_OPERATORS:
+            raise ValueError(f"不支持的聚合算子: {aggregation_operator}")
+        
+        self.indicators = ThreatIndicators(lut_resolution)
         self.operations = IFSOperations()
         
+        # 引擎选择：各操作的批量阈值（可由calibrate_engines按本机实测更新）
+        self.batch_min_targets = {
+            'rank_targets': batch_min_targets,
+            'find_most_threatening': batch_min_targets,
+            'top_k': batch_min_targets
+        }
+        # 剪枝搜索的得分上界依赖IFWA的线性，其他聚合算子不使用剪枝搜索
+        self.aggregation_operator = aggregation_operator
+        self.position_weights = position_weights
+        self.pruned_search = pruned_search and aggregation_operator == AGGREGATION_IFWA
+        self.calibration = None
+        self.engine_stats = {
+            operation: {engine: {'calls': 0, 'targets': 0, 'total_time': 0.0}
+                        for engine in (ENGINE_SCALAR, ENGINE_BATCH)}
+            for operation in self.batch_min_targets
+        }
+        self.engine_stats['find_most_threatening'][ENGINE_PRUNED] = {'calls': 0, 'targets': 0, 'total_time': 0.0}
+        self.pruning_stats = {'searches': 0, 'targets': 0, 'full_evaluations': 0}
+        self._engine_lock = threading.Lock()
+        
         # 设置指标权重
         self.default_weights = {
             'distance': 0.30,
@@ -63,7 +232,8 @@ class IFSThreatEvaluator:
     def evaluate_single_target(self, 
                               enemy: Dict, 
                               player_pos: Tuple[float, float] = (0, 0),
-                              terrain_data: Dict = None) -> Dict:
+                              terrain_data: Dict = None,
+                              weights: Dict[str, float] = None) -> Dict:
         """
         评估单个敌人的威胁度
         
@@ -79,6 +249,7 @@ class IFSThreatEvaluator:
                 }
             player_pos: 玩家位置 (x, z)
             terrain_data: 地形数据（可选），包含通视和环境信息
+            weights: 本次使用的指标权重（默认当前权重，例如熵权法给出的一帧权重）
         
         Returns:
             {
@@ -100,7 +271,7 @@ class IFSThreatEvaluator:
         # 1. 计算距离
         dx = enemy['x'] - player_pos[0]
         dz = enemy['z'] - player_pos[1]
-        distance = np.sqrt(dx**2 + dz**2)
+        distance = math.sqrt(dx**2 + dz**2)
         
         # 2. 评估各个威胁指标
         indicator_results = {}
@@ -157,31 +328,25 @@ class IFSThreatEvaluator:
             )
         
         # 3. 提取各指标的IFS值
+        weights = self.weights if weights is None else weights
         ifs_list = []
         weight_list = []
         indicator_names = []
         
-        for indicator_name in ['distance', 'type', 'speed', 'angle', 'visibility', 'environment']:
-            if indicator_name in indicator_results and indicator_name in self.weights:
+        for indicator_name in INDICATOR_NAMES:
+            if indicator_name in indicator_results and indicator_name in weights:
                 ifs_list.append(indicator_results[indicator_name]['ifs'])
-                weight_list.append(self.weights[indicator_name])
+                weight_list.append(weights[indicator_name])
                 indicator_names.append(indicator_name)
         
-        # 4. 使用IFS加权算术平均算子（IFWA）聚合
-        comprehensive_ifs = self.operations.weighted_average(ifs_list, weight_list)
+        # 4. 使用配置的聚合算子（默认IFS加权算术平均IFWA）聚合
+        comprehensive_ifs = self._aggregate_ifs(ifs_list, weight_list)
         
         # 5. 计算综合威胁得分
         comprehensive_score = comprehensive_ifs.score()
         
         # 6. 确定威胁等级
-        if comprehensive_score >= 0.6:
-            threat_level = 'critical'
-        elif comprehensive_score >= 0.3:
-            threat_level = 'high'
-        elif comprehensive_score >= 0.0:
-            threat_level = 'medium'
-        else:
-            threat_level = 'low'
+        threat_level = threat_level_for_score(comprehensive_score)
         
         # 7. 计算各指标对综合得分的贡献
         contributions = {}
@@ -210,88 +375,706 @@ class IFSThreatEvaluator:
             'weighted_aggregation': {
                 'weights': dict(zip(indicator_names, weight_list)),
                 'contributions': contributions,
-                'aggregation_method': 'IFWA'  # IFS加权算术平均
+                'aggregation_method': self.aggregation_operator.upper()  # 默认IFWA（IFS加权算术平均）
             },
             'distance': distance,
             'evaluation_time': evaluation_time
         }
     
+    def score_single_target(self,
+                            enemy: Dict,
+                            player_pos: Tuple[float, float] = (0, 0),
+                            terrain_data: Dict = None) -> ThreatResult:
+        """
+        只计算单个敌人的综合威胁得分（快速模式）
+        
+        与 evaluate_single_target 的得分一致，但不生成各指标详情、描述字符串和贡献度，
+        这些解释信息在访问返回结果的 explanation 时才生成。
+        
+        Args:
+            enemy: 敌人数据字典（同 evaluate_single_target）
+            player_pos: 玩家位置 (x, z)
+            terrain_data: 地形数据（可选）
+        
+        Returns:
+            ThreatResult
+        """
+        distance, cheap_ifs = self._cheap_indicator_ifs(enemy, player_pos)
+        return self._score_result(enemy, distance, cheap_ifs, player_pos, terrain_data)
+    
+    def _cheap_indicator_ifs(self, enemy: Dict,
+                             player_pos: Tuple[float, float]) -> Tuple[float, Tuple[IFS, IFS, IFS]]:
+        """距离、类型、速度三个指标的IFS值（只依赖敌人自身字段），返回 (距离, IFS元组)"""
+        indicators = self.indicators
+        dx = enemy['x'] - player_pos[0]
+        dz = enemy['z'] - player_pos[1]
+        distance = math.sqrt(dx**2 + dz**2)
+        
+        return distance, (
+            indicators.distance_ifs(distance)[0],
+            indicators.target_type_ifs(enemy['type']),
+            indicators.speed_ifs(enemy['speed'], enemy['type'])[0]
+        )
+    
+    def _score_result(self, enemy: Dict, distance: float, cheap_ifs: Tuple[IFS, IFS, IFS],
+                      player_pos: Tuple[float, float], terrain_data: Dict = None) -> ThreatResult:
+        """计算攻击角度、通视条件、作战环境三个指标，与 cheap_ifs 聚合为紧凑结果"""
+        indicator_ifs = cheap_ifs + (
+            self.indicators.attack_angle_ifs(enemy['direction'], (enemy['x'], enemy['z']), player_pos)[0],
+            self.visibility_ifs(terrain_data),
+            self.environment_ifs(terrain_data)
+        )
+        return self.aggregate(enemy, distance, indicator_ifs, player_pos, terrain_data)
+    
+    def visibility_ifs(self, terrain_data: Dict = None) -> IFS:
+        """单个敌人地形数据中的通视条件 → IFS（没有通视数据时假设无遮挡）"""
+        if terrain_data and 'visibility' in terrain_data:
+            vis_data = terrain_data['visibility']
+            return self.indicators.visibility_ifs(
+                vis_data.get('is_blocked', False),
+                vis_data.get('blocking_count', 0),
+                vis_data.get('visibility_ratio', None)
+            )[0]
+        return self.indicators.visibility_ifs(False, 0, 1.0)[0]
+        
+    def environment_ifs(self, terrain_data: Dict = None) -> IFS:
+        """单个敌人地形数据中的作战环境 → IFS（没有环境数据时按开阔环境）"""
+        if terrain_data and 'environment' in terrain_data:
+            env_data = terrain_data['environment']
+            return self.indicators.environment_ifs(
+                env_data.get('obstacle_density', 0.0),
+                env_data.get('building_density', 0.0),
+                env_data.get('complexity_level', None)
+            )[0]
+        return self.indicators.environment_ifs(0.2, 0.1)[0]
+        
+    def aggregate(self, enemy: Dict, distance: float, indicator_ifs: Tuple[IFS, ...],
+                  player_pos: Tuple[float, float] = (0, 0), terrain_data: Dict = None,
+                  weights: Dict[str, float] = None) -> ThreatResult:
+        """
+        按当前权重和聚合算子聚合已算好的六个指标IFS值，得到紧凑结果
+        
+        Args:
+            enemy: 敌人数据字典
+            distance: 敌人到玩家的距离
+            indicator_ifs: 按 INDICATOR_NAMES 顺序的六个指标IFS值
+            player_pos: 玩家位置（用于按需生成解释信息）
+            terrain_data: 该敌人的地形数据（用于按需生成解释信息）
+            weights: 本次使用的指标权重（默认当前权重），解释信息使用同一组权重
+        
+        Returns:
+            ThreatResult
+        """
+        active_weights = self.weights if weights is None else weights
+        ifs_list = []
+        weight_list = []
+        for name, ifs in zip(INDICATOR_NAMES, indicator_ifs):
+            if name in active_weights:
+                ifs_list.append(ifs)
+                weight_list.append(active_weights[name])
+        
+        comprehensive_ifs = self._aggregate_ifs(ifs_list, weight_list)
+        score = comprehensive_ifs.score()
+        
+        return ThreatResult(enemy['id'], score, comprehensive_ifs.mu, comprehensive_ifs.nu,
+                            threat_level_for_score(score), distance, self, enemy, player_pos, terrain_data,
+                            weights=weights)
+    
+    def _position_weights(self, weight_list: List[float]) -> List[float]:
+        """IFOWA/IFHA使用的位置权重（未配置时为从大到小排列的指标权重）"""
+        if self.position_weights is not None:
+            return self.position_weights
+        return sorted(weight_list, reverse=True)
+    
+    def _aggregate_ifs(self, ifs_list: List[IFS], weight_list: List[float]) -> IFS:
+        """用配置的聚合算子聚合单个目标的指标IFS值"""
+        if self.aggregation_operator == AGGREGATION_IFWA:
+            return self.operations.weighted_average(ifs_list, weight_list)
+        return self.operations.aggregate(self.aggregation_operator, ifs_list, weight_list,
+                                         self._position_weights(weight_list))
+    
+    def aggregate_batch(self, indicators: IFSArray, weights: Dict[str, float] = None) -> IFSArray:
+        """
+        用配置的聚合算子把 N×6 指标矩阵聚合为N个综合IFS（整批一次计算，不逐个目标循环）
+        
+        Args:
+            indicators: N×6 指标IFSArray（列顺序见INDICATOR_NAMES）
+            weights: 指标权重字典（默认当前权重），不在字典中的指标不参与聚合
+        
+        Returns:
+            N个综合IFS（IFSArray）
+        """
+        weights = self.weights if weights is None else weights
+        if self.aggregation_operator == AGGREGATION_IFWA:
+            # IFWA：N×6 指标矩阵与权重向量相乘，未配置的指标权重为0
+            return indicators.weighted_average([weights.get(name, 0.0) for name in INDICATOR_NAMES])
+        
+        active = [i for i, name in enumerate(INDICATOR_NAMES) if name in weights]
+        weight_list = [weights[INDICATOR_NAMES[i]] for i in active]
+        return indicators[:, active].aggregate(self.aggregation_operator, weight_list,
+                                               self._position_weights(weight_list))
+    
+    @staticmethod
+    def _enemy_terrain(enemy: Dict, terrain_data: Dict = None) -> Optional[Dict]:
+        """获取该敌人的地形数据（如果存在）"""
+        if terrain_data and 'enemies' in terrain_data:
+            return terrain_data['enemies'].get(enemy['id'], None)
+        return None
+    
+    @staticmethod
+    def batch_columns(enemies: List[Dict], terrain_data: Dict = None) -> Dict[str, np.ndarray]:
+        """
+        敌人字典列表 → evaluate_batch 所需的列数组
+        
+        地形数据按 terrain_data['enemies'][id] 逐个取用，与 rank_targets 的逐个评估一致；
+        缺省值与 evaluate_single_target 相同（无遮挡、开阔环境）。
+        
+        Args:
+            enemies: 敌人列表
+            terrain_data: 地形数据（可选）
+        
+        Returns:
+            evaluate_batch 的关键字参数字典
+        """
+        n = len(enemies)
+        per_enemy = terrain_data.get('enemies', {}) if terrain_data else {}
+        
+        visibility_ratio = np.full(n, np.nan)
+        is_blocked = np.zeros(n, dtype=bool)
+        blocking_count = np.zeros(n)
+        obstacle_density = np.full(n, 0.2)
+        building_density = np.full(n, 0.1)
+        complexity = np.full(n, COMPLEXITY_AUTO, dtype=np.int8)
+        
+        for i, enemy in enumerate(enemies):
+            enemy_terrain = per_enemy.get(enemy['id'])
+            if not enemy_terrain:
+                visibility_ratio[i] = 1.0
+                continue
+            
+            if 'visibility' in enemy_terrain:
+                vis_data = enemy_terrain['visibility']
+                is_blocked[i] = vis_data.get('is_blocked', False)
+                blocking_count[i] = vis_data.get('blocking_count', 0)
+                ratio = vis_data.get('visibility_ratio', None)
+                visibility_ratio[i] = np.nan if ratio is None else ratio
+            else:
+                visibility_ratio[i] = 1.0
+            
+            if 'environment' in enemy_terrain:
+                env_data = enemy_terrain['environment']
+                obstacle_density[i] = env_data.get('obstacle_density', 0.0)
+                building_density[i] = env_data.get('building_density', 0.0)
+                complexity[i] = complexity_code(env_data.get('complexity_level', None))
+        
+        names = [enemy['type'] for enemy in enemies]
+        return {
+            'x': np.array([enemy['x'] for enemy in enemies], dtype=float),
+            'z': np.array([enemy['z'] for enemy in enemies], dtype=float),
+            'speed': np.array([enemy['speed'] for enemy in enemies], dtype=float),
+            'direction': np.array([enemy['direction'] for enemy in enemies], dtype=float),
+            'type_code': type_codes(names),
+            # 速度阈值按原始类型名查找（evaluate_speed不做大小写归一）
+            'speed_type_code': np.array([TYPE_CODE_DRONE if t == 'drone' else 0 for t in names], dtype=np.int8),
+            'visibility_ratio': visibility_ratio,
+            'is_blocked': is_blocked,
+            'blocking_count': blocking_count,
+            'obstacle_density': obstacle_density,
+            'building_density': building_density,
+            'complexity': complexity,
+        }
+    
+    def evaluate_batch(self,
+                       x: np.ndarray,
+                       z: np.ndarray,
+                       speed: np.ndarray,
+                       direction: np.ndarray,
+                       type_code: np.ndarray,
+                       player_pos: Tuple[float, float] = (0, 0),
+                       speed_type_code: np.ndarray = None,
+                       visibility_ratio: np.ndarray = None,
+                       is_blocked: np.ndarray = None,
+                       blocking_count: np.ndarray = None,
+                       obstacle_density: np.ndarray = None,
+                       building_density: np.ndarray = None,
+                       complexity: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        批量评估N个敌人的综合威胁度（向量化）
+        
+        各指标按列一次性计算，组成 N×6 的指标IFSArray后整批聚合（见 aggregate_batch），
+        结果与逐个调用 evaluate_single_target 一致。
+        
+        Args:
+            x, z, speed, direction: 敌人位置、速度、朝向列数组
+            type_code: 目标类型编码（见 threat_indicators.TYPE_NAMES）
+            player_pos: 玩家位置 (x, z)
+            speed_type_code: 选择速度阈值用的类型编码（默认同type_code）
+            visibility_ratio: 可见度比例，NaN表示按遮挡状态估算（默认1.0）
+            is_blocked: 是否被遮挡（默认False）
+            blocking_count: 遮挡物数量（默认0）
+            obstacle_density, building_density: 环境密度（默认0.2/0.1）
+            complexity: 环境复杂度编码（默认按密度自动判断）
+        
+        Returns:
+            {
+                'score': 综合威胁得分数组,
+                'ifs': 综合IFS（IFSArray）,
+                'mu', 'nu', 'pi': 综合IFS数组,
+                'threat_level': 威胁等级数组,
+                'distance': 距离数组,
+                'indicators': N×6 指标IFSArray（列顺序见INDICATOR_NAMES）,
+                'indicator_mu', 'indicator_nu': 指标IFSArray的μ/ν矩阵
+            }
+        """
+        x = np.asarray(x, dtype=float)
+        z = np.asarray(z, dtype=float)
+        n = len(x)
+        type_code = np.asarray(type_code)
+        speed_type_code = type_code if speed_type_code is None else np.asarray(speed_type_code)
+        
+        visibility_ratio = np.ones(n) if visibility_ratio is None else np.asarray(visibility_ratio, dtype=float)
+        is_blocked = np.zeros(n, dtype=bool) if is_blocked is None else np.asarray(is_blocked, dtype=bool)
+        blocking_count = np.zeros(n) if blocking_count is None else np.asarray(blocking_count, dtype=float)
+        obstacle_density = np.full(n, 0.2) if obstacle_density is None else np.asarray(obstacle_density, dtype=float)
+        building_density = np.full(n, 0.1) if building_density is None else np.asarray(building_density, dtype=float)
+        complexity = np.full(n, COMPLEXITY_AUTO) if complexity is None else np.asarray(complexity)
+        
+        distance = np.sqrt((x - player_pos[0]) ** 2 + (z - player_pos[1]) ** 2)
+        
+        columns = {
+            'distance': self.indicators.evaluate_distance_batch(distance),
+            'type': self.indicators.evaluate_target_type_batch(type_code),
+            'speed': self.indicators.evaluate_speed_batch(np.asarray(speed, dtype=float), speed_type_code),
+            'angle': self.indicators.evaluate_attack_angle_batch(np.asarray(direction, dtype=float), x, z, player_pos),
+            'visibility': self.indicators.evaluate_visibility_batch(is_blocked, blocking_count, visibility_ratio),
+            'environment': self.indicators.evaluate_environment_batch(obstacle_density, building_density, complexity),
+        }
+        
+        indicators = IFSArray(np.column_stack([columns[name][0] for name in INDICATOR_NAMES]),
+                              np.column_stack([columns[name][1] for name in INDICATOR_NAMES]))
+        
+        comprehensive = self.aggregate_batch(indicators)
+        score = comprehensive.score()
+        
+        threat_level = np.select([score >= 0.6, score >= 0.3, score >= 0.0],
+                                 ['critical', 'high', 'medium'], 'low')
+        
+        return {
+            'score': score,
+            'ifs': comprehensive,
+            'mu': comprehensive.mu,
+            'nu': comprehensive.nu,
+            'pi': comprehensive.pi,
+            'threat_level': threat_level,
+            'distance': distance,
+            'indicators': indicators,
+            'indicator_mu': indicators.mu,
+            'indicator_nu': indicators.nu,
+        }
+    
+    def indicator_matrix(self,
+                         enemies: List[Dict],
+                         player_pos: Tuple[float, float] = (0, 0),
+                         terrain_data: Dict = None) -> IFSArray:
+        """
+        计算一帧中所有敌人的六个指标IFS值（与权重无关，可供多组权重复用）
+        
+        Args:
+            enemies: 敌人列表
+            player_pos: 玩家位置
+            terrain_data: 地形数据（可选）
+        
+        Returns:
+            N×6 指标IFSArray（列顺序见INDICATOR_NAMES）
+        """
+        if not enemies:
+            return IFSArray(np.zeros((0, len(INDICATOR_NAMES))), np.zeros((0, len(INDICATOR_NAMES))))
+        return self.evaluate_batch(player_pos=player_pos, **self.batch_columns(enemies, terrain_data))['indicators']
+    
     def rank_targets(self, 
                     enemies: List[Dict], 
                     player_pos: Tuple[float, float] = (0, 0),
-                    terrain_data: Dict = None) -> List[Dict]:
+                    terrain_data: Dict = None) -> List[ThreatResult]:
         """
         对所有敌人进行威胁排序
         
+        按目标数量选择逐个评估或批量评估引擎（见 select_engine），两者结果一致。
+        
         Args:
             enemies: 敌人列表
             player_pos: 玩家位置
             terrain_data: 地形数据（可选）
         
         Returns:
-            按威胁度降序排列的评估结果列表
+            按威胁度降序排列的评估结果列表（ThreatResult，详情在访问时才生成）
         """
-        results = []
-        
-        for enemy in enemies:
-            # 获取该敌人的地形数据（如果存在）
-            enemy_terrain_data = None
-            if terrain_data and 'enemies' in terrain_data:
-                enemy_terrain_data = terrain_data['enemies'].get(enemy['id'], None)
-            
-            result = self.evaluate_single_target(enemy, player_pos, enemy_terrain_data)
-            results.append(result)
-        
-        # 按综合威胁得分降序排序
-        results.sort(key=lambda x: x['comprehensive_threat_score'], reverse=True)
+        if not enemies:
+            return []
         
-        # 添加排名信息
-        for rank, result in enumerate(results, 1):
-            result['rank'] = rank
+        engine = self.select_engine('rank_targets', len(enemies))
+        start_time = time.perf_counter()
+        if engine == ENGINE_BATCH:
+            results = self._rank_targets_batch(enemies, player_pos, terrain_data)
+        else:
+            results = self._rank_targets_scalar(enemies, player_pos, terrain_data)
+        self._record_engine('rank_targets', engine, len(enemies), time.perf_counter() - start_time)
         
         return results
     
     def find_most_threatening(self, 
                              enemies: List[Dict], 
                              player_pos: Tuple[float, float] = (0, 0),
-                             terrain_data: Dict = None) -> Optional[Dict]:
+                             terrain_data: Dict = None,
+                             terrain_provider: Callable[[Dict], Optional[Dict]] = None) -> Optional[ThreatResult]:
         """
         快速找出最高威胁目标（优化版）
         
+        按目标数量选择逐个评估、剪枝搜索或批量评估引擎（见 select_engine），结果一致。
+        
         Args:
             enemies: 敌人列表
             player_pos: 玩家位置
             terrain_data: 地形数据（可选）
+            terrain_provider: 按需计算单个敌人地形数据的函数（可选，代替terrain_data）。
+                剪枝搜索只对可能胜出的目标调用；其他引擎对所有目标调用
         
         Returns:
-            最高威胁目标的评估结果，如果没有敌人则返回None
+            最高威胁目标的评估结果（ThreatResult），如果没有敌人则返回None
         """
         if not enemies:
             return None
         
+        start_time = time.perf_counter()
         if len(enemies) == 1:
-            return self.evaluate_single_target(enemies[0], player_pos, terrain_data)
+            engine = ENGINE_SCALAR
+            if terrain_provider is not None:
+                terrain_data = terrain_provider(enemies[0])
+            most_threatening = self.score_single_target(enemies[0], player_pos, terrain_data)
+        else:
+            engine = self.select_engine('find_most_threatening', len(enemies))
+            if engine == ENGINE_PRUNED:
+                most_threatening = self._find_most_threatening_pruned(enemies, player_pos, terrain_data,
+                                                                      terrain_provider)
+            else:
+                if terrain_provider is not None:
+                    terrain_data = {'enemies': {enemy['id']: terrain_provider(enemy) for enemy in enemies}}
+                if engine == ENGINE_BATCH:
+                    most_threatening = self._find_most_threatening_batch(enemies, player_pos, terrain_data)
+                else:
+                    most_threatening = self._find_most_threatening_scalar(enemies, player_pos, terrain_data)
+            most_threatening.rank = 1
+        self._record_engine('find_most_threatening', engine, len(enemies), time.perf_counter() - start_time)
         
-        # 评估所有目标并找出最大威胁
-        max_threat_score = -float('inf')
-        most_threatening = None
+        return most_threatening
+    
+    def top_k(self,
+              enemies: List[Dict],
+              k: int,
+              player_pos: Tuple[float, float] = (0, 0),
+              terrain_data: Dict = None) -> List[ThreatResult]:
+        """
+        只找出威胁度最高的k个目标（部分排序）
+        
+        不对全部目标排序：逐个评估引擎用堆（O(N + k log N)），批量评估引擎用
+        np.argpartition（O(N + k log k)）。得分相同时按IFS比较法则的精确函数 μ + ν
+        从高到低，再相同时按输入顺序（rank_targets 同分时只按输入顺序）。
+        
+        Args:
+            enemies: 敌人列表
+            k: 需要的目标数
+            player_pos: 玩家位置
+            terrain_data: 地形数据（可选）
+        
+        Returns:
+            按威胁度降序排列的前k个评估结果（rank为1..k）
+        """
+        if not enemies or k <= 0:
+            return []
+        k = min(k, len(enemies))
+        
+        engine = self.select_engine('top_k', len(enemies))
+        start_time = time.perf_counter()
+        if engine == ENGINE_BATCH:
+            results = self._top_k_batch(enemies, k, player_pos, terrain_data)
+        else:
+            results = self._top_k_scalar(enemies, k, player_pos, terrain_data)
+        self._record_engine('top_k', engine, len(enemies), time.perf_counter() - start_time)
+        
+        return results
+    
+    def _top_k_scalar(self, enemies: List[Dict], k: int, player_pos: Tuple[float, float],
+                      terrain_data: Dict = None) -> List[ThreatResult]:
+        """逐个评估引擎：建堆后弹出前k个"""
+        heap = []
+        for index, enemy in enumerate(enemies):
+            result = self.score_single_target(enemy, player_pos, self._enemy_terrain(enemy, terrain_data))
+            heap.append((-result.score, -(result.mu + result.nu), index, result))
+        heapq.heapify(heap)
+        
+        results = []
+        for rank in range(1, k + 1):
+            result = heapq.heappop(heap)[3]
+            result.rank = rank
+            results.append(result)
+        return results
+    
+    def _top_k_batch(self, enemies: List[Dict], k: int, player_pos: Tuple[float, float],
+                     terrain_data: Dict = None) -> List[ThreatResult]:
+        """批量评估引擎：argpartition选出候选后只对候选排序"""
+        batch = self.evaluate_batch(player_pos=player_pos, **self.batch_columns(enemies, terrain_data))
+        score = batch['score']
+        
+        # 第k大的得分；与其同分的目标都作为候选，保证同分时按精确函数和输入顺序取舍
+        kth_score = score[np.argpartition(-score, k - 1)[k - 1]]
+        candidates = np.flatnonzero(score >= kth_score)
+        accuracy = batch['mu'][candidates] + batch['nu'][candidates]
+        order = candidates[np.lexsort((candidates, -accuracy, -score[candidates]))[:k]]
         
+        return [self._batch_result(batch, index, enemies, player_pos, terrain_data, rank)
+                for rank, index in enumerate(order.tolist(), 1)]
+    
+    def _rank_targets_scalar(self, enemies: List[Dict], player_pos: Tuple[float, float],
+                             terrain_data: Dict = None) -> List[ThreatResult]:
+        """逐个评估引擎：逐个计算得分后排序"""
+        results = [self.score_single_target(enemy, player_pos, self._enemy_terrain(enemy, terrain_data))
+                   for enemy in enemies]
+        
+        # 按综合威胁得分降序排序
+        results.sort(key=lambda x: x.score, reverse=True)
+        
+        # 添加排名信息
+        for rank, result in enumerate(results, 1):
+            result.rank = rank
+        
+        return results
+    
+    def _rank_targets_batch(self, enemies: List[Dict], player_pos: Tuple[float, float],
+                            terrain_data: Dict = None) -> List[ThreatResult]:
+        """批量评估引擎：批量计算得分后排序（稳定排序，同分保持输入顺序）"""
+        batch = self.evaluate_batch(player_pos=player_pos, **self.batch_columns(enemies, terrain_data))
+        order = np.argsort(-batch['score'], kind='stable')
+        return [self._batch_result(batch, index, enemies, player_pos, terrain_data, rank)
+                for rank, index in enumerate(order.tolist(), 1)]
+    
+    def _find_most_threatening_scalar(self, enemies: List[Dict], player_pos: Tuple[float, float],
+                                      terrain_data: Dict = None) -> ThreatResult:
+        """逐个评估引擎：逐个计算得分并找出最大威胁"""
+        most_threatening = None
         for enemy in enemies:
-            enemy_terrain_data = None
-            if terrain_data and 'enemies' in terrain_data:
-                enemy_terrain_data = terrain_data['enemies'].get(enemy['id'], None)
-            
-            result = self.evaluate_single_target(enemy, player_pos, enemy_terrain_data)
-            
-            if result['comprehensive_threat_score'] > max_threat_score:
-                max_threat_score = result['comprehensive_threat_score']
+            result = self.score_single_target(enemy, player_pos, self._enemy_terrain(enemy, terrain_data))
+            if most_threatening is None or result.score > most_threatening.score:
                 most_threatening = result
+        return most_threatening
+    
+    def _find_most_threatening_pruned(self, enemies: List[Dict], player_pos: Tuple[float, float],
+                                      terrain_data: Dict = None,
+                                      terrain_provider: Callable[[Dict], Optional[Dict]] = None) -> ThreatResult:
+        """
+        剪枝搜索引擎（分支限界）：按得分上界从高到低逐个评估，上界不可能超过当前最高得分时停止
+        
+        IFWA是线性的，综合得分等于各指标得分的加权和。距离、类型、速度三个指标直接计算，
+        攻击角度、通视条件、作战环境取 best_case_scores 的最高得分，得到每个目标的得分上界；
+        只有上界仍可能胜出的目标才计算这三个指标（以及terrain_provider的地形分析）。
+        同分时与逐个评估引擎一样取输入顺序靠前的目标。
+        """
+        weights = self._normalized_weights()
+        best_case = self.indicators.best_case_scores()
+        optimistic = sum(weights.get(name, 0.0) * best_case[name] for name in best_case)
+        
+        candidates = []
+        for index, enemy in enumerate(enemies):
+            distance, cheap_ifs = self._cheap_indicator_ifs(enemy, player_pos)
+            bound = optimistic + sum(weights.get(name, 0.0) * ifs.score()
+                                     for name, ifs in zip(CHEAP_INDICATOR_NAMES, cheap_ifs))
+            candidates.append((-bound, index, distance, cheap_ifs))
+        candidates.sort()
+        
+        most_threatening = None
+        best_index = None
+        evaluated = 0
+        for negative_bound, index, distance, cheap_ifs in candidates:
+            if most_threatening is not None and -negative_bound < most_threatening.score - PRUNE_TOLERANCE:
+                break
+            enemy = enemies[index]
+            if terrain_provider is not None:
+                enemy_terrain = terrain_provider(enemy)
+            else:
+                enemy_terrain = self._enemy_terrain(enemy, terrain_data)
+            result = self._score_result(enemy, distance, cheap_ifs, player_pos, enemy_terrain)
+            evaluated += 1
+            if (most_threatening is None or result.score > most_threatening.score
+                    or (result.score == most_threatening.score and index < best_index)):
+                most_threatening = result
+                best_index = index
         
-        if most_threatening:
-            most_threatening['rank'] = 1
+        with self._engine_lock:
+            self.pruning_stats['searches'] += 1
+            self.pruning_stats['targets'] += len(enemies)
+            self.pruning_stats['full_evaluations'] += evaluated
         
         return most_threatening
     
+    def _normalized_weights(self) -> Dict[str, float]:
+        """参与聚合的指标权重（与 IFSOperations.weighted_average 相同的归一化）"""
+        weights = {name: self.weights[name] for name in INDICATOR_NAMES if name in self.weights}
+        total = sum(weights.values())
+        if total == 0:
+            raise ValueError("权重和不能为0")
+        return {name: weight / total for name, weight in weights.items()}
+    
+    def _find_most_threatening_batch(self, enemies: List[Dict], player_pos: Tuple[float, float],
+                                     terrain_data: Dict = None) -> ThreatResult:
+        """批量评估引擎：argmax取第一个最大值"""
+        batch = self.evaluate_batch(player_pos=player_pos, **self.batch_columns(enemies, terrain_data))
+        return self._batch_result(batch, int(np.argmax(batch['score'])), enemies, player_pos, terrain_data)
+    
+    def _batch_result(self, batch: Dict[str, np.ndarray], index: int, enemies: List[Dict],
+                      player_pos: Tuple[float, float], terrain_data: Dict = None,
+                      rank: int = None) -> ThreatResult:
+        """从evaluate_batch的结果中取出第index个目标的紧凑结果"""
+        enemy = enemies[index]
+        return ThreatResult(enemy['id'], float(batch['score'][index]), float(batch['mu'][index]),
+                            float(batch['nu'][index]), str(batch['threat_level'][index]),
+                            float(batch['distance'][index]), self, enemy, player_pos,
+                            self._enemy_terrain(enemy, terrain_data), rank)
+    
+    def select_engine(self, operation: str, num_targets: int) -> str:
+        """
+        按目标数量选择评估引擎
+        
+        Args:
+            operation: 'rank_targets'、'find_most_threatening' 或 'top_k'
+            num_targets: 目标数量
+        
+        Returns:
+            ENGINE_BATCH（目标数达到该操作的批量阈值）、ENGINE_PRUNED（find_most_threatening
+            开启剪枝搜索时）或 ENGINE_SCALAR
+        """
+        threshold = self.batch_min_targets[operation]
+        if threshold is not None and num_targets >= threshold:
+            return ENGINE_BATCH
+        if operation == 'find_most_threatening' and self.pruned_search:
+            return ENGINE_PRUNED
+        return ENGINE_SCALAR
+    
+    def calibrate_engines(self, sizes: Tuple[int, ...] = CALIBRATION_SIZES, repeat: int = 3) -> Dict:
+        """
+        在本机上测量两种引擎的耗时，确定各操作的批量阈值（启动时调用一次）
+        
+        对每个目标数量取repeat次中的最短耗时；批量引擎在连续两个数量上都更快时停止，
+        以第一个更快的数量作为阈值；批量引擎始终不占优时该操作只使用逐个评估。
+        开启剪枝搜索时，find_most_threatening 以剪枝搜索代替逐个评估参与比较。
+        
+        Args:
+            sizes: 递增的测试目标数量
+            repeat: 每个数量的重复次数
+        
+        Returns:
+            {操作名: {'batch_min_targets': int或None, 'timings': [{'targets', 'scalar_ms', 'batch_ms'}, ...]}}
+        """
+        rng = np.random.default_rng(0)
+        enemies = [{
+            'id': i,
+            'type': ('soldier', 'drone')[i % 2],
+            'x': float(rng.uniform(-50, 50)),
+            'z': float(rng.uniform(-50, 50)),
+            'speed': float(rng.uniform(0, 15)),
+            'direction': float(rng.uniform(0, 360))
+        } for i in range(max(sizes))]
+        
+        engines = {
+            'rank_targets': (self._rank_targets_scalar, self._rank_targets_batch),
+            'find_most_threatening': (self._find_most_threatening_pruned if self.pruned_search
+                                      else self._find_most_threatening_scalar,
+                                      self._find_most_threatening_batch),
+            'top_k': (lambda sample, player_pos: self._top_k_scalar(
+                          sample, min(CALIBRATION_TOP_K, len(sample)), player_pos),
+                      lambda sample, player_pos: self._top_k_batch(
+                          sample, min(CALIBRATION_TOP_K, len(sample)), player_pos)),
+        }
+        
+        calibration = {}
+        for operation, (scalar_engine, batch_engine) in engines.items():
+            timings = []
+            crossover = None
+            wins = 0
+            for size in sizes:
+                sample = enemies[:size]
+                elapsed = {}
+                for engine, func in ((ENGINE_SCALAR, scalar_engine), (ENGINE_BATCH, batch_engine)):
+                    best = float('inf')
+                    for _ in range(repeat):
+                        start_time = time.perf_counter()
+                        func(sample, (0, 0))
+                        best = min(best, time.perf_counter() - start_time)
+                    elapsed[engine] = best
+                timings.append({
+                    'targets': size,
+                    'scalar_ms': elapsed[ENGINE_SCALAR] * 1000,
+                    'batch_ms': elapsed[ENGINE_BATCH] * 1000
+                })
+                
+                if elapsed[ENGINE_BATCH] < elapsed[ENGINE_SCALAR]:
+                    crossover = size if crossover is None else crossover
+                    wins += 1
+                    if wins >= 2:
+                        break
+                else:
+                    crossover = None
+                    wins = 0
+            
+            self.batch_min_targets[operation] = crossover
+            calibration[operation] = {'batch_min_targets': crossover, 'timings': timings}
+        
+        self.calibration = calibration
+        return calibration
+    
+    def _record_engine(self, operation: str, engine: str, num_targets: int, elapsed: float):
+        """记录一次引擎调用"""
+        with self._engine_lock:
+            stats = self.engine_stats[operation][engine]
+            stats['calls'] += 1
+            stats['targets'] += num_targets
+            stats['total_time'] += elapsed
+    
+    def get_engine_stats(self) -> Dict:
+        """
+        获取引擎选择统计
+        
+        Returns:
+            {
+                'batch_min_targets': {操作名: 阈值（None表示只用逐个评估）},
+                'calibrated': bool,
+                'calibration': calibrate_engines的结果（未校准时为None）,
+                'operations': {操作名: {引擎: {'calls', 'targets', 'total_ms', 'mean_ms'}}},
+                'pruning': {'searches', 'targets', 'full_evaluations', 'skipped_evaluations', 'skip_rate'}
+            }
+        """
+        with self._engine_lock:
+            operations = {}
+            for operation, engines in self.engine_stats.items():
+                operations[operation] = {}
+                for engine, stats in engines.items():
+                    calls = stats['calls']
+                    operations[operation][engine] = {
+                        'calls': calls,
+                        'targets': stats['targets'],
+                        'total_ms': stats['total_time'] * 1000,
+                        'mean_ms': stats['total_time'] * 1000 / calls if calls else 0.0
+                    }
+            pruning = dict(self.pruning_stats)
+        
+        pruning['skipped_evaluations'] = pruning['targets'] - pruning['full_evaluations']
+        pruning['skip_rate'] = pruning['skipped_evaluations'] / pruning['targets'] if pruning['targets'] else 0.0
+        
+        return {
+            'batch_min_targets': dict(self.batch_min_targets),
+            'calibrated': self.calibration is not None,
+            'calibration': self.calibration,
+            'operations': operations,
+            'pruning': pruning
+        }
+    
     def compare_targets(self, enemy1: Dict, enemy2: Dict,
                        player_pos: Tuple[float, float] = (0, 0)) -> Dict:
         """
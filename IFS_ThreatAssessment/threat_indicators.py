@@ -12,16 +12,247 @@
 """
 
 import numpy as np
+import bisect
+import copy
 import math
-from typing import Dict, Tuple
-from .ifs_core import IFS, IFSConverter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .ifs_core import IFS, FrozenIFS, IFSConverter, normalize_ifs_arrays
+
+# 目标类型 → IFS值（基于战斗力和生存能力），模块加载时构造一次
+TARGET_TYPE_TABLE = {
+    'drone': {
+        'ifs': FrozenIFS(0.60, 0.30),  # 无人机：中等威胁
+        'name': '敌军无人机',
+        'level': 'medium'
+    },
+    'soldier': {
+        'ifs': FrozenIFS(0.60, 0.30),  # 士兵：中等威胁
+        'name': '士兵',
+        'level': 'medium'
+    },
+    'armed_personnel': {
+        'ifs': FrozenIFS(0.50, 0.40),  # 武装人员：中低威胁
+        'name': '武装人员',
+        'level': 'medium'
+    }
+}
+
+# 未知类型的默认值
+UNKNOWN_TARGET_TYPE = {
+    'ifs': FrozenIFS(0.55, 0.35),  # 默认：中等威胁
+    'name': '未知类型',
+    'level': 'medium'
+}
+
+# 批量评估使用的目标类型编码（0/1与models.TARGET_TYPE_SOLDIER/DRONE一致）
+TYPE_NAMES = ('soldier', 'drone', 'armed_personnel')
+TYPE_CODE_SOLDIER = 0
+TYPE_CODE_DRONE = 1
+TYPE_CODE_UNKNOWN = len(TYPE_NAMES)
+
+# 批量评估使用的环境复杂度编码（-1表示按密度自动判断）
+COMPLEXITY_NAMES = ('open', 'moderate', 'complex')
+COMPLEXITY_AUTO = -1
+
+
+def type_codes(enemy_types: Iterable[str]) -> np.ndarray:
+    """敌人类型名称 → 类型编码数组（未知类型为TYPE_CODE_UNKNOWN）"""
+    codes = {name: code for code, name in enumerate(TYPE_NAMES)}
+    return np.array([codes.get(t.lower().strip(), TYPE_CODE_UNKNOWN) for t in enemy_types], dtype=np.int8)
+
+
+def complexity_code(complexity_level) -> int:
+    """环境复杂度等级 → 编码（None为自动判断，'open'/'moderate'以外按'complex'处理）"""
+    if complexity_level is None:
+        return COMPLEXITY_AUTO
+    if complexity_level == 'open':
+        return 0
+    if complexity_level == 'moderate':
+        return 1
+    return 2
+
+
+# 查找表（LUT）模式的默认采样间隔：距离（米）、速度（m/s）、角度差（度）
+DEFAULT_LUT_RESOLUTION = {
+    'distance': 0.1,
+    'speed': 0.05,
+    'angle': 0.5
+}
+
+# 段内线性插值误差超过该值时，在跳变/折点处拆分（最多拆分LUT_MAX_SPLIT_DEPTH层）
+LUT_SPLIT_TOLERANCE = 1e-3
+LUT_MAX_SPLIT_DEPTH = 4
+
+# 距离查找表覆盖的范围（米），更远的目标按精确公式计算
+DISTANCE_LUT_RANGE = 200.0
+
+# 各曲线的分段名称（与精确计算返回的区域/类别一致）
+DISTANCE_ZONES = ('critical', 'high', 'medium', 'low')
+SPEED_CATEGORIES = ('static', 'low_speed', 'medium_speed', 'high_speed')
+DIRECTION_CATEGORIES = ('approaching', 'flanking', 'lateral', 'retreating')
+
+# 查找表曲线 → 决定分段的阈值属性（阈值变化后自动重建）
+LUT_THRESHOLDS = {
+    'distance': 'distance_thresholds',
+    'speed': 'speed_thresholds',
+    'angle': 'angle_thresholds'
+}
+
+
+class PiecewiseLUT:
+    """
+    分段隶属度曲线的查找表
+    
+    阈值处曲线不连续，所以每段单独均匀采样、不跨段插值。段内若仍有插值误差超过
+    LUT_SPLIT_TOLERANCE 的跳变或折点（例如 from_real_number 中 μ + ν > 1 时对ν的修正、
+    min/max截断），用二分法找到该点并在此处再拆分。查询时先按各段起点定位所在段，
+    段内均匀网格直接由坐标算出下标，再线性插值。
+    
+    right_closed为True时各段为 (b_i, b_i+1]（首段包含起点），否则为 [b_i, b_i+1)；
+    超出 [b_0, b_n] 的输入返回None/NaN（调用方改用精确计算）。
+    """
+    
+    def __init__(self, breakpoints: List[float], labels: Tuple[str, ...],
+                 exact: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                 resolution: float, right_closed: bool = True):
+        """
+        采样并校验查找表
+        
+        Args:
+            breakpoints: 递增的分段点 [b_0, ..., b_n]（相等的相邻分段点表示该段为空）
+            labels: 各段名称（n个）
+            exact: 精确计算的向量化函数 x → (mu, nu)
+            resolution: 采样间隔
+            right_closed: 分段区间的闭合方向
+        """
+        self.exact = exact
+        self.resolution = resolution
+        
+        pieces = []
+        for index, (lo, hi) in enumerate(zip(breakpoints[:-1], breakpoints[1:])):
+            if hi <= lo:
+                continue
+            # 开区间端点属于相邻段：网格坐标和采样点都取紧邻端点的段内值
+            if right_closed and pieces:
+                lo = np.nextafter(lo, np.inf)
+            if not right_closed and index < len(labels) - 1:
+                hi = np.nextafter(hi, -np.inf)
+            pieces.extend(self._sample(lo, hi, labels[index], 0))
+        
+        # 各段：起点、1/采样间隔、在拼接数组中的偏移、最后一个区间的段内下标、名称
+        self.starts = np.array([xs[0] for xs, _, _, _ in pieces])
+        self.end = float(pieces[-1][0][-1])
+        self.inverse_steps = np.array([(len(xs) - 1) / (xs[-1] - xs[0]) for xs, _, _, _ in pieces])
+        self.offsets = np.cumsum([0] + [len(xs) for xs, _, _, _ in pieces[:-1]])
+        self.last_intervals = np.array([len(xs) - 2 for xs, _, _, _ in pieces])
+        self.labels = [label for _, _, _, label in pieces]
+        self.mu = np.concatenate([mu for _, mu, _, _ in pieces])
+        self.nu = np.concatenate([nu for _, _, nu, _ in pieces])
+        self.samples = len(self.mu)
+        
+        # 标量查询使用的Python列表
+        self._pieces = [(float(start), float(inverse_step), int(offset), int(last), label)
+                        for start, inverse_step, offset, last, label in zip(
+                            self.starts, self.inverse_steps, self.offsets, self.last_intervals, self.labels)]
+        self._starts = self.starts.tolist()
+        self._mu = self.mu.tolist()
+        self._nu = self.nu.tolist()
+        
+        # 在每个采样区间内再取32个点，与精确计算比较得到最大误差
+        check_x = np.concatenate([np.linspace(xs[0], xs[-1], (len(xs) - 1) * 32 + 1)[1:-1]
+                                  for xs, _, _, _ in pieces])
+        exact_mu, exact_nu = exact(check_x)
+        lut_mu, lut_nu = self.lookup_batch(check_x)
+        self.max_error = float(max(np.max(np.abs(lut_mu - exact_mu), initial=0.0),
+                                   np.max(np.abs(lut_nu - exact_nu), initial=0.0)))
+    
+    def _sample(self, lo: float, hi: float, label: str, depth: int) -> list:
+        """
+        均匀采样 [lo, hi]，插值误差过大时在跳变/折点处拆分后分别采样
+        
+        Returns:
+            [(xs, mu, nu, 段名称), ...]
+        """
+        count = max(2, int(math.ceil((hi - lo) / self.resolution)) + 1)
+        xs = np.linspace(lo, hi, count)
+        mu, nu = (np.asarray(values, dtype=float) for values in self.exact(xs))
+        
+        if depth < LUT_MAX_SPLIT_DEPTH:
+            mid_mu, mid_nu = self.exact((xs[:-1] + xs[1:]) / 2)
+            error = np.maximum(np.abs(mid_mu - (mu[:-1] + mu[1:]) / 2), np.abs(mid_nu - (nu[:-1] + nu[1:]) / 2))
+            worst = int(np.argmax(error))
+            if error[worst] > LUT_SPLIT_TOLERANCE:
+                a, b = self._locate_break(xs[worst], xs[worst + 1])
+                return self._sample(lo, a, label, depth + 1) + self._sample(b, hi, label, depth + 1)
+        
+        return [(xs, mu, nu, label)]
+    
+    def _locate_break(self, a: float, b: float) -> Tuple[float, float]:
+        """二分法收缩到跳变/折点：每次保留线性插值误差较大的一半"""
+        while True:
+            m = (a + b) / 2
+            if not a < m < b:
+                return a, b
+            points = np.array([a, (a + m) / 2, m, (m + b) / 2, b])
+            mu, nu = self.exact(points)
+            left = max(abs(mu[1] - (mu[0] + mu[2]) / 2), abs(nu[1] - (nu[0] + nu[2]) / 2))
+            right = max(abs(mu[3] - (mu[2] + mu[4]) / 2), abs(nu[3] - (nu[2] + nu[4]) / 2))
+            if left >= right:
+                b = m
+            else:
+                a = m
+    
+    def lookup(self, x: float) -> Optional[Tuple[float, float, str]]:
+        """单个输入的查表，返回 (mu, nu, 段名称)，超出范围返回None"""
+        index = bisect.bisect_right(self._starts, x) - 1
+        if index < 0 or x > self.end:
+            return None
+        
+        start, inverse_step, offset, last, label = self._pieces[index]
+        position = (x - start) * inverse_step
+        j = int(position)
+        if j > last:
+            j = last
+        frac = position - j
+        j += offset
+        mu = self._mu
+        nu = self._nu
+        return mu[j] + (mu[j + 1] - mu[j]) * frac, nu[j] + (nu[j + 1] - nu[j]) * frac, label
+    
+    def lookup_batch(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        向量化查表
+        
+        Returns:
+            (mu, nu)，超出范围的位置为NaN
+        """
+        x = np.asarray(x, dtype=float)
+        index = np.searchsorted(self.starts, x, side='right') - 1
+        outside = (index < 0) | (x > self.end)
+        index[outside] = 0
+        
+        position = (x - self.starts[index]) * self.inverse_steps[index]
+        j = np.minimum(position.astype(np.intp), self.last_intervals[index])
+        frac = position - j
+        j += self.offsets[index]
+        mu = self.mu[j] + (self.mu[j + 1] - self.mu[j]) * frac
+        nu = self.nu[j] + (self.nu[j + 1] - self.nu[j]) * frac
+        mu[outside] = np.nan
+        nu[outside] = np.nan
+        return mu, nu
 
 
 class ThreatIndicators:
     """威胁指标评估类"""
     
-    def __init__(self):
-        """初始化指标参数"""
+    def __init__(self, lut_resolution: Dict[str, float] = None):
+        """
+        初始化指标参数
+        
+        Args:
+            lut_resolution: {曲线: 采样间隔}，只有列出的曲线（distance/speed/angle）使用查找表，
+                其余曲线精确计算；传入 DEFAULT_LUT_RESOLUTION 全部启用，None表示全部精确计算
+        """
         self.converter = IFSConverter()
         
         # 距离分段阈值（米）
@@ -51,26 +282,74 @@ class ThreatIndicators:
             'lateral': 150     # 侧向
         }
     
-    def evaluate_distance(self, distance: float) -> Dict:
+        # 查找表模式：{曲线: (构建时的阈值, 查找表)}，首次使用及阈值变化时构建
+        self.lut_resolution = dict(lut_resolution or {})
+        for curve in self.lut_resolution:
+            if curve not in LUT_THRESHOLDS:
+                raise ValueError(f"不支持查找表的曲线: {curve}")
+        self._luts = {}
+    
+    def _curve_lut(self, curve: str):
         """
-        指标1：目标距离评估
+        获取曲线的查找表（距离、角度为PiecewiseLUT，速度为 {阈值类型: PiecewiseLUT}）
         
-        论文方法：使用分段函数和高斯隶属度
-        - 距离越近，威胁越高
-        - 考虑不同距离段的威胁特性
+        与构建时的阈值不同（阈值被修改或替换）时重新构建。
+        """
+        thresholds = getattr(self, LUT_THRESHOLDS[curve])
+        entry = self._luts.get(curve)
+        if entry is None or entry[0] != thresholds:
+            entry = (copy.deepcopy(thresholds), self._build_lut(curve))
+            self._luts[curve] = entry
+        return entry[1]
+    
+    def _build_lut(self, curve: str):
+        """按当前阈值采样构建查找表"""
+        resolution = self.lut_resolution[curve]
+        if curve == 'distance':
+            t = self.distance_thresholds
+            return PiecewiseLUT([0.0, t['critical'], t['high'], t['medium'], max(DISTANCE_LUT_RANGE, t['medium'])],
+                                DISTANCE_ZONES, self._distance_batch_exact, resolution)
+        if curve == 'angle':
+            t = self.angle_thresholds
+            return PiecewiseLUT([0.0, t['direct'], t['oblique'], t['lateral'], 180.0],
+                                DIRECTION_CATEGORIES, self._angle_batch_exact, resolution)
         
-        Args:
-            distance: 目标距离（米）
+        # 速度：超过2倍高速阈值后隶属度不再变化，采样到该处为止；
+        # 中速阈值低于0.5时低速段为空（宽度为0的段不会被查到）
+        luts = {}
+        for enemy_type, t in self.speed_thresholds.items():
+            luts[enemy_type] = PiecewiseLUT(
+                [0.0, min(0.5, t['medium']), t['medium'], t['high'], 2 * t['high']], SPEED_CATEGORIES,
+                lambda speed, t=t: self._speed_batch_exact(speed, t['high'], t['medium']),
+                resolution, right_closed=False
+            )
+        return luts
+    
+    def lut_max_error(self) -> Dict[str, float]:
+        """
+        查找表模式相对精确计算的最大误差（μ、ν中较大者，在每个采样区间内取点校验）
         
         Returns:
-            {
-                'ifs': IFS对象,
-                'threat_score': float,
-                'threat_level': str,
-                'distance': float,
-                'zone': str  # 'critical', 'high', 'medium', 'low'
-            }
+            {曲线: float}，只包含启用查找表的曲线
+        """
+        errors = {}
+        for curve in self.lut_resolution:
+            lut = self._curve_lut(curve)
+            errors[curve] = max(t.max_error for t in lut.values()) if curve == 'speed' else lut.max_error
+        return errors
+    
+    def distance_ifs(self, distance: float) -> Tuple[IFS, str]:
+        """
+        指标1（目标距离）的IFS值，不生成评估详情
+        
+        Returns:
+            (IFS, 距离区域)
         """
+        if 'distance' in self.lut_resolution:
+            hit = self._curve_lut('distance').lookup(distance)
+            if hit is not None:
+                return IFS(mu=hit[0], nu=hit[1]), hit[2]
+        
         # 确定距离区域
         if distance <= self.distance_thresholds['critical']:
             zone = 'critical'
@@ -117,6 +396,30 @@ class ThreatIndicators:
             nu = min(0.8, 0.5 + (1 - decay_factor) * 0.3)
             ifs = IFS(mu=mu, nu=nu)
         
+        return ifs, zone
+    
+    def evaluate_distance(self, distance: float) -> Dict:
+        """
+        指标1：目标距离评估
+        
+        论文方法：使用分段函数和高斯隶属度
+        - 距离越近，威胁越高
+        - 考虑不同距离段的威胁特性
+        
+        Args:
+            distance: 目标距离（米）
+        
+        Returns:
+            {
+                'ifs': IFS对象,
+                'threat_score': float,
+                'threat_level': str,
+                'distance': float,
+                'zone': str  # 'critical', 'high', 'medium', 'low'
+            }
+        """
+        ifs, zone = self.distance_ifs(distance)
+        
         threat_score = ifs.score()
         
         # 确定威胁等级
@@ -138,27 +441,19 @@ class ThreatIndicators:
             'description': f"{zone}区域，距离{distance:.1f}米"
         }
     
-    def evaluate_speed(self, speed: float, enemy_type: str) -> Dict:
+    def speed_ifs(self, speed: float, enemy_type: str) -> Tuple[IFS, str]:
         """
-        指标2：目标速度评估
-        
-        论文方法：考虑目标类型和移动速度
-        - 高速运动 → 可能是攻击意图 → 高威胁
-        - 低速/静止 → 可能是巡逻/防守 → 低威胁
-        
-        Args:
-            speed: 移动速度（m/s）
-            enemy_type: 敌人类型 ('soldier' 或 'drone')
+        指标2（目标速度）的IFS值，不生成评估详情
         
         Returns:
-            {
-                'ifs': IFS对象,
-                'threat_score': float,
-                'threat_level': str,
-                'speed': float,
-                'speed_category': str
-            }
+            (IFS, 速度等级)
         """
+        if 'speed' in self.lut_resolution:
+            luts = self._curve_lut('speed')
+            hit = luts.get(enemy_type, luts['soldier']).lookup(speed)
+            if hit is not None:
+                return IFS(mu=hit[0], nu=hit[1]), hit[2]
+        
         # 获取对应类型的速度阈值
         thresholds = self.speed_thresholds.get(enemy_type, self.speed_thresholds['soldier'])
         
@@ -195,6 +490,31 @@ class ThreatIndicators:
             # 静止/极慢：低威胁但有不确定性（可能是埋伏）
             ifs = IFS(mu=0.25, nu=0.50)  # 保留较高的犹豫度
         
+        return ifs, speed_category
+    
+    def evaluate_speed(self, speed: float, enemy_type: str) -> Dict:
+        """
+        指标2：目标速度评估
+        
+        论文方法：考虑目标类型和移动速度
+        - 高速运动 → 可能是攻击意图 → 高威胁
+        - 低速/静止 → 可能是巡逻/防守 → 低威胁
+        
+        Args:
+            speed: 移动速度（m/s）
+            enemy_type: 敌人类型 ('soldier' 或 'drone')
+        
+        Returns:
+            {
+                'ifs': IFS对象,
+                'threat_score': float,
+                'threat_level': str,
+                'speed': float,
+                'speed_category': str
+            }
+        """
+        ifs, speed_category = self.speed_ifs(speed, enemy_type)
+        
         threat_score = ifs.score()
         
         # 确定威胁等级
@@ -215,30 +535,14 @@ class ThreatIndicators:
             'description': f"{speed_category}，{speed:.1f}m/s"
         }
     
-    def evaluate_attack_angle(self, enemy_direction: float, 
-                             enemy_pos: Tuple[float, float],
-                             player_pos: Tuple[float, float] = (0, 0)) -> Dict:
+    def attack_angle_ifs(self, enemy_direction: float,
+                         enemy_pos: Tuple[float, float],
+                         player_pos: Tuple[float, float] = (0, 0)) -> Tuple[IFS, str, float, float]:
         """
-        指标3：攻击角度评估
-        
-        论文方法：分析敌人移动方向与玩家位置的关系
-        - 敌人朝向玩家 → 高威胁（可能是进攻）
-        - 敌人背向玩家 → 低威胁（可能是撤退）
-        
-        Args:
-            enemy_direction: 敌人移动方向（度，0-360）
-            enemy_pos: 敌人位置 (x, z)
-            player_pos: 玩家位置 (x, z)，默认(0, 0)
+        指标3（攻击角度）的IFS值，不生成评估详情
         
         Returns:
-            {
-                'ifs': IFS对象,
-                'threat_score': float,
-                'threat_level': str,
-                'angle_to_player': float,
-                'angle_diff': float,
-                'direction_category': str
-            }
+            (IFS, 方向类别, 朝向玩家的方位角, 角度差)
         """
         # 计算从敌人到玩家的方位角
         dx = player_pos[0] - enemy_pos[0]
@@ -252,6 +556,11 @@ class ThreatIndicators:
         # 计算角度差（敌人移动方向与朝向玩家方向的夹角）
         angle_diff = abs((enemy_direction - angle_to_player + 180) % 360 - 180)
         
+        if 'angle' in self.lut_resolution:
+            hit = self._curve_lut('angle').lookup(angle_diff)
+            if hit is not None:
+                return IFS(mu=hit[0], nu=hit[1]), hit[2], angle_to_player, angle_diff
+        
         # 根据角度差评估威胁
         if angle_diff <= self.angle_thresholds['direct']:
             direction_category = 'approaching'  # 正面接近
@@ -288,6 +597,35 @@ class ThreatIndicators:
             nu = 0.6 + 0.2 * retreat_factor
             ifs = IFS(mu=mu, nu=nu)
         
+        return ifs, direction_category, angle_to_player, angle_diff
+    
+    def evaluate_attack_angle(self, enemy_direction: float, 
+                             enemy_pos: Tuple[float, float],
+                             player_pos: Tuple[float, float] = (0, 0)) -> Dict:
+        """
+        指标3：攻击角度评估
+        
+        论文方法：分析敌人移动方向与玩家位置的关系
+        - 敌人朝向玩家 → 高威胁（可能是进攻）
+        - 敌人背向玩家 → 低威胁（可能是撤退）
+        
+        Args:
+            enemy_direction: 敌人移动方向（度，0-360）
+            enemy_pos: 敌人位置 (x, z)
+            player_pos: 玩家位置 (x, z)，默认(0, 0)
+        
+        Returns:
+            {
+                'ifs': IFS对象,
+                'threat_score': float,
+                'threat_level': str,
+                'angle_to_player': float,
+                'angle_diff': float,
+                'direction_category': str
+            }
+        """
+        ifs, direction_category, angle_to_player, angle_diff = self.attack_angle_ifs(enemy_direction, enemy_pos, player_pos)
+        
         threat_score = ifs.score()
         
         # 确定威胁等级
@@ -308,6 +646,10 @@ class ThreatIndicators:
             'description': f"{direction_category}，角度差{angle_diff:.1f}°"
         }
     
+    def target_type_ifs(self, enemy_type: str) -> IFS:
+        """指标4（目标类型）的IFS值（共享的不可变常量），不生成评估详情"""
+        return TARGET_TYPE_TABLE.get(enemy_type.lower().strip(), UNKNOWN_TARGET_TYPE)['ifs']
+    
     def evaluate_target_type(self, enemy_type: str) -> Dict:
         """
         指标4：目标类型评估
@@ -328,33 +670,8 @@ class ThreatIndicators:
                 'type_name': str
             }
         """
-        enemy_type_lower = enemy_type.lower().strip()
-        
-        # 根据类型分配IFS值（基于战斗力和生存能力）
-        type_mapping = {
-            'drone': {
-                'ifs': IFS(0.60, 0.30),  # 无人机：中等威胁
-                'name': '敌军无人机',
-                'level': 'medium'
-            },
-            'soldier': {
-                'ifs': IFS(0.60, 0.30),  # 士兵：中等威胁
-                'name': '士兵',
-                'level': 'medium'
-            },
-            'armed_personnel': {
-                'ifs': IFS(0.50, 0.40),  # 武装人员：中低威胁
-                'name': '武装人员',
-                'level': 'medium'
-            }
-        }
-        
         # 获取类型信息
-        type_info = type_mapping.get(enemy_type_lower, {
-            'ifs': IFS(0.55, 0.35),  # 默认：中等威胁
-            'name': '未知类型',
-            'level': 'medium'
-        })
+        type_info = TARGET_TYPE_TABLE.get(enemy_type.lower().strip(), UNKNOWN_TARGET_TYPE)
         
         ifs = type_info['ifs']
         threat_score = ifs.score()
@@ -368,29 +685,14 @@ class ThreatIndicators:
             'description': f"{type_info['name']}({type_info['level']}威胁)"
         }
     
-    def evaluate_visibility(self, is_blocked: bool, 
-                           blocking_count: int = 0,
-                           visibility_ratio: float = None) -> Dict:
+    def visibility_ifs(self, is_blocked: bool,
+                       blocking_count: int = 0,
+                       visibility_ratio: float = None) -> Tuple[IFS, str, float]:
         """
-        指标5：通视条件评估
-        
-        论文方法：考虑射线遮挡情况
-        - 无遮挡：清晰可见 → 高威胁（易被发现和打击）
-        - 有遮挡：视线受阻 → 低威胁但不确定性高
-        
-        Args:
-            is_blocked: 是否被遮挡
-            blocking_count: 遮挡物数量
-            visibility_ratio: 可见度比例 [0, 1]，None表示完全可见或完全遮挡
+        指标5（通视条件）的IFS值，不生成评估详情
         
         Returns:
-            {
-                'ifs': IFS对象,
-                'threat_score': float,
-                'threat_level': str,
-                'is_blocked': bool,
-                'visibility_ratio': float
-            }
+            (IFS, 威胁等级, 可见度)
         """
         if visibility_ratio is not None:
             # 使用精确的可见度比例
@@ -422,6 +724,34 @@ class ThreatIndicators:
             ifs = IFS(mu=mu, nu=nu)  # 保持较高犹豫度
             threat_level = 'low'
         
+        return ifs, threat_level, vis
+    
+    def evaluate_visibility(self, is_blocked: bool, 
+                           blocking_count: int = 0,
+                           visibility_ratio: float = None) -> Dict:
+        """
+        指标5：通视条件评估
+        
+        论文方法：考虑射线遮挡情况
+        - 无遮挡：清晰可见 → 高威胁（易被发现和打击）
+        - 有遮挡：视线受阻 → 低威胁但不确定性高
+        
+        Args:
+            is_blocked: 是否被遮挡
+            blocking_count: 遮挡物数量
+            visibility_ratio: 可见度比例 [0, 1]，None表示完全可见或完全遮挡
+        
+        Returns:
+            {
+                'ifs': IFS对象,
+                'threat_score': float,
+                'threat_level': str,
+                'is_blocked': bool,
+                'visibility_ratio': float
+            }
+        """
+        ifs, threat_level, vis = self.visibility_ifs(is_blocked, blocking_count, visibility_ratio)
+        
         threat_score = ifs.score()
         
         return {
@@ -434,29 +764,14 @@ class ThreatIndicators:
             'description': f"{'遮挡' if is_blocked else '无遮挡'}，可见度{vis*100:.0f}%"
         }
     
-    def evaluate_environment(self, obstacle_density: float,
-                            building_density: float = 0.0,
-                            complexity_level: str = None) -> Dict:
+    def environment_ifs(self, obstacle_density: float,
+                        building_density: float = 0.0,
+                        complexity_level: str = None) -> Tuple[IFS, str, float, str]:
         """
-        指标6：作战环境评估
-        
-        论文方法：分析目标周围的环境复杂度
-        - 开阔地带：敌人易暴露 → 高威胁（对我方有利）
-        - 复杂地形：掩体多，难预测 → 中低威胁但不确定性高
-        
-        Args:
-            obstacle_density: 障碍物密度 [0, 1]
-            building_density: 建筑物密度 [0, 1]
-            complexity_level: 复杂度等级 ('open', 'moderate', 'complex')
+        指标6（作战环境）的IFS值，不生成评估详情
         
         Returns:
-            {
-                'ifs': IFS对象,
-                'threat_score': float,
-                'threat_level': str,
-                'obstacle_density': float,
-                'complexity_level': str
-            }
+            (IFS, 威胁等级, 综合密度, 复杂度等级)
         """
         # 计算综合环境复杂度
         total_density = (obstacle_density + building_density) / 2.0
@@ -491,6 +806,34 @@ class ThreatIndicators:
             ifs = IFS(mu=mu, nu=nu)  # 犹豫度较高
             threat_level = 'low'
         
+        return ifs, threat_level, total_density, complexity_level
+    
+    def evaluate_environment(self, obstacle_density: float,
+                            building_density: float = 0.0,
+                            complexity_level: str = None) -> Dict:
+        """
+        指标6：作战环境评估
+        
+        论文方法：分析目标周围的环境复杂度
+        - 开阔地带：敌人易暴露 → 高威胁（对我方有利）
+        - 复杂地形：掩体多，难预测 → 中低威胁但不确定性高
+        
+        Args:
+            obstacle_density: 障碍物密度 [0, 1]
+            building_density: 建筑物密度 [0, 1]
+            complexity_level: 复杂度等级 ('open', 'moderate', 'complex')
+        
+        Returns:
+            {
+                'ifs': IFS对象,
+                'threat_score': float,
+                'threat_level': str,
+                'obstacle_density': float,
+                'complexity_level': str
+            }
+        """
+        ifs, threat_level, total_density, complexity_level = self.environment_ifs(obstacle_density, building_density, complexity_level)
+        
         threat_score = ifs.score()
         
         return {
@@ -504,6 +847,158 @@ class ThreatIndicators:
             'description': f"{complexity_level}环境，密度{total_density*100:.0f}%"
         }
 
+    def best_case_scores(self) -> Dict[str, float]:
+        """
+        攻击角度、通视条件、作战环境三个指标可能取到的最高得分（剪枝搜索的乐观上界）
+        
+        分别对应：正对玩家移动、无遮挡（可见度比例不超过1）、零密度开阔地带。
+        这三个指标依赖朝向计算或地形分析，其余指标只需敌人自身字段即可直接计算。
+        
+        Returns:
+            {'angle': float, 'visibility': float, 'environment': float}
+        """
+        return {
+            'angle': self.attack_angle_ifs(180.0, (1.0, 0.0), (0.0, 0.0))[0].score(),
+            'visibility': self.visibility_ifs(False, 0, 1.0)[0].score(),
+            'environment': self.environment_ifs(0.0, 0.0, 'open')[0].score()
+        }
+    
+    # ------------------------------------------------------------------
+    # 批量（向量化）评估：输入为列数组，返回 (mu, nu) 数组，
+    # 与逐个调用对应的 evaluate_* 方法得到的IFS一致
+    # ------------------------------------------------------------------
+    
+    def evaluate_distance_batch(self, distance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标1：目标距离评估（向量化）"""
+        if 'distance' in self.lut_resolution:
+            return self._lut_batch(self._curve_lut('distance'), distance, self._distance_batch_exact)
+        return self._distance_batch_exact(distance)
+    
+    def _distance_batch_exact(self, distance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标1的精确向量化计算"""
+        critical = self.distance_thresholds['critical']
+        high = self.distance_thresholds['high']
+        medium = self.distance_thresholds['medium']
+        
+        mu1, nu1 = IFSConverter.from_real_numbers(distance, 0, 5, 0, critical)
+        mu1, nu1 = normalize_ifs_arrays(np.minimum(0.95, mu1 + 0.15), np.maximum(0.02, nu1 - 0.1))
+        
+        mu2, nu2 = IFSConverter.from_real_numbers(distance, critical, 5, critical, high)
+        mu2, nu2 = normalize_ifs_arrays(np.minimum(0.85, mu2 + 0.1), np.maximum(0.05, nu2 - 0.05))
+        
+        mu3, nu3 = IFSConverter.from_real_numbers(distance, high, 7, high, medium)
+        
+        decay_factor = np.exp(-(distance - medium) / 15)
+        mu4, nu4 = normalize_ifs_arrays(np.maximum(0.1, 0.4 * decay_factor),
+                                        np.minimum(0.8, 0.5 + (1 - decay_factor) * 0.3))
+        
+        zones = [distance <= critical, distance <= high, distance <= medium]
+        return np.select(zones, [mu1, mu2, mu3], mu4), np.select(zones, [nu1, nu2, nu3], nu4)
+    
+    def evaluate_speed_batch(self, speed: np.ndarray, type_code: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标2：目标速度评估（向量化，无人机使用无人机速度阈值，其余类型使用士兵阈值）"""
+        is_drone = type_code == TYPE_CODE_DRONE
+        if 'speed' in self.lut_resolution:
+            luts = self._curve_lut('speed')
+            mu = np.empty(np.shape(speed))
+            nu = np.empty(np.shape(speed))
+            for enemy_type, mask in (('drone', is_drone), ('soldier', ~is_drone)):
+                t = self.speed_thresholds[enemy_type]
+                mu[mask], nu[mask] = self._lut_batch(
+                    luts[enemy_type], speed[mask],
+                    lambda values, t=t: self._speed_batch_exact(values, t['high'], t['medium']))
+            return mu, nu
+        
+        high = np.where(is_drone, self.speed_thresholds['drone']['high'], self.speed_thresholds['soldier']['high'])
+        medium = np.where(is_drone, self.speed_thresholds['drone']['medium'], self.speed_thresholds['soldier']['medium'])
+        return self._speed_batch_exact(speed, high, medium)
+        
+    def _speed_batch_exact(self, speed: np.ndarray, high, medium) -> Tuple[np.ndarray, np.ndarray]:
+        """指标2的精确向量化计算（high/medium为标量或与speed等长的阈值数组）"""
+        excess_ratio = np.minimum(2.0, speed / high)
+        mu1 = np.minimum(0.9, 0.65 + 0.25 * (excess_ratio - 1))
+        nu1 = np.maximum(0.05, 0.25 - 0.2 * (excess_ratio - 1))
+        
+        mu2, nu2 = IFSConverter.from_real_numbers(speed, high, medium, 0, high * 1.5)
+        
+        mu3 = 0.3 + 0.2 * (speed / medium)
+        nu3 = 0.6 - 0.3 * (speed / medium)
+        
+        categories = [speed >= high, speed >= medium, speed >= 0.5]
+        return normalize_ifs_arrays(np.select(categories, [mu1, mu2, mu3], 0.25),
+                                    np.select(categories, [nu1, nu2, nu3], 0.50))
+    
+    def evaluate_attack_angle_batch(self, enemy_direction: np.ndarray, enemy_x: np.ndarray,
+                                    enemy_z: np.ndarray,
+                                    player_pos: Tuple[float, float] = (0, 0)) -> Tuple[np.ndarray, np.ndarray]:
+        """指标3：攻击角度评估（向量化）"""
+        angle_to_player = np.degrees(np.arctan2(player_pos[1] - enemy_z, player_pos[0] - enemy_x))
+        angle_to_player = np.where(angle_to_player < 0, angle_to_player + 360, angle_to_player)
+        angle_diff = np.abs(np.mod(enemy_direction - angle_to_player + 180, 360) - 180)
+        
+        if 'angle' in self.lut_resolution:
+            return self._lut_batch(self._curve_lut('angle'), angle_diff, self._angle_batch_exact)
+        return self._angle_batch_exact(angle_diff)
+    
+    def _angle_batch_exact(self, angle_diff: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标3的精确向量化计算（输入为角度差，0~180度）"""
+        direct = self.angle_thresholds['direct']
+        oblique = self.angle_thresholds['oblique']
+        lateral = self.angle_thresholds['lateral']
+        
+        r1 = angle_diff / direct
+        r2 = (angle_diff - direct) / (oblique - direct)
+        r3 = (angle_diff - oblique) / (lateral - oblique)
+        r4 = (angle_diff - lateral) / (180 - lateral)
+        
+        categories = [angle_diff <= direct, angle_diff <= oblique, angle_diff <= lateral]
+        mu = np.select(categories, [0.95 - 0.15 * r1, 0.8 - 0.3 * r2, 0.5 - 0.2 * r3], 0.3 - 0.2 * r4)
+        nu = np.select(categories, [0.02 + 0.08 * r1, 0.1 + 0.3 * r2, 0.4 + 0.2 * r3], 0.6 + 0.2 * r4)
+        return normalize_ifs_arrays(mu, nu)
+    
+    @staticmethod
+    def _lut_batch(lut: PiecewiseLUT, values: np.ndarray,
+                   exact: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """向量化查表，超出查找表范围的输入改用精确计算"""
+        mu, nu = lut.lookup_batch(values)
+        outside = np.isnan(mu)
+        if outside.any():
+            mu[outside], nu[outside] = exact(values[outside])
+        return mu, nu
+    
+    def evaluate_target_type_batch(self, type_code: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标4：目标类型评估（向量化，type_code见TYPE_NAMES）"""
+        table = [TARGET_TYPE_TABLE[name]['ifs'] for name in TYPE_NAMES] + [UNKNOWN_TARGET_TYPE['ifs']]
+        mu_table = np.array([ifs.mu for ifs in table])
+        nu_table = np.array([ifs.nu for ifs in table])
+        codes = np.minimum(type_code, TYPE_CODE_UNKNOWN)
+        return mu_table[codes], nu_table[codes]
+    
+    def evaluate_visibility_batch(self, is_blocked: np.ndarray, blocking_count: np.ndarray,
+                                  visibility_ratio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标5：通视条件评估（向量化，visibility_ratio为NaN表示未给出）"""
+        vis = np.where(np.isnan(visibility_ratio), np.where(is_blocked, 0.0, 1.0), visibility_ratio)
+        
+        uncertainty_factor = np.minimum(0.3, 0.1 + blocking_count * 0.05)
+        categories = [~is_blocked | (vis > 0.7), vis > 0.3]
+        mu = np.select(categories, [0.85 - 0.1 * (1 - vis), 0.45 + 0.25 * vis], 0.30 - uncertainty_factor)
+        nu = np.select(categories, [0.10 + 0.1 * (1 - vis), 0.35 - 0.15 * vis], 0.50)
+        return normalize_ifs_arrays(mu, nu)
+    
+    def evaluate_environment_batch(self, obstacle_density: np.ndarray, building_density: np.ndarray,
+                                   complexity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """指标6：作战环境评估（向量化，complexity见COMPLEXITY_NAMES，COMPLEXITY_AUTO按密度判断）"""
+        total_density = (obstacle_density + building_density) / 2.0
+        auto = np.select([total_density < 0.3, total_density < 0.6], [0, 1], 2)
+        complexity = np.where(complexity == COMPLEXITY_AUTO, auto, complexity)
+        
+        categories = [complexity == 0, complexity == 1]
+        mu = np.select(categories, [0.70 - 0.2 * total_density, 0.50 - 0.1 * (total_density - 0.3)],
+                       0.40 - 0.15 * total_density)
+        nu = np.select(categories, [0.20 + 0.1 * total_density, 0.35 + 0.1 * (total_density - 0.3)],
+                       0.30 + 0.1 * total_density)
+        return normalize_ifs_arrays(mu, nu)
+
 
 if __name__ == "__main__":
     # 测试代码
@@ -0,0 +1,257 @@
+"""
+多权重方案评估模块
+
+分析人员需要比较几十组指标权重下的威胁排序，并做权重敏感性分析。六个指标的
+IFS值与权重无关，每帧只需计算一次 N×6 指标矩阵；IFWA是线性的，K组权重可以
+写成 K×6 权重矩阵，一次矩阵乘法得到全部 N×K 综合IFS，不必为每组权重新建
+评估器再重新评估。
+
+WeightProfileEvaluator 返回每组权重下的排序，以及相对基准权重的排名翻转统计：
+哪些目标的名次随权重变化、每组权重改变了多少目标的名次、最高威胁目标是否稳定。
+"""
+
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .ifs_core import AGGREGATION_IFWA, IFSArray
+from .threat_evaluator import INDICATOR_NAMES, IFSThreatEvaluator
+
+# 不指定基准权重方案时，以评估器当前权重作为基准，其名称为：
+CURRENT_PROFILE = 'current'
+
+
+def weight_matrix(profiles: Union[Dict[str, Dict[str, float]], Sequence]) -> Tuple[List[str], np.ndarray]:
+    """
+    权重方案 → (方案名称列表, K×6 归一化权重矩阵)
+    
+    Args:
+        profiles: {方案名: 权重字典}，或权重字典/长度为6的数组组成的序列（名称为下标字符串）；
+            权重字典中未给出的指标权重为0
+    
+    Returns:
+        (names, weights)，weights的列顺序见INDICATOR_NAMES
+    """
+    if isinstance(profiles, dict):
+        names, rows = list(profiles.keys()), list(profiles.values())
+    else:
+        rows = list(profiles)
+        names = [str(k) for k in range(len(rows))]
+    
+    matrix = np.zeros((len(rows), len(INDICATOR_NAMES)))
+    for k, row in enumerate(rows):
+        if isinstance(row, dict):
+            unknown = set(row) - set(INDICATOR_NAMES)
+            if unknown:
+                raise ValueError(f"未知的指标: {sorted(unknown)}")
+            matrix[k] = [row.get(name, 0.0) for name in INDICATOR_NAMES]
+        else:
+            matrix[k] = row
+    
+    weight_sum = matrix.sum(axis=1)
+    if np.any(weight_sum == 0):
+        raise ValueError("权重和不能为0")
+    return names, matrix / weight_sum[:, None]
+
+
+def sweep_profiles(weights: Dict[str, float], indicator: str,
+                   values: Sequence[float]) -> Dict[str, Dict[str, float]]:
+    """
+    单指标权重敏感性扫描：依次把indicator的权重设为values中的值，其余指标按原比例分配剩余权重
+    
+    Args:
+        weights: 基准权重字典
+        indicator: 扫描的指标名
+        values: 该指标的权重取值（0~1）
+    
+    Returns:
+        {'<indicator>=<value>': 权重字典}，可直接传给 WeightProfileEvaluator.evaluate
+    """
+    if indicator not in INDICATOR_NAMES:
+        raise ValueError(f"未知的指标: {indicator}")
+    others = {name: w for name, w in weights.items() if name != indicator}
+    others_sum = sum(others.values())
+    
+    profiles = {}
+    for value in values:
+        profile = {name: w / others_sum * (1.0 - value) for name, w in others.items()} if others_sum else {}
+        profile[indicator] = value
+        profiles[f"{indicator}={value:g}"] = profile
+    return profiles
+
+
+class WeightProfileEvaluator:
+    """
+    在多组权重下同时评估一帧数据
+    
+    指标矩阵由 IFSThreatEvaluator.indicator_matrix 计算一次，聚合由
+    IFSArray.weighted_average_profiles 一次矩阵乘法完成。评估器使用其他聚合算子时
+    （见 IFSThreatEvaluator.aggregate_batch）逐组整批聚合，权重为0的指标不参与聚合。
+    每组权重下的排序与用该权重新建评估器调用 rank_targets 一致（按得分降序，同分保持输入顺序）。
+    """
+    
+    def __init__(self, evaluator: IFSThreatEvaluator = None):
+        """
+        初始化多权重评估器
+        
+        Args:
+            evaluator: 用于计算指标矩阵的评估器（默认新建），其当前权重作为默认基准
+        """
+        self.evaluator = evaluator or IFSThreatEvaluator()
+    
+    def evaluate(self,
+                 enemies: List[Dict],
+                 profiles: Union[Dict[str, Dict[str, float]], Sequence],
+                 player_pos: Tuple[float, float] = (0, 0),
+                 terrain_data: Dict = None,
+                 baseline: str = None) -> Dict:
+        """
+        计算每组权重下的得分和排序，以及相对基准的排名翻转统计
+        
+        Args:
+            enemies: 敌人列表
+            profiles: 权重方案（格式见 weight_matrix）
+            player_pos: 玩家位置
+            terrain_data: 地形数据（可选）
+            baseline: 作为基准的方案名称；None表示评估器当前权重（名称为CURRENT_PROFILE）
+        
+        Returns:
+            {
+                'profile_names': [K个方案名],
+                'enemy_ids': [N个敌人ID],
+                'weights': K×6 归一化权重矩阵,
+                'indicators': N×6 指标IFSArray,
+                'scores', 'mu', 'nu': K×N 数组,
+                'ranks': K×N 名次（从1开始，ranks[k, i]为第i个敌人在方案k下的名次）,
+                'rankings': {方案名: 按威胁度降序的敌人ID列表},
+                'rank_flips': 排名翻转统计（见 rank_flip_statistics）
+            }
+        """
+        names, weights = weight_matrix(profiles)
+        if baseline is not None and baseline not in names:
+            raise ValueError(f"未知的基准权重方案: {baseline}")
+        
+        indicators = self.evaluator.indicator_matrix(enemies, player_pos, terrain_data)
+        enemy_ids = [enemy['id'] for enemy in enemies]
+        
+        # 基准为当前权重时作为额外一行参与同一次矩阵乘法
+        if baseline is None:
+            _, current = weight_matrix([[self.evaluator.weights.get(name, 0.0) for name in INDICATOR_NAMES]])
+            all_weights = np.vstack([weights, current])
+        else:
+            all_weights = weights
+        if self.evaluator.aggregation_operator == AGGREGATION_IFWA:
+            comprehensive = indicators.weighted_average_profiles(all_weights)
+        else:
+            columns = [self.evaluator.aggregate_batch(indicators, {name: w for name, w in zip(INDICATOR_NAMES, row)
+                                                                   if w > 0})
+                       for row in all_weights.tolist()]
+            comprehensive = IFSArray(np.stack([c.mu for c in columns], axis=-1),
+                                     np.stack([c.nu for c in columns], axis=-1))
+        scores = comprehensive.score().T
+        
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(enemies) + 1)[None, :], axis=1)
+        
+        k = len(names)
+        if baseline is None:
+            baseline_name, baseline_ranks = CURRENT_PROFILE, ranks[k]
+        else:
+            baseline_name, baseline_ranks = baseline, ranks[names.index(baseline)]
+        
+        return {
+            'profile_names': names,
+            'enemy_ids': enemy_ids,
+            'weights': weights,
+            'indicators': indicators,
+            'scores': scores[:k],
+            'mu': comprehensive.mu.T[:k],
+            'nu': comprehensive.nu.T[:k],
+            'ranks': ranks[:k],
+            'rankings': {name: [enemy_ids[i] for i in order[row].tolist()] for row, name in enumerate(names)},
+            'rank_flips': rank_flip_statistics(ranks[:k], baseline_ranks, names, enemy_ids, baseline_name)
+        }
+
+
+def rank_flip_statistics(ranks: np.ndarray, baseline_ranks: np.ndarray, profile_names: List[str],
+                         enemy_ids: List, baseline: str = CURRENT_PROFILE) -> Dict:
+    """
+    各方案相对基准排序的名次变化统计
+    
+    Args:
+        ranks: K×N 名次矩阵（从1开始）
+        baseline_ranks: 基准排序下N个敌人的名次
+        profile_names: K个方案名
+        enemy_ids: N个敌人ID
+        baseline: 基准方案名称
+    
+    Returns:
+        {
+            'baseline': 基准方案名称,
+            'baseline_ranking': 基准排序的敌人ID列表,
+            'flip_rate': 名次与基准不同的（方案, 目标）比例,
+            'stable_top': 所有方案的最高威胁目标是否都与基准相同,
+            'top_targets': {敌人ID: 作为最高威胁目标的方案数},
+            'targets': {敌人ID: {'baseline_rank', 'best_rank', 'worst_rank', 'rank_range',
+                                 'mean_rank', 'changed_profiles'}}（按名次变化范围从大到小）,
+            'profiles': {方案名: {'top_target', 'top_changed', 'changed_targets',
+                                  'max_displacement', 'spearman'}}
+        }
+    """
+    k, n = ranks.shape
+    baseline_ranking = [enemy_ids[i] for i in np.argsort(baseline_ranks, kind='stable').tolist()]
+    if n == 0:
+        return {'baseline': baseline, 'baseline_ranking': [], 'flip_rate': 0.0, 'stable_top': True,
+                'top_targets': {}, 'targets': {}, 'profiles': {name: {} for name in profile_names}}
+    
+    changed = ranks != baseline_ranks[None, :]
+    displacement = np.abs(ranks - baseline_ranks[None, :])
+    # Spearman等级相关系数（无并列名次）：1 - 6Σd² / (n(n²-1))
+    if n > 1:
+        spearman = 1.0 - 6.0 * (displacement.astype(float) ** 2).sum(axis=1) / (n * (n * n - 1))
+    else:
+        spearman = np.ones(k)
+    
+    top_index = np.argmin(ranks, axis=1)
+    baseline_top = int(np.argmin(baseline_ranks))
+    top_targets = {}
+    for index in top_index.tolist():
+        top_targets[enemy_ids[index]] = top_targets.get(enemy_ids[index], 0) + 1
+    
+    profiles = {}
+    for row, name in enumerate(profile_names):
+        profiles[name] = {
+            'top_target': enemy_ids[int(top_index[row])],
+            'top_changed': int(top_index[row]) != baseline_top,
+            'changed_targets': int(changed[row].sum()),
+            'max_displacement': int(displacement[row].max()),
+            'spearman': float(spearman[row])
+        }
+    
+    targets = {}
+    if k:
+        best, worst = ranks.min(axis=0), ranks.max(axis=0)
+        mean, changed_profiles = ranks.mean(axis=0), changed.sum(axis=0)
+    else:
+        best = worst = mean = baseline_ranks
+        changed_profiles = np.zeros(n, dtype=int)
+    for i in sorted(range(n), key=lambda i: (-(worst[i] - best[i]), baseline_ranks[i])):
+        targets[enemy_ids[i]] = {
+            'baseline_rank': int(baseline_ranks[i]),
+            'best_rank': int(best[i]),
+            'worst_rank': int(worst[i]),
+            'rank_range': int(worst[i] - best[i]),
+            'mean_rank': float(mean[i]),
+            'changed_profiles': int(changed_profiles[i])
+        }
+    
+    return {
+        'baseline': baseline,
+        'baseline_ranking': baseline_ranking,
+        'flip_rate': float(changed.mean()) if k else 0.0,
+        'stable_top': bool(np.all(top_index == baseline_top)),
+        'top_targets': top_targets,
+        'targets': targets,
+        'profiles': profiles
+    }
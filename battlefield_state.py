@@ -0,0 +1,264 @@
+"""服务器端战场状态模块：增量（delta）数据帧
+
+Unity每个round都重发全部目标的全部字段，即使只有少数目标移动。
+增量帧只携带相对某个基准round新增、删除和变化的目标：
+
+    {
+        "frameType": "delta",
+        "round": 12,
+        "baseRound": 11,
+        "playerPosition": {"x": ..., "y": ..., "z": ...},
+        "added":   [完整的目标字典, ...],
+        "changed": [{"id": 3, "position": {...}, "distance": 8.5}, ...],   # 只含变化的字段
+        "removed": [5, 7],
+        "situationAwareness": false
+    }
+
+没有 frameType（或为 "keyframe"）的数据帧是关键帧，携带全部目标，会重置状态。
+服务器为每个发送方保存一份权威目标表；增量帧的 baseRound 与表中最后一个round
+不一致（序号缺口）时无法应用，丢弃该帧并请求客户端发送关键帧。
+
+状态按发送方地址区分：二进制关键帧不含sessionId，关键帧（JSON或二进制）和增量帧
+统一使用地址作为键，才能互相作为基准。长时间没有数据的发送方会被移除。
+"""
+import dataclasses
+import logging
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+from models import GameData, Position, Target
+
+logger = logging.getLogger(__name__)
+
+# 增量帧类型标识
+FRAME_TYPE_DELTA = "delta"
+FRAME_TYPE_KEYFRAME = "keyframe"
+
+# 可以出现在 changed 条目中的字段
+_CHANGEABLE_FIELDS = ('angle', 'distance', 'type', 'speed', 'direction')
+
+
+def is_delta_frame(data: dict) -> bool:
+    """判断JSON数据帧是否为增量帧"""
+    return data.get('frameType') == FRAME_TYPE_DELTA
+
+
+def _target_from_dict(target_data: dict) -> Target:
+    """从完整的目标字典创建Target（字段含义与GameData.from_dict相同）"""
+    velocity = None
+    if target_data.get('velocity'):
+        velocity = Position(**target_data['velocity'])
+    return Target(
+        id=target_data['id'],
+        angle=target_data['angle'],
+        distance=target_data['distance'],
+        type=target_data['type'],
+        position=Position(**target_data['position']),
+        speed=target_data.get('speed', 0.0),
+        direction=target_data.get('direction', 0.0),
+        velocity=velocity
+    )
+
+
+class DeltaError(ValueError):
+    """增量帧无法应用（序号缺口或引用了未知目标）"""
+
+
+class BattlefieldState:
+    """单个发送方的权威目标表"""
+    
+    def __init__(self):
+        self.round: Optional[int] = None
+        self.session_id: Optional[str] = None
+        self.last_seen = time.monotonic()
+        self._keyframe_targets = None
+        self._table: Optional[Dict[int, Target]] = None
+    
+    @property
+    def synchronized(self) -> bool:
+        """是否有可用的基准状态（收到关键帧且之后没有出现缺口）"""
+        return self.round is not None
+    
+    def apply_keyframe(self, game_data: GameData):
+        """
+        用关键帧重置状态
+        
+        为避免只使用关键帧的客户端付出额外开销，目标表在第一次应用增量帧时才建立。
+        """
+        self.round = game_data.round
+        if game_data.sessionId is not None:
+            self.session_id = game_data.sessionId
+        self._keyframe_targets = game_data.targets
+        self._table = None
+    
+    def invalidate(self):
+        """丢弃状态，等待下一个关键帧"""
+        self.round = None
+        self._keyframe_targets = None
+        self._table = None
+    
+    def apply_delta(self, data: dict) -> GameData:
+        """
+        应用增量帧
+        
+        Args:
+            data: 增量帧JSON字典
+        
+        Returns:
+            应用后的完整GameData
+        
+        Raises:
+            DeltaError: 没有基准状态、baseRound不匹配或引用了未知目标
+        """
+        base_round = data.get('baseRound')
+        if data.get('sessionId') is not None:
+            self.session_id = data['sessionId']
+        if self.round is None:
+            raise DeltaError(f"No keyframe received yet (delta base round {base_round})")
+        if base_round != self.round:
+            raise DeltaError(f"Sequence gap: delta base round {base_round}, state at round {self.round}")
+        
+        if self._table is None:
+            # 二进制关键帧的目标是TargetBatch行视图，需要转换为独立的Target
+            self._table = {
+                target.id: target.to_target() if hasattr(target, 'to_target') else target
+                for target in self._keyframe_targets
+            }
+            self._keyframe_targets = None
+        
+        # 复制目标表：已经交给下游的GameData不受后续增量影响
+        table = dict(self._table)
+        for target_id in data.get('removed', ()):
+            if table.pop(target_id, None) is None:
+                raise DeltaError(f"Delta removes unknown target {target_id}")
+        for change in data.get('changed', ()):
+            target = table.get(change['id'])
+            if target is None:
+                raise DeltaError(f"Delta changes unknown target {change['id']}")
+            updates = {name: change[name] for name in _CHANGEABLE_FIELDS if name in change}
+            if 'position' in change:
+                updates['position'] = Position(**change['position'])
+            if 'velocity' in change:
+                updates['velocity'] = Position(**change['velocity']) if change['velocity'] else None
+            table[target.id] = dataclasses.replace(target, **updates)
+        for target_data in data.get('added', ()):
+            table[target_data['id']] = _target_from_dict(target_data)
+        
+        self._table = table
+        self.round = data['round']
+        return GameData(
+            round=data['round'],
+            playerPosition=Position(**data['playerPosition']),
+            targets=list(table.values()),
+            situationAwareness=data.get('situationAwareness', False),
+            sessionId=data.get('sessionId')
+        )
+
+
+class BattlefieldStateTable:
+    """按发送方保存战场状态，处理关键帧/增量帧并在出现缺口时请求关键帧"""
+    
+    def __init__(self, keyframe_request_func: Optional[Callable[[Hashable, Optional[int]], None]] = None,
+                 keyframe_request_interval: float = 0.5,
+                 idle_timeout: Optional[float] = 60.0):
+        """
+        初始化状态表
+        
+        Args:
+            keyframe_request_func: 请求关键帧的回调 (发送方, 最后已知round) -> None，
+                None表示不主动请求（等待客户端定期发送的关键帧）
+            keyframe_request_interval: 同一发送方两次请求关键帧的最小间隔（秒）
+            idle_timeout: 发送方超过该时长（秒）没有数据时移除其状态，None表示不移除
+        """
+        self.keyframe_request_func = keyframe_request_func
+        self.keyframe_request_interval = keyframe_request_interval
+        self.idle_timeout = idle_timeout
+        self._states: Dict[Hashable, BattlefieldState] = {}
+        self._last_request: Dict[Hashable, float] = {}
+        self._last_sweep = time.monotonic()
+        self.stats = {
+            'keyframes': 0,
+            'deltas_applied': 0,
+            'deltas_rejected': 0,
+            'stale_deltas': 0,
+            'keyframe_requests': 0,
+            'evicted_sources': 0
+        }
+    
+    def state(self, key: Hashable) -> BattlefieldState:
+        """获取（必要时创建）发送方的状态，并记录其最近活动时间"""
+        now = time.monotonic()
+        self._evict_idle(now)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = BattlefieldState()
+        state.last_seen = now
+        return state
+    
+    def session_id(self, key: Hashable) -> Optional[str]:
+        """发送方最近一帧携带的sessionId（没有时为None）"""
+        state = self._states.get(key)
+        return state.session_id if state is not None else None
+    
+    def _evict_idle(self, now: float):
+        """移除长时间没有数据的发送方（每隔idle_timeout的四分之一最多检查一次）"""
+        if self.idle_timeout is None or now - self._last_sweep < self.idle_timeout / 4:
+            return
+        self._last_sweep = now
+        idle = [key for key, state in self._states.items() if now - state.last_seen > self.idle_timeout]
+        for key in idle:
+            del self._states[key]
+            self._last_request.pop(key, None)
+        if idle:
+            self.stats['evicted_sources'] += len(idle)
+            logger.info(f"Dropped battlefield state of {len(idle)} idle source(s)")
+    
+    def apply_keyframe(self, key: Hashable, game_data: GameData):
+        """记录关键帧"""
+        self.state(key).apply_keyframe(game_data)
+        self.stats['keyframes'] += 1
+    
+    def apply_delta(self, key: Hashable, data: dict) -> Optional[GameData]:
+        """
+        应用增量帧
+        
+        Returns:
+            完整的GameData；无法应用时返回None（状态作废并请求关键帧）
+        """
+        state = self.state(key)
+        last_round = state.round
+        if last_round is not None and isinstance(data.get('round'), int) and data['round'] <= last_round:
+            # 乱序到达的旧增量帧：忽略，不影响当前状态
+            self.stats['stale_deltas'] += 1
+            logger.debug(f"Ignored stale delta frame round {data['round']} from {key} (state at {last_round})")
+            return None
+        try:
+            game_data = state.apply_delta(data)
+        except (DeltaError, KeyError, TypeError) as e:
+            self.stats['deltas_rejected'] += 1
+            state.invalidate()
+            logger.warning(f"Rejected delta frame round {data.get('round')} from {key}: {e}")
+            self._request_keyframe(key, last_round)
+            return None
+        self.stats['deltas_applied'] += 1
+        return game_data
+    
+    def _request_keyframe(self, key: Hashable, last_round: Optional[int]):
+        """请求关键帧（按发送方限速）"""
+        if self.keyframe_request_func is None:
+            return
+        now = time.monotonic()
+        if now - self._last_request.get(key, float('-inf')) < self.keyframe_request_interval:
+            return
+        self._last_request[key] = now
+        try:
+            self.keyframe_request_func(key, last_round)
+            self.stats['keyframe_requests'] += 1
+        except Exception as e:
+            logger.error(f"Failed to request keyframe from {key}: {e}")
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取关键帧/增量帧统计"""
+        stats = dict(self.stats)
+        stats['tracked_sources'] = len(self._states)
+        return stats
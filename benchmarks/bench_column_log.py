@@ -0,0 +1,96 @@
+"""CSV与列式日志的方向威胁统计性能对比
+
+用法:
+    python benchmarks/bench_column_log.py [--rounds 1000000] [--csv-rounds 100000]
+
+生成随机实验数据后分别测量：
+- CSV日志：csv.DictReader逐行解析16个方向列并求均值
+- 列式日志：np.memmap加载并用column_log.direction_threat_stats统计
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from column_log import (
+    LOG_HEADER_STRUCT, LOG_MAGIC, LOG_VERSION, ROUND_RECORD_DTYPE,
+    direction_threat_stats, load_session
+)
+from experiment_store import DIRECTION_COLUMNS
+
+
+def make_records(num_rounds: int, seed: int = 42) -> np.ndarray:
+    """生成随机的单轮记录"""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(num_rounds, dtype=ROUND_RECORD_DTYPE)
+    records['round'] = np.char.encode(np.arange(num_rounds).astype(str))
+    records['threat_id'] = rng.integers(1, 50, num_rounds)
+    records['threat_distance'] = rng.uniform(1, 100, num_rounds)
+    records['direction_threats'] = rng.random((num_rounds, 16)) * (rng.random((num_rounds, 16)) > 0.5)
+    return records
+
+
+def write_column_log(path: str, records: np.ndarray):
+    """写入列式日志文件"""
+    with open(path, 'wb') as f:
+        f.write(LOG_HEADER_STRUCT.pack(LOG_MAGIC, LOG_VERSION, ROUND_RECORD_DTYPE.itemsize, 0))
+        f.write(records.tobytes())
+
+
+def write_csv_log(path: str, records: np.ndarray):
+    """写入与CSVLogger相同列的CSV文件"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'round', 'threat_enemy_id'] + list(DIRECTION_COLUMNS))
+        for record in records:
+            writer.writerow(['', record['round'].decode(), int(record['threat_id'])]
+                            + [round(float(t), 3) for t in record['direction_threats']])
+
+
+def csv_direction_means(path: str) -> np.ndarray:
+    """逐行解析CSV计算方向均值"""
+    total = np.zeros(16)
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            total += [float(row[name]) for name in DIRECTION_COLUMNS]
+            count += 1
+    return total / max(count, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV vs columnar log analytics benchmark")
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--csv-rounds', type=int, default=100_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        records = make_records(args.rounds)
+        column_path = os.path.join(tmpdir, 'bench.rlog')
+        write_column_log(column_path, records)
+        
+        csv_path = os.path.join(tmpdir, 'bench.csv')
+        write_csv_log(csv_path, records[:args.csv_rounds])
+        
+        start = time.perf_counter()
+        csv_direction_means(csv_path)
+        csv_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        stats = direction_threat_stats(load_session(column_path))
+        column_time = time.perf_counter() - start
+    
+    print(f"{'format':>10} {'rounds':>10} {'total ms':>10} {'us/1k rounds':>14}")
+    print(f"{'csv':>10} {args.csv_rounds:>10} {csv_time * 1e3:>10.1f} {csv_time * 1e6 / args.csv_rounds * 1e3:>14.1f}")
+    print(f"{'columnar':>10} {stats['count']:>10} {column_time * 1e3:>10.1f} "
+          f"{column_time * 1e6 / stats['count'] * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""小目标数场景下逐个评估路径的内存分配与耗时
+
+用法:
+    python benchmarks/bench_scalar_alloc.py [--targets 1 2 3 5] [--repeat 2000]
+
+用tracemalloc测量：
+- 单次调用过程中的分配块数（调用结束后仍存活的块 + 调用期间的峰值字节数）
+- 单次调用平均耗时
+
+覆盖 evaluate_target_type、from_linguistic_term、evaluate_single_target、
+score_single_target（不生成详情的快速模式）以及不同目标数量下的 find_most_threatening。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IFS_ThreatAssessment.ifs_core import IFSConverter
+from IFS_ThreatAssessment.threat_evaluator import IFSThreatEvaluator
+
+
+def make_enemies(num_enemies: int, seed: int = 42) -> list:
+    """生成随机敌人列表"""
+    rng = random.Random(seed)
+    return [{
+        'id': i + 1,
+        'type': rng.choice(['soldier', 'drone']),
+        'x': rng.uniform(-40, 40),
+        'z': rng.uniform(-40, 40),
+        'speed': rng.uniform(0, 15),
+        'direction': rng.uniform(0, 360)
+    } for i in range(num_enemies)]
+
+
+def measure(func, repeat: int):
+    """
+    返回 (每次调用存活块数, 单次调用峰值字节数, 单次调用耗时微秒)
+    
+    存活块数：保留repeat次调用的返回值后统计新增块数再平均；
+    峰值字节数：单次调用期间相对调用前的最大内存增量（包含调用内部临时对象）。
+    """
+    func()
+    
+    tracemalloc.start()
+    results = []
+    before = tracemalloc.take_snapshot()
+    for _ in range(repeat):
+        results.append(func())
+    after = tracemalloc.take_snapshot()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno')) / repeat
+    del results
+    
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat * 1e6
+    
+    return blocks, peak - base, elapsed
+
+
+def run(target_counts, repeat: int):
+    evaluator = IFSThreatEvaluator()
+    cases = [
+        ('evaluate_target_type', lambda: evaluator.indicators.evaluate_target_type('drone')),
+        ('from_linguistic_term', lambda: IFSConverter.from_linguistic_term('高')),
+        ('evaluate_single_target', lambda e=make_enemies(1)[0]: evaluator.evaluate_single_target(e)),
+        ('score_single_target', lambda e=make_enemies(1)[0]: evaluator.score_single_target(e)),
+    ]
+    for count in target_counts:
+        enemies = make_enemies(count)
+        cases.append((f'find_most_threatening x{count}',
+                      lambda enemies=enemies: evaluator.find_most_threatening(enemies)))
+    
+    print(f"{'case':>32} {'blocks/call':>12} {'peak B':>10} {'us/call':>10}")
+    for name, func in cases:
+        blocks, peak, elapsed = measure(func, repeat)
+        print(f"{name:>32} {blocks:>12.1f} {peak:>10} {elapsed:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar evaluation allocation benchmark")
+    parser.add_argument('--targets', type=int, nargs='+', default=[1, 2, 3, 5])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.targets, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
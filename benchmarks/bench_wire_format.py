@@ -0,0 +1,89 @@
+"""JSON与二进制数据帧解析性能对比
+
+用法:
+    python benchmarks/bench_wire_format.py [--targets 10 100 500] [--repeat 2000]
+
+对每个目标数量分别测量：
+- 数据包大小
+- JSON解析（json.loads + GameData.from_dict）耗时
+- 二进制解析（wire_format.decode_frame）耗时
+- 二进制解析后再逐个访问全部目标（按需生成Target）的耗时
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import GameData
+from wire_format import decode_frame, encode_frame, MAX_TARGETS_PER_DATAGRAM
+
+
+def make_frame_dict(num_targets: int, seed: int = 42) -> dict:
+    """生成包含指定数量目标的JSON数据帧字典"""
+    rng = random.Random(seed)
+    targets = []
+    for i in range(num_targets):
+        x, z = rng.uniform(-100, 100), rng.uniform(-100, 100)
+        target = {
+            'id': i + 1,
+            'angle': rng.uniform(0, 360),
+            'distance': (x * x + z * z) ** 0.5,
+            'type': rng.choice(['Soldier', 'Drone']),
+            'position': {'x': x, 'y': 0.0, 'z': z},
+            'speed': rng.uniform(0, 15),
+            'direction': rng.uniform(0, 360)
+        }
+        if i % 2 == 0:
+            target['velocity'] = {'x': rng.uniform(-5, 5), 'y': 0.0, 'z': rng.uniform(-5, 5)}
+        targets.append(target)
+    return {
+        'round': 1,
+        'playerPosition': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+        'targets': targets,
+        'situationAwareness': False
+    }
+
+
+def time_per_call(func, repeat: int) -> float:
+    """返回单次调用平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(target_counts, repeat: int):
+    print(f"{'targets':>8} {'json B':>9} {'binary B':>9} {'json us':>10} "
+          f"{'binary us':>10} {'bin+iter us':>12} {'speedup':>8}")
+    print("-" * 72)
+    for count in target_counts:
+        frame = make_frame_dict(count)
+        json_bytes = json.dumps(frame).encode('utf-8')
+        binary_bytes = encode_frame(GameData.from_dict(frame))
+        json_note = "" if len(json_bytes) <= 65507 else " (exceeds UDP limit)"
+        
+        json_us = time_per_call(lambda: GameData.from_dict(json.loads(json_bytes.decode('utf-8'))), repeat)
+        binary_us = time_per_call(lambda: decode_frame(binary_bytes), repeat)
+        iter_us = time_per_call(lambda: list(decode_frame(binary_bytes).targets), max(1, repeat // 10))
+        
+        print(f"{count:>8} {len(json_bytes):>9} {len(binary_bytes):>9} {json_us:>10.1f} "
+              f"{binary_us:>10.1f} {iter_us:>12.1f} {json_us / binary_us:>7.1f}x{json_note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary GameData parsing")
+    parser.add_argument('--targets', type=int, nargs='+', default=[1, 10, 100, 500, 1000],
+                        help="target counts to benchmark")
+    parser.add_argument('--repeat', type=int, default=2000, help="iterations per measurement")
+    args = parser.parse_args()
+    
+    counts = [c for c in args.targets if c <= MAX_TARGETS_PER_DATAGRAM]
+    run(counts, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
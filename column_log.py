@@ -0,0 +1,412 @@
+"""列式二进制实验日志模块
+
+CSV日志分析时需要用 csv.DictReader 逐行解析25列文本，历史数据越多越慢。
+本模块提供一种只追加的二进制日志格式：每个会话一个文件，16字节文件头之后
+是定长的结构化记录（ROUND_RECORD_DTYPE），可以直接用 np.memmap 映射，
+按列（例如 direction_threats）做向量化统计，不需要解析文本。
+
+    文件头（16字节，小端）:
+        magic        4字节   b'TRLG'
+        version      uint32  格式版本，当前为1
+        record_size  uint32  单条记录字节数（用于校验dtype）
+        reserved     uint32
+
+ColumnarLogger 与 CSVLogger 接口相同，可以直接替换；
+load_session / load_sessions 以只读内存映射方式加载一个或全部会话，
+direction_threat_stats 对任意多个会话计算16个方向的威胁统计。
+"""
+import csv
+import glob
+import logging
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from models import Target, TARGET_TYPE_NAMES, type_code
+
+logger = logging.getLogger(__name__)
+
+# 文件头
+LOG_MAGIC = b'TRLG'
+LOG_VERSION = 1
+LOG_HEADER_STRUCT = struct.Struct('<4sIII')
+LOG_HEADER_SIZE = LOG_HEADER_STRUCT.size
+
+# 日志文件扩展名
+LOG_EXTENSION = '.rlog'
+
+# 没有威胁目标时的类型编码
+NO_TARGET_TYPE = 0xFF
+
+# 统计时每次复制到连续缓冲区的记录数（缓冲区可放入CPU缓存）
+STATS_CHUNK_ROUNDS = 16384
+
+# 单轮记录（没有威胁目标时 threat_id 为 -1，坐标等为NaN）
+ROUND_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),               # Unix时间戳（秒）
+    ('round', 'S32'),                   # round（UTF-8编码的字符串，超长的round不记录）
+    ('threat_id', '<i4'),
+    ('threat_type', 'u1'),              # models.TARGET_TYPE_* 或 NO_TARGET_TYPE
+    ('reserved', 'u1', (3,)),
+    ('threat_distance', '<f4'),
+    ('threat_angle', '<f4'),
+    ('threat_x', '<f4'),
+    ('threat_y', '<f4'),
+    ('threat_z', '<f4'),
+    ('direction_threats', '<f4', (16,)),
+])
+
+# round字段的最大字节数（UTF-8编码）；截断会使重新打开后的索引与内存中的round不一致
+MAX_ROUND_BYTES = ROUND_RECORD_DTYPE['round'].itemsize
+
+
+class ColumnLogError(ValueError):
+    """列式日志文件格式错误"""
+
+
+def _read_header(f, file_path: str):
+    """读取并校验文件头"""
+    header = f.read(LOG_HEADER_SIZE)
+    if len(header) < LOG_HEADER_SIZE:
+        raise ColumnLogError(f"File too short for header: {file_path}")
+    magic, version, record_size, _ = LOG_HEADER_STRUCT.unpack(header)
+    if magic != LOG_MAGIC:
+        raise ColumnLogError(f"Bad magic {magic!r} in {file_path}")
+    if version != LOG_VERSION or record_size != ROUND_RECORD_DTYPE.itemsize:
+        raise ColumnLogError(
+            f"Unsupported log format in {file_path}: version {version}, record size {record_size}"
+        )
+
+
+def load_session(file_path: str) -> np.ndarray:
+    """
+    以只读内存映射方式加载一个会话
+    
+    文件末尾不完整的记录（写入中断）会被忽略。
+    
+    Args:
+        file_path: 日志文件路径
+    
+    Returns:
+        ROUND_RECORD_DTYPE结构化数组（np.memmap），按列访问时才从磁盘读取
+    """
+    with open(file_path, 'rb') as f:
+        _read_header(f, file_path)
+    count = (os.path.getsize(file_path) - LOG_HEADER_SIZE) // ROUND_RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=ROUND_RECORD_DTYPE)
+    return np.memmap(file_path, dtype=ROUND_RECORD_DTYPE, mode='r',
+                     offset=LOG_HEADER_SIZE, shape=(count,))
+
+
+def load_sessions(directory: str, pattern: str = f"*{LOG_EXTENSION}") -> Dict[str, np.ndarray]:
+    """
+    加载目录中的全部会话
+    
+    Returns:
+        {会话名（文件名，不含扩展名）: 内存映射的结构化数组}
+    """
+    sessions = {}
+    for file_path in sorted(glob.glob(os.path.join(directory, pattern))):
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        try:
+            sessions[name] = load_session(file_path)
+        except (OSError, ColumnLogError) as e:
+            logger.error(f"Failed to load {file_path}: {e}")
+    return sessions
+
+
+def _column_max(values: np.ndarray) -> np.ndarray:
+    """
+    按列求最大值
+    
+    (n, 16) 数组沿axis 0归约时每行只有16个元素，逐行循环开销大；
+    先把连续的多行拼成宽行归约，再合并为16列。
+    """
+    rows = len(values) // 64 * 64
+    result = values[rows:].max(axis=0) if rows < len(values) else np.full(16, -np.inf, dtype=values.dtype)
+    if rows:
+        wide = values[:rows].reshape(-1, 64 * 16).max(axis=0)
+        result = np.maximum(result, wide.reshape(64, 16).max(axis=0))
+    return result
+
+
+def direction_threat_stats(records: Union[np.ndarray, Iterable[np.ndarray], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    计算16个方向的威胁统计
+    
+    多个会话逐个累加，不需要把全部数据拼接到内存中；每个会话按块复制到
+    连续的float32缓冲区，求和类统计用矩阵-向量乘法完成（块内float32，块间float64累加）。
+    
+    Args:
+        records: 一个结构化数组、多个结构化数组，或load_sessions返回的字典
+    
+    Returns:
+        {'count': 轮数, 'mean', 'std', 'max': 各方向统计 (16,),
+         'active_rate': 各方向威胁值大于0的轮次比例 (16,)}
+    """
+    if isinstance(records, dict):
+        records = records.values()
+    elif isinstance(records, np.ndarray):
+        records = (records,)
+    
+    count = 0
+    total = np.zeros(16)
+    total_sq = np.zeros(16)
+    maximum = np.zeros(16)
+    active = np.zeros(16)
+    buffer = np.empty((STATS_CHUNK_ROUNDS, 16), dtype=np.float32)
+    ones = np.ones(STATS_CHUNK_ROUNDS, dtype=np.float32)
+    for session in records:
+        threats = session['direction_threats']
+        for start in range(0, len(threats), STATS_CHUNK_ROUNDS):
+            chunk = threats[start:start + STATS_CHUNK_ROUNDS]
+            n = len(chunk)
+            block = buffer[:n]
+            block[...] = chunk
+            weights = ones[:n]
+            total += weights @ block
+            total_sq += weights @ np.square(block)
+            active += weights @ (block > 0).astype(np.float32)
+            np.maximum(maximum, _column_max(block), out=maximum)
+            count += n
+    
+    if count == 0:
+        zeros = np.zeros(16)
+        return {'count': 0, 'mean': zeros, 'std': zeros, 'max': zeros, 'active_rate': zeros}
+    mean = total / count
+    return {
+        'count': count,
+        'mean': mean,
+        'std': np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0)),
+        'max': maximum,
+        'active_rate': active / count
+    }
+
+
+class ColumnarLogger:
+    """列式二进制日志记录器（接口与CSVLogger相同）"""
+    
+    def __init__(self, base_dir: str = "logs", file_path: Optional[str] = None):
+        """
+        初始化列式日志记录器
+        
+        Args:
+            base_dir: 日志文件存储目录，默认为 "logs"
+            file_path: 已有的日志文件路径（可选），指定时以追加方式打开该文件，
+                       否则在base_dir中创建新的带时间戳的文件
+        """
+        self.base_dir = base_dir
+        self.file_path = None
+        self.log_file = None
+        self.record_count = 0
+        
+        # round索引：round字符串 → 记录序号（重复round保留第一条）
+        self._round_index: Dict[str, int] = {}
+        
+        if not os.path.exists(self.base_dir):
+            os.makedirs(self.base_dir)
+            logger.info(f"Created log directory: {self.base_dir}")
+        
+        if file_path and os.path.exists(file_path):
+            self._open_existing_file(file_path)
+        else:
+            self._create_log_file()
+    
+    def _create_log_file(self):
+        """创建带时间戳的日志文件并写入文件头"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.file_path = os.path.join(self.base_dir, f"experiment_{timestamp}{LOG_EXTENSION}")
+        self.log_file = open(self.file_path, 'wb')
+        self.log_file.write(LOG_HEADER_STRUCT.pack(LOG_MAGIC, LOG_VERSION, ROUND_RECORD_DTYPE.itemsize, 0))
+        self.log_file.flush()
+        logger.info(f"📊 Columnar logger initialized: {self.file_path}")
+    
+    def _open_existing_file(self, file_path: str):
+        """以追加方式打开已有的日志文件，并建立round索引"""
+        self.file_path = file_path
+        records = load_session(file_path)
+        self.record_count = len(records)
+        for index, round_bytes in enumerate(records['round'].tolist()):
+            self._round_index.setdefault(round_bytes.decode('utf-8'), index)
+        del records
+        
+        self.log_file = open(file_path, 'r+b')
+        # 截掉写入中断留下的不完整记录，保证后续记录对齐
+        self.log_file.truncate(LOG_HEADER_SIZE + self.record_count * ROUND_RECORD_DTYPE.itemsize)
+        self.log_file.seek(0, os.SEEK_END)
+        logger.info(f"📊 Columnar logger opened existing file: {file_path} ({self.record_count} records)")
+    
+    def log_round_data(
+        self,
+        round_number,
+        most_threatening_target: Optional[Target],
+        direction_threats  # 可以是字典或列表
+    ):
+        """
+        记录每轮的数据
+        
+        Args:
+            round_number: 轮次编号
+            most_threatening_target: 最具威胁的目标对象，如果没有则为None
+            direction_threats: 16个方向的威胁值（字典{0-15: float}或列表）
+        """
+        if not self.log_file:
+            logger.error("Columnar logger is not initialized")
+            return
+        
+        key = str(round_number)
+        round_bytes = key.encode('utf-8')
+        if len(round_bytes) > MAX_ROUND_BYTES:
+            logger.error(f"Round id too long for columnar log ({len(round_bytes)} > {MAX_ROUND_BYTES} bytes), "
+                         f"not recorded: {key!r}")
+            return
+        
+        record = np.zeros(1, dtype=ROUND_RECORD_DTYPE)[0]
+        record['timestamp'] = time.time()
+        record['round'] = round_bytes
+        
+        target = most_threatening_target
+        if target is not None:
+            record['threat_id'] = target.id
+            record['threat_type'] = type_code(target.type)
+            record['threat_distance'] = target.distance
+            record['threat_angle'] = target.angle
+            record['threat_x'] = target.position.x
+            record['threat_y'] = target.position.y
+            record['threat_z'] = target.position.z
+        else:
+            record['threat_id'] = -1
+            record['threat_type'] = NO_TARGET_TYPE
+            for name in ('threat_distance', 'threat_angle', 'threat_x', 'threat_y', 'threat_z'):
+                record[name] = np.nan
+        
+        if isinstance(direction_threats, dict):
+            threats = [direction_threats.get(i, 0.0) for i in range(16)]
+        else:
+            threats = list(direction_threats)[:16]
+        record['direction_threats'][:len(threats)] = threats
+        
+        try:
+            self.log_file.write(record.tobytes())
+            self.log_file.flush()
+        except OSError as e:
+            logger.error(f"Failed to write to columnar log: {e}")
+            return
+        self._round_index.setdefault(key, self.record_count)
+        self.record_count += 1
+    
+    def check_round_exists(self, round_number) -> bool:
+        """检查日志中是否已存在该round的记录"""
+        return str(round_number) in self._round_index
+    
+    def read_round_data(self, round_number) -> Optional[dict]:
+        """
+        读取指定round的数据
+        
+        Returns:
+            与CSVLogger.read_round_data格式相同的字典（数值字段为数字，没有威胁目标时为None），
+            round不存在时返回None
+        """
+        index = self._round_index.get(str(round_number))
+        if index is None:
+            logger.warning(f"Round {round_number} not found in columnar log")
+            return None
+        
+        with open(self.file_path, 'rb') as f:
+            f.seek(LOG_HEADER_SIZE + index * ROUND_RECORD_DTYPE.itemsize)
+            record = np.frombuffer(f.read(ROUND_RECORD_DTYPE.itemsize), dtype=ROUND_RECORD_DTYPE)[0]
+        
+        has_target = record['threat_id'] >= 0
+        data = {
+            'round': round_number,
+            'threat_enemy_id': int(record['threat_id']) if has_target else None,
+            'threat_enemy_type': TARGET_TYPE_NAMES[record['threat_type']] if has_target else None
+        }
+        for name in ('distance', 'angle', 'x', 'y', 'z'):
+            data[f'threat_enemy_{name}'] = float(record[f'threat_{name}']) if has_target else None
+        data['direction_threats'] = record['direction_threats'].astype(float).tolist()
+        return data
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取写入统计（记录数和不重复的round数）"""
+        return {'records': self.record_count, 'rounds': len(self._round_index)}
+    
+    def close(self):
+        """关闭日志文件"""
+        if self.log_file:
+            try:
+                self.log_file.close()
+                logger.info(f"Columnar log file closed: {self.file_path}")
+            except OSError as e:
+                logger.error(f"Error closing columnar log file: {e}")
+            self.log_file = None
+    
+    def __enter__(self):
+        """支持with语句"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """支持with语句"""
+        self.close()
+        return False
+
+
+def convert_csv(csv_path: str, output_path: Optional[str] = None) -> str:
+    """
+    将CSV实验日志转换为列式日志（早期8方向格式只填写对应的方向）
+    
+    Args:
+        csv_path: CSV文件路径
+        output_path: 输出路径，None表示与CSV同名、扩展名为.rlog
+    
+    Returns:
+        输出文件路径
+    """
+    from experiment_store import DIRECTION_COLUMNS
+    
+    if output_path is None:
+        output_path = os.path.splitext(csv_path)[0] + LOG_EXTENSION
+    
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    
+    too_long = [row for row in rows if len((row.get('round') or '').encode('utf-8')) > MAX_ROUND_BYTES]
+    if too_long:
+        logger.warning(f"Skipped {len(too_long)} row(s) with round ids longer than {MAX_ROUND_BYTES} bytes "
+                       f"in {csv_path}")
+        rows = [row for row in rows if len((row.get('round') or '').encode('utf-8')) <= MAX_ROUND_BYTES]
+    
+    records = np.zeros(len(rows), dtype=ROUND_RECORD_DTYPE)
+    for i, row in enumerate(rows):
+        record = records[i]
+        try:
+            record['timestamp'] = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S.%f').timestamp()
+        except (KeyError, TypeError, ValueError):
+            record['timestamp'] = np.nan
+        record['round'] = (row.get('round') or '').encode('utf-8')
+        try:
+            record['threat_id'] = int(row.get('threat_enemy_id'))
+            record['threat_type'] = type_code(row.get('threat_enemy_type') or '')
+            for name in ('distance', 'angle', 'x', 'y', 'z'):
+                record[f'threat_{name}'] = float(row[f'threat_enemy_{name}'])
+        except (KeyError, TypeError, ValueError):
+            record['threat_id'] = -1
+            record['threat_type'] = NO_TARGET_TYPE
+            for name in ('distance', 'angle', 'x', 'y', 'z'):
+                record[f'threat_{name}'] = np.nan
+        for direction, name in enumerate(DIRECTION_COLUMNS):
+            try:
+                record['direction_threats'][direction] = float(row.get(name))
+            except (TypeError, ValueError):
+                pass
+    
+    with open(output_path, 'wb') as f:
+        f.write(LOG_HEADER_STRUCT.pack(LOG_MAGIC, LOG_VERSION, ROUND_RECORD_DTYPE.itemsize, 0))
+        f.write(records.tobytes())
+    logger.info(f"Converted {len(records)} rounds: {csv_path} -> {output_path}")
+    return output_path
@@ -32,6 +32,60 @@ IFS_CONFIG = {
     }
 }
 
+# IFS评估引擎选择
+# 目标数达到阈值时使用批量（向量化）评估，否则逐个评估
+IFS_BATCH_MIN_TARGETS = 24
+
+# 启动时在本机实测两种引擎的耗时以确定阈值（约0.3秒，多会话模式下每个评估进程各测一次），
+# 默认关闭，使用IFS_BATCH_MIN_TARGETS；在部署机器上需要精确阈值时设为True
+IFS_ENGINE_CALIBRATION = False
+
+# 查找最高威胁目标时按得分上界剪枝：距离/类型/速度给出上界，只对可能胜出的目标
+# 计算攻击角度并做地形分析（通视射线检测、环境密度），结果与完整评估一致
+IFS_PRUNED_SEARCH = True
+
+# 增量评估：按目标ID缓存各指标（含通视和环境的地形分析），逐轮只重新计算
+# 依赖输入变化超过容差的指标；启用时代替上面的剪枝搜索和引擎选择。
+# 输入变化在容差内时沿用缓存的指标（近似结果），默认关闭，需要时设为True
+IFS_INCREMENTAL_EVALUATION = False
+
+# 增量评估的输入变化容差：位置（米）、速度（m/s）、方向（度），0表示任何变化都重新计算
+IFS_INCREMENTAL_EPSILONS = {
+    'position': 0.05,
+    'player_position': 0.05,
+    'speed': 0.05,
+    'direction': 0.5
+}
+
+# 隶属度曲线查找表：按阈值分段预先采样，运行时线性插值代替逐点计算，
+# 阈值修改后自动重建；最大误差在初始化日志中输出（距离约1e-3）。
+# 结果为近似值，默认关闭（精确计算），需要时设为True
+IFS_INDICATOR_LUT = False
+
+# 使用查找表的曲线及采样间隔：距离（米）；速度（m/s）和角度（度）同样支持，
+# 但其精确公式本身很快，查找表没有明显收益，默认不启用
+IFS_INDICATOR_LUT_RESOLUTION = {
+    'distance': 0.1
+}
+
+# 指标聚合算子
+# 'ifwa': 加权算术平均（论文公式7-9，默认）
+# 'ifwg': 加权几何平均，更强调短板指标
+# 'ifowa': 有序加权平均，按指标取值排序后使用位置权重
+# 'ifha': 混合平均，同时使用指标权重和位置权重
+# 剪枝搜索依赖IFWA的线性，选择其他算子时自动不使用剪枝搜索
+IFS_AGGREGATION_OPERATOR = 'ifwa'
+
+# IFOWA/IFHA的位置权重（6个，从最高威胁的指标到最低），None表示使用从大到小排列的指标权重
+IFS_POSITION_WEIGHTS = None
+
+# 熵权法：按当前帧所有目标的指标熵计算客观权重（越能区分目标的指标权重越高），
+# 与上面的主观权重混合后聚合；随增量评估逐帧更新，未启用增量评估时不生效
+IFS_ENTROPY_WEIGHTING = False
+
+# 客观（熵）权重在混合权重中的占比，0为纯主观，1为纯客观
+IFS_ENTROPY_BLEND = 0.5
+
 # IFS评估日志详细程度
 # 'detailed': 输出各指标得分和贡献度
 # 'summary': 只输出最终威胁得分
@@ -83,6 +137,117 @@ UDP_PORT = 5005
 # UDP接收超时时间（秒）
 UDP_TIMEOUT = 1.0
 
+# 内核接收缓冲区大小（SO_RCVBUF，字节），None表示使用系统默认值
+# Linux实际生效值受 net.core.rmem_max 限制
+UDP_RCVBUF_SIZE = 4 * 1024 * 1024
+
+# 是否批量接收：每次唤醒读空内核缓冲区中所有待处理的数据包
+UDP_BATCH_RECEIVE = True
+
+# 单次批量接收的最大数据包数量（None表示读空缓冲区）
+UDP_MAX_BATCH = None
+
+# 内核丢包检查间隔（秒）
+UDP_DROP_CHECK_INTERVAL = 10.0
+
+# 分片帧重组超时时间（秒）：超时仍未收齐全部分片的帧被丢弃
+UDP_REASSEMBLY_TIMEOUT = 1.0
+
+# 分片重组缓冲区内存上限（字节）：超出时丢弃最早的未完成帧
+UDP_REASSEMBLY_MAX_BYTES = 16 * 1024 * 1024
+
+# 增量帧出现序号缺口时是否向发送方回发关键帧请求（{"type": "keyframeRequest", ...}）
+UDP_REQUEST_KEYFRAMES = True
+
+# 发送方超过该时长（秒）没有数据时移除其战场状态（客户端重启后使用新端口时释放旧状态）
+UDP_BATTLEFIELD_IDLE_TIMEOUT = 60.0
+
+
+# ============================================================================
+# 处理流水线配置
+# ============================================================================
+
+# 接收→评估队列容量（队列满时丢弃最旧的数据帧；启用帧合并时为最大玩家数）
+PIPELINE_INGEST_QUEUE_SIZE = 64
+
+# 是否启用最新帧合并：每个玩家只评估最新一帧，被取代的旧round直接丢弃
+PIPELINE_COALESCE_FRAMES = True
+
+# 评估→输出队列容量（默认1：震动播放期间只保留最新的评估结果，被取代结果的态势感知请求保留到新结果上）
+PIPELINE_OUTPUT_QUEUE_SIZE = 1
+
+# 退出时等待流水线线程结束的超时时间（秒）
+PIPELINE_SHUTDOWN_TIMEOUT = 5.0
+
+
+# ============================================================================
+# 多会话配置（一台主机服务多个Unity客户端和触觉背心）
+# ============================================================================
+
+# 是否启用多会话模式（False: 单玩家模式，使用上面的串口和单个CSV文件）
+MULTI_SESSION_ENABLED = False
+
+# 评估进程池大小（None表示使用CPU核数）
+SESSION_MAX_WORKERS = None
+
+# 最大会话数量
+SESSION_MAX_COUNT = 32
+
+# 会话空闲超时时间（秒），超时后关闭会话并释放串口和日志文件
+SESSION_IDLE_TIMEOUT = 60.0
+
+# 会话CSV日志根目录（每个会话一个子目录）
+SESSION_LOG_DIR = "logs/sessions"
+
+# 会话输出设备：{会话键: 串口号}
+# 会话键为数据包中的sessionId，没有时为 "IP:端口"；未配置的会话只记录日志不震动
+SESSION_SERIAL_PORTS = {}
+
+# 会话统计（含延迟）输出间隔（秒）
+SESSION_STATS_INTERVAL = 30.0
+
+
+# ============================================================================
+# 实验数据记录配置
+# ============================================================================
+
+# 是否由后台线程写入CSV（主循环只负责入队，不等待磁盘）
+CSV_BACKGROUND_WRITER = True
+
+# 后台写入队列容量（行），队列满时主循环阻塞等待
+CSV_WRITE_QUEUE_SIZE = 1024
+
+# 每批最多写入的行数
+CSV_WRITE_BATCH_SIZE = 64
+
+# 一批数据最长等待时间（秒），超时后即使未凑满也写入
+CSV_WRITE_FLUSH_INTERVAL = 0.5
+
+# fsync策略
+# 'none': 只flush到操作系统缓存（断电可能丢失最近的数据）
+# 'batch': 每批写入后fsync
+# 'row': 每行写入后fsync（最安全，最慢）
+CSV_FSYNC_POLICY = 'batch'
+
+# 实验数据记录后端
+# 'csv': 每次运行生成一个新的CSV文件（旧行为）
+# 'sqlite': 写入统一的SQLite实验数据库（WAL模式，重启后round去重依然有效）
+# 'columnar': 每次运行生成一个列式二进制日志（.rlog，可用np.memmap直接加载做离线统计）
+# 导入已有CSV: python experiment_store.py logs --db logs/experiments.db
+EXPERIMENT_LOG_BACKEND = 'csv'
+
+# SQLite实验数据库路径
+EXPERIMENT_DB_PATH = "logs/experiments.db"
+
+# sqlite后端的实验会话名称，round去重按 (会话, round) 进行
+# None: 每次运行使用启动时间戳（如 "20250101_120000"），重启后从头记录，不会跳过已有的round
+# 固定名称: 重启后继续同一会话，已记录过的round不再计算和震动
+# 多会话模式在此名称后附加会话键（如 "20250101_120000/192.168.1.5:50000"）
+EXPERIMENT_SESSION_NAME = None
+
+# 是否记录完整的目标排序（需要额外运行一次IFS全量评估）
+EXPERIMENT_STORE_RANKINGS = True
+
 
 # ============================================================================
 # 威胁评估策略配置
@@ -118,6 +283,11 @@ DISTANCE_2 = 20.0  # 第二个距离阈值（米）
 # 两次震动之间的暂停时间（秒）
 PAUSE_BETWEEN_VIBRATIONS = 3.0
 
+# 是否启用触觉时间线调度器
+# True: 震动时长由调度线程控制，不阻塞输出线程；态势感知帧可抢占正在播放的单目标序列
+# False: 使用 time.sleep 控制震动时长（旧行为）
+ENABLE_HAPTIC_SCHEDULER = True
+
 # 态势感知模式震动强度配置
 # 最小可感知震动强度（低于此值几乎感觉不到）
 # 根据实际硬件调整，推荐值：60-100
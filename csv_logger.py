@@ -2,33 +2,88 @@
 import csv
 import logging
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from models import Target
 
 logger = logging.getLogger(__name__)
 
+# fsync策略：'none' 只flush到操作系统；'batch' 每批写入后fsync；'row' 每行写入后fsync
+FSYNC_POLICIES = ('none', 'batch', 'row')
+
+# 写入队列中的停止标记
+_STOP = object()
+
 
 class CSVLogger:
     """CSV日志记录器，用于记录实验数据"""
     
-    def __init__(self, base_dir: str = "logs"):
+    def __init__(
+        self,
+        base_dir: str = "logs",
+        file_path: Optional[str] = None,
+        background: bool = False,
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        fsync_policy: str = 'none'
+    ):
         """
         初始化CSV日志记录器
         
         Args:
             base_dir: 日志文件存储目录，默认为 "logs"
+            file_path: 已有的CSV文件路径（可选），指定时以追加方式打开该文件，
+                       否则在base_dir中创建新的带时间戳的文件
+            background: 是否由后台线程写入（log_round_data只负责入队，不等待磁盘）
+            queue_size: 后台写入队列容量（队列满时log_round_data阻塞等待）
+            batch_size: 后台线程每批最多写入的行数
+            flush_interval: 一批数据从第一行入队起最多等待的时间（秒）
+            fsync_policy: fsync策略，'none' / 'batch' / 'row'
         """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy!r} (expected one of {FSYNC_POLICIES})")
         self.base_dir = base_dir
         self.csv_file = None
         self.csv_writer = None
         self.file_path = None
+        self.headers: List[str] = []
+        
+        # round索引：round值（CSV中的字符串） → 该行在文件中的字节偏移
+        # 已入队但尚未写入的round偏移为None
+        self._round_offsets: Dict[str, Optional[int]] = {}
+        self._read_file = None
+        
+        # 后台写入
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self._queue: Optional[queue.Queue] = queue.Queue(maxsize=queue_size) if background else None
+        self._writer_thread: Optional[threading.Thread] = None
+        self.stats = {
+            'rows_written': 0,
+            'batches_written': 0,
+            'fsyncs': 0,
+            'queue_full_waits': 0,
+            'write_errors': 0
+        }
         
         # 创建日志目录
         self._create_log_directory()
         
-        # 创建CSV文件
-        self._create_csv_file()
+        if file_path and os.path.exists(file_path):
+            # 打开已有文件并重建索引
+            self._open_existing_file(file_path)
+        else:
+            # 创建CSV文件
+            self._create_csv_file()
+        
+        if self._queue is not None:
+            self._writer_thread = threading.Thread(target=self._writer_loop, name="csv-writer", daemon=True)
+            self._writer_thread.start()
     
     def _create_log_directory(self):
         """创建日志目录（如果不存在）"""
@@ -81,6 +136,7 @@ class CSVLogger:
             ]
             self.csv_writer.writerow(headers)
             self.csv_file.flush()
+            self.headers = headers
             
             logger.info("=" * 60)
             logger.info("📊 CSV Logger initialized")
@@ -92,6 +148,34 @@ class CSVLogger:
             logger.error(f"Failed to create CSV file: {e}")
             raise
     
+    def _open_existing_file(self, file_path: str):
+        """
+        以追加方式打开已有的CSV文件，并扫描一次建立round索引
+        
+        Args:
+            file_path: CSV文件路径
+        """
+        try:
+            self.file_path = file_path
+            with open(file_path, 'rb') as f:
+                self.headers = next(csv.reader([f.readline().decode('utf-8')]), [])
+                round_column = self.headers.index('round')
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    fields = next(csv.reader([line.decode('utf-8')]), [])
+                    if len(fields) > round_column:
+                        self._round_offsets.setdefault(fields[round_column], offset)
+            
+            self.csv_file = open(file_path, 'a', newline='', encoding='utf-8')
+            self.csv_writer = csv.writer(self.csv_file)
+            logger.info(f"📊 CSV Logger opened existing file: {file_path} ({len(self._round_offsets)} rounds indexed)")
+        except Exception as e:
+            logger.error(f"Failed to open existing CSV file: {e}")
+            raise
+    
     def log_round_data(
         self,
         round_number: str,
@@ -148,7 +232,7 @@ class CSVLogger:
             # 四舍五入威胁值到3位小数
             direction_threats_rounded = [round(t, 3) for t in direction_threats_list[:16]]
             
-            # 写入数据行
+            # 数据行
             row = [
                 timestamp,
                 round_number,
@@ -160,19 +244,103 @@ class CSVLogger:
                 threat_y,
                 threat_z,
             ] + direction_threats_rounded
+        except Exception as e:
+            logger.error(f"Failed to format CSV row: {e}")
+            return
             
-            self.csv_writer.writerow(row)
-            self.csv_file.flush()  # 立即写入磁盘
-            
+        # 与DictReader读到的值一致：索引键为写入CSV后的字符串
+        key = str(round_number)
+        if self._writer_thread is None:
+            self._write_rows([(key, row)])
             logger.debug(f"CSV: Logged data for round {round_number}")
+            return
+            
+        # 入队时即登记round，check_round_exists不需要等待后台写入
+        self._round_offsets.setdefault(key, None)
+        try:
+            self._queue.put_nowait((key, row))
+        except queue.Full:
+            self.stats['queue_full_waits'] += 1
+            logger.warning("CSV write queue is full, waiting for the writer thread")
+            self._queue.put((key, row))
             
+    def _write_rows(self, rows: List[Tuple[str, list]]):
+        """
+        写入一批数据行并按fsync策略同步到磁盘
+        
+        Args:
+            rows: (round索引键, 数据行) 列表
+        """
+        try:
+            for key, row in rows:
+                offset = self.csv_file.tell()
+                self.csv_writer.writerow(row)
+                if self._round_offsets.get(key) is None:
+                    self._round_offsets[key] = offset
+                if self.fsync_policy == 'row':
+                    self._sync()
+            self.csv_file.flush()
+            if self.fsync_policy == 'batch':
+                self._sync()
+            self.stats['rows_written'] += len(rows)
+            self.stats['batches_written'] += 1
         except Exception as e:
+            self.stats['write_errors'] += 1
             logger.error(f"Failed to write to CSV file: {e}")
             # 不抛出异常，避免中断主程序
     
+    def _sync(self):
+        """将文件内容同步到磁盘"""
+        self.csv_file.flush()
+        os.fsync(self.csv_file.fileno())
+        self.stats['fsyncs'] += 1
+    
+    def _writer_loop(self):
+        """后台写入线程：凑满batch_size行或等待flush_interval秒后写入一批"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            rows = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                rows.append(item)
+            self._write_rows(rows)
+            for _ in rows:
+                self._queue.task_done()
+    
+    def flush(self):
+        """等待后台写入队列中的全部数据写入文件"""
+        if self._queue is not None and self._writer_thread is not None and self._writer_thread.is_alive():
+            self._queue.join()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取写入统计
+        
+        Returns:
+            已写入行数/批数、fsync次数、队列满等待次数、写入错误次数和当前队列长度
+        """
+        stats = dict(self.stats)
+        stats['queued_rows'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+    
     def check_round_exists(self, round_number: str) -> bool:
         """
-        检查CSV文件中是否已存在该round的记录
+        检查CSV文件中是否已存在该round的记录（查内存索引，O(1)）
+        
+        round按 str() 转换后与CSV中的值比较（与写入时的索引键一致）。
         
         Args:
             round_number: 轮次编号（如 "1-1"）
@@ -180,19 +348,7 @@ class CSVLogger:
         Returns:
             如果round已存在返回True，否则返回False
         """
-        if not self.file_path or not os.path.exists(self.file_path):
-            return False
-        
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('round') == round_number:
-                        return True
-            return False
-        except Exception as e:
-            logger.error(f"Error checking round existence: {e}")
-            return False
+        return str(round_number) in self._round_offsets
     
     def read_round_data(self, round_number: str) -> Optional[dict]:
         """
@@ -211,56 +367,72 @@ class CSVLogger:
             logger.warning(f"CSV file does not exist: {self.file_path}")
             return None
         
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('round') == round_number:
-                        # 提取16个方向的威胁值
-                        direction_threats = [
-                            float(row.get('north_threat', 0.0)),              # 0
-                            float(row.get('north_northeast_threat', 0.0)),    # 1
-                            float(row.get('northeast_threat', 0.0)),          # 2
-                            float(row.get('east_northeast_threat', 0.0)),     # 3
-                            float(row.get('east_threat', 0.0)),               # 4
-                            float(row.get('east_southeast_threat', 0.0)),     # 5
-                            float(row.get('southeast_threat', 0.0)),          # 6
-                            float(row.get('south_southeast_threat', 0.0)),    # 7
-                            float(row.get('south_threat', 0.0)),              # 8
-                            float(row.get('south_southwest_threat', 0.0)),    # 9
-                            float(row.get('southwest_threat', 0.0)),          # 10
-                            float(row.get('west_southwest_threat', 0.0)),     # 11
-                            float(row.get('west_threat', 0.0)),               # 12
-                            float(row.get('west_northwest_threat', 0.0)),     # 13
-                            float(row.get('northwest_threat', 0.0)),          # 14
-                            float(row.get('north_northwest_threat', 0.0))     # 15
-                        ]
-                        
-                        # 构建返回数据
-                        data = {
-                            'round': round_number,
-                            'threat_enemy_id': row.get('threat_enemy_id'),
-                            'threat_enemy_type': row.get('threat_enemy_type'),
-                            'threat_enemy_distance': row.get('threat_enemy_distance'),
-                            'threat_enemy_angle': row.get('threat_enemy_angle'),
-                            'threat_enemy_x': row.get('threat_enemy_x'),
-                            'threat_enemy_y': row.get('threat_enemy_y'),
-                            'threat_enemy_z': row.get('threat_enemy_z'),
-                            'direction_threats': direction_threats
-                        }
-                        
-                        logger.debug(f"CSV: Read data for round {round_number}")
-                        return data
-            
+        key = str(round_number)
+        if key in self._round_offsets and self._round_offsets[key] is None:
+            # 该round还在后台写入队列中
+            self.flush()
+        offset = self._round_offsets.get(key)
+        if offset is None:
             logger.warning(f"Round {round_number} not found in CSV")
             return None
+        
+        try:
+            # 按索引中的字节偏移直接定位到该行
+            if self._read_file is None:
+                self._read_file = open(self.file_path, 'rb')
+            self._read_file.seek(offset)
+            line = self._read_file.readline().decode('utf-8')
+            row = dict(zip(self.headers, next(csv.reader([line]))))
+            
+            # 提取16个方向的威胁值
+            direction_threats = [
+                float(row.get('north_threat', 0.0)),              # 0
+                float(row.get('north_northeast_threat', 0.0)),    # 1
+                float(row.get('northeast_threat', 0.0)),          # 2
+                float(row.get('east_northeast_threat', 0.0)),     # 3
+                float(row.get('east_threat', 0.0)),               # 4
+                float(row.get('east_southeast_threat', 0.0)),     # 5
+                float(row.get('southeast_threat', 0.0)),          # 6
+                float(row.get('south_southeast_threat', 0.0)),    # 7
+                float(row.get('south_threat', 0.0)),              # 8
+                float(row.get('south_southwest_threat', 0.0)),    # 9
+                float(row.get('southwest_threat', 0.0)),          # 10
+                float(row.get('west_southwest_threat', 0.0)),     # 11
+                float(row.get('west_threat', 0.0)),               # 12
+                float(row.get('west_northwest_threat', 0.0)),     # 13
+                float(row.get('northwest_threat', 0.0)),          # 14
+                float(row.get('north_northwest_threat', 0.0))     # 15
+            ]
+            
+            # 构建返回数据
+            data = {
+                'round': round_number,
+                'threat_enemy_id': row.get('threat_enemy_id'),
+                'threat_enemy_type': row.get('threat_enemy_type'),
+                'threat_enemy_distance': row.get('threat_enemy_distance'),
+                'threat_enemy_angle': row.get('threat_enemy_angle'),
+                'threat_enemy_x': row.get('threat_enemy_x'),
+                'threat_enemy_y': row.get('threat_enemy_y'),
+                'threat_enemy_z': row.get('threat_enemy_z'),
+                'direction_threats': direction_threats
+            }
+            
+            logger.debug(f"CSV: Read data for round {round_number}")
+            return data
             
         except Exception as e:
             logger.error(f"Error reading round data: {e}")
             return None
     
     def close(self):
-        """关闭CSV文件"""
+        """关闭CSV文件（后台写入模式下先写完队列中的全部数据）"""
+        if self._writer_thread is not None:
+            self._queue.put(_STOP)
+            self._writer_thread.join()
+            self._writer_thread = None
+        if self._read_file:
+            self._read_file.close()
+            self._read_file = None
         if self.csv_file:
             try:
                 self.csv_file.close()
@@ -0,0 +1,426 @@
+"""SQLite实验数据存储模块
+
+每次运行 main.py 都会生成一个新的 logs/experiment_<时间戳>.csv，重启后round去重失效，
+分析时也需要逐个解析大量CSV文件。本模块将实验数据集中保存到一个SQLite数据库：
+
+- WAL模式：写入不阻塞读取，多个会话可以同时写同一个数据库文件
+- 批量插入：log_round_data 先缓存，凑满一批或超过等待时间后一次提交
+- (session, round) 唯一索引：同一会话的round去重在重启后依然有效
+- 保存最高威胁目标、16个方向的威胁值以及完整的目标排序
+
+接口与 CSVLogger 相同（log_round_data / check_round_exists / read_round_data / close），
+可以直接替换。import_csv 用于导入已有的CSV日志（包括早期的8方向格式）。
+"""
+import csv
+import glob
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from models import Target
+
+logger = logging.getLogger(__name__)
+
+# 16个方向的威胁值列（与CSV日志的列名一致，索引即方向ID）
+DIRECTION_COLUMNS = (
+    'north_threat',              # 0
+    'north_northeast_threat',    # 1
+    'northeast_threat',          # 2
+    'east_northeast_threat',     # 3
+    'east_threat',               # 4
+    'east_southeast_threat',     # 5
+    'southeast_threat',          # 6
+    'south_southeast_threat',    # 7
+    'south_threat',              # 8
+    'south_southwest_threat',    # 9
+    'southwest_threat',          # 10
+    'west_southwest_threat',     # 11
+    'west_threat',               # 12
+    'west_northwest_threat',     # 13
+    'northwest_threat',          # 14
+    'north_northwest_threat',    # 15
+)
+
+# 最高威胁目标列
+THREAT_COLUMNS = (
+    'threat_enemy_id',
+    'threat_enemy_type',
+    'threat_enemy_distance',
+    'threat_enemy_angle',
+    'threat_enemy_x',
+    'threat_enemy_y',
+    'threat_enemy_z',
+)
+
+ROUND_COLUMNS = ('session', 'round', 'timestamp') + THREAT_COLUMNS + DIRECTION_COLUMNS
+
+RANKING_COLUMNS = ('session', 'round', 'rank', 'target_id', 'target_type',
+                   'distance', 'angle', 'score', 'threat_level')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    round TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    threat_enemy_id INTEGER,
+    threat_enemy_type TEXT,
+    threat_enemy_distance REAL,
+    threat_enemy_angle REAL,
+    threat_enemy_x REAL,
+    threat_enemy_y REAL,
+    threat_enemy_z REAL,
+    {', '.join(f'{name} REAL' for name in DIRECTION_COLUMNS)}
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rounds_session_round ON rounds (session, round);
+CREATE TABLE IF NOT EXISTS target_rankings (
+    session TEXT NOT NULL,
+    round TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    target_type TEXT,
+    distance REAL,
+    angle REAL,
+    score REAL,
+    threat_level TEXT,
+    PRIMARY KEY (session, round, rank)
+);
+"""
+
+
+def _insert_sql(table: str, columns: Sequence[str]) -> str:
+    """生成INSERT OR IGNORE语句（重复的键保留第一次写入的记录）"""
+    return (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})")
+
+
+def _to_float(value) -> Optional[float]:
+    """CSV字段 → 浮点数（'N/A' 和空值为None）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    """CSV字段 → 整数（'N/A' 和空值为None）"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def connect(db_path: str, busy_timeout: float = 5.0) -> sqlite3.Connection:
+    """
+    打开实验数据库（WAL模式）并建表
+    
+    Args:
+        db_path: 数据库文件路径
+        busy_timeout: 其他连接持有写锁时的等待时间（秒）
+    
+    Returns:
+        sqlite3连接
+    """
+    directory = os.path.dirname(db_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    conn = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL模式下NORMAL只在检查点时fsync，断电最多丢失最近的事务，不会损坏数据库
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    conn.commit()
+    return conn
+
+
+class ExperimentStore:
+    """基于SQLite的实验数据记录器（接口与CSVLogger相同）"""
+    
+    def __init__(
+        self,
+        db_path: str = "logs/experiments.db",
+        session: str = "default",
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        record_rankings: bool = True
+    ):
+        """
+        初始化实验数据存储
+        
+        Args:
+            db_path: 数据库文件路径
+            session: 会话名称（与round一起构成唯一键）
+            batch_size: 缓存多少轮后提交一次
+            flush_interval: 第一条缓存记录最多等待多久提交（秒），在下一次写入时检查
+            record_rankings: 是否记录完整的目标排序（调用方据此决定是否计算排序）
+        """
+        self.db_path = db_path
+        self.session = session
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.record_rankings = record_rankings
+        self._lock = threading.Lock()
+        self._pending_rounds: List[tuple] = []
+        self._pending_rankings: List[tuple] = []
+        self._pending_since: Optional[float] = None
+        self.stats = {
+            'rounds_logged': 0,
+            'rankings_logged': 0,
+            'commits': 0,
+            'write_errors': 0
+        }
+        
+        self.conn = connect(db_path)
+        
+        # 该会话已有的round（重启后去重依然有效）
+        self._rounds = {
+            row[0] for row in self.conn.execute("SELECT round FROM rounds WHERE session = ?", (session,))
+        }
+        logger.info(f"📊 Experiment store opened: {db_path} (session '{session}', {len(self._rounds)} rounds)")
+    
+    def log_round_data(
+        self,
+        round_number,
+        most_threatening_target: Optional[Target],
+        direction_threats,  # 可以是字典或列表
+        rankings: Optional[Sequence[Tuple[Target, Any]]] = None
+    ):
+        """
+        记录每轮的数据
+        
+        Args:
+            round_number: 轮次编号
+            most_threatening_target: 最具威胁的目标对象，如果没有则为None
+            direction_threats: 16个方向的威胁值（字典{0-15: float}或列表）
+            rankings: 完整的目标排序 [(Target, 评估详情或得分), ...]，按威胁度降序（可选）；
+                评估详情可以是字典或IFS评估的ThreatResult
+        """
+        key = str(round_number)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        
+        if isinstance(direction_threats, dict):
+            threats = [direction_threats.get(i, 0.0) for i in range(16)]
+        else:
+            threats = list(direction_threats)[:16]
+        threats = [round(float(t), 3) for t in threats] + [None] * (16 - len(threats))
+        
+        target = most_threatening_target
+        if target is not None:
+            threat_fields = (target.id, target.type, round(target.distance, 2), round(target.angle, 2),
+                             round(target.position.x, 2), round(target.position.y, 2),
+                             round(target.position.z, 2))
+        else:
+            threat_fields = (None,) * len(THREAT_COLUMNS)
+        
+        ranking_rows = []
+        for rank, (ranked_target, details) in enumerate(rankings or (), 1):
+            if hasattr(details, 'get'):
+                # 评估详情字典或ThreatResult（按键读取得分和等级，不生成解释信息）
+                score = details.get('comprehensive_threat_score')
+                level = details.get('threat_level')
+            else:
+                score, level = details, None
+            ranking_rows.append((
+                self.session, key, rank, ranked_target.id, ranked_target.type,
+                ranked_target.distance, ranked_target.angle,
+                None if score is None else float(score), level
+            ))
+        
+        with self._lock:
+            self._rounds.add(key)
+            self._pending_rounds.append((self.session, key, timestamp) + threat_fields + tuple(threats))
+            self._pending_rankings.extend(ranking_rows)
+            now = time.monotonic()
+            if self._pending_since is None:
+                self._pending_since = now
+            if (len(self._pending_rounds) >= self.batch_size
+                    or now - self._pending_since >= self.flush_interval):
+                self._flush_locked()
+        
+        logger.debug(f"Store: Logged data for round {round_number}")
+    
+    def flush(self):
+        """提交缓存中的全部记录"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        """提交缓存（调用方持有锁）"""
+        if not self._pending_rounds and not self._pending_rankings:
+            return
+        rounds, rankings = self._pending_rounds, self._pending_rankings
+        self._pending_rounds, self._pending_rankings = [], []
+        self._pending_since = None
+        try:
+            with self.conn:
+                self.conn.executemany(_insert_sql('rounds', ROUND_COLUMNS), rounds)
+                if rankings:
+                    self.conn.executemany(_insert_sql('target_rankings', RANKING_COLUMNS), rankings)
+            self.stats['rounds_logged'] += len(rounds)
+            self.stats['rankings_logged'] += len(rankings)
+            self.stats['commits'] += 1
+        except sqlite3.Error as e:
+            self.stats['write_errors'] += 1
+            logger.error(f"Failed to write to experiment store: {e}")
+            # 不抛出异常，避免中断主程序
+    
+    def check_round_exists(self, round_number) -> bool:
+        """
+        检查当前会话中是否已存在该round的记录（包括尚未提交的缓存）
+        
+        Args:
+            round_number: 轮次编号
+        
+        Returns:
+            如果round已存在返回True，否则返回False
+        """
+        return str(round_number) in self._rounds
+    
+    def read_round_data(self, round_number) -> Optional[dict]:
+        """
+        读取当前会话中指定round的数据
+        
+        Args:
+            round_number: 轮次编号
+        
+        Returns:
+            与CSVLogger.read_round_data格式相同的字典，另含 'rankings' 列表；
+            round不存在时返回None
+        """
+        key = str(round_number)
+        if key not in self._rounds:
+            logger.warning(f"Round {round_number} not found in experiment store")
+            return None
+        
+        with self._lock:
+            self._flush_locked()
+            row = self.conn.execute(
+                f"SELECT {', '.join(THREAT_COLUMNS + DIRECTION_COLUMNS)} FROM rounds "
+                f"WHERE session = ? AND round = ?", (self.session, key)
+            ).fetchone()
+            rankings = self.conn.execute(
+                f"SELECT {', '.join(RANKING_COLUMNS[2:])} FROM target_rankings "
+                f"WHERE session = ? AND round = ? ORDER BY rank", (self.session, key)
+            ).fetchall()
+        if row is None:
+            return None
+        
+        data = {'round': round_number}
+        data.update(zip(THREAT_COLUMNS, row[:len(THREAT_COLUMNS)]))
+        data['direction_threats'] = [t if t is not None else 0.0 for t in row[len(THREAT_COLUMNS):]]
+        data['rankings'] = [dict(zip(RANKING_COLUMNS[2:], ranking)) for ranking in rankings]
+        return data
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取写入统计
+        
+        Returns:
+            已写入轮数/排序条数、提交次数、写入错误次数和当前缓存的轮数
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending_rounds'] = len(self._pending_rounds)
+        return stats
+    
+    def close(self):
+        """提交缓存并关闭数据库"""
+        with self._lock:
+            if self.conn is None:
+                return
+            self._flush_locked()
+            self.conn.close()
+            self.conn = None
+        logger.info(f"Experiment store closed: {self.db_path} (session '{self.session}')")
+    
+    def __enter__(self):
+        """支持with语句"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """支持with语句"""
+        self.close()
+        return False
+
+
+def import_csv(conn: sqlite3.Connection, csv_path: str, session: Optional[str] = None) -> int:
+    """
+    导入一个CSV实验日志
+    
+    按列名匹配方向威胁值，早期8方向格式的日志只填写对应的8个方向（其余为NULL）；
+    没有威胁目标的行（'N/A'）目标字段为NULL。
+    
+    Args:
+        conn: 实验数据库连接（见connect）
+        csv_path: CSV文件路径
+        session: 会话名称，None表示使用文件名（不含扩展名）
+    
+    Returns:
+        新导入的轮数（已存在的 (session, round) 不会重复导入）
+    """
+    if session is None:
+        session = os.path.splitext(os.path.basename(csv_path))[0]
+    
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for record in csv.DictReader(f):
+            if not record.get('round'):
+                continue
+            rows.append((
+                session,
+                record['round'],
+                record.get('timestamp') or '',
+                _to_int(record.get('threat_enemy_id')),
+                None if record.get('threat_enemy_type') in (None, '', 'N/A') else record['threat_enemy_type'],
+                *(_to_float(record.get(name)) for name in THREAT_COLUMNS[2:]),
+                *(_to_float(record.get(name)) for name in DIRECTION_COLUMNS)
+            ))
+    
+    with conn:
+        before = conn.total_changes
+        conn.executemany(_insert_sql('rounds', ROUND_COLUMNS), rows)
+        imported = conn.total_changes - before
+    logger.info(f"Imported {imported}/{len(rows)} rounds from {csv_path} (session '{session}')")
+    return imported
+
+
+def import_csv_directory(conn: sqlite3.Connection, directory: str,
+                         pattern: str = "experiment_*.csv") -> Dict[str, int]:
+    """
+    导入目录中的全部CSV实验日志（每个文件作为一个会话）
+    
+    Returns:
+        {文件路径: 新导入的轮数}
+    """
+    results = {}
+    for csv_path in sorted(glob.glob(os.path.join(directory, pattern))):
+        try:
+            results[csv_path] = import_csv(conn, csv_path)
+        except (OSError, csv.Error, sqlite3.Error) as e:
+            logger.error(f"Failed to import {csv_path}: {e}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    
+    parser = argparse.ArgumentParser(description="导入CSV实验日志到SQLite实验数据库")
+    parser.add_argument('paths', nargs='+', help="CSV文件或包含 experiment_*.csv 的目录")
+    parser.add_argument('--db', default="logs/experiments.db", help="数据库文件路径")
+    args = parser.parse_args()
+    
+    conn = connect(args.db)
+    total = 0
+    for path in args.paths:
+        if os.path.isdir(path):
+            total += sum(import_csv_directory(conn, path).values())
+        else:
+            total += import_csv(conn, path)
+    conn.close()
+    print(f"Imported {total} rounds into {args.db}")
@@ -0,0 +1,249 @@
+"""多数据包分片与重组模块
+
+单个UDP数据包最大65507字节，目标数量较多的数据帧（JSON或二进制格式）需要拆分发送。
+每个分片带有一个10字节的分片头（小端字节序）:
+
+    magic     uint8   固定为 0xA8（与JSON '{' 和二进制帧 0xA7 区分）
+    version   uint8   分片格式版本，当前为1
+    index     uint16  分片序号（从0开始）
+    count     uint16  分片总数
+    frame_id  uint32  帧编号（同一发送方内唯一，例如round）
+
+接收端按 (发送方地址, frame_id) 收集分片，全部到齐后拼接为原始数据帧。
+未完成的帧在超时或缓冲区超过内存上限时被丢弃，并计入统计。内存上限同时计入
+分片数据和每帧、每个分片的簿记开销；按分片头声明的数量无法放进上限的帧直接拒绝。
+"""
+import logging
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 分片头魔数和版本
+FRAGMENT_MAGIC = 0xA8
+FRAGMENT_VERSION = 1
+
+FRAGMENT_HEADER_STRUCT = struct.Struct('<BBHHI')
+FRAGMENT_HEADER_SIZE = FRAGMENT_HEADER_STRUCT.size
+
+# UDP最大数据包大小
+MAX_DATAGRAM_SIZE = 65507
+
+# 单帧最多分片数量（uint16上限）
+MAX_FRAGMENTS = 0xFFFF
+
+# 计入内存上限的簿记开销估计（字节）：每个未完成帧（帧对象、分片字典、键）和每个缓冲的分片
+PARTIAL_FRAME_OVERHEAD = 512
+FRAGMENT_OVERHEAD = 64
+
+
+class FragmentError(ValueError):
+    """分片格式错误"""
+
+
+def is_fragment(data: Union[bytes, bytearray, memoryview]) -> bool:
+    """根据魔数判断数据包是否为分片"""
+    return len(data) > 0 and data[0] == FRAGMENT_MAGIC
+
+
+def split_frame(payload: bytes, frame_id: int,
+                max_datagram_size: int = MAX_DATAGRAM_SIZE) -> List[bytes]:
+    """
+    将一个数据帧拆分为多个带分片头的数据包（供客户端和测试使用）
+    
+    Args:
+        payload: 完整的数据帧（JSON或二进制格式）
+        frame_id: 帧编号（0 ~ 2^32-1）
+        max_datagram_size: 每个数据包的最大字节数（含分片头）
+    
+    Returns:
+        分片数据包列表
+    
+    Raises:
+        FragmentError: 分片数量超过上限
+    """
+    chunk_size = max_datagram_size - FRAGMENT_HEADER_SIZE
+    if chunk_size <= 0:
+        raise FragmentError(f"max_datagram_size too small: {max_datagram_size}")
+    count = max(1, -(-len(payload) // chunk_size))
+    if count > MAX_FRAGMENTS:
+        raise FragmentError(f"Frame needs {count} fragments, limit is {MAX_FRAGMENTS}")
+    frame_id &= 0xFFFFFFFF
+    return [
+        FRAGMENT_HEADER_STRUCT.pack(FRAGMENT_MAGIC, FRAGMENT_VERSION, index, count, frame_id)
+        + payload[index * chunk_size:(index + 1) * chunk_size]
+        for index in range(count)
+    ]
+
+
+class _PartialFrame:
+    """正在重组的帧（分片按序号保存在字典中，内存只随实际收到的分片增长）"""
+    __slots__ = ('count', 'chunks', 'received', 'size', 'first_seen')
+    
+    def __init__(self, count: int, first_seen: float):
+        self.count = count
+        self.chunks: Dict[int, bytes] = {}
+        self.received = 0
+        self.size = PARTIAL_FRAME_OVERHEAD
+        self.first_seen = first_seen
+
+
+class ReassemblyBuffer:
+    """分片重组缓冲区（带超时和内存上限）"""
+    
+    def __init__(self, timeout: float = 1.0, max_bytes: int = 16 * 1024 * 1024):
+        """
+        初始化重组缓冲区
+        
+        Args:
+            timeout: 未完成帧的最长等待时间（秒），从收到第一个分片开始计算
+            max_bytes: 缓冲的分片数据总量上限（字节，含簿记开销），超出时丢弃最早的未完成帧
+        """
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Tuple[Hashable, int], _PartialFrame]" = OrderedDict()
+        self._buffered_bytes = 0
+        self.stats = {
+            'fragments_received': 0,
+            'frames_completed': 0,
+            'frames_timed_out': 0,
+            'frames_evicted': 0,
+            'fragments_dropped': 0,
+            'duplicate_fragments': 0,
+            'invalid_fragments': 0,
+            'oversized_frames': 0
+        }
+    
+    def add(self, data: Union[bytes, bytearray, memoryview], source: Hashable = None,
+            now: Optional[float] = None) -> Optional[bytes]:
+        """
+        加入一个分片
+        
+        Args:
+            data: 带分片头的数据包
+            source: 发送方（通常为地址），不同发送方的帧编号互不冲突
+            now: 当前时间（time.monotonic），None表示自动获取
+        
+        Returns:
+            帧的全部分片到齐时返回拼接后的数据帧，否则返回None
+        
+        Raises:
+            FragmentError: 分片头不正确，或按分片头声明的数量该帧无法放进内存上限
+        """
+        if now is None:
+            now = time.monotonic()
+        self.expire(now)
+        
+        view = memoryview(data)
+        if len(view) < FRAGMENT_HEADER_SIZE:
+            self.stats['invalid_fragments'] += 1
+            raise FragmentError(f"Fragment too short: {len(view)} bytes")
+        magic, version, index, count, frame_id = FRAGMENT_HEADER_STRUCT.unpack_from(view, 0)
+        if magic != FRAGMENT_MAGIC or version != FRAGMENT_VERSION:
+            self.stats['invalid_fragments'] += 1
+            raise FragmentError(f"Bad fragment header: magic=0x{magic:02X}, version={version}")
+        if count == 0 or index >= count:
+            self.stats['invalid_fragments'] += 1
+            raise FragmentError(f"Bad fragment index {index}/{count}")
+        self.stats['fragments_received'] += 1
+        
+        chunk = bytes(view[FRAGMENT_HEADER_SIZE:])
+        if count == 1:
+            self.stats['frames_completed'] += 1
+            return chunk
+        
+        key = (source, frame_id)
+        frame = self._frames.get(key)
+        if frame is not None and frame.count != count:
+            # 同一帧编号但分片总数不同：发送方已开始发送新的帧，旧的不完整帧作废
+            self._drop(key, 'frames_evicted')
+            frame = None
+        if frame is None:
+            self._check_frame_size(count, index, len(chunk))
+            frame = _PartialFrame(count, now)
+            self._frames[key] = frame
+            self._buffered_bytes += frame.size
+        
+        if index in frame.chunks:
+            self.stats['duplicate_fragments'] += 1
+            return None
+        frame.chunks[index] = chunk
+        frame.received += 1
+        chunk_size = len(chunk) + FRAGMENT_OVERHEAD
+        frame.size += chunk_size
+        self._buffered_bytes += chunk_size
+        
+        if frame.received == count:
+            del self._frames[key]
+            self._buffered_bytes -= frame.size
+            self.stats['frames_completed'] += 1
+            return b"".join(frame.chunks[i] for i in range(count))
+        
+        # 内存上限：从最早开始重组的帧依次丢弃（单帧超过上限时该帧本身也会被丢弃）
+        while self._buffered_bytes > self.max_bytes and self._frames:
+            self._drop(next(iter(self._frames)), 'frames_evicted')
+        return None
+    
+    def _check_frame_size(self, count: int, index: int, chunk_size: int):
+        """
+        按第一个到达的分片估计帧的最小缓冲量，超过内存上限时拒绝该帧
+        
+        除最后一个分片外各分片大小相同且至少1字节，因此非最后分片给出的下限为
+        (count - 1) × 分片大小 + 1，最后一个分片给出 count - 1 + 分片大小；另加簿记开销。
+        
+        Raises:
+            FragmentError: 该帧不可能在内存上限内重组完成
+        """
+        if index < count - 1:
+            payload = (count - 1) * chunk_size + 1
+        else:
+            payload = count - 1 + chunk_size
+        needed = payload + PARTIAL_FRAME_OVERHEAD + count * FRAGMENT_OVERHEAD
+        if needed > self.max_bytes:
+            self.stats['oversized_frames'] += 1
+            raise FragmentError(f"Frame of {count} fragments needs at least {needed} bytes, "
+                                f"limit is {self.max_bytes}")
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        丢弃等待超时的未完成帧
+        
+        Returns:
+            本次丢弃的帧数量
+        """
+        if now is None:
+            now = time.monotonic()
+        expired = 0
+        # 帧按首个分片到达的顺序保存，遇到未超时的帧即可停止
+        while self._frames:
+            key, frame = next(iter(self._frames.items()))
+            if now - frame.first_seen <= self.timeout:
+                break
+            self._drop(key, 'frames_timed_out')
+            expired += 1
+        return expired
+    
+    def _drop(self, key, reason: str):
+        """丢弃一个未完成帧并更新统计"""
+        frame = self._frames.pop(key)
+        self._buffered_bytes -= frame.size
+        self.stats[reason] += 1
+        self.stats['fragments_dropped'] += frame.received
+        logger.warning(
+            f"Dropped incomplete frame {key[1]} from {key[0]} "
+            f"({frame.received}/{frame.count} fragments, reason: {reason})"
+        )
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取重组统计
+        
+        Returns:
+            分片/帧计数、丢弃原因计数，以及当前缓冲的帧数和字节数
+        """
+        stats = dict(self.stats)
+        stats['partial_frames'] = len(self._frames)
+        stats['buffered_bytes'] = self._buffered_bytes
+        return stats
@@ -0,0 +1,289 @@
+"""触觉时间线调度模块
+
+使用最小堆保存带时间戳的串口命令（启动/停止），由独立调度线程按时发送，
+调用方无需time.sleep等待震动时长。
+
+- 命令按序列（sequence）提交，每个序列带有标签（tag），可按标签整体取消（抢占）
+- 被抢占的序列如果已经开始震动，会立即补发停止命令
+- 序列可以排在指定标签的序列之后播放；排队中尚未开始的同类序列被新序列替换
+- 记录每条命令实际发送时间相对计划时间的抖动（jitter）
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 停止所有马达的串口命令
+STOP_COMMAND = "stop\n"
+
+
+class ScheduledSequence:
+    """一组按时间排列的串口命令"""
+    
+    def __init__(self, tag: Optional[str], total: int, end: float = 0.0):
+        self.tag = tag
+        self.total = total
+        self.end = end
+        self.dispatched = 0
+        self.emitted = 0
+        self.cancelled = False
+        self._done = threading.Event()
+        if total == 0:
+            self._done.set()
+    
+    @property
+    def started(self) -> bool:
+        """是否已有命令被调度线程取出发送（在持有调度器锁时判断）"""
+        return self.dispatched > 0
+    
+    def is_done(self) -> bool:
+        """序列是否已结束（全部发送或被取消）"""
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待序列结束
+        
+        Returns:
+            序列是否在超时前结束
+        """
+        return self._done.wait(timeout)
+    
+    def _mark_done(self):
+        self._done.set()
+
+
+class _Command:
+    """堆中的单条命令"""
+    __slots__ = ('due', 'message', 'sequence', 'is_last')
+    
+    def __init__(self, due: float, message: str, sequence: ScheduledSequence, is_last: bool):
+        self.due = due
+        self.message = message
+        self.sequence = sequence
+        self.is_last = is_last
+
+
+class HapticScheduler:
+    """基于最小堆的触觉命令调度器"""
+    
+    def __init__(self, write_func: Callable[[str], None], jitter_window: int = 1000):
+        """
+        初始化调度器
+        
+        Args:
+            write_func: 实际发送命令的函数（例如SerialHandler.write_command）
+            jitter_window: 用于计算抖动统计的最近样本数量
+        """
+        self.write_func = write_func
+        self._heap: List[Tuple[float, int, _Command]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._active: Dict[str, List[ScheduledSequence]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        
+        # 抖动统计（毫秒）
+        self._jitter_samples = deque(maxlen=jitter_window)
+        self._jitter_count = 0
+        self._jitter_max = 0.0
+        self._emit_errors = 0
+    
+    def start(self):
+        """启动调度线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="haptic-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Haptic scheduler started")
+    
+    def stop(self, timeout: float = 2.0):
+        """停止调度线程，丢弃尚未发送的命令"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            for _, _, command in self._heap:
+                command.sequence.cancelled = True
+                command.sequence._mark_done()
+            self._heap.clear()
+            self._active.clear()
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Haptic scheduler stopped")
+    
+    def is_running(self) -> bool:
+        """检查调度器是否在运行"""
+        return self._running
+    
+    def submit_sequence(self, steps: List[Tuple[float, str]], tag: Optional[str] = None,
+                        preempt: Tuple[str, ...] = (), after: Tuple[str, ...] = ()) -> ScheduledSequence:
+        """
+        提交一个命令序列（不阻塞调用线程）
+        
+        Args:
+            steps: [(相对序列开始时间的偏移秒数, 命令字符串), ...]
+            tag: 序列标签，用于之后按标签取消
+            preempt: 提交前需要取消（抢占）的序列标签
+            after: 需要等待其播放结束的序列标签；其中与本序列标签相同、排队中尚未开始的序列
+                被本序列替换，其他标签的序列（包括尚未开始的）都排在本序列之前播放
+        
+        Returns:
+            ScheduledSequence对象，可用于等待或查询状态
+        """
+        ordered = sorted(steps, key=lambda step: step[0])
+        with self._cond:
+            for preempt_tag in preempt:
+                self._cancel_locked(preempt_tag)
+            
+            start = time.monotonic()
+            for after_tag in after:
+                pending = [s for s in self._active.get(after_tag, []) if not s.is_done()]
+                if after_tag == tag:
+                    # 只替换同标签排队中的序列，其他标签的序列（如态势感知）只等待、不丢弃
+                    self._cancel_sequences_locked([s for s in pending if not s.started])
+                    pending = [s for s in pending if s.started]
+                for waiting in pending:
+                    start = max(start, waiting.end)
+            
+            end = start + max(0.0, ordered[-1][0]) if ordered else start
+            sequence = ScheduledSequence(tag, len(steps), end)
+            for index, (offset, message) in enumerate(ordered):
+                command = _Command(start + max(0.0, offset), message, sequence,
+                                   index == len(ordered) - 1)
+                heapq.heappush(self._heap, (command.due, next(self._counter), command))
+            if tag is not None and steps:
+                self._active.setdefault(tag, []).append(sequence)
+            self._cond.notify()
+        return sequence
+    
+    def cancel(self, tag: str) -> int:
+        """
+        取消指定标签下所有未完成的序列
+        
+        已经开始震动的序列会立即补发一条停止命令。
+        
+        Returns:
+            被取消的序列数量
+        """
+        with self._cond:
+            count = self._cancel_locked(tag)
+        if count:
+            logger.info(f"Preempted {count} haptic sequence(s) with tag '{tag}'")
+        return count
+    
+    def _cancel_locked(self, tag: str) -> int:
+        """取消指定标签下所有未完成的序列（调用方持有锁）"""
+        sequences = [s for s in self._active.pop(tag, []) if not s.is_done()]
+        self._cancel_sequences_locked(sequences)
+        return len(sequences)
+    
+    def _cancel_sequences_locked(self, sequences: List[ScheduledSequence]):
+        """
+        取消给定的序列（调用方持有锁）
+        
+        是否补发停止命令在锁内按已取出的命令判断：调度线程取出命令时即记为已开始，
+        因此正在发送第一条命令时被取消的序列同样会补发停止命令（排在该命令之后）。
+        """
+        if not sequences:
+            return
+        need_stop = False
+        for sequence in sequences:
+            sequence.cancelled = True
+            need_stop = need_stop or sequence.started
+            sequence._mark_done()
+            if sequence.tag in self._active:
+                self._active[sequence.tag] = [s for s in self._active[sequence.tag] if s is not sequence]
+                if not self._active[sequence.tag]:
+                    del self._active[sequence.tag]
+        self._heap = [entry for entry in self._heap if not entry[2].sequence.cancelled]
+        heapq.heapify(self._heap)
+        if need_stop:
+            stop_sequence = ScheduledSequence(None, 1)
+            command = _Command(time.monotonic(), STOP_COMMAND, stop_sequence, True)
+            heapq.heappush(self._heap, (command.due, next(self._counter), command))
+        self._cond.notify()
+    
+    def active_sequence(self, tag: str) -> Optional[ScheduledSequence]:
+        """返回指定标签下最近一个未结束的序列"""
+        with self._cond:
+            pending = [s for s in self._active.get(tag, []) if not s.is_done()]
+            return pending[-1] if pending else None
+    
+    def _run(self):
+        """调度线程主循环"""
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                _, _, command = heapq.heappop(self._heap)
+                command.sequence.dispatched += 1
+            
+            self._emit(command)
+    
+    def _emit(self, command: _Command):
+        """发送单条命令并记录抖动"""
+        try:
+            self.write_func(command.message)
+        except Exception as e:
+            self._emit_errors += 1
+            logger.error(f"Failed to emit haptic command {command.message.strip()}: {e}")
+        
+        jitter_ms = (time.monotonic() - command.due) * 1000.0
+        with self._cond:
+            self._jitter_samples.append(jitter_ms)
+            self._jitter_count += 1
+            self._jitter_max = max(self._jitter_max, jitter_ms)
+            
+            sequence = command.sequence
+            sequence.emitted += 1
+            if command.is_last and not sequence.cancelled:
+                sequence._mark_done()
+                if sequence.tag in self._active:
+                    self._active[sequence.tag] = [
+                        s for s in self._active[sequence.tag] if not s.is_done()
+                    ]
+                    if not self._active[sequence.tag]:
+                        del self._active[sequence.tag]
+    
+    def get_jitter_stats(self) -> Dict[str, float]:
+        """
+        获取调度抖动统计（实际发送时间 - 计划时间，单位毫秒）
+        
+        Returns:
+            {'count', 'mean_ms', 'p95_ms', 'max_ms', 'last_ms', 'emit_errors'}
+        """
+        with self._cond:
+            samples = sorted(self._jitter_samples)
+            last = self._jitter_samples[-1] if self._jitter_samples else 0.0
+            count = self._jitter_count
+            max_ms = self._jitter_max
+            errors = self._emit_errors
+        if not samples:
+            return {'count': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0,
+                    'last_ms': 0.0, 'emit_errors': errors}
+        p95_index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+        return {
+            'count': count,
+            'mean_ms': sum(samples) / len(samples),
+            'p95_ms': samples[p95_index],
+            'max_ms': max_ms,
+            'last_ms': last,
+            'emit_errors': errors
+        }
@@ -4,6 +4,8 @@ import signal
 import sys
 import os
 import time
+from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -19,6 +21,15 @@ from config import (
     NUM_VIBRATORS,
     UDP_HOST,
     UDP_PORT,
+    UDP_TIMEOUT,
+    UDP_RCVBUF_SIZE,
+    UDP_BATCH_RECEIVE,
+    UDP_MAX_BATCH,
+    UDP_DROP_CHECK_INTERVAL,
+    UDP_REASSEMBLY_TIMEOUT,
+    UDP_REASSEMBLY_MAX_BYTES,
+    UDP_REQUEST_KEYFRAMES,
+    UDP_BATTLEFIELD_IDLE_TIMEOUT,
     VIBRATION_INTENSITY,
     VIBRATION_DURATION,
     VIBRATION_MODE_DRONE,
@@ -32,11 +43,33 @@ from config import (
     THREAT_THRESHOLD,
     DISTANCE_1,
     DISTANCE_2,
-    PAUSE_BETWEEN_VIBRATIONS
+    PAUSE_BETWEEN_VIBRATIONS,
+    PIPELINE_INGEST_QUEUE_SIZE,
+    PIPELINE_COALESCE_FRAMES,
+    PIPELINE_OUTPUT_QUEUE_SIZE,
+    PIPELINE_SHUTDOWN_TIMEOUT,
+    ENABLE_HAPTIC_SCHEDULER,
+    MULTI_SESSION_ENABLED,
+    SESSION_MAX_WORKERS,
+    SESSION_MAX_COUNT,
+    SESSION_IDLE_TIMEOUT,
+    SESSION_LOG_DIR,
+    SESSION_SERIAL_PORTS,
+    SESSION_STATS_INTERVAL,
+    CSV_BACKGROUND_WRITER,
+    CSV_WRITE_QUEUE_SIZE,
+    CSV_WRITE_BATCH_SIZE,
+    CSV_WRITE_FLUSH_INTERVAL,
+    CSV_FSYNC_POLICY,
+    EXPERIMENT_LOG_BACKEND,
+    EXPERIMENT_DB_PATH,
+    EXPERIMENT_SESSION_NAME,
+    EXPERIMENT_STORE_RANKINGS
 )
 
-from threat_analyzer import find_most_threatening_target
+from threat_analyzer import find_most_threatening_target, get_ifs_engine_stats, rank_targets
 from serial_handler import SerialHandler
+from haptic_scheduler import HapticScheduler, STOP_COMMAND
 from udp_server import UDPServer
 from direction_mapper import calculate_motor_for_target
 from situation_awareness import (
@@ -44,6 +77,10 @@ from situation_awareness import (
     normalize_threat_to_intensity
 )
 from csv_logger import CSVLogger
+from experiment_store import ExperimentStore
+from column_log import ColumnarLogger
+from pipeline import ThreatPipeline
+from session_manager import Session, SessionManager, create_process_pool
 
 # 配置日志
 logging.basicConfig(
@@ -79,6 +116,303 @@ def get_distance_vibration_mode(distance: float) -> int:
         return 3  # 模式3: 波浪式 (最远)
 
 
+# 本次运行的实验会话名称（未配置 EXPERIMENT_SESSION_NAME 时使用启动时间戳）
+RUN_SESSION_NAME = EXPERIMENT_SESSION_NAME or datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def create_experiment_logger(base_dir: str, session: str = None):
+    """
+    按配置创建实验数据记录器
+    
+    Args:
+        base_dir: 日志目录（csv / columnar后端）
+        session: 会话键（sqlite后端，附加在本次运行的会话名称之后；None表示单会话模式）
+    
+    Returns:
+        CSVLogger（后台写入、批量大小和fsync策略按配置）、ExperimentStore 或 ColumnarLogger
+    """
+    if EXPERIMENT_LOG_BACKEND == 'sqlite':
+        return ExperimentStore(
+            db_path=EXPERIMENT_DB_PATH,
+            session=RUN_SESSION_NAME if session is None else f"{RUN_SESSION_NAME}/{session}",
+            batch_size=CSV_WRITE_BATCH_SIZE,
+            flush_interval=CSV_WRITE_FLUSH_INTERVAL,
+            record_rankings=EXPERIMENT_STORE_RANKINGS
+        )
+    if EXPERIMENT_LOG_BACKEND == 'columnar':
+        return ColumnarLogger(base_dir=base_dir)
+    return CSVLogger(
+        base_dir=base_dir,
+        background=CSV_BACKGROUND_WRITER,
+        queue_size=CSV_WRITE_QUEUE_SIZE,
+        batch_size=CSV_WRITE_BATCH_SIZE,
+        flush_interval=CSV_WRITE_FLUSH_INTERVAL,
+        fsync_policy=CSV_FSYNC_POLICY
+    )
+
+
+def log_game_data(game_data):
+    """打印接收到的数据详情"""
+    logger.info("=" * 60)
+    logger.info(f"Processing received data - Round: {game_data.round}")
+    logger.info(f"Player Position: X={game_data.playerPosition.x:.2f}, Y={game_data.playerPosition.y:.2f}, Z={game_data.playerPosition.z:.2f}")
+    logger.info(f"Total targets: {len(game_data.targets)}")
+    for i, target in enumerate(game_data.targets, 1):
+        velocity = target.velocity
+        velocity_info = f", Velocity=({velocity.x:.2f}, {velocity.y:.2f}, {velocity.z:.2f}) m/s" if velocity is not None else ""
+        direction_info = f", Direction={target.direction:.2f}°" if target.direction is not None else ""
+        logger.info(
+            f"  Target {i}: ID={target.id}, Type={target.type}, "
+            f"Distance={target.distance:.2f}, Angle={target.angle:.2f}°, "
+            f"Position=({target.position.x:.2f}, {target.position.y:.2f}, {target.position.z:.2f})"
+            f"{velocity_info}{direction_info}"
+        )
+    logger.info("=" * 60)
+
+
+def assess_round(game_data, csv_logger) -> Optional[dict]:
+    """
+    评估阶段：计算威胁数据并写入CSV（在评估线程中运行）
+    
+    Args:
+        game_data: 游戏数据对象
+        csv_logger: CSV日志记录器（可以为None）
+    
+    Returns:
+        评估结果字典 {'game_data', 'most_threatening', 'direction_threats'}，
+        如果无需震动输出（无目标或round已处理）则返回None
+    """
+    log_game_data(game_data)
+    
+    # 如果没有目标，跳过
+    if not game_data.targets:
+        logger.warning("No targets in received data, skipping...")
+        return None
+    
+    # ========== 步骤1：检查round是否已存在 ==========
+    round_exists = csv_logger.check_round_exists(game_data.round) if csv_logger else False
+    
+    if round_exists:
+        logger.info(f"📋 Round {game_data.round} already exists in CSV, skipping calculation and vibration")
+        return None  # 跳过已处理的 round
+    
+    # ========== 步骤2：计算威胁数据 ==========
+    logger.info(f"📝 Round {game_data.round} is new, calculating threat data...")
+    most_threatening = find_most_threatening_target(game_data)
+    direction_threats = calculate_all_directions_threat(game_data)
+    
+    # ========== 步骤3：写入CSV ==========
+    if csv_logger:
+        extra = {}
+        if getattr(csv_logger, 'record_rankings', False):
+            extra['rankings'] = rank_targets(game_data)
+        csv_logger.log_round_data(
+            round_number=game_data.round,
+            most_threatening_target=most_threatening,
+            direction_threats=direction_threats,
+            **extra
+        )
+        logger.info(f"✓ Round {game_data.round} data saved to CSV")
+    
+    return {
+        'game_data': game_data,
+        'most_threatening': most_threatening,
+        'direction_threats': direction_threats
+    }
+
+
+def render_haptics(serial_handler: SerialHandler, assessment: dict):
+    """
+    输出阶段：根据评估结果发送震动信号（在输出线程中运行，允许阻塞）
+    
+    Args:
+        serial_handler: 串口处理器
+        assessment: assess_round 返回的评估结果字典
+    """
+    game_data = assessment['game_data']
+    most_threatening = assessment['most_threatening']
+    direction_threats = assessment['direction_threats']
+    
+    # ========== 检查是否为态势感知模式 ==========
+    if game_data.situationAwareness:
+        # 态势感知模式：同时震动所有方向
+        logger.info("🌐 态势感知模式已激活")
+        
+        # 将威胁度映射到震动强度
+        intensities_dict = normalize_threat_to_intensity(
+            direction_threats,
+            min_intensity=MIN_PERCEPTIBLE_INTENSITY,
+            max_intensity=MAX_VIBRATION_INTENSITY,
+            threshold=THREAT_THRESHOLD
+        )
+        
+        # 转换为列表（按方向ID 0-15 排序）
+        intensities_list = [intensities_dict.get(i, 0) for i in range(16)]
+        
+        # 发送多马达震动信号
+        success = serial_handler.send_multi_vibration(
+            intensities=intensities_list,
+            duration=VIBRATION_DURATION,
+            mode=0  # 态势感知使用持续震动模式
+        )
+        
+        if not success:
+            logger.error("Failed to send situation awareness vibration")
+        return
+    
+    if most_threatening is None:
+        logger.warning("No most threatening target, skipping vibration")
+        return
+    
+    # 单目标模式：双震动（距离 + 类型）
+    logger.info("🎯 单目标模式 - 双震动")
+    
+    # 计算敌人方向对应的马达编号
+    motor_id, direction_angle, direction_desc = calculate_motor_for_target(
+        game_data.playerPosition,
+        most_threatening.position
+    )
+    
+    # ===== 第一次震动：根据距离 =====
+    distance = most_threatening.distance
+    distance_mode = get_distance_vibration_mode(distance)
+    distance_mode_name = ["持续震动", "超快脉冲", "三连击", "波浪式"][distance_mode]
+    
+    logger.info("=" * 60)
+    logger.info("🎯 第一次震动 - 距离反馈")
+    logger.info(f"  Most threatening target: ID={most_threatening.id}, Type={most_threatening.type}")
+    logger.info(f"  Target position: ({most_threatening.position.x:.2f}, {most_threatening.position.y:.2f}, {most_threatening.position.z:.2f})")
+    logger.info(f"  Direction angle: {direction_angle:.2f}°")
+    logger.info(f"  Selected motor: #{motor_id} - {direction_desc}")
+    logger.info("─" * 60)
+    logger.info(f"  距离: {distance:.2f}m")
+    logger.info(f"  震动强度: {VIBRATION_INTENSITY}")
+    logger.info(f"  震动模式: {distance_mode} ({distance_mode_name})")
+    logger.info(f"  持续时间: {VIBRATION_DURATION}s")
+    logger.info("=" * 60)
+    
+    is_drone = most_threatening.type.lower() == "drone"
+    type_mode = VIBRATION_MODE_DRONE if is_drone else VIBRATION_MODE_SOLDIER
+    type_mode_name = "持续震动" if is_drone else "超快脉冲"
+    
+    if serial_handler.scheduler:
+        # 调度模式：整个双震动序列交给调度线程，输出线程立即返回
+        logger.info(f"  第二次震动 - 敌人类型: {most_threatening.type}, 模式: {type_mode} ({type_mode_name})")
+        sequence = serial_handler.play_single_target_sequence(
+            motor_id, VIBRATION_INTENSITY, VIBRATION_DURATION, distance_mode,
+            PAUSE_BETWEEN_VIBRATIONS, type_mode
+        )
+        if sequence is None:
+            logger.error("Failed to schedule single target vibration sequence")
+        return
+    
+    success = serial_handler.send_vibration(
+        motor_id, VIBRATION_INTENSITY, VIBRATION_DURATION, distance_mode
+    )
+    
+    if not success:
+        logger.error("Failed to send first vibration (distance)")
+    
+    # ===== 暂停 3 秒 =====
+    logger.info(f"⏸  暂停 {PAUSE_BETWEEN_VIBRATIONS} 秒...")
+    time.sleep(PAUSE_BETWEEN_VIBRATIONS)
+    
+    # ===== 第二次震动：根据敌人类型 =====
+    logger.info("=" * 60)
+    logger.info("🎯 第二次震动 - 敌人类型反馈")
+    logger.info(f"  敌人类型: {most_threatening.type}")
+    logger.info(f"  震动强度: {VIBRATION_INTENSITY}")
+    logger.info(f"  震动模式: {type_mode} ({type_mode_name})")
+    logger.info(f"  持续时间: {VIBRATION_DURATION}s")
+    logger.info("=" * 60)
+    
+    success = serial_handler.send_vibration(
+        motor_id, VIBRATION_INTENSITY, VIBRATION_DURATION, type_mode
+    )
+    
+    if not success:
+        logger.error("Failed to send second vibration (enemy type)")
+
+
+def create_session(key: str, executor) -> Session:
+    """
+    多会话模式的会话工厂：为每个会话创建独立的CSV日志和输出设备
+    
+    Args:
+        key: 会话键（sessionId 或 "IP:端口"）
+        executor: 评估进程池
+    
+    Returns:
+        未启动的Session对象
+    """
+    csv_logger = None
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+    try:
+        csv_logger = create_experiment_logger(os.path.join(SESSION_LOG_DIR, safe_name), session=key)
+    except Exception as e:
+        logger.error(f"Failed to initialize CSV logger for session '{key}': {e}")
+    
+    output_func = None
+    on_close = None
+    port = SESSION_SERIAL_PORTS.get(key)
+    if port:
+        serial_handler = SerialHandler(port=port, baudrate=SERIAL_BAUDRATE)
+        if serial_handler.connect():
+            scheduler = None
+            if ENABLE_HAPTIC_SCHEDULER:
+                scheduler = HapticScheduler(serial_handler.write_command)
+                scheduler.start()
+                serial_handler.attach_scheduler(scheduler)
+            
+            def on_close():
+                if scheduler:
+                    scheduler.stop()
+                    serial_handler.write_command(STOP_COMMAND)
+                serial_handler.disconnect()
+            
+            output_func = lambda assessment: render_haptics(serial_handler, assessment)
+        else:
+            logger.error(f"Failed to connect serial port {port} for session '{key}', running without output")
+    
+    return Session(key, executor, output_func=output_func, csv_logger=csv_logger,
+                   on_close=on_close, output_queue_size=PIPELINE_OUTPUT_QUEUE_SIZE)
+
+
+def run_multi_session(udp_server: UDPServer):
+    """
+    多会话模式主循环：按会话分发数据帧，评估在进程池中并行执行
+    
+    Args:
+        udp_server: 已启动的UDP服务器
+    """
+    executor = create_process_pool(SESSION_MAX_WORKERS)
+    manager = SessionManager(executor, create_session,
+                             max_sessions=SESSION_MAX_COUNT, idle_timeout=SESSION_IDLE_TIMEOUT)
+    logger.info(f"Multi-session mode: up to {SESSION_MAX_COUNT} sessions, "
+                f"{SESSION_MAX_WORKERS or os.cpu_count()} assessment worker process(es)")
+    
+    next_stats = time.monotonic() + SESSION_STATS_INTERVAL
+    try:
+        while running:
+            for game_data in udp_server.receive_batch():
+                manager.dispatch(game_data)
+            
+            if time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + SESSION_STATS_INTERVAL
+                manager.reap_idle()
+                for key, stats in manager.get_stats().items():
+                    latency = stats['assess_latency']
+                    logger.info(
+                        f"📊 Session '{key}': round={stats['last_round']}, "
+                        f"assess latency p50={latency['p50_ms']:.1f}ms p95={latency['p95_ms']:.1f}ms "
+                        f"max={latency['max_ms']:.1f}ms, dropped={stats['pipeline']['ingest_dropped']}"
+                    )
+    finally:
+        logger.info(f"Session statistics: {manager.get_stats()}")
+        manager.close_all(timeout=PIPELINE_SHUTDOWN_TIMEOUT)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def signal_handler(sig, frame):
     """处理中断信号（Ctrl+C）"""
     global running
@@ -104,14 +438,32 @@ def main():
     print(f"  - 地形分析: {'✓ 已启用' if ENABLE_TERRAIN_ANALYSIS else '✗ 已禁用'}")
     print(f"串口配置: {SERIAL_PORT} @ {SERIAL_BAUDRATE} bps")
     print(f"UDP配置: {UDP_HOST}:{UDP_PORT}")
+    print(f"多会话模式: {'✓ 已启用' if MULTI_SESSION_ENABLED else '✗ 已禁用'}")
     print("=" * 70 + "\n")
     
     # 初始化UDP服务器
-    udp_server = UDPServer(host=UDP_HOST, port=UDP_PORT)
+    udp_server = UDPServer(host=UDP_HOST, port=UDP_PORT,
+                           timeout=UDP_TIMEOUT, rcvbuf_size=UDP_RCVBUF_SIZE,
+                           reassembly_timeout=UDP_REASSEMBLY_TIMEOUT,
+                           reassembly_max_bytes=UDP_REASSEMBLY_MAX_BYTES,
+                           request_keyframes=UDP_REQUEST_KEYFRAMES,
+                           battlefield_idle_timeout=UDP_BATTLEFIELD_IDLE_TIMEOUT)
     if not udp_server.start():
         logger.error("Failed to start UDP server, exiting...")
         sys.exit(1)
     
+    # 多会话模式：每个会话使用独立的串口和CSV日志
+    if MULTI_SESSION_ENABLED:
+        try:
+            run_multi_session(udp_server)
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt received")
+        finally:
+            logger.info(f"UDP receive statistics: {udp_server.get_stats()}")
+            udp_server.stop()
+            logger.info("System shutdown complete")
+        return
+    
     # 初始化串口处理器
     serial_handler = SerialHandler(port=SERIAL_PORT, baudrate=SERIAL_BAUDRATE)
     if not serial_handler.connect():
@@ -119,6 +471,13 @@ def main():
         udp_server.stop()
         sys.exit(1)
     
+    # 初始化触觉时间线调度器
+    haptic_scheduler = None
+    if ENABLE_HAPTIC_SCHEDULER:
+        haptic_scheduler = HapticScheduler(serial_handler.write_command)
+        haptic_scheduler.start()
+        serial_handler.attach_scheduler(haptic_scheduler)
+    
     # 询问用户是否进行硬件测试
     print("\n" + "=" * 60)
     print("🔧 硬件测试选项")
@@ -135,7 +494,7 @@ def main():
     # 初始化CSV日志记录器
     csv_logger = None
     try:
-        csv_logger = CSVLogger(base_dir="logs")
+        csv_logger = create_experiment_logger("logs")
     except Exception as e:
         logger.error(f"Failed to initialize CSV logger: {e}")
         logger.warning("Continuing without CSV logging...")
@@ -150,141 +509,37 @@ def main():
     logger.info("Default mode: Single Target Mode")
     logger.info("System initialized successfully. Waiting for data...")
     
+    # 启动三级流水线：接收 → 评估 → 输出
+    if UDP_BATCH_RECEIVE:
+        receive_func = lambda: udp_server.receive_batch(UDP_MAX_BATCH)
+    else:
+        receive_func = udp_server.receive_data
+    pipeline = ThreatPipeline(
+        receive_func=receive_func,
+        assess_func=lambda game_data: assess_round(game_data, csv_logger),
+        output_func=lambda assessment: render_haptics(serial_handler, assessment),
+        ingest_queue_size=PIPELINE_INGEST_QUEUE_SIZE,
+        output_queue_size=PIPELINE_OUTPUT_QUEUE_SIZE,
+        coalesce_frames=PIPELINE_COALESCE_FRAMES,
+        batch_receive=UDP_BATCH_RECEIVE
+    )
+    
     try:
+        pipeline.start()
+        last_kernel_drops = udp_server.get_kernel_drops()
+        next_drop_check = time.monotonic() + UDP_DROP_CHECK_INTERVAL
         while running:
-            # 接收UDP数据
-            game_data = udp_server.receive_data()
-            
-            if game_data is None:
-                # 超时或接收失败，继续循环
-                continue
-            
-            # 打印接收到的数据详情
-            logger.info("=" * 60)
-            logger.info(f"Processing received data - Round: {game_data.round}")
-            logger.info(f"Player Position: X={game_data.playerPosition.x:.2f}, Y={game_data.playerPosition.y:.2f}, Z={game_data.playerPosition.z:.2f}")
-            logger.info(f"Total targets: {len(game_data.targets)}")
-            for i, target in enumerate(game_data.targets, 1):
-                velocity_info = f", Velocity={target.velocity:.2f} m/s" if target.velocity is not None else ""
-                direction_info = f", Direction={target.direction:.2f}°" if target.direction is not None else ""
-                logger.info(
-                    f"  Target {i}: ID={target.id}, Type={target.type}, "
-                    f"Distance={target.distance:.2f}, Angle={target.angle:.2f}°, "
-                    f"Position=({target.position.x:.2f}, {target.position.y:.2f}, {target.position.z:.2f})"
-                    f"{velocity_info}{direction_info}"
-                )
-            logger.info("=" * 60)
-            
-            # 如果没有目标，跳过
-            if not game_data.targets:
-                logger.warning("No targets in received data, skipping...")
-                continue
-            
-            # ========== 步骤1：检查round是否已存在 ==========
-            round_exists = csv_logger.check_round_exists(game_data.round) if csv_logger else False
-            
-            if not round_exists:
-                # ========== 步骤2：计算威胁数据 ==========
-                logger.info(f"📝 Round {game_data.round} is new, calculating threat data...")
-                most_threatening = find_most_threatening_target(game_data)
-                direction_threats = calculate_all_directions_threat(game_data)
-                
-                # ========== 步骤3：写入CSV ==========
-                if csv_logger:
-                    csv_logger.log_round_data(
-                        round_number=game_data.round,
-                        most_threatening_target=most_threatening,
-                        direction_threats=direction_threats
-                    )
-                    logger.info(f"✓ Round {game_data.round} data saved to CSV")
-            else:
-                logger.info(f"📋 Round {game_data.round} already exists in CSV, skipping calculation and vibration")
-                continue  # 跳过已处理的 round
-            
-            # ========== 检查是否为态势感知模式 ==========
-            if game_data.situationAwareness:
-                # 态势感知模式：同时震动所有方向
-                logger.info("🌐 态势感知模式已激活")
-                
-                # 将威胁度映射到震动强度
-                intensities_dict = normalize_threat_to_intensity(
-                    direction_threats,
-                    min_intensity=MIN_PERCEPTIBLE_INTENSITY,
-                    max_intensity=MAX_VIBRATION_INTENSITY,
-                    threshold=THREAT_THRESHOLD
-                )
-                
-                # 转换为列表（按方向ID 0-15 排序）
-                intensities_list = [intensities_dict.get(i, 0) for i in range(16)]
-                
-                # 发送多马达震动信号
-                success = serial_handler.send_multi_vibration(
-                    intensities=intensities_list,
-                    duration=VIBRATION_DURATION,
-                    mode=0  # 态势感知使用持续震动模式
-                )
-                
-                if not success:
-                    logger.error("Failed to send situation awareness vibration")
+            time.sleep(0.2)
             
-            else:
-                # 单目标模式：双震动（距离 + 类型）
-                logger.info("🎯 单目标模式 - 双震动")
-                
-                # 计算敌人方向对应的马达编号
-                motor_id, direction_angle, direction_desc = calculate_motor_for_target(
-                    game_data.playerPosition,
-                    most_threatening.position
-                )
-                
-                # ===== 第一次震动：根据距离 =====
-                distance = most_threatening.distance
-                distance_mode = get_distance_vibration_mode(distance)
-                distance_mode_name = ["持续震动", "超快脉冲", "三连击", "波浪式"][distance_mode]
-                
-                logger.info("=" * 60)
-                logger.info("🎯 第一次震动 - 距离反馈")
-                logger.info(f"  Most threatening target: ID={most_threatening.id}, Type={most_threatening.type}")
-                logger.info(f"  Target position: ({most_threatening.position.x:.2f}, {most_threatening.position.y:.2f}, {most_threatening.position.z:.2f})")
-                logger.info(f"  Direction angle: {direction_angle:.2f}°")
-                logger.info(f"  Selected motor: #{motor_id} - {direction_desc}")
-                logger.info("─" * 60)
-                logger.info(f"  距离: {distance:.2f}m")
-                logger.info(f"  震动强度: {VIBRATION_INTENSITY}")
-                logger.info(f"  震动模式: {distance_mode} ({distance_mode_name})")
-                logger.info(f"  持续时间: {VIBRATION_DURATION}s")
-                logger.info("=" * 60)
-                
-                success = serial_handler.send_vibration(
-                    motor_id, VIBRATION_INTENSITY, VIBRATION_DURATION, distance_mode
-                )
-                
-                if not success:
-                    logger.error("Failed to send first vibration (distance)")
-                
-                # ===== 暂停 3 秒 =====
-                logger.info(f"⏸  暂停 {PAUSE_BETWEEN_VIBRATIONS} 秒...")
-                time.sleep(PAUSE_BETWEEN_VIBRATIONS)
-                
-                # ===== 第二次震动：根据敌人类型 =====
-                is_drone = most_threatening.type.lower() == "drone"
-                type_mode = VIBRATION_MODE_DRONE if is_drone else VIBRATION_MODE_SOLDIER
-                type_mode_name = "持续震动" if is_drone else "超快脉冲"
-                
-                logger.info("=" * 60)
-                logger.info("🎯 第二次震动 - 敌人类型反馈")
-                logger.info(f"  敌人类型: {most_threatening.type}")
-                logger.info(f"  震动强度: {VIBRATION_INTENSITY}")
-                logger.info(f"  震动模式: {type_mode} ({type_mode_name})")
-                logger.info(f"  持续时间: {VIBRATION_DURATION}s")
-                logger.info("=" * 60)
-                
-                success = serial_handler.send_vibration(
-                    motor_id, VIBRATION_INTENSITY, VIBRATION_DURATION, type_mode
-                )
-                
-                if not success:
-                    logger.error("Failed to send second vibration (enemy type)")
+            # 定期检查内核接收缓冲区丢包
+            if time.monotonic() >= next_drop_check:
+                next_drop_check = time.monotonic() + UDP_DROP_CHECK_INTERVAL
+                kernel_drops = udp_server.get_kernel_drops()
+                if kernel_drops is not None and last_kernel_drops is not None \
+                        and kernel_drops > last_kernel_drops:
+                    logger.warning(f"⚠️ Kernel dropped {kernel_drops - last_kernel_drops} UDP datagram(s) "
+                                   f"in the last {UDP_DROP_CHECK_INTERVAL:.0f}s (total: {kernel_drops})")
+                last_kernel_drops = kernel_drops
     
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
@@ -293,9 +548,27 @@ def main():
     finally:
         # 清理资源
         logger.info("Cleaning up resources...")
+        if not pipeline.stop(timeout=PIPELINE_SHUTDOWN_TIMEOUT):
+            logger.warning("Pipeline did not stop cleanly")
+        logger.info(f"Pipeline statistics: {pipeline.get_stats()}")
+        ifs_engine_stats = get_ifs_engine_stats()
+        if ifs_engine_stats:
+            logger.info(f"IFS engine statistics: {ifs_engine_stats['operations']}")
+            logger.info(f"IFS pruned search: {ifs_engine_stats['pruning']}")
+            if 'incremental' in ifs_engine_stats:
+                logger.info(f"IFS incremental cache: {ifs_engine_stats['incremental']}")
+        if haptic_scheduler:
+            logger.info(f"Haptic scheduler jitter: {haptic_scheduler.get_jitter_stats()}")
+            haptic_scheduler.stop()
+            try:
+                serial_handler.write_command(STOP_COMMAND)
+            except Exception as e:
+                logger.error(f"Failed to send final stop command: {e}")
         if csv_logger:
             csv_logger.close()
+            logger.info(f"Experiment log statistics: {csv_logger.get_stats()}")
         serial_handler.disconnect()
+        logger.info(f"UDP receive statistics: {udp_server.get_stats()}")
         udp_server.stop()
         logger.info("System shutdown complete")
 
@@ -1,8 +1,41 @@
 """数据模型定义模块"""
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
 import math
 
+import numpy as np
+
+# 目标类型编码（TargetBatch.type_code 列；与IFS适配器一致：非Drone一律视为Soldier）
+TARGET_TYPE_SOLDIER = 0
+TARGET_TYPE_DRONE = 1
+TARGET_TYPE_NAMES = ("Soldier", "Drone")
+
+# 目标记录标志位
+TARGET_FLAG_HAS_VELOCITY = 0x01
+
+# 单条目标记录的内存布局（小端、紧凑），同时也是二进制数据帧中的目标记录格式
+TARGET_RECORD_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('type', 'u1'),
+    ('flags', 'u1'),
+    ('reserved', '<u2'),
+    ('angle', '<f4'),
+    ('distance', '<f4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('speed', '<f4'),
+    ('direction', '<f4'),
+    ('vx', '<f4'),
+    ('vy', '<f4'),
+    ('vz', '<f4'),
+])
+
+
+def type_code(type_name: str) -> int:
+    """目标类型名称 → 类型编码"""
+    return TARGET_TYPE_DRONE if type_name.lower() == 'drone' else TARGET_TYPE_SOLDIER
+
 
 @dataclass
 class Position:
@@ -30,8 +63,11 @@ class GameData:
     """游戏数据"""
     round: int
     playerPosition: Position
-    targets: List[Target]
+    targets: Union[List[Target], 'TargetBatch']
     situationAwareness: bool = False  # 是否启用态势感知模式
+    source: Optional[Tuple[str, int]] = None  # 数据发送方地址（由UDP服务器填写）
+    sessionId: Optional[str] = None  # 会话ID（可选，多会话模式下区分不同玩家）
+    received_at: Optional[float] = None  # 接收时间（time.monotonic，由UDP服务器填写）
 
     @classmethod
     def from_dict(cls, data: dict) -> 'GameData':
@@ -62,6 +98,260 @@ class GameData:
             round=data['round'],
             playerPosition=player_pos,
             targets=targets,
-            situationAwareness=data.get('situationAwareness', False)
+            situationAwareness=data.get('situationAwareness', False),
+            sessionId=data.get('sessionId')
         )
+    
+    def target_batch(self) -> 'TargetBatch':
+        """以列式TargetBatch形式返回目标（已是TargetBatch时直接返回）"""
+        if isinstance(self.targets, TargetBatch):
+            return self.targets
+        return TargetBatch.from_targets(self.targets)
 
+
+class TargetView:
+    """
+    TargetBatch中单行的轻量视图
+    
+    属性与Target一致，供逐目标处理的旧代码直接使用；
+    字段在访问时才从列数组读取，不复制数据。
+    """
+    __slots__ = ('batch', 'index')
+    
+    def __init__(self, batch: 'TargetBatch', index: int):
+        self.batch = batch
+        self.index = index
+    
+    @property
+    def id(self) -> int:
+        return int(self.batch.id[self.index])
+    
+    @property
+    def angle(self) -> float:
+        return float(self.batch.angle[self.index])
+    
+    @property
+    def distance(self) -> float:
+        return float(self.batch.distance[self.index])
+    
+    @property
+    def type(self) -> str:
+        return TARGET_TYPE_NAMES[self.batch.type_code[self.index]]
+    
+    @property
+    def position(self) -> Position:
+        i = self.index
+        return Position(float(self.batch.x[i]), float(self.batch.y[i]), float(self.batch.z[i]))
+    
+    @property
+    def speed(self) -> float:
+        return float(self.batch.speed[self.index])
+    
+    @property
+    def direction(self) -> float:
+        return float(self.batch.direction[self.index])
+    
+    @property
+    def velocity(self) -> Optional[Position]:
+        i = self.index
+        if not self.batch.has_velocity[i]:
+            return None
+        return Position(float(self.batch.vx[i]), float(self.batch.vy[i]), float(self.batch.vz[i]))
+    
+    def to_target(self) -> Target:
+        """生成独立的Target对象"""
+        return Target(
+            id=self.id,
+            angle=self.angle,
+            distance=self.distance,
+            type=self.type,
+            position=self.position,
+            speed=self.speed,
+            direction=self.direction,
+            velocity=self.velocity
+        )
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TargetView):
+            return self.batch is other.batch and self.index == other.index
+        return NotImplemented
+    
+    def __hash__(self) -> int:
+        return hash((id(self.batch), self.index))
+    
+    def __repr__(self) -> str:
+        return f"TargetView(id={self.id}, type='{self.type}', distance={self.distance:.2f}, angle={self.angle:.2f})"
+
+
+class TargetBatch(Sequence):
+    """
+    列式目标集合
+    
+    每个字段保存为一个NumPy数组（长度为目标数量），下游代码可以直接按列计算；
+    同时实现序列协议（len、索引、迭代），逐行访问时返回TargetView，
+    因此可以直接作为GameData.targets使用。
+    """
+    
+    COLUMNS = ('id', 'type_code', 'angle', 'distance', 'x', 'y', 'z',
+               'speed', 'direction', 'vx', 'vy', 'vz', 'has_velocity')
+    
+    def __init__(self, id: np.ndarray, type_code: np.ndarray, angle: np.ndarray,
+                 distance: np.ndarray, x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                 speed: np.ndarray, direction: np.ndarray, vx: np.ndarray,
+                 vy: np.ndarray, vz: np.ndarray, has_velocity: np.ndarray):
+        """
+        初始化列式目标集合（各列长度必须一致）
+        
+        Args:
+            id: 目标ID
+            type_code: 类型编码（TARGET_TYPE_SOLDIER / TARGET_TYPE_DRONE）
+            angle, distance: 相对玩家的角度（度）和距离（米）
+            x, y, z: 目标位置
+            speed, direction: 移动速度（m/s）和移动方向（度）
+            vx, vy, vz: 速度矢量（has_velocity为False的行无意义）
+            has_velocity: 是否带有速度矢量
+        """
+        self.id = id
+        self.type_code = type_code
+        self.angle = angle
+        self.distance = distance
+        self.x = x
+        self.y = y
+        self.z = z
+        self.speed = speed
+        self.direction = direction
+        self.vx = vx
+        self.vy = vy
+        self.vz = vz
+        self.has_velocity = has_velocity
+        
+        lengths = {len(getattr(self, name)) for name in self.COLUMNS}
+        if len(lengths) > 1:
+            raise ValueError(f"TargetBatch columns have different lengths: {sorted(lengths)}")
+    
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'TargetBatch':
+        """从TARGET_RECORD_DTYPE结构化数组创建（各列为字段视图，不复制）"""
+        return cls(
+            id=records['id'],
+            type_code=records['type'],
+            angle=records['angle'],
+            distance=records['distance'],
+            x=records['x'],
+            y=records['y'],
+            z=records['z'],
+            speed=records['speed'],
+            direction=records['direction'],
+            vx=records['vx'],
+            vy=records['vy'],
+            vz=records['vz'],
+            has_velocity=(records['flags'] & TARGET_FLAG_HAS_VELOCITY).astype(bool)
+        )
+    
+    @classmethod
+    def from_bytes(cls, buffer, count: Optional[int] = None, offset: int = 0) -> 'TargetBatch':
+        """
+        从目标记录字节流创建（零拷贝）
+        
+        Args:
+            buffer: bytes / bytearray / memoryview
+            count: 记录数量，None表示读取到缓冲区末尾
+            offset: 起始字节偏移
+        
+        Returns:
+            TargetBatch对象，各列直接引用buffer中的数据
+        """
+        records = np.frombuffer(buffer, dtype=TARGET_RECORD_DTYPE,
+                                count=-1 if count is None else count, offset=offset)
+        return cls.from_records(records)
+    
+    @classmethod
+    def from_dict(cls, targets: List[dict]) -> 'TargetBatch':
+        """
+        从JSON目标列表创建（字段含义与GameData.from_dict相同）
+        
+        Args:
+            targets: 目标字典列表（JSON数据中的 'targets' 字段）
+        """
+        n = len(targets)
+        records = np.zeros(n, dtype=TARGET_RECORD_DTYPE)
+        if n:
+            records['id'] = [t['id'] for t in targets]
+            records['type'] = [type_code(t['type']) for t in targets]
+            records['angle'] = [t['angle'] for t in targets]
+            records['distance'] = [t['distance'] for t in targets]
+            positions = [t['position'] for t in targets]
+            records['x'] = [p['x'] for p in positions]
+            records['y'] = [p['y'] for p in positions]
+            records['z'] = [p['z'] for p in positions]
+            records['speed'] = [t.get('speed', 0.0) for t in targets]
+            records['direction'] = [t.get('direction', 0.0) for t in targets]
+            for i, t in enumerate(targets):
+                velocity = t.get('velocity')
+                if velocity:
+                    records[i]['flags'] = TARGET_FLAG_HAS_VELOCITY
+                    records[i]['vx'] = velocity['x']
+                    records[i]['vy'] = velocity['y']
+                    records[i]['vz'] = velocity['z']
+        return cls.from_records(records)
+    
+    @classmethod
+    def from_targets(cls, targets: Sequence[Target]) -> 'TargetBatch':
+        """从Target（或TargetView）序列创建"""
+        records = np.zeros(len(targets), dtype=TARGET_RECORD_DTYPE)
+        for i, target in enumerate(targets):
+            record = records[i]
+            record['id'] = target.id
+            record['type'] = type_code(target.type)
+            record['angle'] = target.angle
+            record['distance'] = target.distance
+            record['x'] = target.position.x
+            record['y'] = target.position.y
+            record['z'] = target.position.z
+            record['speed'] = target.speed
+            record['direction'] = target.direction
+            if target.velocity is not None:
+                record['flags'] = TARGET_FLAG_HAS_VELOCITY
+                record['vx'] = target.velocity.x
+                record['vy'] = target.velocity.y
+                record['vz'] = target.velocity.z
+        return cls.from_records(records)
+    
+    def to_records(self) -> np.ndarray:
+        """转换为TARGET_RECORD_DTYPE结构化数组（用于二进制编码）"""
+        records = np.zeros(len(self), dtype=TARGET_RECORD_DTYPE)
+        records['id'] = self.id
+        records['type'] = self.type_code
+        records['flags'] = np.where(self.has_velocity, TARGET_FLAG_HAS_VELOCITY, 0)
+        for name in ('angle', 'distance', 'x', 'y', 'z', 'speed', 'direction', 'vx', 'vy', 'vz'):
+            records[name] = getattr(self, name)
+        return records
+    
+    def to_targets(self) -> List[Target]:
+        """转换为Target对象列表"""
+        return [TargetView(self, i).to_target() for i in range(len(self))]
+    
+    @property
+    def is_drone(self) -> np.ndarray:
+        """无人机掩码"""
+        return self.type_code == TARGET_TYPE_DRONE
+    
+    def __len__(self) -> int:
+        return len(self.id)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TargetView(self, i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("TargetBatch index out of range")
+        return TargetView(self, index)
+    
+    def __iter__(self) -> Iterator[TargetView]:
+        for i in range(len(self)):
+            yield TargetView(self, i)
+    
+    def __repr__(self) -> str:
+        return f"TargetBatch(n={len(self)})"
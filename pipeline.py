@@ -0,0 +1,450 @@
+"""三级处理流水线模块：接收（ingest）→ 威胁评估（assess）→ 触觉输出（output）
+
+每个阶段运行在独立线程中，阶段之间通过有界队列传递数据：
+- 接收线程只负责从UDP读取数据，不会被评估或震动阻塞
+- 评估线程以数据包速率持续计算威胁
+- 输出线程执行震动序列（可能耗时数秒），期间不影响前两个阶段
+
+背压策略：队列满时丢弃最旧的数据（保留最新战场态势），并记录丢弃计数。
+启用帧合并（coalescing）时，接收→评估之间改用FrameCoalescer：
+每个玩家只保留最新一帧，被新帧取代的旧round直接丢弃；
+被取代的帧请求了态势感知时，该请求带到取代它的新帧上，不会因合并而丢失。
+评估→输出队列同样如此：待播放的态势感知结果被新结果取代时，态势感知请求带到新结果上。
+"""
+import dataclasses
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 队列中的停止标记
+_STOP = object()
+
+
+class StageQueue:
+    """有界阶段队列，满时丢弃最旧元素（可经 merge_func 合并到新元素上）"""
+    
+    def __init__(self, name: str, maxsize: int, merge_func: Optional[Callable[[Any, Any], Any]] = None):
+        """
+        初始化阶段队列
+        
+        Args:
+            name: 队列名称（用于日志和统计）
+            maxsize: 队列容量（必须大于0）
+            merge_func: 合并函数 (被丢弃的元素, 新元素) -> 放入的元素；None表示直接丢弃
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Queue size must be positive, got {maxsize}")
+        self.name = name
+        self.maxsize = maxsize
+        self.merge_func = merge_func
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.put_count = 0
+        self.dropped_count = 0
+    
+    def put_latest(self, item: Any) -> bool:
+        """
+        放入元素；队列已满时丢弃最旧的元素
+        
+        Returns:
+            True表示未发生丢弃，False表示丢弃了一个旧元素
+        """
+        with self._lock:
+            dropped = False
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        superseded = self._queue.get_nowait()
+                        self.dropped_count += 1
+                        dropped = True
+                        if self.merge_func is not None:
+                            item = self.merge_func(superseded, item)
+                    except queue.Empty:
+                        pass
+            self.put_count += 1
+            if dropped:
+                logger.debug(f"Queue '{self.name}' full, dropped oldest item")
+            return not dropped
+    
+    def put_stop(self):
+        """放入停止标记（必要时丢弃旧元素为其腾出位置）"""
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(_STOP)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped_count += 1
+                    except queue.Empty:
+                        pass
+    
+    def get(self, timeout: float) -> Any:
+        """取出元素，超时抛出queue.Empty"""
+        return self._queue.get(timeout=timeout)
+    
+    def qsize(self) -> int:
+        """当前队列长度"""
+        return self._queue.qsize()
+
+
+def default_frame_key(frame: Any) -> Hashable:
+    """默认帧合并键：数据帧的发送方（GameData.source），没有则视为同一玩家"""
+    return getattr(frame, 'source', None)
+
+
+def is_priority_frame(frame: Any) -> bool:
+    """是否为不可合并掉的帧（Unity请求了态势感知）"""
+    return bool(getattr(frame, 'situationAwareness', False))
+
+
+def default_frame_merge(superseded: Any, latest: Any) -> Any:
+    """
+    默认帧合并函数：新帧取代旧帧，但保留旧帧的态势感知请求
+    
+    Args:
+        superseded: 被取代的待处理帧
+        latest: 新到达的帧
+    
+    Returns:
+        实际保留的帧（需要时为带有态势感知标志的新帧副本）
+    """
+    if is_priority_frame(superseded) and not is_priority_frame(latest):
+        return dataclasses.replace(latest, situationAwareness=True)
+    return latest
+
+
+def default_result_merge(superseded: Any, latest: Any) -> Any:
+    """
+    默认评估结果合并函数：新结果取代待播放的旧结果，但保留旧结果所属帧的态势感知请求
+    
+    Args:
+        superseded: 被取代的待播放结果（{'game_data', ...} 字典）
+        latest: 新的评估结果
+    
+    Returns:
+        实际放入输出队列的结果（需要时为数据帧带有态势感知标志的新结果副本）
+    """
+    if not isinstance(superseded, dict) or not isinstance(latest, dict):
+        return latest
+    frame = default_frame_merge(superseded.get('game_data'), latest.get('game_data'))
+    if frame is latest.get('game_data'):
+        return latest
+    return dict(latest, game_data=frame)
+
+
+class FrameCoalescer:
+    """
+    最新帧优先（latest-wins）的帧合并器
+    
+    每个键（玩家）只保留最新的一帧；评估线程取帧时总是拿到该玩家
+    当前最新的战场态势，被取代的旧帧计入丢弃计数。旧帧经 merge_func
+    合并到新帧上（默认保留态势感知请求）。
+    多个玩家之间按照最早等待的顺序轮流取帧；键数量超限时优先丢弃
+    最早等待的普通帧，请求了态势感知的帧只在全部待处理帧都是此类时才会被丢弃。
+    接口与StageQueue一致，可直接替换流水线的评估队列。
+    """
+    
+    def __init__(self, name: str = "coalescer",
+                 key_func: Callable[[Any], Hashable] = default_frame_key,
+                 max_keys: int = 64,
+                 merge_func: Callable[[Any, Any], Any] = default_frame_merge):
+        """
+        初始化帧合并器
+        
+        Args:
+            name: 名称（用于日志和统计）
+            key_func: 从数据帧提取合并键的函数
+            max_keys: 同时等待处理的最大键数量，超出时丢弃最早等待的帧
+            merge_func: 合并函数 (被取代的帧, 新帧) -> 保留的帧
+        """
+        if max_keys <= 0:
+            raise ValueError(f"max_keys must be positive, got {max_keys}")
+        self.name = name
+        self.key_func = key_func
+        self.merge_func = merge_func
+        self.maxsize = max_keys
+        self._pending: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._stop_requested = False
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped_count = 0
+        self.processed_count = 0
+    
+    def put_latest(self, item: Any) -> bool:
+        """
+        放入数据帧，取代同一键尚未处理的旧帧
+        
+        Returns:
+            True表示未发生丢弃，False表示有旧帧被丢弃
+        """
+        key = self.key_func(item)
+        with self._cond:
+            dropped = False
+            if key in self._pending:
+                # 同一玩家的旧帧被取代；新帧排到队尾，避免单个玩家饿死其他玩家
+                item = self.merge_func(self._pending.pop(key), item)
+                self.dropped_count += 1
+                dropped = True
+            elif len(self._pending) >= self.maxsize:
+                evicted = next((k for k, frame in self._pending.items() if not is_priority_frame(frame)),
+                               next(iter(self._pending)))
+                del self._pending[evicted]
+                self.dropped_count += 1
+                dropped = True
+            self._pending[key] = item
+            self.put_count += 1
+            self._cond.notify()
+        if dropped:
+            logger.debug(f"Coalescer '{self.name}' dropped a superseded frame (key={key})")
+        return not dropped
+    
+    def put_stop(self):
+        """请求停止：未处理的帧被丢弃，get随后返回停止标记"""
+        with self._cond:
+            self.dropped_count += len(self._pending)
+            self._pending.clear()
+            self._stop_requested = True
+            self._cond.notify_all()
+    
+    def get(self, timeout: float) -> Any:
+        """取出最早等待的键的最新帧，超时抛出queue.Empty"""
+        with self._cond:
+            if not self._pending and not self._stop_requested:
+                self._cond.wait(timeout)
+            if self._pending:
+                _, item = self._pending.popitem(last=False)
+                self.processed_count += 1
+                return item
+            if self._stop_requested:
+                return _STOP
+            raise queue.Empty
+    
+    def qsize(self) -> int:
+        """当前等待处理的帧数量"""
+        with self._cond:
+            return len(self._pending)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取合并统计：接收、丢弃（被取代）和已处理的帧数"""
+        with self._cond:
+            return {
+                'frames_in': self.put_count,
+                'frames_dropped': self.dropped_count,
+                'frames_processed': self.processed_count,
+                'frames_pending': len(self._pending)
+            }
+
+
+class ThreatPipeline:
+    """接收 → 评估 → 输出 三级流水线"""
+    
+    def __init__(
+        self,
+        receive_func: Optional[Callable[[], Any]],
+        assess_func: Callable[[Any], Optional[Any]],
+        output_func: Callable[[Any], None],
+        ingest_queue_size: int = 64,
+        output_queue_size: int = 1,
+        poll_interval: float = 0.5,
+        coalesce_frames: bool = False,
+        frame_key_func: Callable[[Any], Hashable] = default_frame_key,
+        result_merge_func: Optional[Callable[[Any, Any], Any]] = default_result_merge,
+        batch_receive: bool = False,
+        name: str = "pipeline"
+    ):
+        """
+        初始化流水线
+        
+        Args:
+            receive_func: 接收函数，返回一帧数据；无数据时返回None（应自带超时）。
+                为None时不启动接收线程，由调用方通过submit()推送数据帧
+            assess_func: 评估函数，输入一帧数据，返回评估结果；返回None表示无需输出
+            output_func: 输出函数，执行触觉反馈（允许阻塞）
+            ingest_queue_size: 接收→评估队列容量
+            output_queue_size: 评估→输出队列容量（默认1，只保留最新待播放结果）
+            poll_interval: 工作线程等待队列的超时时间（秒），用于响应停止信号
+            coalesce_frames: 是否启用最新帧合并（每个玩家只评估最新一帧）
+            frame_key_func: 帧合并键函数（默认按发送方区分玩家）
+            result_merge_func: 输出队列满时的结果合并函数（默认保留态势感知请求，None表示直接丢弃）
+            batch_receive: 接收函数是否一次返回多帧（列表，按接收顺序）
+            name: 流水线名称（用作线程名前缀）
+        """
+        self.name = name
+        self.receive_func = receive_func
+        self.assess_func = assess_func
+        self.output_func = output_func
+        self.poll_interval = poll_interval
+        self.batch_receive = batch_receive
+        
+        self.coalesce_frames = coalesce_frames
+        if coalesce_frames:
+            self.ingest_queue = FrameCoalescer("ingest", frame_key_func, ingest_queue_size)
+        else:
+            self.ingest_queue = StageQueue("ingest", ingest_queue_size)
+        self.output_queue = StageQueue("output", output_queue_size, result_merge_func)
+        
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'frames_received': 0,
+            'frames_assessed': 0,
+            'results_rendered': 0,
+            'assess_errors': 0,
+            'output_errors': 0,
+            'receive_errors': 0
+        }
+    
+    def submit(self, frame: Any) -> bool:
+        """
+        推送一帧数据到评估队列（用于没有接收函数的推送模式）
+        
+        Returns:
+            True表示未发生丢弃，False表示有旧帧被丢弃
+        """
+        self._count('frames_received')
+        return self.ingest_queue.put_latest(frame)
+    
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[key] += n
+    
+    def start(self):
+        """启动各阶段线程（推送模式下不启动接收线程）"""
+        if self._threads:
+            logger.warning("Pipeline already started")
+            return
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._assess_loop, name=f"{self.name}-assess", daemon=True),
+            threading.Thread(target=self._output_loop, name=f"{self.name}-output", daemon=True)
+        ]
+        if self.receive_func is not None:
+            self._threads.insert(0, threading.Thread(
+                target=self._ingest_loop, name=f"{self.name}-ingest", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(
+            f"Pipeline '{self.name}' started (ingest queue={self.ingest_queue.maxsize}, "
+            f"output queue={self.output_queue.maxsize}, "
+            f"coalescing={'on' if self.coalesce_frames else 'off'})"
+        )
+    
+    def stop(self, timeout: float = 5.0) -> bool:
+        """
+        停止流水线
+        
+        接收线程先停止，随后停止标记沿队列依次传递给评估和输出线程。
+        已在队列中的数据会被丢弃；正在执行的输出会完成后再退出。
+        
+        Args:
+            timeout: 等待所有线程退出的总超时时间（秒）
+        
+        Returns:
+            所有线程是否在超时前退出
+        """
+        if not self._threads:
+            return True
+        self._stop_event.set()
+        self.ingest_queue.put_stop()
+        
+        deadline = time.monotonic() + timeout
+        all_stopped = True
+        for thread in self._threads:
+            remaining = max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+            if thread.is_alive():
+                all_stopped = False
+                logger.warning(f"Pipeline thread {thread.name} did not stop within timeout")
+        self._threads = []
+        logger.info(f"Pipeline '{self.name}' stopped")
+        return all_stopped
+    
+    def is_running(self) -> bool:
+        """检查流水线是否在运行"""
+        return bool(self._threads) and not self._stop_event.is_set()
+    
+    def _ingest_loop(self):
+        """接收阶段：持续读取数据并放入评估队列"""
+        while not self._stop_event.is_set():
+            try:
+                received = self.receive_func()
+            except Exception as e:
+                self._count('receive_errors')
+                logger.error(f"Ingest stage error: {e}")
+                continue
+            if not self.batch_receive:
+                received = [received] if received is not None else []
+            if not received:
+                continue
+            self._count('frames_received', len(received))
+            for frame in received:
+                self.ingest_queue.put_latest(frame)
+    
+    def _assess_loop(self):
+        """评估阶段：从评估队列取数据，结果放入输出队列"""
+        while True:
+            try:
+                frame = self.ingest_queue.get(self.poll_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                continue
+            if frame is _STOP:
+                break
+            try:
+                result = self.assess_func(frame)
+            except Exception as e:
+                self._count('assess_errors')
+                logger.error(f"Assessment stage error: {e}", exc_info=True)
+                continue
+            self._count('frames_assessed')
+            if result is not None:
+                self.output_queue.put_latest(result)
+        self.output_queue.put_stop()
+    
+    def _output_loop(self):
+        """输出阶段：执行触觉反馈（可阻塞，不影响接收和评估）"""
+        while True:
+            try:
+                result = self.output_queue.get(self.poll_interval)
+            except queue.Empty:
+                # 评估线程退出时一定会放入停止标记，这里只需继续等待
+                continue
+            if result is _STOP:
+                break
+            try:
+                self.output_func(result)
+                self._count('results_rendered')
+            except Exception as e:
+                self._count('output_errors')
+                logger.error(f"Output stage error: {e}", exc_info=True)
+    
+    def get_stats(self) -> Dict:
+        """
+        获取流水线统计信息
+        
+        Returns:
+            包含各阶段计数、队列长度和丢弃数量的字典
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'ingest_queue_depth': self.ingest_queue.qsize(),
+            'ingest_dropped': self.ingest_queue.dropped_count,
+            'output_queue_depth': self.output_queue.qsize(),
+            'output_dropped': self.output_queue.dropped_count
+        })
+        if self.coalesce_frames:
+            stats['coalescer'] = self.ingest_queue.get_stats()
+        return stats
@@ -1,26 +1,61 @@
 """串口通信模块"""
 import logging
 import serial
+import threading
 import time
 from typing import Optional
 
+from haptic_scheduler import HapticScheduler, ScheduledSequence, STOP_COMMAND
+
 logger = logging.getLogger(__name__)
 
+# 调度序列标签
+SINGLE_TARGET_TAG = "single_target"
+SITUATION_AWARENESS_TAG = "situation_awareness"
+HARDWARE_TEST_TAG = "hardware_test"
+
 
 class SerialHandler:
     """串口通信处理器"""
     
-    def __init__(self, port: str = "COM7", baudrate: int = 9600):
+    def __init__(self, port: str = "COM7", baudrate: int = 9600,
+                 scheduler: Optional[HapticScheduler] = None):
         """
         初始化串口连接
         
         Args:
             port: 串口名称，默认COM7
             baudrate: 波特率，默认9600
+            scheduler: 触觉时间线调度器（可选）。设置后震动时长由调度线程控制，
+                       send_vibration / send_multi_vibration 不再阻塞调用线程
         """
         self.port = port
         self.baudrate = baudrate
         self.serial_connection: Optional[serial.Serial] = None
+        self.scheduler = scheduler
+        self._write_lock = threading.Lock()
+    
+    def attach_scheduler(self, scheduler: Optional[HapticScheduler]):
+        """设置（或移除）触觉时间线调度器"""
+        self.scheduler = scheduler
+    
+    def write_command(self, message: str) -> int:
+        """
+        发送一条串口命令并立即刷新（线程安全，供调度器调用）
+        
+        Args:
+            message: 命令字符串（如 "3,255,0\n" 或 "stop\n"）
+        
+        Returns:
+            写入的字节数
+        """
+        if not self.serial_connection or not self.serial_connection.is_open:
+            raise serial.SerialException("Serial port is not connected")
+        with self._write_lock:
+            bytes_written = self.serial_connection.write(message.encode('utf-8'))
+            self.serial_connection.flush()
+        logger.debug(f"Serial command sent: {message.strip()} ({bytes_written} bytes)")
+        return bytes_written
     
     def connect(self) -> bool:
         """
@@ -95,6 +130,19 @@ class SerialHandler:
             3: "波浪式"
         }
         
+        if self.scheduler:
+            # 由调度线程按时发送启动/停止命令，不阻塞调用线程
+            start_message = f"{vibrator_id},{intensity},{mode}\n"
+            self.scheduler.submit_sequence(
+                [(0.0, start_message), (duration, STOP_COMMAND)],
+                tag=SINGLE_TARGET_TAG
+            )
+            logger.info(
+                f"✓ Vibration scheduled: motor={vibrator_id}, intensity={intensity}, "
+                f"mode={mode} ({mode_descriptions[mode]}), duration={duration}s"
+            )
+            return True
+        
         try:
             # 第一步：发送震动信号（格式：motorID,intensity,mode）
             start_message = f"{vibrator_id},{intensity},{mode}\n"
@@ -123,6 +171,60 @@ class SerialHandler:
             logger.error(f"Failed to send vibration signal: {e}")
             return False
     
+    def play_single_target_sequence(self, vibrator_id: int, intensity: int,
+                                    duration: float, distance_mode: int,
+                                    pause: float, type_mode: int) -> Optional[ScheduledSequence]:
+        """
+        调度单目标双震动序列（距离震动 → 暂停 → 类型震动）
+        
+        需要已设置调度器，立即返回。如果上一个震动序列仍在播放，本序列排在其结束后开始，
+        替换之前排队中尚未开始的单目标序列；排队中的态势感知序列不会被替换，本序列排在其后。
+        态势感知序列可以抢占本序列（见 send_multi_vibration）。
+        
+        Args:
+            vibrator_id: 振动器编号（0-15）
+            intensity: 震动强度（200或255）
+            duration: 每次震动持续时间（秒）
+            distance_mode: 第一次震动（距离）的模式
+            pause: 两次震动之间的暂停时间（秒）
+            type_mode: 第二次震动（敌人类型）的模式
+        
+        Returns:
+            ScheduledSequence对象，调度器未设置或串口未连接时返回None
+        """
+        if not self.scheduler:
+            logger.error("Haptic scheduler is not attached")
+            return None
+        if not self.serial_connection or not self.serial_connection.is_open:
+            logger.error("Serial port is not connected")
+            return None
+        
+        if intensity not in [200, 255]:
+            logger.warning(f"Invalid intensity {intensity}, using 200")
+            intensity = 200
+        
+        second_start = duration + pause
+        steps = [
+            (0.0, f"{vibrator_id},{intensity},{distance_mode}\n"),
+            (duration, STOP_COMMAND),
+            (second_start, f"{vibrator_id},{intensity},{type_mode}\n"),
+            (second_start + duration, STOP_COMMAND)
+        ]
+        sequence = self.scheduler.submit_sequence(
+            steps,
+            tag=SINGLE_TARGET_TAG,
+            after=(SINGLE_TARGET_TAG, SITUATION_AWARENESS_TAG)
+        )
+        delay = sequence.end - (second_start + duration) - time.monotonic()
+        if delay > 0:
+            logger.info(f"⏳ 排在上一个震动序列之后，{delay:.1f}s 后开始")
+        logger.info(
+            f"✓ Single target sequence scheduled: motor={vibrator_id}, "
+            f"distance_mode={distance_mode}, type_mode={type_mode}, "
+            f"total={second_start + duration:.1f}s"
+        )
+        return sequence
+    
     def send_multi_vibration(self, intensities: list, duration: float = 3.0, mode: int = 0) -> bool:
         """
         同时发送多个马达的震动信号（用于态势感知模式）
@@ -151,6 +253,9 @@ class SerialHandler:
             "正西(12)", "西偏北(13)", "西北(14)", "北偏西(15)"
         ]
         
+        if self.scheduler:
+            return self._schedule_multi_vibration(intensities, duration, mode, directions)
+        
         # 记录已启动的马达，确保停止时能正确记录
         started_motors = []
         
@@ -229,6 +334,40 @@ class SerialHandler:
         
         return True
     
+    def _schedule_multi_vibration(self, intensities: list, duration: float,
+                                  mode: int, directions: list) -> bool:
+        """通过调度器发送态势感知震动（抢占正在播放的单目标序列）"""
+        logger.info("=" * 60)
+        logger.info("🌐 态势感知模式 - 16方向多马达同时震动（调度模式）")
+        logger.info(f"  震动模式: {mode}")
+        logger.info(f"  持续时间: {duration}s")
+        logger.info("  各方向震动强度:")
+        
+        # 先停止所有马达，确保初始状态干净
+        steps = [(0.0, STOP_COMMAND)]
+        offset = 0.2
+        started_motors = []
+        for motor_id in range(16):
+            intensity = int(intensities[motor_id])
+            if intensity > 0:
+                steps.append((offset, f"{motor_id},{intensity},{mode}\n"))
+                started_motors.append(motor_id)
+                logger.info(f"    {directions[motor_id]}: 强度 {intensity}")
+                offset += 0.05  # 每个启动信号之间间隔50毫秒
+        
+        # 震动结束后重复发送3次停止信号
+        end = offset + duration
+        steps.extend([(end, STOP_COMMAND), (end + 0.2, STOP_COMMAND), (end + 0.4, STOP_COMMAND)])
+        
+        self.scheduler.submit_sequence(
+            steps,
+            tag=SITUATION_AWARENESS_TAG,
+            preempt=(SINGLE_TARGET_TAG, SITUATION_AWARENESS_TAG)
+        )
+        logger.info(f"✓ 已调度 {len(started_motors)} 个马达的震动")
+        logger.info("=" * 60)
+        return True
+    
     def is_connected(self) -> bool:
         """检查串口是否已连接"""
         return self.serial_connection is not None and self.serial_connection.is_open
@@ -266,6 +405,9 @@ class SerialHandler:
         logger.info(f"  Intensity: 255 (HIGH)")
         logger.info("=" * 60)
         
+        if self.scheduler:
+            return self._scheduled_hardware_test(num_vibrators, test_duration, pause_duration)
+        
         try:
             for vibrator_id in range(num_vibrators):
                 logger.info(f"\n{'─' * 60}")
@@ -300,4 +442,27 @@ class SerialHandler:
         except Exception as e:
             logger.error(f"❌ Hardware test failed: {e}")
             return False
-
+    
+    def _scheduled_hardware_test(self, num_vibrators: int, test_duration: float,
+                                 pause_duration: float) -> bool:
+        """通过调度器执行硬件测试时间线，等待其完成"""
+        steps = []
+        offset = 0.0
+        for vibrator_id in range(num_vibrators):
+            for mode in range(4):
+                steps.append((offset, f"{vibrator_id},{255},{mode}\n"))
+                offset += test_duration
+                steps.append((offset, STOP_COMMAND))
+                offset += pause_duration
+        
+        sequence = self.scheduler.submit_sequence(steps, tag=HARDWARE_TEST_TAG)
+        logger.info(f"Hardware test scheduled, total time {offset:.1f}s")
+        if not sequence.wait(timeout=offset + 5.0) or sequence.cancelled:
+            logger.error("❌ Hardware test did not complete")
+            return False
+        
+        logger.info("\n" + "=" * 60)
+        logger.info("✅ Hardware test completed successfully!")
+        logger.info(f"   Total tests: {num_vibrators * 4} ({num_vibrators} vibrators × 4 modes)")
+        logger.info("=" * 60)
+        return True
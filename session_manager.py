@@ -0,0 +1,338 @@
+"""多会话管理模块：一台主机同时服务多个Unity客户端和触觉背心
+
+- 会话按数据包中的 sessionId 区分；没有 sessionId 时按发送方地址区分
+- 每个会话拥有独立的状态、CSV日志、日志记录器和输出设备（串口），
+  以及一条推送模式的 ThreatPipeline（评估线程 + 输出线程，互不阻塞）
+- 威胁评估计算提交到共享的进程池，绕开GIL，在多核上并行
+- 每个会话分别统计延迟（接收 → 评估完成、接收 → 开始输出），
+  用于估算一台主机能支持的受训人数
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import GameData
+from pipeline import ThreatPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def session_key(game_data: GameData) -> str:
+    """
+    计算数据帧所属的会话键
+    
+    Returns:
+        数据包中的sessionId；没有时为 "host:port" 形式的发送方地址
+    """
+    if game_data.sessionId:
+        return str(game_data.sessionId)
+    if game_data.source:
+        host, port = game_data.source[:2]
+        return f"{host}:{port}"
+    return "default"
+
+
+def _init_worker():
+    """进程池工作进程初始化：预先加载威胁评估模块（含地形数据）"""
+    import threat_analyzer  # noqa: F401
+    import situation_awareness  # noqa: F401
+
+
+def assess_frame(game_data: GameData, with_rankings: bool = False) -> Tuple[Any, Dict[int, float], Optional[list]]:
+    """
+    在进程池中运行的纯计算部分（必须是模块级函数才能被pickle）
+    
+    Args:
+        game_data: 游戏数据对象
+        with_rankings: 是否同时计算完整的目标排序（实验数据库记录用）
+    
+    Returns:
+        (最高威胁目标, 16个方向的威胁度字典, 目标排序或None)
+    """
+    from threat_analyzer import find_most_threatening_target, rank_targets
+    from situation_awareness import calculate_all_directions_threat
+    
+    most_threatening = find_most_threatening_target(game_data)
+    direction_threats = calculate_all_directions_threat(game_data)
+    rankings = rank_targets(game_data) if with_rankings else None
+    return most_threatening, direction_threats, rankings
+
+
+def create_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    创建评估进程池
+    
+    使用spawn方式启动工作进程：主进程中已有接收、评估和输出线程，
+    fork带锁的多线程进程可能导致子进程死锁。
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker
+    )
+
+
+class LatencyTracker:
+    """延迟统计（毫秒，保留最近window个样本）"""
+    
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, latency_ms: float):
+        """记录一个延迟样本"""
+        with self._lock:
+            self._samples.append(latency_ms)
+            self._count += 1
+            self._max = max(self._max, latency_ms)
+    
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取延迟统计
+        
+        Returns:
+            {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'}
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self._count
+            max_ms = self._max
+        if not samples:
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        last = len(samples) - 1
+        return {
+            'count': count,
+            'mean_ms': sum(samples) / len(samples),
+            'p50_ms': samples[int(round(0.50 * last))],
+            'p95_ms': samples[int(round(0.95 * last))],
+            'max_ms': max_ms
+        }
+
+
+class Session:
+    """单个玩家会话：独立的状态、日志和输出设备"""
+    
+    def __init__(
+        self,
+        key: str,
+        executor: Executor,
+        output_func: Optional[Callable[[dict], None]] = None,
+        csv_logger=None,
+        on_close: Optional[Callable[[], None]] = None,
+        output_queue_size: int = 1
+    ):
+        """
+        初始化会话
+        
+        Args:
+            key: 会话键（见session_key）
+            executor: 执行评估计算的进程池（多个会话共享）
+            output_func: 输出函数，输入评估结果字典；None表示该会话没有输出设备
+            csv_logger: 会话专属的CSV日志记录器（可以为None）
+            on_close: 会话关闭时调用的清理函数（断开串口等）
+            output_queue_size: 评估→输出队列容量
+        """
+        self.key = key
+        self.executor = executor
+        self.output_func = output_func
+        self.csv_logger = csv_logger
+        self.on_close = on_close
+        self.logger = logger.getChild(key.replace('.', '_'))
+        
+        # 会话状态
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+        self.last_round: Optional[int] = None
+        self.last_assessment: Optional[dict] = None
+        
+        # 延迟统计
+        self.assess_latency = LatencyTracker()
+        self.output_latency = LatencyTracker()
+        
+        # 会话内只评估最新一帧（所有帧使用同一个合并键）
+        self.pipeline = ThreatPipeline(
+            receive_func=None,
+            assess_func=self._assess,
+            output_func=self._output,
+            output_queue_size=output_queue_size,
+            coalesce_frames=True,
+            frame_key_func=lambda frame: key,
+            name=f"session-{key}"
+        )
+    
+    def start(self):
+        """启动会话流水线"""
+        self.pipeline.start()
+        self.logger.info(f"Session '{self.key}' started")
+    
+    def submit(self, game_data: GameData):
+        """提交一帧数据（同一会话中未处理的旧帧会被新帧取代）"""
+        self.last_seen = time.monotonic()
+        self.pipeline.submit(game_data)
+    
+    def _assess(self, game_data: GameData) -> Optional[dict]:
+        """评估阶段：检查round，提交进程池计算，记录CSV和延迟"""
+        if not game_data.targets:
+            self.logger.debug(f"Round {game_data.round}: no targets, skipping")
+            return None
+        if self.csv_logger and self.csv_logger.check_round_exists(game_data.round):
+            self.logger.info(f"📋 Round {game_data.round} already exists in CSV, skipping")
+            return None
+        
+        with_rankings = getattr(self.csv_logger, 'record_rankings', False)
+        most_threatening, direction_threats, rankings = self.executor.submit(
+            assess_frame, game_data, with_rankings
+        ).result()
+        
+        if game_data.received_at is not None:
+            self.assess_latency.record((time.monotonic() - game_data.received_at) * 1000.0)
+        if self.csv_logger:
+            extra = {'rankings': rankings} if with_rankings else {}
+            self.csv_logger.log_round_data(
+                round_number=game_data.round,
+                most_threatening_target=most_threatening,
+                direction_threats=direction_threats,
+                **extra
+            )
+        self.last_round = game_data.round
+        assessment = {
+            'game_data': game_data,
+            'most_threatening': most_threatening,
+            'direction_threats': direction_threats
+        }
+        self.last_assessment = assessment
+        return assessment
+    
+    def _output(self, assessment: dict):
+        """输出阶段：记录延迟并交给会话的输出设备"""
+        game_data = assessment['game_data']
+        if game_data.received_at is not None:
+            self.output_latency.record((time.monotonic() - game_data.received_at) * 1000.0)
+        if self.output_func is None:
+            target = assessment['most_threatening']
+            self.logger.info(
+                f"Round {game_data.round}: most threatening target "
+                f"{target.id if target else None} (no output device)"
+            )
+            return
+        self.output_func(assessment)
+    
+    def get_stats(self) -> Dict:
+        """
+        获取会话统计
+        
+        Returns:
+            包含流水线计数、最后round、空闲时间和两类延迟统计的字典
+        """
+        return {
+            'last_round': self.last_round,
+            'idle_s': time.monotonic() - self.last_seen,
+            'pipeline': self.pipeline.get_stats(),
+            'assess_latency': self.assess_latency.get_stats(),
+            'output_latency': self.output_latency.get_stats()
+        }
+    
+    def close(self, timeout: float = 5.0):
+        """停止流水线并释放会话资源"""
+        if not self.pipeline.stop(timeout=timeout):
+            self.logger.warning(f"Session '{self.key}' pipeline did not stop cleanly")
+        if self.csv_logger:
+            self.csv_logger.close()
+        if self.on_close:
+            try:
+                self.on_close()
+            except Exception as e:
+                self.logger.error(f"Failed to release session resources: {e}")
+        self.logger.info(f"Session '{self.key}' closed")
+
+
+class SessionManager:
+    """按会话键分发数据帧，按需创建和回收会话"""
+    
+    def __init__(
+        self,
+        executor: Executor,
+        session_factory: Callable[[str, Executor], Session],
+        max_sessions: int = 32,
+        idle_timeout: Optional[float] = 60.0
+    ):
+        """
+        初始化会话管理器
+        
+        Args:
+            executor: 所有会话共享的评估进程池
+            session_factory: 会话工厂函数 (key, executor) -> Session（未启动）
+            max_sessions: 最大会话数量，超出后新会话的数据帧被拒绝
+            idle_timeout: 会话空闲超时时间（秒），None表示不回收
+        """
+        self.executor = executor
+        self.session_factory = session_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+        self.rejected_frames = 0
+    
+    def dispatch(self, game_data: GameData) -> Optional[Session]:
+        """
+        将数据帧交给所属会话（必要时创建会话）
+        
+        Returns:
+            处理该帧的会话；会话数量已满时返回None
+        """
+        key = session_key(game_data)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self.rejected_frames += 1
+                    logger.warning(f"Session limit ({self.max_sessions}) reached, rejecting frame from '{key}'")
+                    return None
+                session = self.session_factory(key, self.executor)
+                session.start()
+                self._sessions[key] = session
+                logger.info(f"New session '{key}' ({len(self._sessions)} active)")
+        session.submit(game_data)
+        return session
+    
+    def reap_idle(self) -> List[str]:
+        """
+        关闭空闲超时的会话
+        
+        Returns:
+            被关闭的会话键列表
+        """
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, session in self._sessions.items()
+                    if now - session.last_seen > self.idle_timeout]
+            sessions = [self._sessions.pop(key) for key in idle]
+        for session in sessions:
+            logger.info(f"Session '{session.key}' idle for more than {self.idle_timeout:.0f}s, closing")
+            session.close()
+        return idle
+    
+    def sessions(self) -> Dict[str, Session]:
+        """当前活动会话的快照"""
+        with self._lock:
+            return dict(self._sessions)
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取所有会话的统计信息（按会话键）"""
+        return {key: session.get_stats() for key, session in self.sessions().items()}
+    
+    def close_all(self, timeout: float = 5.0):
+        """关闭所有会话"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close(timeout=timeout)
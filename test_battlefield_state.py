@@ -0,0 +1,182 @@
+"""增量数据帧与服务器端战场状态测试"""
+import unittest
+import sys
+import os
+import json
+import socket
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from battlefield_state import BattlefieldStateTable
+from models import GameData
+from udp_server import UDPServer
+from wire_format import encode_frame
+
+
+def target(target_id, x, z, target_type='Soldier'):
+    """创建完整的目标字典"""
+    return {'id': target_id, 'angle': 0.0, 'distance': (x * x + z * z) ** 0.5, 'type': target_type,
+            'position': {'x': x, 'y': 0.0, 'z': z}, 'speed': 1.0, 'direction': 0.0}
+
+
+KEYFRAME = {
+    'round': 10,
+    'playerPosition': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+    'targets': [target(1, 10.0, 0.0), target(2, 0.0, 20.0), target(3, -5.0, -5.0, 'Drone')]
+}
+
+DELTA = {
+    'frameType': 'delta',
+    'round': 11,
+    'baseRound': 10,
+    'playerPosition': {'x': 1.0, 'y': 0.0, 'z': 0.0},
+    'added': [target(4, 3.0, 3.0, 'Drone')],
+    'changed': [{'id': 1, 'position': {'x': 8.0, 'y': 0.0, 'z': 0.0}, 'distance': 8.0}],
+    'removed': [2]
+}
+
+
+class TestBattlefieldStateTable(unittest.TestCase):
+    """测试关键帧/增量帧状态表"""
+    
+    def setUp(self):
+        self.requests = []
+        self.table = BattlefieldStateTable(
+            keyframe_request_func=lambda key, last_round: self.requests.append((key, last_round)),
+            keyframe_request_interval=0.0
+        )
+    
+    def test_delta_applied_to_keyframe(self):
+        """测试增量帧在关键帧基础上新增、修改和删除目标"""
+        self.table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        game_data = self.table.apply_delta('a', DELTA)
+        
+        targets = {t.id: t for t in game_data.targets}
+        self.assertEqual(game_data.round, 11)
+        self.assertEqual(sorted(targets), [1, 3, 4])
+        self.assertEqual(targets[1].position.x, 8.0)
+        self.assertEqual(targets[1].distance, 8.0)
+        self.assertEqual(targets[1].type, 'Soldier')
+        self.assertEqual(targets[4].type, 'Drone')
+        self.assertEqual(game_data.playerPosition.x, 1.0)
+    
+    def test_earlier_frames_not_modified(self):
+        """测试已交给下游的帧不受后续增量影响"""
+        self.table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        first = self.table.apply_delta('a', DELTA)
+        self.table.apply_delta('a', dict(DELTA, round=12, baseRound=11, added=[], removed=[],
+                                         changed=[{'id': 1, 'distance': 1.0}]))
+        self.assertEqual({t.id: t for t in first.targets}[1].distance, 8.0)
+    
+    def test_sequence_gap_requests_keyframe(self):
+        """测试序号缺口时拒绝增量帧并请求关键帧，收到关键帧后恢复"""
+        self.table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        self.assertIsNone(self.table.apply_delta('a', dict(DELTA, round=13, baseRound=12)))
+        self.assertEqual(self.requests, [('a', 10)])
+        
+        # 状态已作废：即使baseRound正确也要等待关键帧
+        self.assertIsNone(self.table.apply_delta('a', dict(DELTA, round=14, baseRound=10)))
+        
+        self.table.apply_keyframe('a', GameData.from_dict(dict(KEYFRAME, round=20)))
+        self.assertIsNotNone(self.table.apply_delta('a', dict(DELTA, round=21, baseRound=20)))
+        stats = self.table.get_stats()
+        self.assertEqual(stats['deltas_rejected'], 2)
+        self.assertEqual(stats['deltas_applied'], 1)
+    
+    def test_stale_delta_ignored(self):
+        """测试乱序到达的旧增量帧被忽略且不破坏状态"""
+        self.table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        self.table.apply_delta('a', DELTA)
+        self.assertIsNone(self.table.apply_delta('a', DELTA))
+        self.assertEqual(self.table.get_stats()['stale_deltas'], 1)
+        self.assertEqual(self.requests, [])
+        self.assertIsNotNone(self.table.apply_delta('a', dict(DELTA, round=12, baseRound=11, added=[], removed=[])))
+    
+    def test_unknown_target_rejected(self):
+        """测试引用未知目标的增量帧被拒绝"""
+        self.table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        self.assertIsNone(self.table.apply_delta('a', dict(DELTA, removed=[99])))
+        self.assertEqual(self.table.get_stats()['deltas_rejected'], 1)
+    
+    def test_binary_keyframe_as_base(self):
+        """测试二进制关键帧可以作为增量帧的基准"""
+        from wire_format import decode_frame
+        self.table.apply_keyframe('a', decode_frame(encode_frame(GameData.from_dict(KEYFRAME))))
+        game_data = self.table.apply_delta('a', DELTA)
+        self.assertEqual(sorted(t.id for t in game_data.targets), [1, 3, 4])
+
+    def test_idle_sources_evicted(self):
+        """测试长时间没有数据的发送方被移除"""
+        table = BattlefieldStateTable(idle_timeout=0.2)
+        table.apply_keyframe('a', GameData.from_dict(KEYFRAME))
+        time.sleep(0.15)
+        table.apply_keyframe('b', GameData.from_dict(KEYFRAME))
+        time.sleep(0.1)
+        table.apply_keyframe('b', GameData.from_dict(dict(KEYFRAME, round=11)))
+        stats = table.get_stats()
+        self.assertEqual(stats['tracked_sources'], 1)
+        self.assertEqual(stats['evicted_sources'], 1)
+        self.assertIsNone(table.apply_delta('a', DELTA))
+
+
+class TestUDPServerDeltaFrames(unittest.TestCase):
+    """测试UDP服务器处理增量帧并回发关键帧请求"""
+    
+    def test_delta_over_udp(self):
+        server = UDPServer(host="127.0.0.1", port=0, timeout=0.5)
+        self.assertTrue(server.start())
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.settimeout(2.0)
+        try:
+            address = server.socket.getsockname()
+            sender.sendto(json.dumps(KEYFRAME).encode('utf-8'), address)
+            sender.sendto(json.dumps(DELTA).encode('utf-8'), address)
+            sender.sendto(json.dumps(dict(DELTA, round=30, baseRound=29)).encode('utf-8'), address)
+            
+            frames = []
+            for _ in range(5):
+                frames.extend(server.receive_batch())
+                if len(frames) == 2:
+                    break
+            self.assertEqual([frame.round for frame in frames], [10, 11])
+            self.assertEqual(len(frames[1].targets), 3)
+            
+            request = json.loads(sender.recv(1024).decode('utf-8'))
+            self.assertEqual(request, {'type': 'keyframeRequest', 'lastRound': 11})
+            self.assertEqual(server.get_stats()['battlefield']['deltas_rejected'], 1)
+        finally:
+            sender.close()
+            server.stop()
+
+    def test_binary_keyframe_with_session_deltas(self):
+        """测试二进制关键帧可作为带sessionId的JSON增量帧的基准，关键帧请求带回sessionId"""
+        server = UDPServer(host="127.0.0.1", port=0, timeout=0.5)
+        self.assertTrue(server.start())
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.settimeout(2.0)
+        try:
+            address = server.socket.getsockname()
+            sender.sendto(encode_frame(GameData.from_dict(KEYFRAME)), address)
+            sender.sendto(json.dumps(dict(DELTA, sessionId='p1')).encode('utf-8'), address)
+            sender.sendto(json.dumps(dict(DELTA, round=30, baseRound=29, sessionId='p1')).encode('utf-8'), address)
+            
+            frames = []
+            for _ in range(5):
+                frames.extend(server.receive_batch())
+                if len(frames) == 2:
+                    break
+            self.assertEqual([frame.round for frame in frames], [10, 11])
+            self.assertEqual(frames[1].sessionId, 'p1')
+            
+            request = json.loads(sender.recv(1024).decode('utf-8'))
+            self.assertEqual(request, {'type': 'keyframeRequest', 'lastRound': 11, 'sessionId': 'p1'})
+            self.assertEqual(server.get_stats()['battlefield']['tracked_sources'], 1)
+        finally:
+            sender.close()
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""列式二进制实验日志测试"""
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from column_log import (
+    ColumnarLogger, ColumnLogError, convert_csv, direction_threat_stats,
+    load_session, load_sessions, MAX_ROUND_BYTES, ROUND_RECORD_DTYPE, STATS_CHUNK_ROUNDS
+)
+from csv_logger import CSVLogger
+from models import Position, Target
+
+
+def make_target(target_id):
+    """创建测试目标"""
+    return Target(id=target_id, angle=30.0, distance=15.0, type='Drone',
+                  position=Position(7.5, 2.0, 13.0))
+
+
+class TestColumnarLogger(unittest.TestCase):
+    """测试列式日志记录器"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_round_trip(self):
+        """测试写入、查询和读取"""
+        with ColumnarLogger(base_dir=self.tmpdir.name) as log:
+            log.log_round_data("1-1", make_target(5), {i: i / 16 for i in range(16)})
+            log.log_round_data("1-2", None, [0.5] * 16)
+            self.assertTrue(log.check_round_exists("1-1"))
+            self.assertFalse(log.check_round_exists("1-3"))
+            
+            data = log.read_round_data("1-1")
+            self.assertEqual(data['threat_enemy_id'], 5)
+            self.assertEqual(data['threat_enemy_type'], 'Drone')
+            self.assertAlmostEqual(data['threat_enemy_x'], 7.5)
+            self.assertAlmostEqual(data['direction_threats'][8], 0.5)
+            self.assertIsNone(log.read_round_data("1-2")['threat_enemy_id'])
+            file_path = log.file_path
+        
+        records = load_session(file_path)
+        self.assertIsInstance(records, np.memmap)
+        self.assertEqual(records.dtype, ROUND_RECORD_DTYPE)
+        self.assertEqual(records['round'].tolist(), [b'1-1', b'1-2'])
+        self.assertEqual(records['threat_id'].tolist(), [5, -1])
+    
+    def test_reopen_truncates_partial_record(self):
+        """测试重新打开时重建索引并截掉不完整的记录"""
+        with ColumnarLogger(base_dir=self.tmpdir.name) as log:
+            log.log_round_data(1, make_target(1), [0.0] * 16)
+            file_path = log.file_path
+        with open(file_path, 'ab') as f:
+            f.write(b'\x00' * 10)
+        self.assertEqual(len(load_session(file_path)), 1)
+        
+        with ColumnarLogger(base_dir=self.tmpdir.name, file_path=file_path) as log:
+            self.assertTrue(log.check_round_exists(1))
+            log.log_round_data(2, make_target(2), [0.0] * 16)
+            self.assertEqual(log.read_round_data(2)['threat_enemy_id'], 2)
+        self.assertEqual(load_session(file_path)['threat_id'].tolist(), [1, 2])
+    
+    def test_long_round_rejected(self):
+        """测试超出字段长度的round不记录，重新打开后索引仍与内存一致"""
+        long_round = 'r' * (MAX_ROUND_BYTES + 8)
+        with ColumnarLogger(base_dir=self.tmpdir.name) as log:
+            log.log_round_data("1-1", make_target(1), [0.0] * 16)
+            with self.assertLogs('column_log', level='ERROR'):
+                log.log_round_data(long_round, make_target(2), [0.0] * 16)
+            self.assertFalse(log.check_round_exists(long_round))
+            file_path = log.file_path
+        self.assertEqual(len(load_session(file_path)), 1)
+        
+        with ColumnarLogger(base_dir=self.tmpdir.name, file_path=file_path) as log:
+            self.assertTrue(log.check_round_exists("1-1"))
+            self.assertFalse(log.check_round_exists(long_round))
+    
+    def test_bad_header(self):
+        """测试非日志文件被拒绝"""
+        path = os.path.join(self.tmpdir.name, 'bad.rlog')
+        with open(path, 'wb') as f:
+            f.write(b'not a log file at all')
+        with self.assertRaises(ColumnLogError):
+            load_session(path)
+
+
+class TestDirectionThreatStats(unittest.TestCase):
+    """测试方向威胁统计"""
+    
+    def test_matches_numpy_reference(self):
+        """测试分块统计与直接计算一致（跨越多个块和多个会话）"""
+        rng = np.random.default_rng(0)
+        sessions = []
+        for n in (STATS_CHUNK_ROUNDS + 123, 77, 0):
+            records = np.zeros(n, dtype=ROUND_RECORD_DTYPE)
+            records['direction_threats'] = rng.random((n, 16)) * (rng.random((n, 16)) > 0.3)
+            sessions.append(records)
+        stats = direction_threat_stats({str(i): s for i, s in enumerate(sessions)})
+        
+        threats = np.concatenate([s['direction_threats'] for s in sessions]).astype(np.float64)
+        self.assertEqual(stats['count'], len(threats))
+        np.testing.assert_allclose(stats['mean'], threats.mean(axis=0), atol=1e-6)
+        np.testing.assert_allclose(stats['std'], threats.std(axis=0), atol=1e-6)
+        np.testing.assert_array_equal(stats['max'], threats.max(axis=0))
+        np.testing.assert_allclose(stats['active_rate'], (threats > 0).mean(axis=0))
+    
+    def test_convert_and_load_sessions(self):
+        """测试CSV转换后按目录加载全部会话"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with CSVLogger(base_dir=tmpdir) as csv_logger:
+                csv_logger.log_round_data("1-1", make_target(3), [0.25] * 16)
+                csv_logger.log_round_data("1-2", None, [0.75] * 16)
+                csv_path = csv_logger.file_path
+            convert_csv(csv_path)
+            
+            sessions = load_sessions(tmpdir)
+            self.assertEqual(len(sessions), 1)
+            records = next(iter(sessions.values()))
+            self.assertEqual(records['threat_id'].tolist(), [3, -1])
+            stats = direction_threat_stats(sessions)
+            self.assertEqual(stats['count'], 2)
+            np.testing.assert_allclose(stats['mean'], [0.5] * 16)
+            del records, sessions
+
+
+if __name__ == '__main__':
+    unittest.main()
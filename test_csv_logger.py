@@ -0,0 +1,139 @@
+"""CSV日志记录器测试"""
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from csv_logger import CSVLogger
+from models import Position, Target
+
+
+def make_target(target_id):
+    """创建测试目标"""
+    return Target(id=target_id, angle=45.0, distance=12.345, type='Drone',
+                  position=Position(1.0, 2.0, 3.0))
+
+
+class TestCSVLoggerRoundIndex(unittest.TestCase):
+    """测试round内存索引"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_check_and_read_written_rounds(self):
+        """测试写入后立即可以查询和读取"""
+        with CSVLogger(base_dir=self.tmpdir.name) as csv_logger:
+            self.assertFalse(csv_logger.check_round_exists("1-1"))
+            csv_logger.log_round_data("1-1", make_target(7), {i: i / 10 for i in range(16)})
+            csv_logger.log_round_data("1-2", None, [0.5] * 16)
+            
+            self.assertTrue(csv_logger.check_round_exists("1-1"))
+            self.assertTrue(csv_logger.check_round_exists("1-2"))
+            self.assertFalse(csv_logger.check_round_exists("1-3"))
+            
+            data = csv_logger.read_round_data("1-1")
+            self.assertEqual(data['threat_enemy_id'], '7')
+            self.assertEqual(data['threat_enemy_distance'], '12.35')
+            self.assertEqual(data['direction_threats'][15], 1.5)
+            self.assertEqual(csv_logger.read_round_data("1-2")['threat_enemy_type'], 'N/A')
+            self.assertIsNone(csv_logger.read_round_data("9-9"))
+    
+    def test_integer_rounds_match_string_keys(self):
+        """测试整数round与写入时的字符串索引键一致（与其他日志后端相同）"""
+        with CSVLogger(base_dir=self.tmpdir.name) as csv_logger:
+            csv_logger.log_round_data(5, make_target(5), [0.0] * 16)
+            self.assertTrue(csv_logger.check_round_exists(5))
+            self.assertTrue(csv_logger.check_round_exists("5"))
+            self.assertEqual(csv_logger.read_round_data(5)['threat_enemy_id'], '5')
+            file_path = csv_logger.file_path
+        
+        with CSVLogger(base_dir=self.tmpdir.name, file_path=file_path) as reopened:
+            self.assertTrue(reopened.check_round_exists(5))
+            self.assertEqual(reopened.read_round_data(5)['threat_enemy_id'], '5')
+    
+    def test_index_rebuilt_when_reopening(self):
+        """测试重新打开已有文件时重建索引并继续追加"""
+        with CSVLogger(base_dir=self.tmpdir.name) as csv_logger:
+            for i in range(50):
+                csv_logger.log_round_data(f"r{i}", make_target(i), [0.0] * 16)
+            file_path = csv_logger.file_path
+        
+        with CSVLogger(base_dir=self.tmpdir.name, file_path=file_path) as reopened:
+            self.assertTrue(reopened.check_round_exists("r0"))
+            self.assertTrue(reopened.check_round_exists("r49"))
+            self.assertEqual(reopened.read_round_data("r31")['threat_enemy_id'], '31')
+            
+            reopened.log_round_data("r50", make_target(50), [0.0] * 16)
+            self.assertEqual(reopened.read_round_data("r50")['threat_enemy_id'], '50')
+        
+        with open(file_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 52)  # 表头 + 51行
+    
+    def test_first_occurrence_wins(self):
+        """测试重复round时读取第一次写入的记录（与逐行扫描的行为一致）"""
+        with CSVLogger(base_dir=self.tmpdir.name) as csv_logger:
+            csv_logger.log_round_data("5", make_target(1), [0.0] * 16)
+            csv_logger.log_round_data("5", make_target(2), [0.0] * 16)
+            self.assertEqual(csv_logger.read_round_data("5")['threat_enemy_id'], '1')
+
+
+
+class TestCSVLoggerBackgroundWriter(unittest.TestCase):
+    """测试后台批量写入"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_close_drains_queue(self):
+        """测试关闭时写完队列中的全部数据"""
+        csv_logger = CSVLogger(base_dir=self.tmpdir.name, background=True,
+                               batch_size=16, flush_interval=10.0)
+        for i in range(200):
+            csv_logger.log_round_data(str(i), make_target(i), [0.1] * 16)
+        csv_logger.close()
+        
+        with open(csv_logger.file_path, encoding='utf-8') as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 201)
+        self.assertEqual(lines[-1].split(',')[1], '199')
+        stats = csv_logger.get_stats()
+        self.assertEqual(stats['rows_written'], 200)
+        self.assertGreaterEqual(stats['batches_written'], 200 // 16)
+        self.assertEqual(stats['queued_rows'], 0)
+    
+    def test_queued_round_is_visible(self):
+        """测试入队后的round立即可查询，读取时等待写入完成"""
+        with CSVLogger(base_dir=self.tmpdir.name, background=True, flush_interval=0.05) as csv_logger:
+            csv_logger.log_round_data("2-1", make_target(3), [0.0] * 16)
+            self.assertTrue(csv_logger.check_round_exists("2-1"))
+            self.assertEqual(csv_logger.read_round_data("2-1")['threat_enemy_id'], '3')
+    
+    def test_fsync_policies(self):
+        """测试fsync策略"""
+        with CSVLogger(base_dir=os.path.join(self.tmpdir.name, 'row'), fsync_policy='row') as csv_logger:
+            csv_logger.log_round_data("1", None, [0.0] * 16)
+            csv_logger.log_round_data("2", None, [0.0] * 16)
+            self.assertEqual(csv_logger.get_stats()['fsyncs'], 2)
+        
+        with CSVLogger(base_dir=os.path.join(self.tmpdir.name, 'batch'), background=True,
+                       batch_size=10, flush_interval=10.0, fsync_policy='batch') as csv_logger:
+            for i in range(10):
+                csv_logger.log_round_data(str(i), None, [0.0] * 16)
+            csv_logger.flush()
+            self.assertEqual(csv_logger.get_stats()['fsyncs'], 1)
+        
+        with self.assertRaises(ValueError):
+            CSVLogger(base_dir=self.tmpdir.name, fsync_policy='always')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""熵权法客观权重测试"""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.ifs_core import IFSArray
+from IFS_ThreatAssessment.incremental_evaluator import IncrementalThreatEvaluator
+from IFS_ThreatAssessment.threat_evaluator import INDICATOR_NAMES, IFSThreatEvaluator
+from IFS_ThreatAssessment.entropy_weights import EntropyWeighting, entropy_weights, ifs_entropy
+from test_ifs_batch import make_enemies
+
+
+def random_matrix(count, seed):
+    """生成 count×6 的随机指标IFSArray"""
+    rng = np.random.default_rng(seed)
+    return IFSArray(rng.random((count, 6)) * 0.6, rng.random((count, 6)) * 0.4)
+
+
+class TestEntropyWeights(unittest.TestCase):
+    """测试熵的定义、一次性计算和增量维护的熵权一致"""
+    
+    def setUp(self):
+        self.subjective = IFSThreatEvaluator().weights
+    
+    def test_entropy_definition(self):
+        """测试明确的IFS熵为0，μ = ν 时熵为1"""
+        np.testing.assert_allclose(ifs_entropy([1.0, 0.0], [0.0, 1.0]), 0.0)
+        np.testing.assert_allclose(ifs_entropy([0.3, 0.0], [0.3, 0.0]), 1.0)
+        entropy = ifs_entropy([0.6], [0.3])
+        self.assertAlmostEqual(entropy[0], (0.3 + 0.1) / (0.6 + 0.1))
+    
+    def test_entropy_weights_formula(self):
+        """测试混合权重与按公式逐项计算一致"""
+        matrix = random_matrix(30, seed=1)
+        weights = entropy_weights(matrix, self.subjective, blend=0.4)
+        self.assertAlmostEqual(sum(weights.values()), 1.0)
+        
+        total = sum(self.subjective.values())
+        information = 1.0 - ifs_entropy(matrix.mu, matrix.nu).mean(axis=0)
+        for j, name in enumerate(INDICATOR_NAMES):
+            expected = 0.6 * self.subjective[name] / total + 0.4 * information[j] / information.sum()
+            self.assertAlmostEqual(weights[name], expected, places=12)
+        
+        # 占比为0时等于归一化的主观权重
+        pure = entropy_weights(matrix, self.subjective, blend=0.0)
+        for name in INDICATOR_NAMES:
+            self.assertAlmostEqual(pure[name], self.subjective[name] / total)
+    
+    def test_incremental_matches_recompute(self):
+        """测试目标出现、变化和离开后，增量维护的权重与整帧重新计算一致"""
+        weighting = EntropyWeighting(self.subjective, blend=0.7)
+        matrix = random_matrix(40, seed=2)
+        weighting.update(list(range(40)), matrix.mu, matrix.nu)
+        
+        # 部分目标的指标变化，部分目标离开
+        changed = random_matrix(10, seed=3)
+        weighting.update(list(range(10)), changed.mu, changed.nu)
+        weighting.retain(range(30))
+        weighting.remove(29)
+        
+        mu = np.vstack([changed.mu, matrix.mu[10:29]])
+        nu = np.vstack([changed.nu, matrix.nu[10:29]])
+        expected = entropy_weights(IFSArray(mu, nu), self.subjective, blend=0.7)
+        weights = weighting.weights()
+        for name in INDICATOR_NAMES:
+            self.assertAlmostEqual(weights[name], expected[name], places=12)
+    
+    def test_empty_and_invalid(self):
+        """测试没有目标时退化为主观权重，占比超出范围时报错"""
+        weighting = EntropyWeighting(self.subjective)
+        matrix = random_matrix(5, seed=4)
+        weighting.update(list(range(5)), matrix.mu, matrix.nu)
+        weighting.retain([])
+        self.assertIsNone(weighting.column_entropy())
+        np.testing.assert_array_equal(weighting.column_sum, 0.0)
+        total = sum(self.subjective.values())
+        for name, weight in weighting.weights().items():
+            self.assertAlmostEqual(weight, self.subjective[name] / total)
+        with self.assertRaises(ValueError):
+            EntropyWeighting(self.subjective, blend=1.5)
+
+
+class TestIncrementalEntropyWeighting(unittest.TestCase):
+    """测试增量评估器逐帧使用熵权"""
+    
+    def setUp(self):
+        self.evaluator = IFSThreatEvaluator(batch_min_targets=None)
+        self.incremental = IncrementalThreatEvaluator(self.evaluator, entropy_blend=0.5)
+    
+    def assert_frame(self, enemies, player_pos):
+        """检查一帧的得分与按该帧指标矩阵算出的熵权直接聚合一致"""
+        results = self.incremental.evaluate(enemies, player_pos)
+        indicators = self.evaluator.indicator_matrix(enemies, player_pos)
+        weights = entropy_weights(indicators, self.evaluator.weights, blend=0.5)
+        expected = self.evaluator.aggregate_batch(indicators, weights)
+        np.testing.assert_allclose([r.score for r in results], expected.score(), rtol=0, atol=1e-12)
+        stats = self.incremental.get_cache_stats()
+        for name in INDICATOR_NAMES:
+            self.assertAlmostEqual(stats['entropy_weights'][name], weights[name], places=12)
+        return results
+    
+    def test_frames_with_arrivals_and_departures(self):
+        """测试目标移动、离开和新出现的多帧中得分与整帧重新计算一致"""
+        enemies = make_enemies(30)
+        self.assert_frame(enemies, (0.0, 0.0))
+        
+        moved = [dict(enemy) for enemy in enemies[5:]]
+        for enemy in moved[:8]:
+            enemy['x'] += 7.0
+        arrivals = make_enemies(36)[30:]
+        for enemy in arrivals:
+            enemy['speed'] = 3.0
+        results = self.assert_frame(moved + arrivals, (0.0, 0.0))
+        self.assertEqual(len(self.incremental.entropy.rows), len(moved) + len(arrivals))
+        
+        # 解释信息使用同一组混合权重
+        explanation = results[0].explanation
+        self.assertAlmostEqual(explanation['comprehensive_threat_score'], results[0].score, places=12)
+        
+        self.incremental.invalidate(enemies[10]['id'])
+        self.assert_frame(moved + arrivals, (1.0, 0.0))
+    
+    def test_disabled_uses_subjective_weights(self):
+        """测试未启用熵权时与评估器的主观权重结果一致"""
+        incremental = IncrementalThreatEvaluator(self.evaluator)
+        enemies = make_enemies(12)
+        results = incremental.evaluate(enemies)
+        expected = self.evaluator.aggregate_batch(self.evaluator.indicator_matrix(enemies))
+        np.testing.assert_allclose([r.score for r in results], expected.score(), rtol=0, atol=1e-12)
+        self.assertNotIn('entropy_weights', incremental.get_cache_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""SQLite实验数据存储测试"""
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from csv_logger import CSVLogger
+from experiment_store import ExperimentStore, connect, import_csv, import_csv_directory
+from models import Position, Target
+
+
+def make_target(target_id, distance=10.0):
+    """创建测试目标"""
+    return Target(id=target_id, angle=90.0, distance=distance, type='Soldier',
+                  position=Position(4.0, 0.0, -2.0))
+
+
+class TestExperimentStore(unittest.TestCase):
+    """测试实验数据存储"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'experiments.db')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_wal_mode(self):
+        """测试数据库使用WAL模式"""
+        conn = connect(self.db_path)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        conn.close()
+    
+    def test_round_trip_with_rankings(self):
+        """测试写入后读取最高威胁目标、方向威胁值和完整排序"""
+        rankings = [
+            (make_target(2, 5.0), {'comprehensive_threat_score': 0.62, 'threat_level': 'high'}),
+            (make_target(1, 20.0), {'comprehensive_threat_score': 0.18, 'threat_level': 'low'}),
+        ]
+        with ExperimentStore(self.db_path, session='s1', batch_size=10) as store:
+            store.log_round_data(3, make_target(2, 5.0), {i: i * 0.01 for i in range(16)}, rankings=rankings)
+            self.assertTrue(store.check_round_exists(3))
+            self.assertTrue(store.check_round_exists("3"))
+            self.assertEqual(store.get_stats()['pending_rounds'], 1)
+            
+            data = store.read_round_data(3)
+            self.assertEqual(data['threat_enemy_id'], 2)
+            self.assertEqual(data['threat_enemy_distance'], 5.0)
+            self.assertAlmostEqual(data['direction_threats'][15], 0.15)
+            self.assertEqual([r['target_id'] for r in data['rankings']], [2, 1])
+            self.assertEqual(data['rankings'][0]['threat_level'], 'high')
+            self.assertIsNone(store.read_round_data(4))
+    
+    def test_logs_ifs_rankings(self):
+        """测试直接记录IFS评估器的排序结果（ThreatResult）"""
+        from models import GameData
+        from threat_analyzer_ifs import IFSThreatAnalyzerAdapter
+        
+        frame = {'round': 1, 'playerPosition': {'x': 0, 'y': 0, 'z': 0}, 'targets': [
+            {'id': 1, 'angle': 30.0, 'distance': 40.0, 'type': 'Soldier',
+             'position': {'x': 20.0, 'y': 0.0, 'z': 34.6}},
+            {'id': 2, 'angle': 180.0, 'distance': 6.0, 'type': 'Drone',
+             'position': {'x': 0.0, 'y': 0.0, 'z': -6.0}},
+        ]}
+        rankings = IFSThreatAnalyzerAdapter().evaluate_all_targets(GameData.from_dict(frame))
+        with ExperimentStore(self.db_path, session='s1') as store:
+            store.log_round_data(1, rankings[0][0], [0.0] * 16, rankings=rankings)
+            data = store.read_round_data(1)
+        self.assertEqual([r['target_id'] for r in data['rankings']], [t.id for t, _ in rankings])
+        for row, (_, result) in zip(data['rankings'], rankings):
+            self.assertAlmostEqual(row['score'], result.score)
+            self.assertEqual(row['threat_level'], result.threat_level)
+    
+    def test_batched_commits(self):
+        """测试凑满一批后才提交"""
+        with ExperimentStore(self.db_path, batch_size=5, flush_interval=60.0) as store:
+            for i in range(12):
+                store.log_round_data(i, None, [0.0] * 16)
+            stats = store.get_stats()
+            self.assertEqual(stats['commits'], 2)
+            self.assertEqual(stats['rounds_logged'], 10)
+            self.assertEqual(stats['pending_rounds'], 2)
+        
+        conn = connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0], 12)
+        conn.close()
+    
+    def test_deduplication_survives_restart(self):
+        """测试重启后同一会话的round去重依然有效，不同会话互不影响"""
+        with ExperimentStore(self.db_path, session='alice') as store:
+            store.log_round_data(1, make_target(1), [0.0] * 16)
+        
+        with ExperimentStore(self.db_path, session='alice') as store:
+            self.assertTrue(store.check_round_exists(1))
+            store.log_round_data(1, make_target(9), [0.0] * 16)
+            self.assertEqual(store.read_round_data(1)['threat_enemy_id'], 1)
+        
+        with ExperimentStore(self.db_path, session='bob') as store:
+            self.assertFalse(store.check_round_exists(1))
+    
+    def test_import_csv(self):
+        """测试导入CSVLogger生成的文件和早期8方向格式的文件"""
+        csv_dir = os.path.join(self.tmpdir.name, 'logs')
+        with CSVLogger(base_dir=csv_dir) as csv_logger:
+            csv_logger.log_round_data("1-1", make_target(4), [0.5] * 16)
+            csv_logger.log_round_data("1-2", None, [0.25] * 16)
+        
+        legacy_path = os.path.join(csv_dir, 'experiment_20250101_000000.csv')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            f.write("timestamp,round,vibration_type,threat_enemy_id,threat_enemy_type,threat_enemy_distance,"
+                    "threat_enemy_angle,threat_enemy_x,threat_enemy_y,threat_enemy_z,north_threat,"
+                    "northeast_threat,east_threat,southeast_threat,south_threat,southwest_threat,"
+                    "west_threat,northwest_threat\n")
+            f.write("2025-01-01 00:00:00.000,1-1,0,7,ifv,20.0,45.0,14.0,1.0,14.0,0.1,0.8,0.2,0,0,0,0.1,0.3\n")
+            f.write("2025-01-01 00:00:01.000,1-1,0,8,ifv,21.0,45.0,14.0,1.0,14.0,0.1,0.8,0.2,0,0,0,0.1,0.3\n")
+        
+        conn = connect(self.db_path)
+        results = import_csv_directory(conn, csv_dir)
+        self.assertEqual(sorted(results.values()), [1, 2])
+        # 重复导入不会产生重复记录
+        self.assertEqual(import_csv(conn, legacy_path), 0)
+        conn.close()
+        
+        with ExperimentStore(self.db_path, session='experiment_20250101_000000') as store:
+            data = store.read_round_data('1-1')
+            self.assertEqual(data['threat_enemy_id'], 7)
+            self.assertEqual(data['direction_threats'][2], 0.8)   # northeast
+            self.assertEqual(data['direction_threats'][1], 0.0)   # 8方向格式中没有该列
+
+
+if __name__ == '__main__':
+    unittest.main()
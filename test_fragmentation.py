@@ -0,0 +1,148 @@
+"""分片与重组测试"""
+import unittest
+import sys
+import os
+import random
+import socket
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fragmentation import (
+    split_frame, ReassemblyBuffer, FragmentError, is_fragment, FRAGMENT_HEADER_STRUCT, FRAGMENT_MAGIC,
+    FRAGMENT_VERSION, MAX_FRAGMENTS, PARTIAL_FRAME_OVERHEAD
+)
+from models import GameData, Position, Target
+from udp_server import UDPServer
+from wire_format import encode_frame
+
+
+class TestReassemblyBuffer(unittest.TestCase):
+    """测试重组缓冲区"""
+    
+    def test_out_of_order_reassembly(self):
+        """测试乱序到达的分片能正确重组"""
+        payload = bytes(random.Random(1).getrandbits(8) for _ in range(5000))
+        fragments = split_frame(payload, frame_id=7, max_datagram_size=1000)
+        self.assertEqual(len(fragments), 6)
+        self.assertTrue(all(is_fragment(f) for f in fragments))
+        
+        buffer = ReassemblyBuffer()
+        order = [5, 0, 3, 1, 4, 2]
+        results = [buffer.add(fragments[i], source='a', now=0.0) for i in order]
+        self.assertEqual(results[:-1], [None] * 5)
+        self.assertEqual(results[-1], payload)
+        
+        stats = buffer.get_stats()
+        self.assertEqual(stats['frames_completed'], 1)
+        self.assertEqual(stats['partial_frames'], 0)
+        self.assertEqual(stats['buffered_bytes'], 0)
+    
+    def test_duplicates_and_sources_are_separate(self):
+        """测试重复分片被忽略，不同发送方的相同帧编号互不干扰"""
+        fragments_a = split_frame(b"a" * 300, frame_id=1, max_datagram_size=110)
+        fragments_b = split_frame(b"b" * 300, frame_id=1, max_datagram_size=110)
+        buffer = ReassemblyBuffer()
+        buffer.add(fragments_a[0], source='a', now=0.0)
+        buffer.add(fragments_a[0], source='a', now=0.0)
+        for fragment in fragments_b:
+            result = buffer.add(fragment, source='b', now=0.0)
+        self.assertEqual(result, b"b" * 300)
+        self.assertEqual(buffer.get_stats()['duplicate_fragments'], 1)
+        self.assertEqual(buffer.get_stats()['partial_frames'], 1)
+    
+    def test_incomplete_frame_times_out(self):
+        """测试超时未到齐的帧被丢弃并计数"""
+        fragments = split_frame(b"x" * 300, frame_id=2, max_datagram_size=110)
+        buffer = ReassemblyBuffer(timeout=0.5)
+        buffer.add(fragments[0], source='a', now=10.0)
+        buffer.add(fragments[1], source='a', now=10.2)
+        self.assertEqual(buffer.expire(now=10.4), 0)
+        self.assertEqual(buffer.expire(now=10.6), 1)
+        
+        # 迟到的分片开始一个新的未完成帧，而不是与已丢弃的分片拼接
+        self.assertIsNone(buffer.add(fragments[2], source='a', now=10.7))
+        stats = buffer.get_stats()
+        self.assertEqual(stats['frames_timed_out'], 1)
+        self.assertEqual(stats['fragments_dropped'], 2)
+        self.assertEqual(stats['partial_frames'], 1)
+    
+    def test_memory_cap_evicts_oldest(self):
+        """测试超过内存上限时丢弃最早的未完成帧"""
+        # 每帧缓冲一个100字节的分片，连同簿记开销约676字节：上限只容得下两帧
+        buffer = ReassemblyBuffer(max_bytes=1500)
+        for frame_id in range(3):
+            fragments = split_frame(b"y" * 300, frame_id=frame_id, max_datagram_size=110)
+            buffer.add(fragments[0], source='a', now=0.0)
+        
+        stats = buffer.get_stats()
+        self.assertEqual(stats['frames_evicted'], 1)
+        self.assertEqual(stats['partial_frames'], 2)
+        self.assertLessEqual(stats['buffered_bytes'], 1500)
+    
+    def test_fragment_count_does_not_bypass_cap(self):
+        """测试分片头声明大量分片的小数据包不会绕过内存上限"""
+        buffer = ReassemblyBuffer(max_bytes=1024 * 1024)
+        with self.assertRaises(FragmentError):
+            buffer.add(FRAGMENT_HEADER_STRUCT.pack(FRAGMENT_MAGIC, FRAGMENT_VERSION, 0, MAX_FRAGMENTS, 1) + b"x",
+                       source='a', now=0.0)
+        self.assertEqual(buffer.get_stats()['oversized_frames'], 1)
+        self.assertEqual(buffer.get_stats()['partial_frames'], 0)
+        
+        # 能放进上限的小分片帧大量到达时，簿记开销也计入上限
+        for frame_id in range(5000):
+            buffer.add(FRAGMENT_HEADER_STRUCT.pack(FRAGMENT_MAGIC, FRAGMENT_VERSION, 0, 100, frame_id) + b"x",
+                       source='a', now=0.0)
+        stats = buffer.get_stats()
+        self.assertLessEqual(stats['buffered_bytes'], 1024 * 1024)
+        self.assertLess(stats['partial_frames'], 1024 * 1024 // PARTIAL_FRAME_OVERHEAD)
+        self.assertGreater(stats['frames_evicted'], 0)
+    
+    def test_invalid_fragment_rejected(self):
+        """测试非法分片头"""
+        fragment = bytearray(split_frame(b"z" * 10, frame_id=1)[0])
+        fragment[2] = 5  # index >= count
+        with self.assertRaises(FragmentError):
+            ReassemblyBuffer().add(bytes(fragment))
+
+
+class TestFragmentedFrames(unittest.TestCase):
+    """测试UDP服务器接收分片帧"""
+    
+    def test_large_binary_frame_over_udp(self):
+        """测试超过单包上限的二进制数据帧分片发送后被完整接收"""
+        targets = [
+            Target(id=i, angle=float(i % 360), distance=10.0 + i % 50, type='Drone' if i % 3 else 'Soldier',
+                   position=Position(float(i), 0.0, float(-i)), speed=1.0)
+            for i in range(3000)
+        ]
+        game_data = GameData(round=5, playerPosition=Position(0.0, 0.0, 0.0), targets=targets)
+        fragments = split_frame(encode_frame(game_data, max_targets=None), frame_id=5,
+                                max_datagram_size=16000)
+        
+        server = UDPServer(host="127.0.0.1", port=0, timeout=0.5, rcvbuf_size=1024 * 1024)
+        self.assertTrue(server.start())
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for fragment in fragments:
+                sender.sendto(fragment, server.socket.getsockname())
+            
+            frames = []
+            for _ in range(10):
+                frames.extend(server.receive_batch())
+                if frames:
+                    break
+            
+            self.assertEqual(len(frames), 1)
+            self.assertEqual(len(frames[0].targets), 3000)
+            self.assertEqual(frames[0].targets[2999].id, 2999)
+            stats = server.get_stats()['reassembly']
+            self.assertEqual(stats['fragments_received'], len(fragments))
+            self.assertEqual(stats['frames_completed'], 1)
+        finally:
+            sender.close()
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+"""触觉时间线调度器测试"""
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from haptic_scheduler import HapticScheduler, STOP_COMMAND
+from serial_handler import SerialHandler, SINGLE_TARGET_TAG, SITUATION_AWARENESS_TAG
+
+
+class RecordingWriter:
+    """记录发送命令及时间的假串口"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = []
+    
+    def __call__(self, message):
+        with self.lock:
+            self.commands.append((time.monotonic(), message))
+    
+    def messages(self):
+        with self.lock:
+            return [message for _, message in self.commands]
+
+
+class TestHapticScheduler(unittest.TestCase):
+    """测试调度器"""
+    
+    def setUp(self):
+        self.writer = RecordingWriter()
+        self.scheduler = HapticScheduler(self.writer)
+        self.scheduler.start()
+    
+    def tearDown(self):
+        self.scheduler.stop()
+    
+    def test_commands_emitted_in_time_order(self):
+        """测试命令按计划时间顺序发送"""
+        start = time.monotonic()
+        sequence = self.scheduler.submit_sequence(
+            [(0.10, "b\n"), (0.0, "a\n"), (0.05, STOP_COMMAND)], tag="t"
+        )
+        self.assertTrue(sequence.wait(1.0))
+        
+        self.assertEqual(self.writer.messages(), ["a\n", STOP_COMMAND, "b\n"])
+        last_time = self.writer.commands[-1][0]
+        self.assertGreaterEqual(last_time - start, 0.10)
+    
+    def test_submit_does_not_block(self):
+        """测试提交长序列不会阻塞调用线程"""
+        start = time.monotonic()
+        sequence = self.scheduler.submit_sequence([(0.0, "a\n"), (5.0, STOP_COMMAND)], tag="t")
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertFalse(sequence.is_done())
+    
+    def test_preempt_running_sequence_sends_stop(self):
+        """测试抢占已开始的序列会立即补发停止命令"""
+        running = self.scheduler.submit_sequence(
+            [(0.0, "1,255,0\n"), (5.0, STOP_COMMAND), (6.0, "1,255,1\n")], tag=SINGLE_TARGET_TAG
+        )
+        deadline = time.monotonic() + 1.0
+        while not running.started and time.monotonic() < deadline:
+            time.sleep(0.005)
+        
+        new_sequence = self.scheduler.submit_sequence(
+            [(0.0, "2,200,0\n")], tag="sa", preempt=(SINGLE_TARGET_TAG,)
+        )
+        self.assertTrue(new_sequence.wait(1.0))
+        time.sleep(0.05)
+        
+        self.assertTrue(running.cancelled)
+        self.assertTrue(running.is_done())
+        self.assertEqual(self.writer.messages(), ["1,255,0\n", STOP_COMMAND, "2,200,0\n"])
+        self.assertIsNone(self.scheduler.active_sequence(SINGLE_TARGET_TAG))
+    
+    def test_queue_after_replaces_pending(self):
+        """测试排在正在播放的序列之后，排队中尚未开始的序列被新序列替换"""
+        playing = self.scheduler.submit_sequence([(0.0, "a1\n"), (0.15, "a2\n")], tag="t")
+        deadline = time.monotonic() + 1.0
+        while not playing.started and time.monotonic() < deadline:
+            time.sleep(0.005)
+        
+        start = time.monotonic()
+        replaced = self.scheduler.submit_sequence([(0.0, "b\n")], tag="t", after=("t",))
+        latest = self.scheduler.submit_sequence([(0.0, "c\n")], tag="t", after=("t",))
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertTrue(replaced.cancelled)
+        self.assertEqual(latest.end, playing.end)
+        
+        self.assertTrue(latest.wait(1.0))
+        self.assertEqual(self.writer.messages(), ["a1\n", "a2\n", "c\n"])
+        self.assertGreaterEqual(self.writer.commands[-1][0], self.writer.commands[-2][0])
+    
+    def test_cancel_during_first_write_sends_stop(self):
+        """测试第一条命令正在发送时被取消，仍会在其后补发停止命令"""
+        writing = threading.Event()
+        release = threading.Event()
+        
+        def slow_write(message):
+            if message == "1,255,0\n":
+                writing.set()
+                release.wait(1.0)
+            self.writer(message)
+        
+        self.scheduler.write_func = slow_write
+        self.scheduler.submit_sequence([(0.0, "1,255,0\n"), (5.0, STOP_COMMAND)], tag="t")
+        self.assertTrue(writing.wait(1.0))
+        self.assertEqual(self.scheduler.cancel("t"), 1)
+        release.set()
+        
+        deadline = time.monotonic() + 1.0
+        while len(self.writer.messages()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.writer.messages(), ["1,255,0\n", STOP_COMMAND])
+    
+    def test_jitter_stats(self):
+        """测试抖动统计"""
+        sequence = self.scheduler.submit_sequence(
+            [(0.01 * i, f"{i}\n") for i in range(10)], tag="t"
+        )
+        self.assertTrue(sequence.wait(1.0))
+        
+        stats = self.scheduler.get_jitter_stats()
+        self.assertEqual(stats['count'], 10)
+        self.assertGreaterEqual(stats['max_ms'], stats['p95_ms'])
+        self.assertGreaterEqual(stats['p95_ms'], 0.0)
+        self.assertLess(stats['mean_ms'], 50.0)
+
+
+class TestSerialHandlerScheduling(unittest.TestCase):
+    """测试串口处理器的调度模式"""
+    
+    def setUp(self):
+        self.scheduler = HapticScheduler(lambda message: None)
+        self.handler = SerialHandler(port="TEST", scheduler=self.scheduler)
+        self.handler.serial_connection = Mock(is_open=True)
+        self.handler.serial_connection.write.side_effect = lambda data: len(data)
+        self.scheduler.write_func = self.handler.write_command
+        self.scheduler.start()
+    
+    def tearDown(self):
+        self.scheduler.stop()
+    
+    def written(self):
+        return [call.args[0].decode('utf-8') for call in self.handler.serial_connection.write.call_args_list]
+    
+    def test_send_vibration_returns_immediately(self):
+        """测试调度模式下send_vibration不阻塞"""
+        start = time.monotonic()
+        self.assertTrue(self.handler.send_vibration(3, 255, duration=2.0, mode=1))
+        self.assertLess(time.monotonic() - start, 0.1)
+    
+    def test_situation_awareness_preempts_single_target(self):
+        """测试态势感知帧抢占单目标序列"""
+        sequence = self.handler.play_single_target_sequence(
+            5, 255, duration=2.0, distance_mode=0, pause=2.0, type_mode=1
+        )
+        self.assertIsNotNone(sequence)
+        deadline = time.monotonic() + 1.0
+        while not sequence.started and time.monotonic() < deadline:
+            time.sleep(0.005)
+        
+        intensities = [0] * 16
+        intensities[2] = 200
+        self.assertTrue(self.handler.send_multi_vibration(intensities, duration=0.05))
+        
+        self.assertTrue(sequence.is_done())
+        self.assertTrue(sequence.cancelled)
+        time.sleep(0.4)
+        written = self.written()
+        self.assertEqual(written[0], "5,255,0\n")
+        self.assertIn("2,200,0\n", written)
+        self.assertNotIn("5,255,1\n", written)
+
+    def test_single_target_sequence_does_not_wait(self):
+        """测试上一个单目标序列仍在播放时立即返回，态势感知帧同时抢占播放中和排队中的序列"""
+        first = self.handler.play_single_target_sequence(
+            5, 255, duration=2.0, distance_mode=0, pause=2.0, type_mode=1
+        )
+        deadline = time.monotonic() + 1.0
+        while not first.started and time.monotonic() < deadline:
+            time.sleep(0.005)
+        start = time.monotonic()
+        second = self.handler.play_single_target_sequence(
+            6, 255, duration=2.0, distance_mode=0, pause=2.0, type_mode=1
+        )
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertGreaterEqual(second.end, first.end + 6.0)
+        
+        self.assertTrue(self.handler.send_multi_vibration([0] * 15 + [200], duration=0.05))
+        self.assertTrue(first.cancelled)
+        self.assertTrue(second.cancelled)
+        time.sleep(0.4)
+        self.assertNotIn("6,255,0\n", self.written())
+
+
+    def test_single_target_waits_for_pending_situation_awareness(self):
+        """测试态势感知序列尚未开始时提交的单目标序列排在其后，不会取消它"""
+        # 持有调度器的锁，保证两次提交都在调度线程取出态势感知的第一条命令之前完成
+        with self.scheduler._cond:
+            self.assertTrue(self.handler.send_multi_vibration([0] * 15 + [200], duration=0.05))
+            awareness = self.scheduler.active_sequence(SITUATION_AWARENESS_TAG)
+            single = self.handler.play_single_target_sequence(
+                5, 255, duration=0.05, distance_mode=0, pause=0.05, type_mode=1
+            )
+            self.assertFalse(awareness.started)
+        self.assertFalse(awareness.cancelled)
+        self.assertGreaterEqual(single.end, awareness.end + 0.15)
+        
+        self.assertTrue(single.wait(3.0))
+        self.assertTrue(awareness.is_done())
+        self.assertFalse(awareness.cancelled)
+        written = self.written()
+        self.assertLess(written.index("15,200,0\n"), written.index("5,255,0\n"))
+
+if __name__ == '__main__':
+    unittest.main()
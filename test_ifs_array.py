@@ -0,0 +1,204 @@
+"""IFSArray（直觉模糊数数组）测试"""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.ifs_core import AGGREGATION_OPERATORS, FrozenIFS, IFS, IFSArray, IFSConverter, IFSOperations
+
+
+def random_ifs_list(count, seed=1):
+    """生成随机IFS列表（包含需要截断和归一化的输入）"""
+    rng = np.random.default_rng(seed)
+    return [IFS(float(mu), float(nu)) for mu, nu in rng.uniform(-0.2, 1.2, (count, 2))]
+
+
+class TestIFSArray(unittest.TestCase):
+    """测试IFSArray与逐个IFS运算一致"""
+    
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.raw = self.rng.uniform(-0.2, 1.2, (200, 2))
+        self.array = IFSArray(self.raw[:, 0], self.raw[:, 1])
+        self.scalars = [IFS(float(mu), float(nu)) for mu, nu in self.raw]
+    
+    def test_constraints_match_ifs(self):
+        """测试截断、归一化和犹豫度与IFS.__post_init__一致"""
+        np.testing.assert_allclose(self.array.mu, [ifs.mu for ifs in self.scalars], atol=1e-12)
+        np.testing.assert_allclose(self.array.nu, [ifs.nu for ifs in self.scalars], atol=1e-12)
+        np.testing.assert_allclose(self.array.pi, [ifs.pi for ifs in self.scalars], atol=1e-12)
+        self.assertTrue(np.all(self.array.mu + self.array.nu <= 1.0 + 1e-12))
+        np.testing.assert_allclose(self.array.score(), [ifs.score() for ifs in self.scalars], atol=1e-12)
+        np.testing.assert_allclose(self.array.accuracy(), [ifs.accuracy() for ifs in self.scalars], atol=1e-12)
+    
+    def test_indexing_and_conversion(self):
+        """测试下标访问和与IFS列表的互相转换"""
+        self.assertIsInstance(self.array[3], IFS)
+        self.assertAlmostEqual(self.array[3].mu, self.scalars[3].mu)
+        self.assertEqual(len(self.array[10:20]), 10)
+        self.assertEqual(self.array.shape, (200,))
+        
+        round_trip = IFSArray.from_list(self.array.to_list())
+        np.testing.assert_allclose(round_trip.mu, self.array.mu)
+        np.testing.assert_allclose(round_trip.nu, self.array.nu)
+    
+    def test_elementwise_operations(self):
+        """测试距离、比较、并、交、补与IFSOperations一致"""
+        other_scalars = random_ifs_list(200, seed=2)
+        other = IFSArray.from_list(other_scalars)
+        ops = IFSOperations
+        
+        hamming = self.array.hamming_distance(other)
+        euclidean = self.array.euclidean_distance(other)
+        compare = self.array.compare(other)
+        union = self.array.union(other)
+        intersection = self.array.intersection(other)
+        complement = self.array.complement()
+        
+        for i, (a, b) in enumerate(zip(self.scalars, other_scalars)):
+            self.assertAlmostEqual(hamming[i], ops.hamming_distance(a, b), places=12)
+            self.assertAlmostEqual(euclidean[i], ops.euclidean_distance(a, b), places=12)
+            self.assertEqual(compare[i], ops.compare(a, b))
+            self.assertAlmostEqual(union.mu[i], ops.union(a, b).mu, places=12)
+            self.assertAlmostEqual(union.nu[i], ops.union(a, b).nu, places=12)
+            self.assertAlmostEqual(intersection.mu[i], ops.intersection(a, b).mu, places=12)
+            self.assertAlmostEqual(intersection.nu[i], ops.intersection(a, b).nu, places=12)
+            self.assertAlmostEqual(complement.mu[i], ops.complement(a).mu, places=12)
+        
+        # 与自身比较全部相等
+        self.assertTrue(np.all(self.array.compare(self.array) == 0))
+    
+    def test_pairwise_distances(self):
+        """测试两两距离矩阵"""
+        small = self.array[:15]
+        other = IFSArray.from_list(random_ifs_list(7, seed=3))
+        hamming = small.pairwise_distances(other)
+        euclidean = small.pairwise_distances(other, metric='euclidean')
+        self.assertEqual(hamming.shape, (15, 7))
+        for i in range(15):
+            for j in range(7):
+                self.assertAlmostEqual(hamming[i, j], IFSOperations.hamming_distance(small[i], other[j]), places=12)
+                self.assertAlmostEqual(euclidean[i, j],
+                                       IFSOperations.euclidean_distance(small[i], other[j]), places=12)
+        
+        self_distances = small.pairwise_distances()
+        np.testing.assert_allclose(self_distances, self_distances.T)
+        np.testing.assert_allclose(np.diag(self_distances), 0.0, atol=1e-12)
+        with self.assertRaises(ValueError):
+            small.pairwise_distances(metric='cosine')
+    
+    def test_weighted_average(self):
+        """测试沿轴的IFWA聚合与逐行weighted_average一致"""
+        matrix = IFSArray(self.rng.random((50, 6)) * 0.6, self.rng.random((50, 6)) * 0.4)
+        weights = [0.3, 0.25, 0.2, 0.15, 0.06, 0.04]
+        aggregated = matrix.weighted_average(weights)
+        self.assertEqual(aggregated.shape, (50,))
+        for i in range(50):
+            expected = IFSOperations.weighted_average(matrix[i].to_list(), weights)
+            self.assertAlmostEqual(aggregated.mu[i], expected.mu, places=12)
+            self.assertAlmostEqual(aggregated.nu[i], expected.nu, places=12)
+        
+        by_column = matrix.weighted_average(np.ones(50), axis=0)
+        self.assertEqual(by_column.shape, (6,))
+        np.testing.assert_allclose(by_column.mu, matrix.mu.mean(axis=0))
+        
+        with self.assertRaises(ValueError):
+            matrix.weighted_average([1.0, 2.0])
+        with self.assertRaises(ValueError):
+            matrix.weighted_average(np.zeros(6))
+    
+    def test_weighted_average_profiles(self):
+        """测试K组权重一次聚合与逐组weighted_average一致"""
+        matrix = IFSArray(self.rng.random((50, 6)) * 0.6, self.rng.random((50, 6)) * 0.4)
+        weight_matrix = self.rng.random((7, 6))
+        aggregated = matrix.weighted_average_profiles(weight_matrix)
+        self.assertEqual(aggregated.shape, (50, 7))
+        for k in range(7):
+            expected = matrix.weighted_average(weight_matrix[k])
+            np.testing.assert_allclose(aggregated.mu[:, k], expected.mu, rtol=0, atol=1e-12)
+            np.testing.assert_allclose(aggregated.nu[:, k], expected.nu, rtol=0, atol=1e-12)
+        
+        with self.assertRaises(ValueError):
+            matrix.weighted_average_profiles(np.ones((3, 2)))
+        with self.assertRaises(ValueError):
+            matrix.weighted_average_profiles(np.vstack([np.ones(6), np.zeros(6)]))
+    
+    def test_aggregation_operators(self):
+        """测试IFWG/IFOWA/IFHA整批聚合与逐行IFSOperations一致"""
+        matrix = IFSArray(self.rng.random((50, 6)) * 0.6, self.rng.random((50, 6)) * 0.4)
+        matrix.mu[:3, 2] = 0.0
+        weights = [0.3, 0.25, 0.2, 0.15, 0.06, 0.04]
+        position_weights = [0.1, 0.15, 0.25, 0.25, 0.15, 0.1]
+        for operator in AGGREGATION_OPERATORS:
+            aggregated = matrix.aggregate(operator, weights, position_weights)
+            self.assertEqual(aggregated.shape, (50,))
+            for i in range(50):
+                expected = IFSOperations.aggregate(operator, matrix[i].to_list(), weights, position_weights)
+                self.assertAlmostEqual(aggregated.mu[i], expected.mu, places=12, msg=operator)
+                self.assertAlmostEqual(aggregated.nu[i], expected.nu, places=12, msg=operator)
+        with self.assertRaises(ValueError):
+            matrix.aggregate('median', weights)
+    
+    def test_aggregation_operator_definitions(self):
+        """测试算子定义：IFWG的短板效应、IFOWA按排序位置加权、IFHA等权时退化为IFOWA"""
+        ifs_list = [IFS(0.8, 0.1), IFS(0.0, 0.5)]
+        geometric = IFSOperations.weighted_geometric(ifs_list, [1.0, 1.0])
+        self.assertEqual(geometric.mu, 0.0)
+        self.assertAlmostEqual(geometric.nu, 1.0 - (0.9 * 0.5) ** 0.5)
+        
+        # 位置权重全部给最大者时等于最大的IFS，与输入顺序无关
+        for ordered in (ifs_list, ifs_list[::-1]):
+            top = IFSOperations.ordered_weighted_average(ordered, [1.0, 0.0])
+            self.assertAlmostEqual(top.mu, 0.8)
+            self.assertAlmostEqual(top.nu, 0.1)
+        
+        equal = [0.5, 0.5]
+        hybrid = IFSOperations.hybrid_average(ifs_list, equal, [0.7, 0.3])
+        ordered = IFSOperations.ordered_weighted_average(ifs_list, [0.7, 0.3])
+        self.assertAlmostEqual(hybrid.mu, ordered.mu)
+        self.assertAlmostEqual(hybrid.nu, ordered.nu)
+    
+    def test_argsort_lexicographic(self):
+        """测试先按得分、再按精确函数排序，完全相同时保持原顺序"""
+        array = IFSArray([0.5, 0.6, 0.3, 0.6, 0.4], [0.3, 0.2, 0.1, 0.2, 0.2])
+        # 得分：0.2, 0.4, 0.2, 0.4, 0.2；精确函数：0.8, 0.8, 0.4, 0.8, 0.6
+        self.assertEqual(array.argsort().tolist(), [1, 3, 0, 4, 2])
+        self.assertEqual(array.argsort(descending=False).tolist(), [2, 4, 0, 1, 3])
+
+
+
+class TestFrozenIFS(unittest.TestCase):
+    """测试不可变IFS常量"""
+    
+    def test_immutable(self):
+        """测试不可修改属性，且不含__dict__"""
+        ifs = FrozenIFS(0.6, 0.3)
+        with self.assertRaises(AttributeError):
+            ifs.mu = 0.1
+        self.assertFalse(hasattr(ifs, '__dict__'))
+        self.assertFalse(hasattr(IFS(0.6, 0.3), '__dict__'))
+    
+    def test_behaves_like_ifs(self):
+        """测试约束、运算和相等比较与IFS一致"""
+        frozen = FrozenIFS(0.8, 0.6)
+        plain = IFS(0.8, 0.6)
+        self.assertIsInstance(frozen, IFS)
+        self.assertEqual(frozen, plain)
+        self.assertEqual(plain, frozen)
+        self.assertAlmostEqual(frozen.pi, plain.pi)
+        self.assertEqual(IFSOperations.compare(frozen, plain), 0)
+        self.assertEqual(len({FrozenIFS(0.5, 0.4), FrozenIFS(0.5, 0.4)}), 1)
+    
+    def test_linguistic_terms_shared(self):
+        """测试语言术语查表返回共享常量，不再逐次构造"""
+        self.assertIs(IFSConverter.from_linguistic_term('高'), IFSConverter.from_linguistic_term(' 高 '))
+        self.assertEqual(IFSConverter.from_linguistic_term('HIGH'), IFS(0.75, 0.15))
+        self.assertEqual(IFSConverter.from_linguistic_term('未知'), IFS(0.50, 0.40))
+
+
+if __name__ == '__main__':
+    unittest.main()
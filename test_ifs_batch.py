@@ -0,0 +1,432 @@
+"""IFS批量（向量化）威胁评估测试"""
+import unittest
+import sys
+import os
+import time
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.ifs_core import AGGREGATION_OPERATORS
+from IFS_ThreatAssessment.threat_evaluator import (
+    ENGINE_BATCH, ENGINE_PRUNED, ENGINE_SCALAR, INDICATOR_NAMES, IFSThreatEvaluator, ThreatResult
+)
+
+
+def make_enemies(count, seed=7):
+    """生成覆盖各距离区段、速度区段和类型的随机敌人"""
+    rng = np.random.default_rng(seed)
+    types = ['soldier', 'drone', 'armed_personnel', 'ifv', 'Drone', ' Soldier ']
+    enemies = []
+    for i in range(count):
+        distance = rng.uniform(0.5, 80.0)
+        bearing = rng.uniform(0, 2 * np.pi)
+        enemies.append({
+            'id': i,
+            'type': types[i % len(types)],
+            'x': float(distance * np.cos(bearing)) + 3.0,
+            'z': float(distance * np.sin(bearing)) - 2.0,
+            'speed': float(rng.choice([0.0, rng.uniform(0, 30)])),
+            'direction': float(rng.uniform(0, 360)),
+        })
+    return enemies
+
+
+def make_terrain(enemies, seed=11):
+    """生成逐个敌人的地形数据（部分敌人缺省、部分只有一类数据）"""
+    rng = np.random.default_rng(seed)
+    per_enemy = {}
+    for enemy in enemies:
+        kind = enemy['id'] % 5
+        if kind == 0:
+            continue
+        data = {}
+        if kind in (1, 2, 4):
+            data['visibility'] = {
+                'is_blocked': bool(rng.random() < 0.6),
+                'blocking_count': int(rng.integers(0, 5)),
+                'visibility_ratio': None if kind == 4 else float(rng.random()),
+            }
+        if kind in (2, 3, 4):
+            data['environment'] = {
+                'obstacle_density': float(rng.random()),
+                'building_density': float(rng.random()),
+                'complexity_level': [None, 'open', 'moderate', 'complex'][int(rng.integers(0, 4))],
+            }
+        per_enemy[enemy['id']] = data
+    return {'enemies': per_enemy}
+
+
+class TestEvaluateBatch(unittest.TestCase):
+    """测试批量评估与逐个评估一致"""
+    
+    def assert_matches_scalar(self, evaluator, enemies, player_pos, terrain_data):
+        batch = evaluator.evaluate_batch(player_pos=player_pos,
+                                         **evaluator.batch_columns(enemies, terrain_data))
+        for i, enemy in enumerate(enemies):
+            enemy_terrain = terrain_data['enemies'].get(enemy['id']) if terrain_data else None
+            result = evaluator.evaluate_single_target(enemy, player_pos, enemy_terrain)
+            
+            self.assertAlmostEqual(batch['score'][i], result['comprehensive_threat_score'], delta=1e-9)
+            self.assertAlmostEqual(batch['mu'][i], result['ifs_values']['membership'], delta=1e-9)
+            self.assertAlmostEqual(batch['nu'][i], result['ifs_values']['non_membership'], delta=1e-9)
+            self.assertAlmostEqual(batch['pi'][i], result['ifs_values']['hesitancy'], delta=1e-9)
+            self.assertAlmostEqual(batch['distance'][i], result['distance'], delta=1e-9)
+            self.assertEqual(batch['threat_level'][i], result['threat_level'])
+            for column, name in enumerate(INDICATOR_NAMES):
+                ifs = result['indicator_details'][name]['ifs']
+                self.assertAlmostEqual(batch['indicator_mu'][i, column], ifs.mu, delta=1e-9, msg=name)
+                self.assertAlmostEqual(batch['indicator_nu'][i, column], ifs.nu, delta=1e-9, msg=name)
+    
+    def test_matches_scalar_without_terrain(self):
+        """测试无地形数据时与evaluate_single_target一致"""
+        enemies = make_enemies(600)
+        self.assert_matches_scalar(IFSThreatEvaluator(), enemies, (0, 0), None)
+        self.assert_matches_scalar(IFSThreatEvaluator(), enemies, (3.0, -2.0), None)
+    
+    def test_matches_scalar_with_terrain(self):
+        """测试逐个敌人的地形数据（通视/环境）与evaluate_single_target一致"""
+        enemies = make_enemies(600, seed=3)
+        self.assert_matches_scalar(IFSThreatEvaluator(), enemies, (1.5, 4.0), make_terrain(enemies))
+    
+    def test_matches_scalar_with_custom_weights(self):
+        """测试自定义权重（含缺省指标）时与evaluate_single_target一致"""
+        enemies = make_enemies(200, seed=5)
+        evaluator = IFSThreatEvaluator(custom_weights={'distance': 2.0, 'speed': 1.0, 'angle': 1.0})
+        self.assert_matches_scalar(evaluator, enemies, (0, 0), make_terrain(enemies))
+    
+    def test_rank_targets_order(self):
+        """测试rank_targets排序与按得分稳定降序排序一致"""
+        evaluator = IFSThreatEvaluator()
+        enemies = make_enemies(300, seed=9)
+        # 重复目标产生同分，检验稳定排序
+        enemies += [dict(enemy, id=1000 + i) for i, enemy in enumerate(enemies[:20])]
+        terrain_data = make_terrain(enemies)
+        
+        expected = []
+        for enemy in enemies:
+            expected.append(evaluator.evaluate_single_target(
+                enemy, (0, 0), terrain_data['enemies'].get(enemy['id'])))
+        expected.sort(key=lambda x: x['comprehensive_threat_score'], reverse=True)
+        
+        ranked = evaluator.rank_targets(enemies, (0, 0), terrain_data)
+        self.assertEqual([r['enemy_id'] for r in ranked], [r['enemy_id'] for r in expected])
+        self.assertEqual([r['rank'] for r in ranked], list(range(1, len(enemies) + 1)))
+        self.assertIn('indicator_details', ranked[0])
+        
+        most = evaluator.find_most_threatening(enemies, (0, 0), terrain_data)
+        self.assertEqual(most['enemy_id'], expected[0]['enemy_id'])
+        self.assertEqual(most['rank'], 1)
+    
+    def test_small_counts_use_scalar_path(self):
+        """测试少量目标时逐个评估路径与批量路径结果一致"""
+        scalar = IFSThreatEvaluator()
+        batched = IFSThreatEvaluator(batch_min_targets=0)
+        for count in (2, 3, 5):
+            enemies = make_enemies(count, seed=count)
+            terrain_data = make_terrain(enemies)
+            expected = batched.rank_targets(enemies, (0, 0), terrain_data)
+            ranked = scalar.rank_targets(enemies, (0, 0), terrain_data)
+            self.assertEqual([r['enemy_id'] for r in ranked], [r['enemy_id'] for r in expected])
+            self.assertEqual([r['rank'] for r in ranked], list(range(1, count + 1)))
+            self.assertEqual(scalar.find_most_threatening(enemies, (0, 0), terrain_data)['enemy_id'],
+                             batched.find_most_threatening(enemies, (0, 0), terrain_data)['enemy_id'])
+    
+    def test_empty(self):
+        """测试空敌人列表"""
+        evaluator = IFSThreatEvaluator()
+        self.assertEqual(evaluator.rank_targets([]), [])
+        self.assertIsNone(evaluator.find_most_threatening([]))
+    
+    def test_large_batch(self):
+        """测试一万个敌人的批量评估耗时"""
+        evaluator = IFSThreatEvaluator()
+        columns = evaluator.batch_columns(make_enemies(10000, seed=13))
+        evaluator.evaluate_batch(**columns)
+        
+        start = time.perf_counter()
+        batch = evaluator.evaluate_batch(**columns)
+        elapsed = time.perf_counter() - start
+        
+        self.assertEqual(len(batch['score']), 10000)
+        self.assertLess(elapsed, 0.5)
+
+
+
+class TestEngineSelection(unittest.TestCase):
+    """测试逐个/批量评估引擎的选择与统计"""
+    
+    def test_select_by_threshold(self):
+        """测试按目标数量和阈值选择引擎"""
+        evaluator = IFSThreatEvaluator(batch_min_targets=10)
+        self.assertEqual(evaluator.select_engine('rank_targets', 9), ENGINE_SCALAR)
+        self.assertEqual(evaluator.select_engine('rank_targets', 10), ENGINE_BATCH)
+        
+        evaluator.batch_min_targets['find_most_threatening'] = None
+        self.assertEqual(evaluator.select_engine('find_most_threatening', 10000), ENGINE_SCALAR)
+    
+    def test_engine_stats(self):
+        """测试调用统计记录所用引擎和目标数"""
+        evaluator = IFSThreatEvaluator(batch_min_targets=10)
+        evaluator.rank_targets(make_enemies(3))
+        evaluator.rank_targets(make_enemies(12))
+        evaluator.find_most_threatening(make_enemies(1))
+        evaluator.find_most_threatening(make_enemies(20))
+        
+        operations = evaluator.get_engine_stats()['operations']
+        self.assertEqual(operations['rank_targets'][ENGINE_SCALAR]['calls'], 1)
+        self.assertEqual(operations['rank_targets'][ENGINE_SCALAR]['targets'], 3)
+        self.assertEqual(operations['rank_targets'][ENGINE_BATCH]['calls'], 1)
+        self.assertEqual(operations['rank_targets'][ENGINE_BATCH]['targets'], 12)
+        self.assertEqual(operations['find_most_threatening'][ENGINE_SCALAR]['calls'], 1)
+        self.assertEqual(operations['find_most_threatening'][ENGINE_BATCH]['targets'], 20)
+        self.assertGreater(operations['find_most_threatening'][ENGINE_BATCH]['mean_ms'], 0)
+    
+    def test_calibration(self):
+        """测试启动校准记录各数量的耗时并更新阈值"""
+        evaluator = IFSThreatEvaluator()
+        self.assertFalse(evaluator.get_engine_stats()['calibrated'])
+        
+        sizes = (2, 64, 512)
+        calibration = evaluator.calibrate_engines(sizes=sizes, repeat=1)
+        stats = evaluator.get_engine_stats()
+        self.assertTrue(stats['calibrated'])
+        for operation, result in calibration.items():
+            self.assertIn(result['batch_min_targets'], sizes + (None,))
+            self.assertEqual(stats['batch_min_targets'][operation], result['batch_min_targets'])
+            self.assertEqual(result['timings'][0]['targets'], 2)
+            self.assertGreater(result['timings'][0]['scalar_ms'], 0)
+        # 校准本身不计入调用统计
+        self.assertEqual(stats['operations']['rank_targets'][ENGINE_SCALAR]['calls'], 0)
+        # 最高威胁目标只需一个详细结果，大批量时批量引擎占优
+        self.assertIsNotNone(calibration['find_most_threatening']['batch_min_targets'])
+
+
+
+class TestThreatResult(unittest.TestCase):
+    """测试紧凑评估结果与延迟生成的解释信息"""
+    
+    def test_score_matches_full_evaluation(self):
+        """测试快速模式得分与evaluate_single_target一致"""
+        evaluator = IFSThreatEvaluator()
+        enemies = make_enemies(300, seed=21)
+        terrain_data = make_terrain(enemies)
+        for enemy in enemies:
+            enemy_terrain = terrain_data['enemies'].get(enemy['id'])
+            result = evaluator.score_single_target(enemy, (2.0, 1.0), enemy_terrain)
+            expected = evaluator.evaluate_single_target(enemy, (2.0, 1.0), enemy_terrain)
+            self.assertEqual(result.score, expected['comprehensive_threat_score'])
+            self.assertEqual(result.mu, expected['ifs_values']['membership'])
+            self.assertEqual(result.nu, expected['ifs_values']['non_membership'])
+            self.assertEqual(result.threat_level, expected['threat_level'])
+            self.assertEqual(result.distance, expected['distance'])
+    
+    def test_explanation_is_lazy(self):
+        """测试解释信息在首次访问时才生成，并保留排名"""
+        for batch_min_targets in (None, 0):
+            evaluator = IFSThreatEvaluator(batch_min_targets=batch_min_targets)
+            enemies = make_enemies(8, seed=4)
+            terrain_data = make_terrain(enemies)
+            ranked = evaluator.rank_targets(enemies, (0, 0), terrain_data)
+            self.assertIsInstance(ranked[0], ThreatResult)
+            self.assertTrue(all(r._explanation is None for r in ranked))
+            
+            first = ranked[0]
+            self.assertIn('distance', first['indicator_details'])
+            self.assertIsNotNone(first._explanation)
+            self.assertTrue(all(r._explanation is None for r in ranked[1:]))
+            self.assertEqual(first.explanation['rank'], 1)
+            self.assertAlmostEqual(first.explanation['comprehensive_threat_score'], first.score, delta=1e-9)
+    
+    def test_dict_compatible_access(self):
+        """测试按原结果字典的方式读取"""
+        evaluator = IFSThreatEvaluator()
+        enemies = make_enemies(3, seed=8)
+        ranked = evaluator.rank_targets(enemies)
+        result = ranked[1]
+        self.assertEqual(result['enemy_id'], result.enemy_id)
+        self.assertEqual(result['comprehensive_threat_score'], result.score)
+        self.assertEqual(result.get('threat_level'), result.threat_level)
+        self.assertEqual(result['rank'], 2)
+        self.assertAlmostEqual(result['ifs_values']['hesitancy'], 1.0 - result.mu - result.nu)
+        self.assertIn('comprehensive_threat_score', result)
+        self.assertIn('weighted_aggregation', result)
+        self.assertNotIn('unknown_field', result)
+        self.assertIsNone(result.get('unknown_field'))
+        
+        stats = evaluator.get_threat_statistics(ranked)
+        self.assertEqual(stats['total_enemies'], 3)
+        self.assertIn('distance', stats['indicator_importance'])
+        
+        single = evaluator.find_most_threatening(enemies[:1])
+        self.assertNotIn('rank', single)
+        with self.assertRaises(KeyError):
+            single['rank']
+
+
+
+class TestTopK(unittest.TestCase):
+    """测试前k个最高威胁目标的部分排序"""
+    
+    def expected_top_k(self, evaluator, enemies, k, terrain_data):
+        """全量评估后按（得分、精确函数、输入顺序）排序取前k个"""
+        results = [evaluator.score_single_target(enemy, (0, 0), terrain_data['enemies'].get(enemy['id']))
+                   for enemy in enemies]
+        order = sorted(range(len(results)),
+                       key=lambda i: (-results[i].score, -(results[i].mu + results[i].nu), i))
+        return [results[i].enemy_id for i in order[:k]]
+    
+    def test_matches_full_sort(self):
+        """测试两种引擎的前k个结果与全量排序一致"""
+        enemies = make_enemies(200, seed=17)
+        # 重复目标产生同分
+        enemies += [dict(enemy, id=500 + i) for i, enemy in enumerate(enemies[:30])]
+        terrain_data = make_terrain(enemies)
+        for batch_min_targets in (None, 0):
+            evaluator = IFSThreatEvaluator(batch_min_targets=batch_min_targets)
+            for k in (1, 3, 10, len(enemies)):
+                top = evaluator.top_k(enemies, k, (0, 0), terrain_data)
+                self.assertEqual([r.enemy_id for r in top], self.expected_top_k(evaluator, enemies, k, terrain_data))
+                self.assertEqual([r.rank for r in top], list(range(1, k + 1)))
+    
+    def test_tie_break_by_accuracy(self):
+        """测试得分相同时精确函数 μ + ν 高的目标排在前面"""
+        # 三个目标得分都为0.5，精确函数分别为0.5、1.0、0.75
+        ifs_values = {1: (0.5, 0.0), 2: (0.75, 0.25), 3: (0.625, 0.125)}
+        enemies = [dict(enemy, id=i) for i, enemy in zip(ifs_values, make_enemies(3))]
+        
+        scalar = IFSThreatEvaluator(batch_min_targets=None)
+        scalar.score_single_target = lambda enemy, player_pos, terrain_data: ThreatResult(
+            enemy['id'], 0.5, *ifs_values[enemy['id']], 'high', 0.0, scalar, enemy, player_pos)
+        
+        batched = IFSThreatEvaluator(batch_min_targets=0)
+        batched.evaluate_batch = lambda **columns: {
+            'score': np.full(3, 0.5),
+            'mu': np.array([ifs_values[i][0] for i in ifs_values]),
+            'nu': np.array([ifs_values[i][1] for i in ifs_values]),
+            'threat_level': np.array(['high'] * 3),
+            'distance': np.zeros(3),
+        }
+        
+        for evaluator in (scalar, batched):
+            self.assertEqual([r.enemy_id for r in evaluator.top_k(enemies, 3)], [2, 3, 1])
+            self.assertEqual([r.enemy_id for r in evaluator.top_k(enemies, 1)], [2])
+    
+    def test_edge_cases(self):
+        """测试k超过目标数、k为0和空列表"""
+        evaluator = IFSThreatEvaluator()
+        enemies = make_enemies(4)
+        self.assertEqual(len(evaluator.top_k(enemies, 10)), 4)
+        self.assertEqual(evaluator.top_k(enemies, 0), [])
+        self.assertEqual(evaluator.top_k([], 3), [])
+        self.assertEqual(evaluator.get_engine_stats()['operations']['top_k'][ENGINE_SCALAR]['calls'], 1)
+
+
+
+class TestPrunedSearch(unittest.TestCase):
+    """测试按得分上界剪枝的最高威胁目标搜索"""
+    
+    def setUp(self):
+        self.scalar = IFSThreatEvaluator(batch_min_targets=None)
+        self.pruned = IFSThreatEvaluator(batch_min_targets=None, pruned_search=True)
+    
+    def test_matches_scalar(self):
+        """测试剪枝搜索与逐个评估选出同一目标、得分相同"""
+        for seed in range(60):
+            enemies = make_enemies(2 + seed, seed)
+            terrain = make_terrain(enemies, seed) if seed % 2 else None
+            expected = self.scalar.find_most_threatening(enemies, (1.0, -2.0), terrain)
+            result = self.pruned.find_most_threatening(enemies, (1.0, -2.0), terrain)
+            self.assertEqual(result.enemy_id, expected.enemy_id)
+            self.assertEqual(result.score, expected.score)
+            self.assertEqual(result.rank, 1)
+        
+        custom = IFSThreatEvaluator({'distance': 1, 'angle': 3, 'visibility': 2},
+                                    batch_min_targets=None, pruned_search=True)
+        plain = IFSThreatEvaluator({'distance': 1, 'angle': 3, 'visibility': 2}, batch_min_targets=None)
+        enemies = make_enemies(30)
+        terrain = make_terrain(enemies)
+        self.assertEqual(custom.find_most_threatening(enemies, terrain_data=terrain).enemy_id,
+                         plain.find_most_threatening(enemies, terrain_data=terrain).enemy_id)
+    
+    def test_ties_keep_input_order(self):
+        """测试同分时与逐个评估一样取输入顺序靠前的目标"""
+        enemy = make_enemies(1)[0]
+        enemies = [dict(enemy, id=i) for i in (5, 3, 9)]
+        self.assertEqual(self.pruned.find_most_threatening(enemies).enemy_id, 5)
+    
+    def test_terrain_provider_called_lazily(self):
+        """测试只对未被剪掉的目标调用地形分析，并统计跳过的完整评估次数"""
+        enemies = make_enemies(40)
+        terrain = make_terrain(enemies)
+        calls = []
+        
+        def provider(enemy):
+            calls.append(enemy['id'])
+            return terrain['enemies'].get(enemy['id'])
+        
+        expected = self.scalar.find_most_threatening(enemies, terrain_data=terrain)
+        result = self.pruned.find_most_threatening(enemies, terrain_provider=provider)
+        self.assertEqual(result.enemy_id, expected.enemy_id)
+        
+        stats = self.pruned.get_engine_stats()
+        pruning = stats['pruning']
+        self.assertEqual(pruning['searches'], 1)
+        self.assertEqual(pruning['targets'], 40)
+        self.assertEqual(pruning['full_evaluations'], len(calls))
+        self.assertEqual(pruning['skipped_evaluations'], 40 - len(calls))
+        self.assertGreater(pruning['skipped_evaluations'], 0)
+        self.assertEqual(stats['operations']['find_most_threatening'][ENGINE_PRUNED]['calls'], 1)
+        
+        # 其他引擎对所有目标调用地形分析
+        calls.clear()
+        self.scalar.find_most_threatening(enemies, terrain_provider=provider)
+        self.assertEqual(len(calls), 40)
+    
+    def test_engine_selection(self):
+        """测试剪枝搜索只替代find_most_threatening的逐个评估"""
+        evaluator = IFSThreatEvaluator(batch_min_targets=10, pruned_search=True)
+        self.assertEqual(evaluator.select_engine('find_most_threatening', 9), ENGINE_PRUNED)
+        self.assertEqual(evaluator.select_engine('find_most_threatening', 10), ENGINE_BATCH)
+        self.assertEqual(evaluator.select_engine('rank_targets', 9), ENGINE_SCALAR)
+        self.assertEqual(self.scalar.get_engine_stats()['pruning']['skip_rate'], 0.0)
+
+
+class TestAggregationOperators(unittest.TestCase):
+    """测试按配置选择的聚合算子在批量评估和逐个评估中一致"""
+    
+    def test_batch_matches_scalar(self):
+        """测试各算子（含自定义权重和位置权重）批量结果与evaluate_single_target一致"""
+        enemies = make_enemies(200, seed=9)
+        terrain_data = make_terrain(enemies)
+        checker = TestEvaluateBatch()
+        for operator in AGGREGATION_OPERATORS:
+            checker.assert_matches_scalar(IFSThreatEvaluator(aggregation_operator=operator),
+                                          enemies, (1.0, -2.0), terrain_data)
+        custom = IFSThreatEvaluator(custom_weights={'distance': 2.0, 'speed': 1.0, 'angle': 1.0},
+                                    aggregation_operator='ifha', position_weights=[0.2, 0.5, 0.3])
+        checker.assert_matches_scalar(custom, enemies, (0, 0), terrain_data)
+    
+    def test_rankings_and_engines(self):
+        """测试非IFWA算子时两种引擎排序一致，且不使用剪枝搜索"""
+        enemies = make_enemies(40, seed=4)
+        for operator in AGGREGATION_OPERATORS[1:]:
+            scalar = IFSThreatEvaluator(batch_min_targets=None, aggregation_operator=operator, pruned_search=True)
+            batch = IFSThreatEvaluator(batch_min_targets=1, aggregation_operator=operator)
+            self.assertFalse(scalar.pruned_search)
+            self.assertEqual(scalar.select_engine('find_most_threatening', 5), ENGINE_SCALAR)
+            self.assertEqual([r.enemy_id for r in scalar.rank_targets(enemies)],
+                             [r.enemy_id for r in batch.rank_targets(enemies)])
+            self.assertEqual(scalar.find_most_threatening(enemies).explanation['weighted_aggregation']
+                             ['aggregation_method'], operator.upper())
+        
+        with self.assertRaises(ValueError):
+            IFSThreatEvaluator(aggregation_operator='median')
+        with self.assertRaises(ValueError):
+            IFSThreatEvaluator(aggregation_operator='ifowa', position_weights=[1.0, 1.0]).rank_targets(enemies)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""增量威胁评估（按目标ID缓存指标）测试"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.incremental_evaluator import INDICATOR_DEPENDENCIES, IncrementalThreatEvaluator
+from IFS_ThreatAssessment.terrain_analyzer import TerrainAnalyzer
+from IFS_ThreatAssessment.threat_evaluator import INDICATOR_NAMES, IFSThreatEvaluator
+from test_ifs_batch import make_enemies
+
+TERRAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'Generate_Picture', 'TerrainData_20251219_191755.json')
+
+
+def misses(evaluator):
+    """各指标的累计未命中次数"""
+    return {name: stats['misses'] for name, stats in evaluator.get_cache_stats()['indicators'].items()}
+
+
+class TestIncrementalEvaluator(unittest.TestCase):
+    """测试增量评估与完整评估一致，且只重新计算输入变化的指标"""
+    
+    def setUp(self):
+        self.terrain = TerrainAnalyzer(TERRAIN_PATH)
+        self.evaluator = IFSThreatEvaluator(batch_min_targets=None)
+        self.incremental = IncrementalThreatEvaluator(self.evaluator, self.terrain)
+        self.enemies = make_enemies(12)
+    
+    def expected_scores(self, enemies, player_pos):
+        """逐个完整评估（含地形分析）的得分"""
+        return [self.evaluator.score_single_target(
+                    enemy, player_pos, self.terrain.analyze_tactical_position((enemy['x'], enemy['z']), player_pos)
+                ).score for enemy in enemies]
+    
+    def test_matches_full_evaluation(self):
+        """测试首轮和输入变化后的结果与完整评估一致"""
+        results = self.incremental.evaluate(self.enemies, (1.0, 2.0))
+        self.assertEqual([r.enemy_id for r in results], [e['id'] for e in self.enemies])
+        for result, expected in zip(results, self.expected_scores(self.enemies, (1.0, 2.0))):
+            self.assertAlmostEqual(result.score, expected, places=12)
+        
+        moved = [dict(enemy, x=enemy['x'] + 3.0, speed=enemy['speed'] + 1.0) for enemy in self.enemies]
+        results = self.incremental.evaluate(moved, (-4.0, 2.0))
+        for result, expected in zip(results, self.expected_scores(moved, (-4.0, 2.0))):
+            self.assertAlmostEqual(result.score, expected, places=12)
+        
+        # 解释信息使用缓存的地形分析结果
+        detail = results[0].explanation['indicator_details']
+        self.assertIn('visibility', detail)
+    
+    def test_unchanged_round_hits_cache(self):
+        """测试输入不变时全部命中"""
+        self.incremental.evaluate(self.enemies)
+        first = self.incremental.evaluate(self.enemies)
+        stats = self.incremental.get_cache_stats()
+        self.assertEqual(stats['rounds'], 2)
+        self.assertEqual(stats['misses'], 12 * len(INDICATOR_NAMES))
+        self.assertEqual(stats['hits'], 12 * len(INDICATOR_NAMES))
+        self.assertAlmostEqual(stats['hit_rate'], 0.5)
+        self.assertEqual([r.score for r in first],
+                         [r.score for r in self.incremental.evaluate(self.enemies)])
+    
+    def test_dependency_sets(self):
+        """测试只重新计算依赖输入发生变化的指标"""
+        self.incremental.evaluate(self.enemies)
+        
+        def changed_indicators(enemies, player_pos=(0, 0)):
+            before = misses(self.incremental)
+            self.incremental.evaluate(enemies, player_pos)
+            after = misses(self.incremental)
+            return {name for name in INDICATOR_NAMES if after[name] != before[name]}
+        
+        retyped = [dict(self.enemies[0], type='armed_personnel')] + self.enemies[1:]
+        self.assertEqual(changed_indicators(retyped), {'type', 'speed'})
+        self.assertEqual(changed_indicators(retyped, (0.0, 5.0)), {'distance', 'angle', 'visibility'})
+        turned = [dict(enemy, direction=enemy['direction'] + 45) for enemy in retyped]
+        self.assertEqual(changed_indicators(turned, (0.0, 5.0)), {'angle'})
+        moved = [dict(enemy, z=enemy['z'] + 1.0) for enemy in turned]
+        self.assertEqual(changed_indicators(moved, (0.0, 5.0)),
+                         {name for name, deps in INDICATOR_DEPENDENCIES.items() if 'position' in deps})
+    
+    def test_epsilon_measured_from_last_recompute(self):
+        """测试小于容差的变化复用缓存，逐轮漂移累计超过容差后重新计算"""
+        incremental = IncrementalThreatEvaluator(self.evaluator, epsilons={'position': 0.1})
+        enemy = make_enemies(1)[0]
+        incremental.evaluate([enemy])
+        for step in range(1, 4):
+            incremental.evaluate([dict(enemy, x=enemy['x'] + 0.04 * step)])
+        # 0.04、0.08 在容差内，0.12 超过容差
+        self.assertEqual(misses(incremental)['environment'], 2)
+        
+        exact = IncrementalThreatEvaluator(self.evaluator, epsilons={'speed': 0})
+        exact.evaluate([enemy])
+        exact.evaluate([dict(enemy, speed=enemy['speed'] + 1e-6)])
+        self.assertEqual(misses(exact)['speed'], 2)
+    
+    def test_departed_targets_are_dropped(self):
+        """测试本轮未出现的目标移出缓存，invalidate清除缓存"""
+        self.incremental.evaluate(self.enemies)
+        self.incremental.evaluate(self.enemies[:5])
+        self.assertEqual(self.incremental.get_cache_stats()['tracked_targets'], 5)
+        self.incremental.invalidate(self.enemies[0]['id'])
+        self.assertEqual(self.incremental.get_cache_stats()['tracked_targets'], 4)
+        self.incremental.invalidate()
+        self.assertEqual(self.incremental.get_cache_stats()['tracked_targets'], 0)
+    
+    def test_rank_and_find(self):
+        """测试排序和最高威胁目标与IFSThreatEvaluator一致"""
+        incremental = IncrementalThreatEvaluator(self.evaluator)
+        expected = self.evaluator.rank_targets(self.enemies, (2.0, 1.0))
+        ranked = incremental.rank_targets(self.enemies, (2.0, 1.0))
+        self.assertEqual([r.enemy_id for r in ranked], [r.enemy_id for r in expected])
+        self.assertEqual(ranked[0].rank, 1)
+        self.assertEqual(incremental.find_most_threatening(self.enemies, (2.0, 1.0)).enemy_id,
+                         expected[0].enemy_id)
+        self.assertIsNone(incremental.find_most_threatening([]))
+
+    def test_duplicate_ids_evaluated_once(self):
+        """测试同一轮中重复的目标ID只按最后一次出现的数据评估"""
+        incremental = IncrementalThreatEvaluator(self.evaluator)
+        moved = dict(self.enemies[0], x=self.enemies[0]['x'] + 30.0)
+        results = incremental.evaluate(self.enemies[:3] + [moved])
+        self.assertEqual([r.enemy_id for r in results], [enemy['id'] for enemy in self.enemies[:3]])
+        expected = self.evaluator.score_single_target(moved, (0, 0)).score
+        self.assertAlmostEqual(results[0].score, expected, places=12)
+        stats = incremental.get_cache_stats()
+        self.assertEqual(stats['duplicate_ids'], 1)
+        self.assertEqual(stats['tracked_targets'], 3)
+
+
+class TestAdapterIncrementalSessions(unittest.TestCase):
+    """测试适配器为每个会话使用独立的增量缓存"""
+    
+    def frame(self, session_id, x):
+        """创建只有一个目标（ID为1）的数据帧"""
+        from models import GameData
+        return GameData.from_dict({
+            'round': 1, 'sessionId': session_id, 'playerPosition': {'x': 0, 'y': 0, 'z': 0},
+            'targets': [{'id': 1, 'angle': 0.0, 'distance': x, 'type': 'Soldier',
+                         'position': {'x': x, 'y': 0.0, 'z': 0.0}}]
+        })
+    
+    def test_sessions_do_not_share_cache(self):
+        """测试不同会话中相同的目标ID互不覆盖，结果与非增量评估一致"""
+        from threat_analyzer_ifs import IFSThreatAnalyzerAdapter
+        incremental = IFSThreatAnalyzerAdapter(incremental=True)
+        full = IFSThreatAnalyzerAdapter()
+        
+        for _ in range(2):
+            for session_id, x in (('a', 5.0), ('b', 60.0)):
+                frame = self.frame(session_id, x)
+                expected = full.evaluate_all_targets(frame)[0][1].score
+                self.assertAlmostEqual(incremental.evaluate_all_targets(frame)[0][1].score, expected, places=12)
+        
+        stats = incremental.get_engine_stats()['incremental']
+        self.assertEqual(sorted(stats), ['a', 'b'])
+        self.assertEqual(stats['a']['tracked_targets'], 1)
+        self.assertGreater(stats['b']['hits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
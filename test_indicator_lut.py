@@ -0,0 +1,114 @@
+"""隶属度曲线查找表（LUT）模式测试"""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.threat_indicators import DEFAULT_LUT_RESOLUTION, ThreatIndicators, type_codes
+
+
+class TestIndicatorLUT(unittest.TestCase):
+    """测试查找表结果与精确计算的误差不超过报告的最大误差，分段与精确计算一致"""
+    
+    def setUp(self):
+        self.exact = ThreatIndicators()
+        self.lut = ThreatIndicators(DEFAULT_LUT_RESOLUTION)
+        self.errors = self.lut.lut_max_error()
+        rng = np.random.default_rng(7)
+        self.distance = rng.uniform(0, 250, 2000)
+        self.speed = rng.uniform(-1, 40, 2000)
+        self.direction = rng.uniform(0, 360, 2000)
+        self.types = rng.choice(['soldier', 'drone', 'armed_personnel'], 2000)
+    
+    def assertIFSClose(self, exact, approx, tolerance):
+        self.assertLessEqual(abs(exact.mu - approx.mu), tolerance + 1e-12)
+        self.assertLessEqual(abs(exact.nu - approx.nu), tolerance + 1e-12)
+    
+    def test_reported_max_error(self):
+        """测试报告的最大误差覆盖启用的曲线且足够小"""
+        self.assertEqual(set(self.errors), set(DEFAULT_LUT_RESOLUTION))
+        for error in self.errors.values():
+            self.assertLess(error, 5e-3)
+    
+    def test_scalar_matches_exact(self):
+        """测试逐点查表与精确计算一致（含阈值边界上的分段）"""
+        for distance in list(self.distance[:500]) + [0, 10, 20, 35, 200, 10 + 1e-9]:
+            exact, zone = self.exact.distance_ifs(distance)
+            approx, lut_zone = self.lut.distance_ifs(distance)
+            self.assertEqual(lut_zone, zone)
+            self.assertIFSClose(exact, approx, self.errors['distance'])
+        
+        boundaries = [0.5, 2.0, 5.0, 8.0, 15.0, 10.0, 30.0, 0.5 - 1e-9]
+        for speed, enemy_type in list(zip(self.speed[:500], self.types[:500])) + \
+                [(s, t) for s in boundaries for t in ('soldier', 'drone', 'armed_personnel')]:
+            exact, category = self.exact.speed_ifs(speed, enemy_type)
+            approx, lut_category = self.lut.speed_ifs(speed, enemy_type)
+            self.assertEqual(lut_category, category)
+            self.assertIFSClose(exact, approx, self.errors['speed'])
+        
+        for direction, x in zip(self.direction[:500], self.distance[:500] - 100):
+            exact = self.exact.attack_angle_ifs(direction, (x, 5.0), (1.0, 2.0))
+            approx = self.lut.attack_angle_ifs(direction, (x, 5.0), (1.0, 2.0))
+            self.assertEqual(approx[1], exact[1])
+            self.assertIFSClose(exact[0], approx[0], self.errors['angle'])
+    
+    def test_batch_matches_exact(self):
+        """测试向量化查表与精确计算一致（超出查找表范围的值按精确公式计算）"""
+        cases = (
+            ('evaluate_distance_batch', (self.distance,), 'distance'),
+            ('evaluate_speed_batch', (self.speed, type_codes(self.types)), 'speed'),
+            ('evaluate_attack_angle_batch', (self.direction, self.distance - 100, self.speed), 'angle')
+        )
+        for method, args, curve in cases:
+            exact = getattr(self.exact, method)(*args)
+            approx = getattr(self.lut, method)(*args)
+            for e, a in zip(exact, approx):
+                self.assertLessEqual(np.abs(e - a).max(), self.errors[curve] + 1e-12)
+        
+        # 超出范围：距离 > 200 米、负速度与精确结果完全相同
+        far = np.array([250.0, 1000.0])
+        np.testing.assert_array_equal(self.lut.evaluate_distance_batch(far)[0],
+                                      self.exact.evaluate_distance_batch(far)[0])
+        negative = np.array([-1.0, -0.1])
+        codes = type_codes(['soldier', 'drone'])
+        np.testing.assert_array_equal(self.lut.evaluate_speed_batch(negative, codes)[0],
+                                      self.exact.evaluate_speed_batch(negative, codes)[0])
+        self.assertEqual(self.lut.distance_ifs(1000.0), self.exact.distance_ifs(1000.0))
+    
+    def test_rebuild_on_threshold_change(self):
+        """测试修改或替换阈值后自动重建查找表"""
+        self.lut.distance_ifs(15.0)
+        self.lut.distance_thresholds['critical'] = 12
+        self.exact.distance_thresholds['critical'] = 12
+        self.assertEqual(self.lut.distance_ifs(11.0)[1], 'critical')
+        self.assertIFSClose(self.exact.distance_ifs(11.0)[0], self.lut.distance_ifs(11.0)[0],
+                            self.lut.lut_max_error()['distance'])
+        
+        thresholds = {'soldier': {'high': 4.0, 'medium': 1.0}, 'drone': {'high': 12.0, 'medium': 6.0}}
+        self.lut.speed_thresholds = thresholds
+        self.exact.speed_thresholds = thresholds
+        for speed in (0.8, 1.0, 3.9, 4.0, 7.0):
+            exact, category = self.exact.speed_ifs(speed, 'soldier')
+            approx, lut_category = self.lut.speed_ifs(speed, 'soldier')
+            self.assertEqual(lut_category, category)
+            self.assertIFSClose(exact, approx, self.lut.lut_max_error()['speed'])
+    
+    def test_partial_curves(self):
+        """测试只启用部分曲线时其余曲线精确计算，未知曲线报错"""
+        lut = ThreatIndicators({'distance': 0.1})
+        self.assertEqual(set(lut.lut_max_error()), {'distance'})
+        self.assertEqual(lut.speed_ifs(3.3, 'drone'), self.exact.speed_ifs(3.3, 'drone'))
+        np.testing.assert_array_equal(lut.evaluate_speed_batch(self.speed, type_codes(self.types))[0],
+                                      self.exact.evaluate_speed_batch(self.speed, type_codes(self.types))[0])
+        self.assertEqual(set(lut._luts), {'distance'})
+        self.assertEqual(ThreatIndicators().lut_max_error(), {})
+        with self.assertRaises(ValueError):
+            ThreatIndicators({'visibility': 0.1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,267 @@
+"""处理流水线测试"""
+import unittest
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import StageQueue, FrameCoalescer, ThreatPipeline
+from models import GameData, Position
+
+
+class TestStageQueue(unittest.TestCase):
+    """测试有界阶段队列"""
+    
+    def test_drop_oldest_when_full(self):
+        """测试队列满时丢弃最旧元素"""
+        q = StageQueue("test", maxsize=2)
+        self.assertTrue(q.put_latest(1))
+        self.assertTrue(q.put_latest(2))
+        self.assertFalse(q.put_latest(3))
+        
+        self.assertEqual(q.dropped_count, 1)
+        self.assertEqual(q.get(timeout=0.1), 2)
+        self.assertEqual(q.get(timeout=0.1), 3)
+    
+    def test_invalid_size(self):
+        """测试非法容量"""
+        with self.assertRaises(ValueError):
+            StageQueue("test", maxsize=0)
+
+
+class TestFrameCoalescer(unittest.TestCase):
+    """测试最新帧合并器"""
+    
+    def make_frame(self, round_number, source=None, situation_awareness=False):
+        """创建测试数据帧"""
+        return GameData(
+            round=round_number,
+            playerPosition=Position(0.0, 0.0, 0.0),
+            targets=[],
+            situationAwareness=situation_awareness,
+            source=source
+        )
+    
+    def test_latest_frame_wins(self):
+        """测试同一玩家只保留最新一帧"""
+        coalescer = FrameCoalescer()
+        for round_number in range(1, 6):
+            coalescer.put_latest(self.make_frame(round_number))
+        
+        frame = coalescer.get(timeout=0.1)
+        self.assertEqual(frame.round, 5)
+        self.assertEqual(coalescer.qsize(), 0)
+        
+        stats = coalescer.get_stats()
+        self.assertEqual(stats['frames_in'], 5)
+        self.assertEqual(stats['frames_dropped'], 4)
+        self.assertEqual(stats['frames_processed'], 1)
+    
+    def test_frames_kept_per_player(self):
+        """测试不同玩家的帧互不覆盖，并按等待顺序轮流处理"""
+        coalescer = FrameCoalescer()
+        coalescer.put_latest(self.make_frame(1, ('10.0.0.1', 5000)))
+        coalescer.put_latest(self.make_frame(1, ('10.0.0.2', 5000)))
+        coalescer.put_latest(self.make_frame(2, ('10.0.0.1', 5000)))
+        
+        first = coalescer.get(timeout=0.1)
+        second = coalescer.get(timeout=0.1)
+        self.assertEqual((first.source[0], first.round), ('10.0.0.2', 1))
+        self.assertEqual((second.source[0], second.round), ('10.0.0.1', 2))
+        self.assertEqual(coalescer.get_stats()['frames_dropped'], 1)
+    
+    def test_situation_awareness_not_coalesced_away(self):
+        """测试待处理的态势感知帧被同一玩家的普通帧取代时，态势感知请求带到新帧上"""
+        coalescer = FrameCoalescer()
+        sa_frame = self.make_frame(1, situation_awareness=True)
+        coalescer.put_latest(sa_frame)
+        coalescer.put_latest(self.make_frame(2))
+        coalescer.put_latest(self.make_frame(3))
+        
+        frame = coalescer.get(timeout=0.1)
+        self.assertEqual(frame.round, 3)
+        self.assertTrue(frame.situationAwareness)
+        self.assertEqual(coalescer.get_stats()['frames_dropped'], 2)
+        
+        # 键数量超限时优先丢弃普通帧
+        coalescer = FrameCoalescer(max_keys=2)
+        coalescer.put_latest(self.make_frame(1, ('10.0.0.1', 5000), situation_awareness=True))
+        coalescer.put_latest(self.make_frame(1, ('10.0.0.2', 5000)))
+        coalescer.put_latest(self.make_frame(1, ('10.0.0.3', 5000)))
+        sources = [coalescer.get(timeout=0.1).source[0] for _ in range(2)]
+        self.assertEqual(sources, ['10.0.0.1', '10.0.0.3'])
+    
+    def test_empty_get_times_out(self):
+        """测试无数据时超时"""
+        import queue
+        with self.assertRaises(queue.Empty):
+            FrameCoalescer().get(timeout=0.01)
+
+
+class TestThreatPipeline(unittest.TestCase):
+    """测试三级流水线"""
+    
+    def make_source(self, frames):
+        """创建按顺序返回数据帧的接收函数"""
+        frames = list(frames)
+        lock = threading.Lock()
+        
+        def receive():
+            with lock:
+                if frames:
+                    return frames.pop(0)
+            time.sleep(0.01)
+            return None
+        
+        return receive
+    
+    def wait_until(self, condition, timeout=2.0):
+        """等待条件成立"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+    
+    def test_frames_flow_through_stages(self):
+        """测试数据依次经过三个阶段"""
+        rendered = []
+        pipeline = ThreatPipeline(
+            receive_func=self.make_source(range(5)),
+            assess_func=lambda frame: frame * 10,
+            output_func=rendered.append,
+            output_queue_size=16
+        )
+        pipeline.start()
+        self.assertTrue(self.wait_until(lambda: len(rendered) == 5))
+        self.assertTrue(pipeline.stop(timeout=2.0))
+        
+        self.assertEqual(rendered, [0, 10, 20, 30, 40])
+        stats = pipeline.get_stats()
+        self.assertEqual(stats['frames_received'], 5)
+        self.assertEqual(stats['frames_assessed'], 5)
+        self.assertEqual(stats['results_rendered'], 5)
+    
+    def test_assessment_continues_during_slow_output(self):
+        """测试输出阶段阻塞时评估阶段仍按数据包速率运行"""
+        release = threading.Event()
+        assessed = []
+        rendered = []
+        
+        def slow_output(result):
+            release.wait(2.0)
+            rendered.append(result)
+        
+        def assess(frame):
+            assessed.append(frame)
+            return frame
+        
+        pipeline = ThreatPipeline(
+            receive_func=self.make_source(range(20)),
+            assess_func=assess,
+            output_func=slow_output,
+            output_queue_size=1
+        )
+        pipeline.start()
+        self.assertTrue(self.wait_until(lambda: len(assessed) == 20))
+        release.set()
+        self.assertTrue(self.wait_until(lambda: rendered and rendered[-1] == 19))
+        self.assertTrue(pipeline.stop(timeout=2.0))
+        
+        # 播放期间积压的中间结果被丢弃，只播放最新的结果
+        self.assertLess(len(rendered), 20)
+        self.assertGreater(pipeline.get_stats()['output_dropped'], 0)
+    
+    def test_situation_awareness_result_kept_during_blocked_output(self):
+        """测试输出阻塞期间待播放的态势感知结果被新结果取代时，请求带到新结果上"""
+        playing = threading.Event()
+        release = threading.Event()
+        rendered = []
+        
+        def blocked_output(result):
+            playing.set()
+            release.wait(2.0)
+            rendered.append(result)
+        
+        pipeline = ThreatPipeline(
+            receive_func=None,
+            assess_func=lambda frame: {'game_data': frame},
+            output_func=blocked_output,
+            output_queue_size=1
+        )
+        pipeline.start()
+        frames = [GameData(round=i, playerPosition=Position(0.0, 0.0, 0.0), targets=[],
+                           situationAwareness=(i == 1)) for i in range(5)]
+        pipeline.submit(frames[0])
+        self.assertTrue(playing.wait(2.0))
+        for frame in frames[1:]:
+            pipeline.submit(frame)
+        self.assertTrue(self.wait_until(lambda: pipeline.get_stats()['frames_assessed'] == 5))
+        release.set()
+        self.assertTrue(self.wait_until(lambda: len(rendered) == 2))
+        self.assertTrue(pipeline.stop(timeout=2.0))
+        
+        latest = rendered[-1]['game_data']
+        self.assertEqual(latest.round, 4)
+        self.assertTrue(latest.situationAwareness)
+        self.assertFalse(frames[4].situationAwareness)
+        self.assertEqual(pipeline.get_stats()['output_dropped'], 3)
+    
+    def test_stage_errors_do_not_stop_pipeline(self):
+        """测试阶段异常不会终止流水线"""
+        rendered = []
+        
+        def assess(frame):
+            if frame == 1:
+                raise RuntimeError("bad frame")
+            return frame
+        
+        pipeline = ThreatPipeline(
+            receive_func=self.make_source(range(3)),
+            assess_func=assess,
+            output_func=rendered.append,
+            output_queue_size=16
+        )
+        pipeline.start()
+        self.assertTrue(self.wait_until(lambda: len(rendered) == 2))
+        self.assertTrue(pipeline.stop(timeout=2.0))
+        
+        self.assertEqual(rendered, [0, 2])
+        self.assertEqual(pipeline.get_stats()['assess_errors'], 1)
+    
+    def test_coalescing_skips_backlog(self):
+        """测试启用帧合并后积压的旧帧被跳过"""
+        release = threading.Event()
+        assessed = []
+        
+        def slow_assess(frame):
+            release.wait(2.0)
+            assessed.append(frame)
+            return None
+        
+        pipeline = ThreatPipeline(
+            receive_func=self.make_source(range(50)),
+            assess_func=slow_assess,
+            output_func=lambda result: None,
+            coalesce_frames=True,
+            frame_key_func=lambda frame: 'player'
+        )
+        pipeline.start()
+        self.assertTrue(self.wait_until(
+            lambda: pipeline.get_stats()['frames_received'] == 50))
+        release.set()
+        self.assertTrue(self.wait_until(lambda: assessed and assessed[-1] == 49))
+        self.assertTrue(pipeline.stop(timeout=2.0))
+        
+        stats = pipeline.get_stats()['coalescer']
+        self.assertLess(len(assessed), 50)
+        self.assertEqual(stats['frames_processed'], len(assessed))
+        self.assertEqual(stats['frames_dropped'] + stats['frames_processed'], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""多会话管理测试"""
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import GameData
+from session_manager import Session, SessionManager, assess_frame, session_key, create_process_pool
+
+
+def make_frame(round_number, session_id=None, source=('10.0.0.1', 5000)):
+    """创建测试数据帧"""
+    game_data = GameData.from_dict({
+        'round': round_number,
+        'playerPosition': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+        'targets': [
+            {'id': 1, 'angle': 90.0, 'distance': 30.0, 'type': 'Soldier',
+             'position': {'x': 30.0, 'y': 0.0, 'z': 0.0}},
+            {'id': 2, 'angle': 0.0, 'distance': 8.0, 'type': 'Drone',
+             'position': {'x': 0.0, 'y': 0.0, 'z': 8.0}, 'speed': 10.0}
+        ],
+        'sessionId': session_id
+    })
+    game_data.source = source
+    game_data.received_at = time.monotonic()
+    return game_data
+
+
+def wait_until(condition, timeout=10.0):
+    """等待条件成立"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestSessionKey(unittest.TestCase):
+    """测试会话键"""
+    
+    def test_session_id_takes_precedence(self):
+        """测试数据包中的sessionId优先于发送方地址"""
+        self.assertEqual(session_key(make_frame(1, session_id='trainee-3')), 'trainee-3')
+        self.assertEqual(session_key(make_frame(1)), '10.0.0.1:5000')
+
+
+class TestSessionManager(unittest.TestCase):
+    """测试会话分发、输出隔离和延迟统计"""
+    
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.outputs = {}
+        self.lock = threading.Lock()
+    
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+    
+    def factory(self, key, executor):
+        """为每个会话记录自己的输出"""
+        def output(assessment):
+            with self.lock:
+                self.outputs.setdefault(key, []).append(assessment)
+        return Session(key, executor, output_func=output)
+    
+    def test_frames_routed_to_separate_sessions(self):
+        """测试不同玩家的数据帧由各自的会话处理"""
+        manager = SessionManager(self.executor, self.factory)
+        try:
+            manager.dispatch(make_frame(1, source=('10.0.0.1', 5000)))
+            manager.dispatch(make_frame(7, source=('10.0.0.2', 5000)))
+            self.assertTrue(wait_until(lambda: len(self.outputs) == 2))
+            
+            self.assertEqual(self.outputs['10.0.0.1:5000'][0]['game_data'].round, 1)
+            self.assertEqual(self.outputs['10.0.0.2:5000'][0]['game_data'].round, 7)
+            self.assertEqual(self.outputs['10.0.0.1:5000'][0]['most_threatening'].id, 2)
+            
+            stats = manager.get_stats()
+            self.assertEqual(set(stats), {'10.0.0.1:5000', '10.0.0.2:5000'})
+            for session_stats in stats.values():
+                self.assertEqual(session_stats['assess_latency']['count'], 1)
+                self.assertGreater(session_stats['assess_latency']['max_ms'], 0.0)
+        finally:
+            manager.close_all()
+    
+    def test_session_limit_and_idle_reaping(self):
+        """测试会话数量上限和空闲会话回收"""
+        manager = SessionManager(self.executor, self.factory, max_sessions=1, idle_timeout=0.05)
+        try:
+            self.assertIsNotNone(manager.dispatch(make_frame(1, session_id='a')))
+            self.assertIsNone(manager.dispatch(make_frame(1, session_id='b')))
+            self.assertEqual(manager.rejected_frames, 1)
+            
+            time.sleep(0.1)
+            self.assertEqual(manager.reap_idle(), ['a'])
+            self.assertEqual(manager.sessions(), {})
+        finally:
+            manager.close_all()
+    
+    def test_process_pool_assessment(self):
+        """测试评估计算在独立进程中完成"""
+        executor = create_process_pool(max_workers=1)
+        manager = SessionManager(executor, self.factory)
+        try:
+            manager.dispatch(make_frame(3, session_id='pool'))
+            self.assertTrue(wait_until(lambda: 'pool' in self.outputs, timeout=60.0))
+            assessment = self.outputs['pool'][0]
+            self.assertEqual(assessment['most_threatening'].id, 2)
+            self.assertEqual(len(assessment['direction_threats']), 16)
+        finally:
+            manager.close_all()
+            executor.shutdown(wait=True)
+
+
+    def test_process_pool_rankings(self):
+        """测试带目标排序的评估结果能从spawn进程池传回（含解释信息）"""
+        executor = create_process_pool(max_workers=1)
+        try:
+            most_threatening, direction_threats, rankings = executor.submit(
+                assess_frame, make_frame(4), True).result(timeout=60.0)
+        finally:
+            executor.shutdown(wait=True)
+        self.assertEqual(most_threatening.id, 2)
+        self.assertEqual([target.id for target, _ in rankings], [2, 1])
+        details = rankings[0][1]
+        self.assertEqual(details['rank'], 1)
+        self.assertIn('distance', details['indicator_details'])
+
+if __name__ == '__main__':
+    unittest.main()
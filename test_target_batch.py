@@ -0,0 +1,98 @@
+"""列式目标集合（TargetBatch）测试"""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import GameData, Target, TargetBatch, TargetView, TARGET_TYPE_DRONE
+from wire_format import encode_frame, HEADER_SIZE
+
+
+TARGETS = [
+    {'id': 1, 'angle': 45.0, 'distance': 14.1, 'type': 'Soldier',
+     'position': {'x': 10.0, 'y': 0.0, 'z': 10.0}, 'speed': 1.5, 'direction': 90.0},
+    {'id': 2, 'angle': 180.0, 'distance': 30.0, 'type': 'Drone',
+     'position': {'x': 0.0, 'y': 5.0, 'z': -30.0}, 'speed': 12.0, 'direction': 270.0,
+     'velocity': {'x': -1.0, 'y': 0.0, 'z': 2.0}},
+    {'id': 3, 'angle': 300.0, 'distance': 8.0, 'type': 'soldier',
+     'position': {'x': -4.0, 'y': 0.0, 'z': 7.0}}
+]
+
+
+class TestTargetBatch(unittest.TestCase):
+    """测试列式目标集合"""
+    
+    def test_from_dict_columns(self):
+        """测试从JSON目标列表构建列数组"""
+        batch = TargetBatch.from_dict(TARGETS)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.id.tolist(), [1, 2, 3])
+        self.assertEqual(batch.is_drone.tolist(), [False, True, False])
+        self.assertEqual(batch.type_code[1], TARGET_TYPE_DRONE)
+        self.assertEqual(batch.has_velocity.tolist(), [False, True, False])
+        np.testing.assert_allclose(batch.speed, [1.5, 12.0, 0.0])
+        np.testing.assert_allclose(batch.z, [10.0, -30.0, 7.0])
+    
+    def test_row_views_match_targets(self):
+        """测试行视图与GameData.from_dict生成的Target一致"""
+        batch = TargetBatch.from_dict(TARGETS)
+        expected = GameData.from_dict({
+            'round': 1, 'playerPosition': {'x': 0, 'y': 0, 'z': 0}, 'targets': TARGETS
+        }).targets
+        
+        for view, target in zip(batch, expected):
+            self.assertIsInstance(view, TargetView)
+            self.assertEqual(view.id, target.id)
+            self.assertEqual(view.type.lower(), target.type.lower())
+            self.assertAlmostEqual(view.position.x, target.position.x, places=5)
+            self.assertAlmostEqual(view.direction, target.direction, places=5)
+        self.assertIsNone(batch[0].velocity)
+        self.assertAlmostEqual(batch[-2].velocity.z, 2.0)
+        self.assertIsInstance(batch[1].to_target(), Target)
+        with self.assertRaises(IndexError):
+            batch[3]
+    
+    def test_from_bytes_is_zero_copy(self):
+        """测试从二进制目标记录构建时不复制数据"""
+        game_data = GameData.from_dict({
+            'round': 1, 'playerPosition': {'x': 0, 'y': 0, 'z': 0}, 'targets': TARGETS
+        })
+        buffer = bytearray(encode_frame(game_data))
+        batch = TargetBatch.from_bytes(buffer, offset=HEADER_SIZE)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.distance[2], 8.0)
+        
+        # 修改缓冲区后列数组随之变化，说明引用的是同一块内存
+        buffer[HEADER_SIZE] = 9
+        self.assertEqual(batch.id[0], 9)
+    
+    def test_game_data_accepts_batch(self):
+        """测试TargetBatch可直接作为GameData.targets参与IFS评估"""
+        from threat_analyzer_ifs import IFSThreatAnalyzerAdapter
+        
+        frame = {'round': 1, 'playerPosition': {'x': 0, 'y': 0, 'z': 0}, 'targets': TARGETS}
+        with_list = GameData.from_dict(frame)
+        with_batch = GameData.from_dict(frame)
+        with_batch.targets = TargetBatch.from_dict(TARGETS)
+        self.assertIs(with_batch.target_batch(), with_batch.targets)
+        
+        adapter = IFSThreatAnalyzerAdapter()
+        expected, _ = adapter.find_most_threatening(with_list)
+        actual, _ = adapter.find_most_threatening(with_batch)
+        self.assertEqual(actual.id, expected.id)
+    
+    def test_mismatched_columns_rejected(self):
+        """测试列长度不一致时报错"""
+        batch = TargetBatch.from_dict(TARGETS)
+        columns = {name: getattr(batch, name) for name in TargetBatch.COLUMNS}
+        columns['speed'] = columns['speed'][:2]
+        with self.assertRaises(ValueError):
+            TargetBatch(**columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""UDP服务器批量接收测试"""
+import unittest
+import sys
+import os
+import json
+import socket
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from udp_server import UDPServer
+
+
+def make_payload(round_number):
+    """创建测试用的JSON数据包"""
+    return json.dumps({
+        'round': round_number,
+        'playerPosition': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+        'targets': [
+            {'id': 1, 'angle': 30.0, 'distance': 11.2, 'type': 'Soldier',
+             'position': {'x': 10.0, 'y': 0.0, 'z': 5.0}}
+        ]
+    }).encode('utf-8')
+
+
+class TestUDPServerBatchReceive(unittest.TestCase):
+    """测试非阻塞批量接收"""
+    
+    def setUp(self):
+        self.server = UDPServer(host="127.0.0.1", port=0, timeout=0.5, rcvbuf_size=256 * 1024)
+        self.assertTrue(self.server.start())
+        self.address = self.server.socket.getsockname()
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    
+    def tearDown(self):
+        self.sender.close()
+        self.server.stop()
+    
+    def test_batch_drains_all_pending_datagrams(self):
+        """测试一次调用读出缓冲区中的全部数据包"""
+        for round_number in range(1, 11):
+            self.sender.sendto(make_payload(round_number), self.address)
+        
+        frames = []
+        while len(frames) < 10:
+            batch = self.server.receive_batch()
+            if not batch:
+                break
+            frames.extend(batch)
+        
+        self.assertEqual([frame.round for frame in frames], list(range(1, 11)))
+        self.assertEqual(frames[0].source[1], self.sender.getsockname()[1])
+        stats = self.server.get_stats()
+        self.assertEqual(stats['datagrams_received'], 10)
+        self.assertLessEqual(stats['batches'], 10)
+    
+    def test_max_datagrams_limits_batch(self):
+        """测试单批数量上限"""
+        for round_number in range(1, 6):
+            self.sender.sendto(make_payload(round_number), self.address)
+        
+        first = self.server.receive_batch(max_datagrams=2)
+        self.assertLessEqual(len(first), 2)
+    
+    def test_parse_errors_are_counted(self):
+        """测试无法解析的数据包被跳过并计数"""
+        self.sender.sendto(b"not json", self.address)
+        self.sender.sendto(make_payload(1), self.address)
+        
+        frames = []
+        for _ in range(5):
+            frames.extend(self.server.receive_batch())
+            if frames:
+                break
+        
+        self.assertEqual([frame.round for frame in frames], [1])
+        self.assertEqual(self.server.get_stats()['parse_errors'], 1)
+    
+    def test_timeout_returns_empty_list(self):
+        """测试超时返回空列表"""
+        self.server.timeout = 0.01
+        self.assertEqual(self.server.receive_batch(), [])
+    
+    @unittest.skipUnless(os.path.exists("/proc/net/udp"), "requires Linux /proc/net/udp")
+    def test_kernel_drops_available_on_linux(self):
+        """测试读取内核丢包计数"""
+        drops = self.server.get_kernel_drops()
+        self.assertIsInstance(drops, int)
+        self.assertGreaterEqual(drops, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
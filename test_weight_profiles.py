@@ -0,0 +1,118 @@
+"""多权重方案评估测试"""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from IFS_ThreatAssessment.threat_evaluator import INDICATOR_NAMES, IFSThreatEvaluator
+from IFS_ThreatAssessment.weight_profiles import (
+    CURRENT_PROFILE, WeightProfileEvaluator, sweep_profiles, weight_matrix
+)
+from test_ifs_batch import make_enemies
+
+
+class TestWeightProfiles(unittest.TestCase):
+    """测试多组权重一次聚合的排序与逐组新建评估器一致，以及排名翻转统计"""
+    
+    def setUp(self):
+        self.evaluator = IFSThreatEvaluator(batch_min_targets=None)
+        self.profiles = WeightProfileEvaluator(self.evaluator)
+        self.enemies = make_enemies(25)
+        self.terrain = {'enemies': {
+            enemy['id']: {'visibility': {'is_blocked': enemy['id'] % 3 == 0, 'visibility_ratio': 0.4}}
+            for enemy in self.enemies
+        }}
+        rng = np.random.default_rng(3)
+        self.weight_sets = {f"random{k}": dict(zip(INDICATOR_NAMES, rng.random(6))) for k in range(8)}
+        self.weight_sets['type_only'] = {'type': 1.0}
+    
+    def test_matches_rank_targets(self):
+        """测试每组权重下的排序和得分与用该权重新建评估器的rank_targets一致"""
+        result = self.profiles.evaluate(self.enemies, self.weight_sets, (1.0, 2.0), self.terrain)
+        self.assertEqual(result['scores'].shape, (len(self.weight_sets), len(self.enemies)))
+        for k, (name, weights) in enumerate(self.weight_sets.items()):
+            evaluator = IFSThreatEvaluator(custom_weights=weights, batch_min_targets=None)
+            expected = evaluator.rank_targets(self.enemies, (1.0, 2.0), self.terrain)
+            self.assertEqual(result['rankings'][name], [r.enemy_id for r in expected])
+            for r in expected:
+                i = result['enemy_ids'].index(r.enemy_id)
+                self.assertAlmostEqual(result['scores'][k, i], r.score, places=12)
+                self.assertEqual(result['ranks'][k, i], r.rank)
+    
+    def test_other_aggregation_operators(self):
+        """测试评估器使用非IFWA聚合算子时逐组聚合，排序仍与rank_targets一致"""
+        weight_sets = {'dense': self.weight_sets['random0'], 'sparse': {'distance': 0.5, 'angle': 0.5}}
+        for operator in ('ifwg', 'ifha'):
+            evaluator = IFSThreatEvaluator(batch_min_targets=None, aggregation_operator=operator)
+            result = WeightProfileEvaluator(evaluator).evaluate(self.enemies, weight_sets, (1.0, 2.0), self.terrain)
+            for name, weights in weight_sets.items():
+                expected = IFSThreatEvaluator(custom_weights=weights, batch_min_targets=None,
+                                              aggregation_operator=operator).rank_targets(
+                    self.enemies, (1.0, 2.0), self.terrain)
+                self.assertEqual(result['rankings'][name], [r.enemy_id for r in expected])
+    
+    def test_rank_flip_statistics(self):
+        """测试排名翻转统计与名次矩阵一致"""
+        result = self.profiles.evaluate(self.enemies, self.weight_sets)
+        flips = result['rank_flips']
+        self.assertEqual(flips['baseline'], CURRENT_PROFILE)
+        self.assertEqual(flips['baseline_ranking'], [r.enemy_id for r in self.evaluator.rank_targets(self.enemies)])
+        self.assertEqual(sum(flips['top_targets'].values()), len(self.weight_sets))
+        
+        ranks = result['ranks']
+        for i, enemy_id in enumerate(result['enemy_ids']):
+            stats = flips['targets'][enemy_id]
+            self.assertEqual(stats['best_rank'], ranks[:, i].min())
+            self.assertEqual(stats['worst_rank'], ranks[:, i].max())
+            self.assertEqual(stats['changed_profiles'], int((ranks[:, i] != stats['baseline_rank']).sum()))
+        ranges = [stats['rank_range'] for stats in flips['targets'].values()]
+        self.assertEqual(ranges, sorted(ranges, reverse=True))
+        
+        # 以某个方案为基准时，该方案自身没有名次变化
+        result = self.profiles.evaluate(self.enemies, self.weight_sets, baseline='random0')
+        own = result['rank_flips']['profiles']['random0']
+        self.assertEqual(own['changed_targets'], 0)
+        self.assertFalse(own['top_changed'])
+        self.assertAlmostEqual(own['spearman'], 1.0)
+        with self.assertRaises(ValueError):
+            self.profiles.evaluate(self.enemies, self.weight_sets, baseline='missing')
+    
+    def test_identical_profiles_have_no_flips(self):
+        """测试与当前权重相同的方案不产生排名翻转"""
+        result = self.profiles.evaluate(self.enemies, [self.evaluator.weights] * 3)
+        flips = result['rank_flips']
+        self.assertEqual(flips['flip_rate'], 0.0)
+        self.assertTrue(flips['stable_top'])
+        self.assertEqual(result['profile_names'], ['0', '1', '2'])
+    
+    def test_weight_matrix_and_sweep(self):
+        """测试权重矩阵归一化、未知指标报错，以及单指标扫描保持其余指标比例"""
+        names, matrix = weight_matrix({'a': {'distance': 2.0, 'type': 2.0}, 'b': np.ones(6)})
+        self.assertEqual(names, ['a', 'b'])
+        np.testing.assert_allclose(matrix.sum(axis=1), 1.0)
+        self.assertEqual(matrix[0, INDICATOR_NAMES.index('distance')], 0.5)
+        with self.assertRaises(ValueError):
+            weight_matrix([{'distnace': 1.0}])
+        with self.assertRaises(ValueError):
+            weight_matrix([{'distance': 0.0}])
+        
+        sweep = sweep_profiles(self.evaluator.weights, 'distance', [0.0, 0.5])
+        self.assertEqual(list(sweep), ['distance=0', 'distance=0.5'])
+        half = sweep['distance=0.5']
+        self.assertAlmostEqual(sum(half.values()), 1.0)
+        self.assertAlmostEqual(half['type'] / half['speed'],
+                               self.evaluator.weights['type'] / self.evaluator.weights['speed'])
+    
+    def test_empty_frame(self):
+        """测试没有敌人时返回空排序"""
+        result = self.profiles.evaluate([], self.weight_sets)
+        self.assertEqual(result['rankings']['random0'], [])
+        self.assertEqual(result['rank_flips']['targets'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""二进制数据帧格式测试"""
+import unittest
+import sys
+import os
+import json
+import socket
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import GameData, TargetBatch
+from udp_server import UDPServer
+from wire_format import (
+    decode_frame, encode_frame, is_binary_frame, WireFormatError,
+    HEADER_SIZE, TARGET_RECORD_SIZE
+)
+
+
+FRAME_DICT = {
+    'round': 42,
+    'playerPosition': {'x': 1.5, 'y': 0.0, 'z': -2.5},
+    'targets': [
+        {'id': 1, 'angle': 45.0, 'distance': 14.1, 'type': 'Soldier',
+         'position': {'x': 10.0, 'y': 0.0, 'z': 10.0}, 'speed': 1.5, 'direction': 90.0},
+        {'id': 2, 'angle': 180.0, 'distance': 30.0, 'type': 'Drone',
+         'position': {'x': 0.0, 'y': 5.0, 'z': -30.0}, 'speed': 12.0, 'direction': 270.0,
+         'velocity': {'x': -1.0, 'y': 0.0, 'z': 2.0}}
+    ],
+    'situationAwareness': True
+}
+
+
+class TestWireFormat(unittest.TestCase):
+    """测试二进制编解码"""
+    
+    def test_round_trip_matches_json(self):
+        """测试二进制解析结果与JSON解析结果一致"""
+        from_json = GameData.from_dict(FRAME_DICT)
+        data = encode_frame(from_json)
+        self.assertEqual(len(data), HEADER_SIZE + 2 * TARGET_RECORD_SIZE)
+        self.assertTrue(is_binary_frame(data))
+        
+        from_binary = decode_frame(data)
+        self.assertEqual(from_binary.round, 42)
+        self.assertTrue(from_binary.situationAwareness)
+        self.assertEqual(from_binary.playerPosition, from_json.playerPosition)
+        self.assertEqual(len(from_binary.targets), 2)
+        for expected, actual in zip(from_json.targets, from_binary.targets):
+            self.assertEqual(actual.id, expected.id)
+            self.assertEqual(actual.type, expected.type)
+            self.assertAlmostEqual(actual.distance, expected.distance, places=5)
+            self.assertAlmostEqual(actual.position.z, expected.position.z, places=5)
+            self.assertAlmostEqual(actual.speed, expected.speed, places=5)
+        self.assertIsNone(from_binary.targets[0].velocity)
+        self.assertAlmostEqual(from_binary.targets[1].velocity.z, 2.0)
+    
+    def test_targets_reference_datagram_memory(self):
+        """测试目标列直接引用数据包内存（不复制、不创建逐目标对象）"""
+        data = encode_frame(GameData.from_dict(FRAME_DICT))
+        targets = decode_frame(data).targets
+        self.assertIsInstance(targets, TargetBatch)
+        self.assertFalse(targets.speed.flags.owndata)
+        self.assertEqual(targets.speed.tolist(), [1.5, 12.0])
+    
+    def test_json_is_not_detected_as_binary(self):
+        """测试JSON数据包不会被误判为二进制格式"""
+        self.assertFalse(is_binary_frame(json.dumps(FRAME_DICT).encode('utf-8')))
+        self.assertFalse(is_binary_frame(b""))
+    
+    def test_malformed_frames_rejected(self):
+        """测试长度或版本错误的数据帧被拒绝"""
+        data = bytearray(encode_frame(GameData.from_dict(FRAME_DICT)))
+        with self.assertRaises(WireFormatError):
+            decode_frame(data[:-1])
+        with self.assertRaises(WireFormatError):
+            decode_frame(data[:10])
+        data[1] = 99
+        with self.assertRaises(WireFormatError):
+            decode_frame(data)
+    
+    def test_unknown_type_code_rejected(self):
+        """测试未知的目标类型编码被拒绝"""
+        data = bytearray(encode_frame(GameData.from_dict(FRAME_DICT)))
+        data[HEADER_SIZE + TARGET_RECORD_SIZE + 4] = 7
+        with self.assertRaises(WireFormatError):
+            decode_frame(data)
+    
+    def test_udp_server_accepts_both_formats(self):
+        """测试UDP服务器同时支持JSON和二进制数据包"""
+        server = UDPServer(host="127.0.0.1", port=0, timeout=0.5)
+        self.assertTrue(server.start())
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            address = server.socket.getsockname()
+            sender.sendto(json.dumps(FRAME_DICT).encode('utf-8'), address)
+            sender.sendto(encode_frame(GameData.from_dict(FRAME_DICT)), address)
+            
+            frames = []
+            for _ in range(5):
+                frames.extend(server.receive_batch())
+                if len(frames) == 2:
+                    break
+            
+            self.assertEqual([len(frame.targets) for frame in frames], [2, 2])
+            stats = server.get_stats()
+            self.assertEqual(stats['json_frames'], 1)
+            self.assertEqual(stats['binary_frames'], 1)
+        finally:
+            sender.close()
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@
 import logging
 import os
 import json
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from models import Target, GameData
 from openai import OpenAI
 from dotenv import load_dotenv
@@ -18,6 +18,17 @@ from config import (
     TERRAIN_DATA_PATH,
     THREAT_ASSESSMENT_STRATEGY,
     IFS_LOG_LEVEL,
+    IFS_BATCH_MIN_TARGETS,
+    IFS_ENGINE_CALIBRATION,
+    IFS_PRUNED_SEARCH,
+    IFS_INCREMENTAL_EVALUATION,
+    IFS_INCREMENTAL_EPSILONS,
+    IFS_INDICATOR_LUT,
+    IFS_INDICATOR_LUT_RESOLUTION,
+    IFS_AGGREGATION_OPERATOR,
+    IFS_POSITION_WEIGHTS,
+    IFS_ENTROPY_WEIGHTING,
+    IFS_ENTROPY_BLEND,
     OPENAI_API_KEY,
     OPENAI_BASE_URL
 )
@@ -37,7 +48,18 @@ if ENABLE_IFS_ASSESSMENT:
         if ENABLE_TERRAIN_ANALYSIS and os.path.exists(TERRAIN_DATA_PATH):
             terrain_path = TERRAIN_DATA_PATH
         
-        ifs_adapter = IFSThreatAnalyzerAdapter(terrain_path)
+        ifs_adapter = IFSThreatAnalyzerAdapter(
+            terrain_path,
+            batch_min_targets=IFS_BATCH_MIN_TARGETS,
+            calibrate_engines=IFS_ENGINE_CALIBRATION,
+            pruned_search=IFS_PRUNED_SEARCH,
+            incremental=IFS_INCREMENTAL_EVALUATION,
+            incremental_epsilons=IFS_INCREMENTAL_EPSILONS,
+            indicator_lut_resolution=IFS_INDICATOR_LUT_RESOLUTION if IFS_INDICATOR_LUT else None,
+            aggregation_operator=IFS_AGGREGATION_OPERATOR,
+            position_weights=IFS_POSITION_WEIGHTS,
+            entropy_blend=IFS_ENTROPY_BLEND if IFS_ENTROPY_WEIGHTING else None
+        )
         logger.info("✓ IFS Threat Analyzer initialized")
     except Exception as e:
         logger.error(f"Failed to initialize IFS adapter: {e}")
@@ -278,6 +300,34 @@ def find_most_threatening_target_with_ifs(game_data: GameData) -> Optional[Targe
         return None
 
 
+def rank_targets(game_data: GameData) -> List[Tuple[Target, Dict]]:
+    """
+    使用IFS评估器对所有目标进行威胁排序（用于实验记录）
+    
+    Args:
+        game_data: 游戏数据对象
+    
+    Returns:
+        [(Target对象, IFS评估详情), ...] 按威胁度降序排列；IFS不可用时返回空列表
+    """
+    if not ifs_adapter or not game_data.targets:
+        return []
+    return ifs_adapter.evaluate_all_targets(game_data)
+
+
+def get_ifs_engine_stats() -> Optional[Dict]:
+    """
+    获取IFS评估引擎选择统计
+    
+    Returns:
+        各操作的批量阈值、校准结果、各引擎的调用统计和增量评估的缓存命中统计；
+        IFS不可用时返回None
+    """
+    if not ifs_adapter:
+        return None
+    return ifs_adapter.get_engine_stats()
+
+
 def find_most_threatening_target(game_data: GameData) -> Optional[Target]:
     """
     找出最有威胁的目标（三级评估策略）
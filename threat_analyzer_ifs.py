@@ -1,30 +1,63 @@
 """IFS威胁评估适配器模块"""
 import logging
 import os
+import threading
+from collections import OrderedDict
 from typing import Optional, Tuple, Dict, List
 from models import Target, GameData
+from session_manager import session_key
 
 logger = logging.getLogger(__name__)
 
+# 增量评估最多同时保留缓存的会话数，超出时移除最久未使用的会话
+MAX_INCREMENTAL_SESSIONS = 64
+
 
 class IFSThreatAnalyzerAdapter:
     """IFS威胁评估器的适配层，连接现有系统和IFS模块"""
     
-    def __init__(self, terrain_data_path: str = None):
+    def __init__(self, terrain_data_path: str = None, batch_min_targets: int = 24,
+                 calibrate_engines: bool = False, pruned_search: bool = False,
+                 incremental: bool = False, incremental_epsilons: Dict[str, float] = None,
+                 indicator_lut_resolution: Dict[str, float] = None,
+                 aggregation_operator: str = 'ifwa', position_weights: List[float] = None,
+                 entropy_blend: float = None):
         """
         初始化IFS评估器
         
         Args:
             terrain_data_path: 地形数据JSON文件路径（可选）
+            batch_min_targets: 使用批量评估的最少目标数
+            calibrate_engines: 是否在启动时实测确定批量评估阈值
+            pruned_search: 查找最高威胁目标时使用剪枝搜索，只对可能胜出的目标做地形分析
+            incremental: 按目标ID缓存指标，逐轮只重新计算输入有变化的指标（优先于剪枝搜索）；
+                每个会话（见 session_manager.session_key）使用独立的缓存
+            incremental_epsilons: 增量评估的输入变化容差（见 incremental_evaluator.DEFAULT_EPSILONS）
+            indicator_lut_resolution: 使用查找表计算的隶属度曲线及采样间隔，None表示精确计算
+            aggregation_operator: 指标聚合算子（'ifwa'、'ifwg'、'ifowa'、'ifha'）
+            position_weights: IFOWA/IFHA的位置权重，None表示使用从大到小排列的指标权重
+            entropy_blend: 熵权法客观权重的占比，None表示不使用（需要启用增量评估）
         """
         try:
             # 导入IFS模块
             from IFS_ThreatAssessment.threat_evaluator import IFSThreatEvaluator
             from IFS_ThreatAssessment.terrain_analyzer import TerrainAnalyzer
+            from IFS_ThreatAssessment.incremental_evaluator import IncrementalThreatEvaluator
             
-            self.evaluator = IFSThreatEvaluator()
+            self.evaluator = IFSThreatEvaluator(batch_min_targets=batch_min_targets,
+                                                pruned_search=pruned_search,
+                                                lut_resolution=indicator_lut_resolution,
+                                                aggregation_operator=aggregation_operator,
+                                                position_weights=position_weights)
             self.terrain_analyzer = None
             
+            if indicator_lut_resolution:
+                logger.info(f"✓ IFS indicator LUT max error: {self.evaluator.indicators.lut_max_error()}")
+            
+            if calibrate_engines:
+                self.evaluator.calibrate_engines()
+                logger.info(f"✓ IFS engine crossover calibrated: {self.evaluator.batch_min_targets}")
+            
             # 加载地形分析器（如果提供了路径）
             if terrain_data_path and os.path.exists(terrain_data_path):
                 try:
@@ -34,6 +67,14 @@ class IFSThreatAnalyzerAdapter:
                     logger.warning(f"Failed to load terrain analyzer: {e}")
                     self.terrain_analyzer = None
             
+            self.incremental = incremental
+            self._incremental_factory = lambda: IncrementalThreatEvaluator(
+                self.evaluator, self.terrain_analyzer, incremental_epsilons, entropy_blend)
+            self._incremental_sessions: "OrderedDict[str, IncrementalThreatEvaluator]" = OrderedDict()
+            self._incremental_lock = threading.Lock()
+            if not incremental and entropy_blend is not None:
+                logger.warning("Entropy weighting requires incremental evaluation, using subjective weights")
+            
             logger.info("✓ IFS Threat Analyzer Adapter initialized successfully")
             
         except ImportError as e:
@@ -89,25 +130,11 @@ class IFSThreatAnalyzerAdapter:
             
             logger.debug(f"Evaluating {len(enemies)} enemies at player position {player_pos}")
             
-            # 地形分析（如果可用）
-            terrain_data = None
-            if self.terrain_analyzer:
-                try:
-                    terrain_data = self.terrain_analyzer.batch_analyze_enemies(
-                        enemies, 
-                        player_pos
-                    )
-                    logger.debug(f"Terrain analysis completed for {len(enemies)} enemies")
-                except Exception as e:
-                    logger.warning(f"Terrain analysis failed: {e}, continuing without terrain data")
-                    terrain_data = None
-            
-            # IFS评估
-            result = self.evaluator.find_most_threatening(
-                enemies, 
-                player_pos, 
-                terrain_data
-            )
+            if self.incremental:
+                # 增量评估：地形分析随指标缓存，只对位置有变化的敌人重新分析
+                result = self._incremental_for(game_data).find_most_threatening(enemies, player_pos)
+            else:
+                result = self._find_most_threatening_full(enemies, player_pos)
             
             if not result:
                 logger.warning("IFS evaluator returned no result")
@@ -131,6 +158,44 @@ class IFSThreatAnalyzerAdapter:
             logger.error(f"IFS evaluation failed: {e}", exc_info=True)
             return None, None
     
+    def _find_most_threatening_full(self, enemies: List[Dict], player_pos: Tuple[float, float]):
+        """地形分析 + IFSThreatEvaluator.find_most_threatening（非增量评估）"""
+        # 地形分析（如果可用）
+        terrain_data = None
+        terrain_provider = None
+        if self.terrain_analyzer and self.evaluator.pruned_search:
+            # 剪枝搜索：只对得分上界仍可能胜出的敌人做地形分析
+            terrain_provider = self._terrain_provider(player_pos)
+        elif self.terrain_analyzer:
+            try:
+                terrain_data = self.terrain_analyzer.batch_analyze_enemies(
+                    enemies, 
+                    player_pos
+                )
+                logger.debug(f"Terrain analysis completed for {len(enemies)} enemies")
+            except Exception as e:
+                logger.warning(f"Terrain analysis failed: {e}, continuing without terrain data")
+                terrain_data = None
+        
+        # IFS评估
+        return self.evaluator.find_most_threatening(
+            enemies, 
+            player_pos, 
+            terrain_data,
+            terrain_provider
+        )
+    
+    def _terrain_provider(self, player_pos: Tuple[float, float]):
+        """按需分析单个敌人地形的函数（失败时该敌人按无地形数据评估）"""
+        def analyze(enemy: Dict) -> Optional[Dict]:
+            try:
+                return self.terrain_analyzer.analyze_tactical_position((enemy['x'], enemy['z']), player_pos)
+            except Exception as e:
+                logger.warning(f"Terrain analysis failed for enemy {enemy['id']}: {e}")
+                return None
+        
+        return analyze
+    
     def evaluate_all_targets(
         self, 
         game_data: GameData
@@ -152,24 +217,28 @@ class IFSThreatAnalyzerAdapter:
             enemies = [self.convert_target_to_enemy(t) for t in game_data.targets]
             player_pos = (game_data.playerPosition.x, game_data.playerPosition.z)
             
-            # 地形分析（如果可用）
-            terrain_data = None
-            if self.terrain_analyzer:
-                try:
-                    terrain_data = self.terrain_analyzer.batch_analyze_enemies(
-                        enemies, 
-                        player_pos
-                    )
-                except Exception as e:
-                    logger.warning(f"Terrain analysis failed: {e}")
-                    terrain_data = None
+            if self.incremental:
+                # 增量评估：只重新计算输入有变化的指标
+                ranked_results = self._incremental_for(game_data).rank_targets(enemies, player_pos)
+            else:
+                # 地形分析（如果可用）
+                terrain_data = None
+                if self.terrain_analyzer:
+                    try:
+                        terrain_data = self.terrain_analyzer.batch_analyze_enemies(
+                            enemies, 
+                            player_pos
+                        )
+                    except Exception as e:
+                        logger.warning(f"Terrain analysis failed: {e}")
+                        terrain_data = None
             
-            # 评估所有目标
-            ranked_results = self.evaluator.rank_targets(
-                enemies, 
-                player_pos, 
-                terrain_data
-            )
+                # 评估所有目标
+                ranked_results = self.evaluator.rank_targets(
+                    enemies, 
+                    player_pos, 
+                    terrain_data
+                )
             
             # 转换为Target对象列表
             results = []
@@ -185,6 +254,39 @@ class IFSThreatAnalyzerAdapter:
         except Exception as e:
             logger.error(f"Failed to evaluate all targets: {e}", exc_info=True)
             return []
+    
+    def get_engine_stats(self) -> Dict:
+        """
+        获取评估引擎选择统计（见 IFSThreatEvaluator.get_engine_stats）
+        
+        启用增量评估时附加 'incremental'：{会话键: 缓存命中统计}（见 IncrementalThreatEvaluator.get_cache_stats）
+        """
+        stats = self.evaluator.get_engine_stats()
+        if self.incremental:
+            with self._incremental_lock:
+                sessions = list(self._incremental_sessions.items())
+            stats['incremental'] = {key: evaluator.get_cache_stats() for key, evaluator in sessions}
+        return stats
+    
+    def _incremental_for(self, game_data: GameData):
+        """
+        获取该数据帧所属会话的增量评估器（不存在时创建）
+        
+        缓存按目标ID区分，不同会话的目标ID可能重复，因此每个会话使用独立的评估器，
+        熵权法的逐列累计也互不混合。
+        """
+        key = session_key(game_data)
+        with self._incremental_lock:
+            evaluator = self._incremental_sessions.get(key)
+            if evaluator is None:
+                evaluator = self._incremental_factory()
+                self._incremental_sessions[key] = evaluator
+                if len(self._incremental_sessions) > MAX_INCREMENTAL_SESSIONS:
+                    evicted, _ = self._incremental_sessions.popitem(last=False)
+                    logger.info(f"Dropped incremental IFS cache of idle session '{evicted}'")
+            else:
+                self._incremental_sessions.move_to_end(key)
+            return evaluator
 
 
 def log_ifs_details(target: Target, ifs_details: Dict):
@@ -1,27 +1,68 @@
 """UDP服务器模块"""
 import socket
+import selectors
 import json
 import logging
-from typing import Optional
+import os
+import time
+from typing import Optional, List
 from models import GameData
+from wire_format import is_binary_frame, decode_frame, WireFormatError
+from fragmentation import is_fragment, ReassemblyBuffer, FragmentError
+from battlefield_state import BattlefieldStateTable, is_delta_frame
 
 logger = logging.getLogger(__name__)
 
+# UDP最大数据包大小
+MAX_DATAGRAM_SIZE = 65507
+
+# 内核UDP套接字统计文件（仅Linux）
+PROC_NET_UDP_FILES = ("/proc/net/udp", "/proc/net/udp6")
+
 
 class UDPServer:
     """UDP服务器"""
     
-    def __init__(self, host: str = "0.0.0.0", port: int = 5005):
+    def __init__(self, host: str = "0.0.0.0", port: int = 5005,
+                 timeout: float = 1.0, rcvbuf_size: Optional[int] = None,
+                 reassembly_timeout: float = 1.0,
+                 reassembly_max_bytes: int = 16 * 1024 * 1024,
+                 request_keyframes: bool = True,
+                 battlefield_idle_timeout: Optional[float] = 60.0):
         """
         初始化UDP服务器
         
         Args:
             host: 监听地址，默认0.0.0.0（所有网络接口）
             port: 监听端口，默认5005
+            timeout: 接收等待超时时间（秒），用于响应中断
+            rcvbuf_size: 内核接收缓冲区大小（SO_RCVBUF，字节），None表示使用系统默认值
+            reassembly_timeout: 分片帧重组的最长等待时间（秒）
+            reassembly_max_bytes: 分片重组缓冲区的内存上限（字节）
+            request_keyframes: 增量帧出现序号缺口时是否向发送方请求关键帧
+            battlefield_idle_timeout: 发送方超过该时长（秒）没有数据时移除其战场状态，None表示不移除
         """
         self.host = host
         self.port = port
+        self.timeout = timeout
+        self.rcvbuf_size = rcvbuf_size
         self.socket: Optional[socket.socket] = None
+        self.selector: Optional[selectors.BaseSelector] = None
+        self.reassembly = ReassemblyBuffer(timeout=reassembly_timeout, max_bytes=reassembly_max_bytes)
+        self.battlefield = BattlefieldStateTable(
+            keyframe_request_func=self._send_keyframe_request if request_keyframes else None,
+            idle_timeout=battlefield_idle_timeout
+        )
+        
+        # 接收统计
+        self.stats = {
+            'datagrams_received': 0,
+            'parse_errors': 0,
+            'binary_frames': 0,
+            'json_frames': 0,
+            'batches': 0,
+            'max_batch_size': 0
+        }
     
     def start(self) -> bool:
         """
@@ -32,9 +73,15 @@ class UDPServer:
         """
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if self.rcvbuf_size:
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf_size)
             self.socket.bind((self.host, self.port))
-            self.socket.settimeout(1.0)  # 设置超时以便能够响应中断
-            logger.info(f"UDP server started on {self.host}:{self.port}")
+            # 非阻塞套接字 + selector：等待时带超时以便能够响应中断，唤醒后可一次读空缓冲区
+            self.socket.setblocking(False)
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.socket, selectors.EVENT_READ)
+            actual_rcvbuf = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            logger.info(f"UDP server started on {self.host}:{self.port} (SO_RCVBUF={actual_rcvbuf} bytes)")
             return True
         except OSError as e:
             logger.error(f"Failed to start UDP server: {e}")
@@ -43,6 +90,86 @@ class UDPServer:
             logger.error(f"Unexpected error starting UDP server: {e}")
             return False
     
+    def _wait_readable(self, timeout: float) -> bool:
+        """等待套接字可读"""
+        return bool(self.selector.select(timeout))
+    
+    def _parse_datagram(self, data: bytes, addr, received_at: Optional[float] = None) -> Optional[GameData]:
+        """
+        将一个UDP数据包解析为GameData对象
+        
+        以魔数开头的数据包按二进制格式解析（见wire_format），其余按JSON解析。
+        
+        Args:
+            data: 数据包内容
+            addr: 发送方地址
+            received_at: 接收时间（time.monotonic），None表示当前时间
+        
+        Returns:
+            GameData对象，解析失败则返回None
+        """
+        if received_at is None:
+            received_at = time.monotonic()
+        try:
+            if is_binary_frame(data):
+                game_data = decode_frame(data)
+                self.battlefield.apply_keyframe(addr, game_data)
+                self.stats['binary_frames'] += 1
+            else:
+                json_str = data.decode('utf-8')
+                logger.debug(f"Received JSON data: {json_str}")
+                json_data = json.loads(json_str)
+                self.stats['json_frames'] += 1
+                # 战场状态按发送方地址区分（二进制关键帧不含sessionId）
+                if is_delta_frame(json_data):
+                    game_data = self.battlefield.apply_delta(addr, json_data)
+                    if game_data is None:
+                        return None  # 无法应用的增量帧（已计入battlefield统计）
+                else:
+                    game_data = GameData.from_dict(json_data)
+                    self.battlefield.apply_keyframe(addr, game_data)
+            game_data.source = addr
+            game_data.received_at = received_at
+            logger.debug(f"Successfully parsed game data - Round: {game_data.round}, Player Position: ({game_data.playerPosition.x}, {game_data.playerPosition.y}, {game_data.playerPosition.z}), Targets count: {len(game_data.targets)}")
+            return game_data
+        except WireFormatError as e:
+            logger.error(f"Failed to parse binary frame: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON data: {e}")
+        except KeyError as e:
+            logger.error(f"Missing required field in JSON data: {e}")
+        except Exception as e:
+            logger.error(f"Failed to create GameData object: {e}")
+        self.stats['parse_errors'] += 1
+        return None
+    
+    def _send_keyframe_request(self, addr, last_round: Optional[int]):
+        """增量帧无法应用时，请求发送方在下一帧发送关键帧"""
+        session_id = self.battlefield.session_id(addr)
+        request = {'type': 'keyframeRequest', 'lastRound': last_round}
+        if session_id is not None:
+            request['sessionId'] = session_id
+        self.socket.sendto(json.dumps(request).encode('utf-8'), addr)
+        logger.info(f"Requested keyframe from {addr} (last round: {last_round})")
+    
+    def _handle_datagram(self, data: bytes, addr, received_at: float) -> Optional[GameData]:
+        """
+        处理一个UDP数据包：分片先放入重组缓冲区，完整的数据帧再解析
+        
+        Returns:
+            GameData对象；分片帧尚未到齐或解析失败时返回None
+        """
+        if is_fragment(data):
+            try:
+                data = self.reassembly.add(data, addr, received_at)
+            except FragmentError as e:
+                logger.error(f"Invalid fragment from {addr}: {e}")
+                self.stats['parse_errors'] += 1
+                return None
+            if data is None:
+                return None
+        return self._parse_datagram(data, addr, received_at)
+    
     def receive_data(self) -> Optional[GameData]:
         """
         接收UDP数据并解析为GameData对象
@@ -55,37 +182,113 @@ class UDPServer:
             return None
         
         try:
-            # 接收数据（最大65507字节，UDP最大数据包大小）
-            data, addr = self.socket.recvfrom(65507)
-            logger.info(f"Received UDP data from {addr}, size: {len(data)} bytes")
-            
-            # 解析JSON
-            try:
-                json_str = data.decode('utf-8')
-                logger.info(f"Received JSON data: {json_str}")
-                json_data = json.loads(json_str)
-                game_data = GameData.from_dict(json_data)
-                logger.info(f"Successfully parsed game data - Round: {game_data.round}, Player Position: ({game_data.playerPosition.x}, {game_data.playerPosition.y}, {game_data.playerPosition.z}), Targets count: {len(game_data.targets)}")
-                return game_data
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON data: {e}")
-                return None
-            except KeyError as e:
-                logger.error(f"Missing required field in JSON data: {e}")
+            if not self._wait_readable(self.timeout):
+                # 超时是正常的，用于检查是否需要退出
+                self.reassembly.expire()
                 return None
-            except Exception as e:
-                logger.error(f"Failed to create GameData object: {e}")
-                return None
-                
-        except socket.timeout:
-            # 超时是正常的，用于检查是否需要退出
+            
+            # 接收数据（最大65507字节，UDP最大数据包大小）
+            data, addr = self.socket.recvfrom(MAX_DATAGRAM_SIZE)
+            self.stats['datagrams_received'] += 1
+            logger.debug(f"Received UDP data from {addr}, size: {len(data)} bytes")
+            return self._handle_datagram(data, addr, time.monotonic())
+        
+        except BlockingIOError:
             return None
         except Exception as e:
             logger.error(f"Error receiving UDP data: {e}")
             return None
     
+    def receive_batch(self, max_datagrams: Optional[int] = None) -> List[GameData]:
+        """
+        批量接收：等待套接字可读后，一次读出内核缓冲区中所有待处理的数据包
+        
+        Args:
+            max_datagrams: 单次最多读取的数据包数量，None表示读空缓冲区
+        
+        Returns:
+            解析成功的GameData列表（按接收顺序），超时或失败时返回空列表
+        """
+        if not self.socket:
+            logger.error("UDP server is not started")
+            return []
+        
+        frames = []
+        received = 0
+        try:
+            if not self._wait_readable(self.timeout):
+                self.reassembly.expire()
+                return frames
+            
+            while max_datagrams is None or received < max_datagrams:
+                try:
+                    data, addr = self.socket.recvfrom(MAX_DATAGRAM_SIZE)
+                except BlockingIOError:
+                    break  # 缓冲区已读空
+                received += 1
+                game_data = self._handle_datagram(data, addr, time.monotonic())
+                if game_data is not None:
+                    frames.append(game_data)
+        except Exception as e:
+            logger.error(f"Error receiving UDP data: {e}")
+        
+        if received:
+            self.stats['datagrams_received'] += received
+            self.stats['batches'] += 1
+            self.stats['max_batch_size'] = max(self.stats['max_batch_size'], received)
+            logger.debug(f"Drained {received} datagram(s) in one batch")
+        return frames
+    
+    def get_kernel_drops(self) -> Optional[int]:
+        """
+        读取内核为本套接字统计的丢包数（/proc/net/udp 的 drops 列）
+        
+        接收缓冲区溢出时内核会丢弃数据包并累加该计数，
+        计数持续增长说明主机处理速度跟不上数据发送速度。
+        
+        Returns:
+            丢包数量；非Linux系统或无法读取时返回None
+        """
+        if not self.socket:
+            return None
+        try:
+            inode = str(os.fstat(self.socket.fileno()).st_ino)
+        except OSError:
+            return None
+        
+        for proc_file in PROC_NET_UDP_FILES:
+            try:
+                with open(proc_file, 'r') as f:
+                    next(f, None)  # 跳过表头
+                    for line in f:
+                        fields = line.split()
+                        # 列：sl local rem st tx:rx tr:when retrnsmt uid timeout inode ref pointer drops
+                        if len(fields) >= 13 and fields[9] == inode:
+                            return int(fields[-1])
+            except (OSError, ValueError):
+                continue
+        return None
+    
+    def get_stats(self) -> dict:
+        """
+        获取接收统计信息
+        
+        Returns:
+            包含接收数量、批次信息、解析错误、内核丢包数、分片重组和关键帧/增量帧统计的字典
+        """
+        stats = dict(self.stats)
+        stats['kernel_drops'] = self.get_kernel_drops()
+        stats['reassembly'] = self.reassembly.get_stats()
+        stats['battlefield'] = self.battlefield.get_stats()
+        if self.socket:
+            stats['rcvbuf_bytes'] = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        return stats
+    
     def stop(self):
         """停止UDP服务器"""
+        if self.selector:
+            self.selector.close()
+            self.selector = None
         if self.socket:
             self.socket.close()
             logger.info("UDP server stopped")
@@ -94,4 +297,3 @@ class UDPServer:
     def is_running(self) -> bool:
         """检查服务器是否正在运行"""
         return self.socket is not None
-
@@ -0,0 +1,114 @@
+"""二进制数据帧格式模块
+
+JSON数据帧在目标数量较多时解析开销大，且容易超过UDP单包65507字节的上限。
+本模块定义一种紧凑的、带版本号的二进制格式（小端字节序）：
+
+    帧头（24字节）:
+        magic       uint8    固定为 0xA7（JSON数据总以 '{' 或空白开头，不会冲突）
+        version     uint8    格式版本，当前为1
+        flags       uint16   bit0: situationAwareness
+        round       int32    回合号
+        player_x/y/z float32 玩家位置
+        count       uint32   目标数量
+
+    目标记录（每条48字节，紧跟帧头，共count条）:
+        id int32, type uint8, flags uint8(bit0: 带速度矢量), reserved uint16,
+        angle, distance, x, y, z, speed, direction, vx, vy, vz  (float32)
+
+接收端通过 memoryview 直接将目标区映射为 NumPy 结构化数组，再以列视图构成
+models.TargetBatch，解析时不创建逐目标对象。
+"""
+import struct
+from typing import Optional, Union
+
+from models import GameData, Position, TargetBatch, TARGET_RECORD_DTYPE, TARGET_TYPE_NAMES
+
+# 帧头魔数和版本
+MAGIC = 0xA7
+VERSION = 1
+
+# 帧头标志位
+FLAG_SITUATION_AWARENESS = 0x01
+
+HEADER_STRUCT = struct.Struct('<BBHi3fI')
+HEADER_SIZE = HEADER_STRUCT.size
+
+# 目标记录布局与 models.TARGET_RECORD_DTYPE 相同
+TARGET_RECORD_SIZE = TARGET_RECORD_DTYPE.itemsize
+
+# 单个UDP数据包可容纳的最大目标数量
+MAX_TARGETS_PER_DATAGRAM = (65507 - HEADER_SIZE) // TARGET_RECORD_SIZE
+
+
+class WireFormatError(ValueError):
+    """二进制数据帧格式错误"""
+
+
+def is_binary_frame(data: Union[bytes, bytearray, memoryview]) -> bool:
+    """根据魔数判断数据包是否为二进制格式"""
+    return len(data) > 0 and data[0] == MAGIC
+
+
+def decode_frame(data: Union[bytes, bytearray, memoryview]) -> GameData:
+    """
+    解析二进制数据帧
+    
+    Args:
+        data: 完整的UDP数据包
+    
+    Returns:
+        GameData对象，targets为直接引用数据包内存的TargetBatch
+    
+    Raises:
+        WireFormatError: 魔数、版本、长度或目标类型编码不正确
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise WireFormatError(f"Frame too short: {len(view)} bytes")
+    magic, version, flags, round_number, px, py, pz, count = HEADER_STRUCT.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise WireFormatError(f"Bad magic byte: 0x{magic:02X}")
+    if version != VERSION:
+        raise WireFormatError(f"Unsupported wire format version: {version}")
+    expected = HEADER_SIZE + count * TARGET_RECORD_SIZE
+    if len(view) != expected:
+        raise WireFormatError(f"Frame length mismatch: expected {expected} bytes for {count} targets, got {len(view)}")
+    
+    targets = TargetBatch.from_bytes(view, count=count, offset=HEADER_SIZE)
+    if count and targets.type_code.max() >= len(TARGET_TYPE_NAMES):
+        raise WireFormatError(f"Unknown target type code: {int(targets.type_code.max())}")
+    
+    return GameData(
+        round=round_number,
+        playerPosition=Position(px, py, pz),
+        targets=targets,
+        situationAwareness=bool(flags & FLAG_SITUATION_AWARENESS)
+    )
+
+
+def encode_frame(game_data: GameData,
+                 max_targets: Optional[int] = MAX_TARGETS_PER_DATAGRAM) -> bytes:
+    """
+    将GameData编码为二进制数据帧（供客户端、测试和基准测试使用）
+    
+    Args:
+        game_data: 游戏数据对象
+        max_targets: 目标数量上限（默认为单个数据包的容量）；
+            需要分片发送（见fragmentation.split_frame）时传入None
+    
+    Returns:
+        二进制数据帧
+    
+    Raises:
+        WireFormatError: 目标数量超过上限
+    """
+    count = len(game_data.targets)
+    if max_targets is not None and count > max_targets:
+        raise WireFormatError(f"Too many targets for one datagram: {count} > {max_targets}")
+    
+    records = game_data.target_batch().to_records()
+    
+    flags = FLAG_SITUATION_AWARENESS if game_data.situationAwareness else 0
+    pos = game_data.playerPosition
+    header = HEADER_STRUCT.pack(MAGIC, VERSION, flags, game_data.round, pos.x, pos.y, pos.z, count)
+    return header + records.tobytes()